@@ -12,196 +12,1481 @@ Description:
 """
 
 # Imports from built-in modules
+import hashlib
 import multiprocessing as mp
+import numpy as np
+import os
+import random
 import sys
 import threading
 
 # Imports from Base Data Generator Module
-from BDG007_Configuration import Configuration
+from BDG007_Configuration import BINARY_OUTPUT_KEYS, CSV_OUTPUT_KEYS, DEFAULT_STAGE_PARAMETERS, Configuration
+from data_readers.BDG022_ColumnReader import get_data_files, iter_integer_columns, read_integer_columns
+from data_sinks.BDG011_SQLiteSink import SQLiteSink
+from data_sinks.BDG012_PartitionedFileWriter import PartitionedFileWriter
+from data_sinks.BDG031_StreamWriter import FILE_DESCRIPTOR_PREFIX, STDOUT_TARGET, StreamWriter, is_stream_target
+from data_sinks.BDG032_ScaleFactorWriter import ScaleFactorWriter, SingleFileWriter, get_scale_factor_id_maps, map_scale_factor_id_range
+from execution.BDG027_BatchExecutor import get_block_random_generator
+from edge_generators.BDG014_FriendAdjacencyCSR import FriendAdjacencyCSR
+from graph_statistics.BDG019_GraphStatistics import get_degree_statistics, save_statistics
+from query_parameters.BDG018_DegreeIndex import DegreeIndex
+from samplers.BDG015_VertexSamplers import create_vertex_sampler
+from shard_service.BDG030_ShardService import ShardServer
+from shared_data.BDG013_SharedMemoryArray import SharedMemoryArray
+from stage_cache.BDG024_StageCache import StageCache, get_stage_key
+from tuning.BDG020_AutoTuner import load_or_create_tuning_profile
+from update_streams.BDG017_UpdateStreamEmitter import UpdateStreamEmitter
 import edge_generators.BDG004_FriendEdgeGenerator as FEG
 import edge_generators.BDG005_MirrorEdgeGenerator as MEG
+import edge_generators.BDG025_ChungLuEdgeGenerator as CLEG
+import edge_generators.BDG026_RMatEdgeGenerator as RMEG
+import edge_generators.BDG028_PipelinedEdgeGenerator as PEG
 import list_generators.BDG006_PermutedListGenerator as PLG
 import vertex_generators.BDG002_NamedVertexGenerator as NamedVG
 import vertex_generators.BDG003_NumberedVertexGenerator as NumberedVG
+import vertex_generators.BDG029_SchemaVertexGenerator as SchemaVG
 
 sys.path.append("vertex_generators/")
 
+# Configuration attributes the outputs of every cached stage depend on
+CACHED_CONFIGURATION_KEYS = ["random_seed", "output_layout", "number_of_partitions", "partition_scheme", "nested_scale_factors"]
+
+# Configuration attributes the outputs of each cached stage depend on, besides CACHED_CONFIGURATION_KEYS
+STAGE_CONFIGURATION_KEYS = {"investor_names": ["number_of_investors", "unique_vertex_names", "ordered_vertex_output", "shard_block_size"],\
+                            "tradebook_investment_amounts": ["number_of_investors", "ordered_vertex_output", "shard_block_size"],\
+                            "company_names": ["number_of_investors", "number_of_companies", "unique_vertex_names", "ordered_vertex_output",\
+                                                "shard_block_size"],\
+                            "investor_vertices": ["number_of_investors", "vertex_property_schemas", "unique_vertex_names", "ordered_vertex_output",\
+                                                    "shard_block_size"],\
+                            "company_vertices": ["number_of_investors", "number_of_companies", "vertex_property_schemas", "unique_vertex_names",\
+                                                    "ordered_vertex_output", "shard_block_size"],\
+                            "company_list": ["number_of_investors", "number_of_companies"],\
+                            "follower_list": ["number_of_investors"],\
+                            "leader_list_1": ["number_of_investors"],\
+                            "leader_list_2": ["number_of_investors"],\
+                            "friend_edges": ["number_of_investors", "number_of_friend_edges", "friend_edges_engine", "rmat_probabilities",\
+                                                "follower_list_friend_power_dis_param", "leader_list_1_friend_power_dis_param",\
+                                                "leader_list_2_friend_power_dis_param", "choose_leader_list_1_as_friend_prob",\
+                                                "friend_follower_sampler", "friend_leader_list_1_sampler", "friend_leader_list_2_sampler",\
+                                                "friend_edges_memory_budget", "pipelined_edge_stages", "pipelined_edge_partitions",\
+                                                "friend_adjacency_csr_file_name", "statistics_file_name", "statistics_number_of_hubs",\
+                                                "shard_block_size"],\
+                            "mirror_edges": ["number_of_investors", "number_of_friend_edges", "number_of_mirror_edges",\
+                                                "follower_list_mirror_power_dis_param", "follower_mirrors_a_friend_probability",\
+                                                "follower_removes_a_mirror_probability", "mirror_follower_sampler",\
+                                                "degree_index_file_name", "degree_index_quantiles", "mirror_adjacency_csr_file_name",\
+                                                "statistics_file_name", "statistics_number_of_hubs", "shard_block_size"]}
+
+# Stages whose outputs are read by each stage, the outputs of a stage are regenerated if theirs changed
+STAGE_UPSTREAM_STAGES = {"friend_edges": ["follower_list", "leader_list_1", "leader_list_2"],\
+                            "mirror_edges": ["follower_list", "friend_edges"]}
+
+# Names of all stages, in the order they are generated
+STAGE_NAMES = list(STAGE_CONFIGURATION_KEYS)
+
+# Entity of the stages generating all its properties from its property schema, and the stages they replace
+SCHEMA_VERTEX_STAGES = {"investor_vertices": ("investor", ["investor_names", "tradebook_investment_amounts"]),\
+                        "company_vertices": ("company", ["company_names"])}
+
+# Returns True if the vertex stage generates the vertex files with the configured property schemas (the
+# schema stages of the entities with a schema are used, replacing their name and amount stages)
+def is_vertex_stage_used(config_obj, stage_name):
+
+    vertex_property_schemas = config_obj.vertex_property_schemas or {}
+
+    if stage_name in SCHEMA_VERTEX_STAGES:
+        return SCHEMA_VERTEX_STAGES[stage_name][0] in vertex_property_schemas
+
+    return not any((stage_name in replaced_stage_names) and (entity in vertex_property_schemas)\
+                    for entity, replaced_stage_names in SCHEMA_VERTEX_STAGES.values())
+    # End of is_vertex_stage_used
+
+# Returns True if the stage is to be generated (all stages are, unless some are selected with --stages
+# or they are replaced by the stages of the property schemas)
+def is_stage_selected(config_obj, stage_name):
+    return is_vertex_stage_used(config_obj, stage_name) and\
+            ((config_obj.selected_stages is None) or (stage_name in config_obj.selected_stages))
+
+# Returns True if a selected stage reads the outputs of the stage
+def is_stage_output_needed(config_obj, stage_name):
+    return any(is_stage_selected(config_obj, selected_stage_name) and (stage_name in upstream_stage_names)\
+                for selected_stage_name, upstream_stage_names in STAGE_UPSTREAM_STAGES.items())
+
+# Seeds the random generators from the random seed and the stage name (if configured), so every
+# stage (and every process) draws its own sequence
+def seed_random_generators(config_obj, stage_name):
+
+    if config_obj.random_seed is None:
+        return
+
+    stage_seed = int(hashlib.sha256((str(config_obj.random_seed) + ":" + stage_name).encode()).hexdigest()[:8], 16)
+    random.seed(stage_seed)
+    np.random.seed(stage_seed)
+    # End of seed_random_generators
+
+# Generates the vertices (or the edges) in blocks of shard_block_size IDs with their own seeded random generators
+# (if the random seed is configured), as the shard server does, so the threads of the stage do not change the data
+def seed_generator_blocks(config_obj, generator_obj, stage_name):
+
+    if config_obj.random_seed is None:
+        return
+
+    generator_obj.use_seeded_blocks(config_obj.random_seed, stage_name, config_obj.shard_block_size)
+    # End of seed_generator_blocks
+
+# Returns True if the generated data is to be loaded into the SQLite database instead of the files
+def is_sqlite_sink(config_obj):
+    return config_obj.output_sink == "sqlite"
+
+# Loads the record batches into the table for file_name in the SQLite database
+def load_into_sqlite(config_obj, file_name, field_names, batches, index_fields=[], unique_index_fields=[]):
+
+    sink = SQLiteSink(config_obj.sqlite_database_file_name)
+    sink.load_record_batches(SQLiteSink.get_table_name(file_name),\
+                                field_names,\
+                                batches,\
+                                index_fields=index_fields,\
+                                unique_index_fields=unique_index_fields)
+    sink.close()
+    # End of load_into_sqlite
+
+# Returns the writer for the partitioned output layout of destination_file
+# (None for the single file layout) whose source vertex IDs are in [low_id, high_id),
+# or the stream writer if destination_file is a stream (whatever the layout)
+def create_output_writer(config_obj, destination_file, low_id, high_id):
+
+    if is_stream_target(destination_file):
+        return StreamWriter(destination_file=destination_file,\
+                            max_buffered_bytes=config_obj.stream_buffer_bytes)
+
+    if config_obj.output_layout != "partitioned":
+        return None
+
+    return PartitionedFileWriter(destination_file=destination_file,\
+                                    number_of_partitions=config_obj.number_of_partitions,\
+                                    partition_scheme=config_obj.partition_scheme,\
+                                    low_id=low_id,\
+                                    high_id=high_id)
+    # End of create_output_writer
+
+# Returns the files written for destination_file (the header file and the part files for the partitioned layout)
+def get_output_files(config_obj, destination_file):
+
+    if is_stream_target(destination_file) or (config_obj.output_layout != "partitioned"):
+        return [destination_file,]
+
+    output_writer = create_output_writer(config_obj, destination_file, 0, 1)
+
+    return [output_writer.get_header_file_name(),] +\
+            [output_writer.get_part_file_name(i) for i in range(0, output_writer.number_of_partitions)]
+    # End of get_output_files
+
+# Returns the configurations of the generated scale factor and of the nested scale factors (if configured)
+def get_scale_factor_configurations(config_obj):
+    return [config_obj,] + [config_obj.get_scale_factor_configuration(scale_factor)\
+                            for scale_factor in (config_obj.nested_scale_factors or [])]
+
+# Returns the files written by the stage for all the scale factors
+def get_stage_output_files(config_obj, stage_name):
+    return sum([get_scale_factor_stage_output_files(scale_factor_config, stage_name)\
+                for scale_factor_config in get_scale_factor_configurations(config_obj)], [])
+
+# Returns the files written by the stage for the scale factor of the configuration
+def get_scale_factor_stage_output_files(config_obj, stage_name):
+
+    if stage_name == "investor_names":
+        return get_output_files(config_obj, config_obj.investor_name_file_name)
+    if stage_name == "tradebook_investment_amounts":
+        return get_output_files(config_obj, config_obj.tradebook_investment_amount_file_name)
+    if stage_name == "company_names":
+        return get_output_files(config_obj, config_obj.company_name_file_name)
+    if stage_name in SCHEMA_VERTEX_STAGES:
+        return sum([get_output_files(config_obj, output_file["file_name"])\
+                    for output_file in get_schema_output_files(config_obj, SCHEMA_VERTEX_STAGES[stage_name][0])], [])
+    if stage_name == "company_list":
+        return [config_obj.company_list_file_name,]
+    if stage_name == "follower_list":
+        return [config_obj.follower_list_file_name,]
+    if stage_name == "leader_list_1":
+        return [config_obj.leader_list_1_file_name,]
+    if stage_name == "leader_list_2":
+        return [config_obj.leader_list_2_file_name,]
+    if stage_name == "friend_edges":
+        return get_output_files(config_obj, config_obj.friend_edges_file_name) +\
+                [file_name for file_name in [config_obj.friend_adjacency_csr_file_name,] if file_name is not None]
+
+    # The degree index, the mirror adjacency file and the graph statistics are written with the mirror edges
+    return get_output_files(config_obj, config_obj.mirror_edges_file_name) +\
+            get_output_files(config_obj, config_obj.remove_mirror_edges_file_name) +\
+            [file_name for file_name in [config_obj.degree_index_file_name, config_obj.mirror_adjacency_csr_file_name,\
+                                         config_obj.statistics_file_name] if file_name is not None]
+    # End of get_scale_factor_stage_output_files
+
+# Returns the CSV outputs of the selected stages that are written to streams instead of files
+def get_streamed_output_files(config_obj):
+
+    assert not any(is_stream_target(getattr(config_obj, key)) for key in BINARY_OUTPUT_KEYS),\
+        "ExecuteBaseDataGenerator_ERROR: only the CSV outputs can be streamed"
+
+    return [file_name for stage_name in STAGE_NAMES if is_stage_selected(config_obj, stage_name)\
+            for file_name in get_stage_output_files(config_obj, stage_name) if is_stream_target(file_name)]
+    # End of get_streamed_output_files
+
+# Checks the outputs written to streams and redirects the progress messages to the standard error if
+# an output (or the update stream) is written to the standard output (it is then written to a duplicate of it)
+def prepare_streamed_outputs(config_obj):
+
+    streamed_output_files = get_streamed_output_files(config_obj)
+    if (len(streamed_output_files) == 0) and (config_obj.update_stream_target != STDOUT_TARGET):
+        return
+
+    assert not is_sqlite_sink(config_obj) or (len(streamed_output_files) == 0),\
+        "ExecuteBaseDataGenerator_ERROR: the streamed outputs are not supported by the sqlite sink"
+
+    assert len(set(streamed_output_files)) == len(streamed_output_files),\
+        "ExecuteBaseDataGenerator_ERROR: every stream can only receive one output"
+
+    assert config_obj.update_stream_target not in streamed_output_files,\
+        "ExecuteBaseDataGenerator_ERROR: the update stream cannot share its stream with an output"
+
+    assert (config_obj.mirror_adjacency_csr_file_name is None) or not is_stream_target(config_obj.mirror_edges_file_name),\
+        "ExecuteBaseDataGenerator_ERROR: the mirror adjacency CSR file is built from the mirror edges file, which cannot be streamed"
+
+    if STDOUT_TARGET not in streamed_output_files + [config_obj.update_stream_target,]:
+        return
+
+    sys.stdout.flush()
+    stdout_target = FILE_DESCRIPTOR_PREFIX + str(os.dup(1))
+    os.dup2(2, 1)
+
+    for key in CSV_OUTPUT_KEYS + ["update_stream_target",]:
+        if getattr(config_obj, key) == STDOUT_TARGET:
+            setattr(config_obj, key, stdout_target)
+
+    for schema in (config_obj.vertex_property_schemas or {}).values():
+        for file_schema in schema["files"]:
+            if file_schema["file_name"] == STDOUT_TARGET:
+                file_schema["file_name"] = stdout_target
+    # End of prepare_streamed_outputs
+
+# Returns the output writers of a generator writing several outputs, where the outputs without a writer
+# (single files next to streamed outputs) are written by stream writers too, as the generators either
+# write all their outputs through writers or none
+def get_single_file_stream_writers(config_obj, output_writers, destination_files):
+
+    if all(output_writer is None for output_writer in output_writers):
+        return output_writers
+
+    return [StreamWriter(destination_file=destination_file, max_buffered_bytes=config_obj.stream_buffer_bytes)\
+            if output_writer is None else output_writer for output_writer, destination_file in zip(output_writers, destination_files)]
+    # End of get_single_file_stream_writers
+
+# Checks the nested scale factors (if configured) and creates their output directories
+def prepare_nested_scale_factors(config_obj):
+
+    if config_obj.nested_scale_factors is None:
+        return
+
+    assert not is_sqlite_sink(config_obj) and (config_obj.update_stream_target is None),\
+        "ExecuteBaseDataGenerator_ERROR: the nested scale factors are only written to files"
+
+    assert len(get_streamed_output_files(config_obj)) == 0,\
+        "ExecuteBaseDataGenerator_ERROR: the outputs of the nested scale factors cannot be streamed"
+
+    # The writers of the nested scale factors are shared by threads
+    assert all(config_obj.get_stage_parameters(stage_name)["backend"] != "processes" for stage_name in DEFAULT_STAGE_PARAMETERS),\
+        "ExecuteBaseDataGenerator_ERROR: the processes backend does not support the nested scale factors"
+
+    output_files = set()
+    for scale_factor_config in get_scale_factor_configurations(config_obj):
+        for stage_name in [stage_name for stage_name in STAGE_NAMES if is_vertex_stage_used(config_obj, stage_name)]:
+            stage_output_files = [os.path.abspath(file_name) for file_name in get_scale_factor_stage_output_files(scale_factor_config, stage_name)]
+            assert output_files.isdisjoint(stage_output_files),\
+                "ExecuteBaseDataGenerator_ERROR: every nested scale factor needs its own output directory"
+            output_files.update(stage_output_files)
+
+    get_nested_scale_factor_id_maps(config_obj)
+    for scale_factor in config_obj.nested_scale_factors:
+        os.makedirs(scale_factor["output_directory"], exist_ok=True)
+    # End of prepare_nested_scale_factors
+
+# Returns the ID maps of the nested scale factors. Their vertices are taken in a random order seeded
+# from the random seed (the same order in every stage, process and run, even if the random seed is not
+# configured), so all the outputs of a nested scale factor hold the same vertices
+def get_nested_scale_factor_id_maps(config_obj):
+
+    return get_scale_factor_id_maps(config_obj.number_of_investors,\
+                                    config_obj.number_of_companies,\
+                                    [(scale_factor["number_of_investors"], scale_factor["number_of_companies"])\
+                                        for scale_factor in config_obj.nested_scale_factors],\
+                                    get_block_random_generator(config_obj.random_seed, "nested_scale_factors", 0))
+    # End of get_nested_scale_factor_id_maps
+
+# Prints the number of edges of every nested scale factor counted by the scale factor writers of the
+# edges, and fails if it is far below the expected proportion ((n / N) ** 2) of the generated edges,
+# as the vertices of a nested scale factor are a uniform sample of the generated ones
+def check_nested_scale_factor_edges(config_obj, edge_type, scale_factor_writers):
+
+    if config_obj.nested_scale_factors is None:
+        return
+
+    number_of_edges = sum([scale_factor_writer.row_counts[0] for scale_factor_writer in scale_factor_writers])
+
+    for scale_factor_index, scale_factor in enumerate(config_obj.nested_scale_factors, start=1):
+        scale_factor_edges = sum([scale_factor_writer.row_counts[scale_factor_index] for scale_factor_writer in scale_factor_writers])
+        expected_edges = number_of_edges * (scale_factor["number_of_investors"] / config_obj.number_of_investors) ** 2
+        print("Nested scale factor in", scale_factor["output_directory"] + ":", scale_factor_edges, edge_type,\
+                "(expected about", str(round(expected_edges)) + ")")
+
+        assert scale_factor_edges >= expected_edges / 2 - 3 * np.sqrt(expected_edges),\
+            "ExecuteBaseDataGenerator_ERROR: the nested scale factor in " + scale_factor["output_directory"] +\
+            " has far fewer " + edge_type + " than expected"
+    # End of check_nested_scale_factor_edges
+
+# Returns the headers the generator writes to its single files when resetting them with reset_function
+# (None for the files written by output writers), so the single files of the nested scale factors get them too
+def get_single_file_headers(output_writers, destination_files, reset_function):
+
+    if all(output_writer is not None for output_writer in output_writers):
+        return [None for destination_file in destination_files]
+
+    reset_function()
+
+    file_headers = []
+    for destination_file in destination_files:
+        with open(destination_file, mode='r') as in_file:
+            file_headers.append(in_file.read())
+            in_file.close()
+    return file_headers
+    # End of get_single_file_headers
+
+# Returns the output writers of a generator routing its rows to the outputs of all the scale factors (the
+# output writers are returned as they are without nested scale factors). Every destination file gets a
+# ScaleFactorWriter writing to the generated output (its output writer, or the single file) and to the
+# outputs of the nested scale factors. The rows hold number_of_id_fields vertex IDs and the source vertex IDs
+# of every destination file are in the range [low_id, high_id) given by id_ranges
+def create_scale_factor_writers(config_obj, output_writers, destination_files, id_ranges, number_of_id_fields, reset_function):
+
+    if config_obj.nested_scale_factors is None:
+        return output_writers
+
+    output_writers = output_writers or [None for destination_file in destination_files]
+    file_headers = get_single_file_headers(output_writers, destination_files, reset_function)
+
+    scale_factor_id_maps = get_nested_scale_factor_id_maps(config_obj)
+
+    scale_factor_writers = []
+    for output_writer, destination_file, (low_id, high_id), file_header in zip(output_writers, destination_files, id_ranges, file_headers):
+        # The nested scale factors are written in the layout of the generated one
+        nested_output_writers = []
+        for scale_factor, scale_factor_id_map in zip(config_obj.nested_scale_factors, scale_factor_id_maps):
+            scale_factor_file_name = config_obj.get_scale_factor_file_name(scale_factor, destination_file)
+            if output_writer is None:
+                nested_output_writers.append(SingleFileWriter(scale_factor_file_name, file_header))
+            else:
+                scale_factor_low_id, scale_factor_high_id = map_scale_factor_id_range(low_id, high_id, scale_factor_id_map)
+                nested_output_writers.append(create_output_writer(config_obj, scale_factor_file_name, scale_factor_low_id, scale_factor_high_id))
+
+        if output_writer is None:
+            output_writer = SingleFileWriter(destination_file, file_header)
+
+        scale_factor_writers.append(ScaleFactorWriter([output_writer,] + nested_output_writers,\
+                                                        scale_factor_id_maps,\
+                                                        number_of_id_fields=number_of_id_fields))
+
+    return scale_factor_writers
+    # End of create_scale_factor_writers
+
+# Closes the stream writers among the output writers, once all their rows are written to the streams
+def close_stream_writers(output_writers):
+
+    for output_writer in output_writers:
+        if isinstance(output_writer, StreamWriter):
+            output_writer.close()
+
+# Returns the stage cache if the outputs of the stages are to be cached (only the files are cached)
+def create_stage_cache(config_obj):
+
+    if (config_obj.cache_directory is None) or is_sqlite_sink(config_obj) or (config_obj.update_stream_target is not None):
+        return None
+
+    # The streamed outputs are consumed once, so the stages are always generated
+    if len(get_streamed_output_files(config_obj)) > 0:
+        return None
+
+    return StageCache(config_obj.cache_directory, config_obj.cache_max_bytes)
+
+# Returns the cache key of the stage from its configuration and the output hashes of its upstream
+# stages (None if an upstream stage has no cache entry)
+def get_cached_stage_key(config_obj, stage_name, stage_entries):
+
+    upstream_entries = [stage_entries.get(upstream_stage_name) for upstream_stage_name in STAGE_UPSTREAM_STAGES.get(stage_name, [])]
+    if any(upstream_entry is None for upstream_entry in upstream_entries):
+        return None
+
+    stage_configuration = {key: getattr(config_obj, key) for key in CACHED_CONFIGURATION_KEYS + STAGE_CONFIGURATION_KEYS[stage_name]}
+    return get_stage_key(stage_name, stage_configuration, [upstream_entry["output_hash"] for upstream_entry in upstream_entries])
+
+# Restores the outputs of the stage from the stage cache and returns its cache entry, or returns None if
+# the stage is to be generated (its previous outputs are then removed, so no cached file is overwritten)
+def restore_stage(config_obj, stage_cache, stage_name, stage_entries):
+
+    if stage_cache is None:
+        return None
+
+    stage_key = get_cached_stage_key(config_obj, stage_name, stage_entries)
+    output_files = get_stage_output_files(config_obj, stage_name)
+
+    stage_entry = stage_cache.restore(stage_key, output_files) if stage_key is not None else None
+    if stage_entry is not None:
+        stage_entries[stage_name] = stage_entry
+        print(stage_name, "restored from cache")
+        return stage_entry
+
+    for output_file in output_files:
+        if os.path.lexists(output_file):
+            os.remove(output_file)
+    return None
+    # End of restore_stage
+
+# Stores the outputs of the generated stage into the stage cache
+def store_stage(config_obj, stage_cache, stage_name, stage_entries, metadata=None):
+
+    if stage_cache is None:
+        return
+
+    stage_key = get_cached_stage_key(config_obj, stage_name, stage_entries)
+    if stage_key is not None:
+        stage_entries[stage_name] = stage_cache.store(stage_key, stage_name, get_stage_output_files(config_obj, stage_name), metadata)
+    # End of store_stage
+
+# Starts the stage in a new process, unless it is not selected or its outputs are restored
+# from the stage cache (returns None then)
+def start_stage_process(config_obj, stage_cache, stage_name, stage_entries, target):
+
+    if not is_stage_selected(config_obj, stage_name):
+        return None
+
+    if restore_stage(config_obj, stage_cache, stage_name, stage_entries) is not None:
+        return None
+
+    stage_process = mp.Process(target=target, args=(config_obj,))
+    stage_process.start()
+    return stage_process
+
+# Checks that the joined stage process succeeded. Otherwise the partial outputs of the stage are removed,
+# so they are neither cached nor read as a complete stage, and the generation fails
+def check_stage_process(config_obj, stage_name, stage_process):
+
+    if stage_process.exitcode == 0:
+        return
+
+    for output_file in get_stage_output_files(config_obj, stage_name):
+        if not is_stream_target(output_file) and os.path.lexists(output_file):
+            os.remove(output_file)
+
+    assert False,\
+        "ExecuteBaseDataGenerator_ERROR: the " + stage_name + " stage failed with exit code " + str(stage_process.exitcode)
+    # End of check_stage_process
+
+# Waits for the stage process (if started) and stores the outputs of the stage into the stage cache
+def join_stage_process(config_obj, stage_cache, stage_name, stage_entries, stage_process):
+
+    if stage_process is None:
+        return
+
+    stage_process.join()
+    check_stage_process(config_obj, stage_name, stage_process)
+    store_stage(config_obj, stage_cache, stage_name, stage_entries)
+
+# Executes a vertex data generator writing to the destination file or the SQLite database
+def execute_vertex_generator(config_obj, generator_obj):
+
+    if is_sqlite_sink(config_obj):
+        field_names = generator_obj.get_header_fields()
+        load_into_sqlite(config_obj, generator_obj.destination_file, field_names,\
+                            generator_obj.iter_batches(),\
+                            unique_index_fields=field_names[:1])
+        print(generator_obj.get_vertex_type(),"Vertex Data Generation Complete")
+    else:
+        (generator_obj.output_writer,) = create_scale_factor_writers(config_obj,\
+                                                                    [generator_obj.output_writer,],\
+                                                                    [generator_obj.destination_file,],\
+                                                                    [(generator_obj.first_vertex_ID, generator_obj.first_vertex_ID + generator_obj.item_cardinality),],\
+                                                                    1,\
+                                                                    generator_obj.reset_destination_file)
+        generator_obj.execute()
+        close_stream_writers([generator_obj.output_writer,])
+    # End of execute_vertex_generator
+
+# Generates a permuted list writing it to the destination file or the SQLite database and returns it
+def generate_permuted_list(config_obj, generator_obj, list_type, destination_file):
+
+    if is_sqlite_sink(config_obj):
+        # The list order is kept by the insertion order (rowid) of the table
+        permuted_list = generator_obj.generate_permutation()
+        load_into_sqlite(config_obj, destination_file, generator_obj.get_header_fields(),\
+                            generator_obj.iter_permuted_list_batches(permuted_list))
+        return permuted_list
+
+    if is_stream_target(destination_file) or (config_obj.nested_scale_factors is not None):
+        # The list is streamed after the list type, like in the list file (the list of every nested
+        # scale factor is the subsequence of its IDs)
+        permuted_list = generator_obj.generate_permutation()
+        output_writer = StreamWriter(destination_file=destination_file, max_buffered_bytes=config_obj.stream_buffer_bytes)\
+                            if is_stream_target(destination_file) else None
+        (output_writer,) = create_scale_factor_writers(config_obj,\
+                                                        [output_writer,],\
+                                                        [destination_file,],\
+                                                        [(generator_obj.start_id, generator_obj.start_id + generator_obj.item_cardinality),],\
+                                                        1,\
+                                                        lambda: generator_obj.reset_destination_file(list_type, destination_file))
+        output_writer.reset_destination_files([list_type,])
+        for batch in generator_obj.iter_permuted_list_batches(permuted_list):
+            output_writer.write_record_batch(batch)
+        close_stream_writers([output_writer,])
+        return permuted_list
+
+    return generator_obj.generate_and_save_permuted_list(list_type=list_type,\
+                                                            destination_file=destination_file)
+    # End of generate_permuted_list
+
+# Creates the Investor Names generator
+def create_investor_names_generator(config_obj):
+
+    stage_parameters = config_obj.get_stage_parameters("investor_names")
+    return NamedVG.NamedVertexGenerator(thread_number=stage_parameters["thread_number"],\
+                                           lines_per_thread=stage_parameters["lines_per_thread"],\
+                                           backend=stage_parameters["backend"],\
+                                           scheduling=stage_parameters["scheduling"],\
+                                           destination_file = config_obj.investor_name_file_name,\
+                                           current_start_ID = 0,\
+                                           item_cardinality = config_obj.number_of_investors,\
+                                           vertex_type="investor",
+                                           is_numeric=True,\
+                                           unique_names=config_obj.unique_vertex_names,\
+                                           ordered_output=config_obj.ordered_vertex_output or is_stream_target(config_obj.investor_name_file_name),\
+                                           output_writer=create_output_writer(config_obj,\
+                                                                               config_obj.investor_name_file_name,\
+                                                                               0,\
+                                                                               config_obj.number_of_investors))
+    # End of create_investor_names_generator
+
 # Generates Investor Names
 def generate_investor_names(config_obj):
 
+    seed_random_generators(config_obj, "investor_names")
+
     # Initializing the data generator
-    generator_obj = NamedVG.NamedVertexGenerator(thread_number=10,\
-                                                    lines_per_thread=80,\
-                                                    destination_file = config_obj.investor_name_file_name,\
-                                                    current_start_ID = 0,\
-                                                    item_cardinality = config_obj.number_of_investors,\
-                                                    vertex_type="investor",
-                                                    is_numeric=True)
+    generator_obj = create_investor_names_generator(config_obj)
+    seed_generator_blocks(config_obj, generator_obj, "investor_names")
+
     # Executing the data generator
-    generator_obj.execute()
+    execute_vertex_generator(config_obj, generator_obj)
     # End of generate_investor_names
 
+# Creates the TradeBook Investment Amounts generator
+def create_tradebook_investment_amount_generator(config_obj):
+
+    stage_parameters = config_obj.get_stage_parameters("tradebook_investment_amounts")
+    return NumberedVG.NumberedVertexGenerator(thread_number=stage_parameters["thread_number"],\
+                                                lines_per_thread=stage_parameters["lines_per_thread"],\
+                                                backend=stage_parameters["backend"],\
+                                                scheduling=stage_parameters["scheduling"],\
+                                                destination_file=config_obj.tradebook_investment_amount_file_name,\
+                                                current_start_ID=config_obj.number_of_investors,\
+                                                item_cardinality=config_obj.number_of_investors,\
+                                                vertex_type="tradeBook",\
+                                                lower_limit=15000,\
+                                                upper_limit=1600000,\
+                                                ordered_output=config_obj.ordered_vertex_output or\
+                                                                is_stream_target(config_obj.tradebook_investment_amount_file_name),\
+                                                output_writer=create_output_writer(config_obj,\
+                                                                                    config_obj.tradebook_investment_amount_file_name,\
+                                                                                    config_obj.number_of_investors,\
+                                                                                    2 * config_obj.number_of_investors))
+    # End of create_tradebook_investment_amount_generator
+
 # Generates TradeBook Investment Amounts
 def generate_tradebook_investment_amount(config_obj):
 
+    seed_random_generators(config_obj, "tradebook_investment_amounts")
+
     # Initializing the data generator
-    generator_obj = NumberedVG.NumberedVertexGenerator(thread_number=10,\
-                                                         lines_per_thread=1000,\
-                                                         destination_file=config_obj.tradebook_investment_amount_file_name,\
-                                                         current_start_ID=config_obj.number_of_investors,\
-                                                         item_cardinality=config_obj.number_of_investors,\
-                                                         vertex_type="tradeBook",\
-                                                         lower_limit=15000,\
-                                                         upper_limit=1600000)
+    generator_obj = create_tradebook_investment_amount_generator(config_obj)
+    seed_generator_blocks(config_obj, generator_obj, "tradebook_investment_amounts")
+
     # Executing the data generator
-    generator_obj.execute()
+    execute_vertex_generator(config_obj, generator_obj)
     # End of generate_tradebook_investment_amount
 
+# Creates the Company Names generator
+def create_company_names_generator(config_obj):
+
+    stage_parameters = config_obj.get_stage_parameters("company_names")
+    return NamedVG.NamedVertexGenerator(thread_number=stage_parameters["thread_number"],\
+                                           lines_per_thread=stage_parameters["lines_per_thread"],\
+                                           backend=stage_parameters["backend"],\
+                                           scheduling=stage_parameters["scheduling"],\
+                                           destination_file = config_obj.company_name_file_name,\
+                                           current_start_ID = 2 * config_obj.number_of_investors,\
+                                           item_cardinality = config_obj.number_of_companies,\
+                                           vertex_type="company",\
+                                           is_numeric=False,\
+                                           unique_names=config_obj.unique_vertex_names,\
+                                           ordered_output=config_obj.ordered_vertex_output or is_stream_target(config_obj.company_name_file_name),\
+                                           output_writer=create_output_writer(config_obj,\
+                                                                               config_obj.company_name_file_name,\
+                                                                               2 * config_obj.number_of_investors,\
+                                                                               2 * config_obj.number_of_investors + config_obj.number_of_companies))
+    # End of create_company_names_generator
+
 # Generates Company Names
 def generate_company_names(config_obj):
 
+    seed_random_generators(config_obj, "company_names")
+
     # Initializing the data generator
-    generator_obj = NamedVG.NamedVertexGenerator(thread_number=10,\
-                                                    lines_per_thread=20,\
-                                                    destination_file = config_obj.company_name_file_name,\
-                                                    current_start_ID = 2 * config_obj.number_of_investors,\
-                                                    item_cardinality = config_obj.number_of_companies,\
-                                                    vertex_type="company",\
-                                                    is_numeric=False)
+    generator_obj = create_company_names_generator(config_obj)
+    seed_generator_blocks(config_obj, generator_obj, "company_names")
+
     # Executing the data generator
-    generator_obj.execute()
+    execute_vertex_generator(config_obj, generator_obj)
     # End of generate_company_names
 
+# Returns the output files of the entity's property schema with their ID ranges
+def get_schema_output_files(config_obj, entity):
+    return SchemaVG.get_schema_output_files(entity,\
+                                            config_obj.vertex_property_schemas[entity],\
+                                            config_obj.number_of_investors,\
+                                            config_obj.number_of_companies)
+
+# Creates the generator of all properties of the entity of the schema stage
+def create_schema_vertices_generator(config_obj, stage_name):
+
+    entity = SCHEMA_VERTEX_STAGES[stage_name][0]
+    first_ID = SchemaVG.get_vertex_type_first_ID(entity, config_obj.number_of_investors)
+    output_files = get_schema_output_files(config_obj, entity)
+
+    for output_file in output_files:
+        output_file["id_offset"] = output_file["first_ID"] - first_ID
+
+    # One writer per output file for the partitioned layout (or for the streamed outputs)
+    output_writers = get_single_file_stream_writers(config_obj,\
+                                                    [create_output_writer(config_obj,\
+                                                                            output_file["file_name"],\
+                                                                            output_file["first_ID"],\
+                                                                            output_file["first_ID"] + output_file["number_of_vertices"])\
+                                                        for output_file in output_files],\
+                                                    [output_file["file_name"] for output_file in output_files])
+
+    stage_parameters = config_obj.get_stage_parameters(stage_name)
+    return SchemaVG.SchemaVertexGenerator(thread_number=stage_parameters["thread_number"],\
+                                           lines_per_thread=stage_parameters["lines_per_thread"],\
+                                           backend=stage_parameters["backend"],\
+                                           scheduling=stage_parameters["scheduling"],\
+                                           current_start_ID=first_ID,\
+                                           item_cardinality=SchemaVG.get_entity_cardinality(entity,\
+                                                                                           config_obj.number_of_investors,\
+                                                                                           config_obj.number_of_companies),\
+                                           vertex_type=entity,\
+                                           columns=config_obj.vertex_property_schemas[entity]["columns"],\
+                                           output_files=output_files,\
+                                           output_writers=output_writers if any(output_writers) else None,\
+                                           ordered_output=config_obj.ordered_vertex_output or\
+                                                            any(is_stream_target(output_file["file_name"]) for output_file in output_files),\
+                                           unique_names=config_obj.unique_vertex_names)
+    # End of create_schema_vertices_generator
+
+# Generates all properties of the entity in a single pass from its property schema
+def generate_schema_vertices(config_obj, stage_name):
+
+    seed_random_generators(config_obj, stage_name)
+
+    # Initializing the data generator
+    generator_obj = create_schema_vertices_generator(config_obj, stage_name)
+    seed_generator_blocks(config_obj, generator_obj, stage_name)
+
+    # Executing the data generator
+    if is_sqlite_sink(config_obj):
+        load_schema_vertices_into_sqlite(config_obj, generator_obj)
+    else:
+        generator_obj.output_writers = create_scale_factor_writers(config_obj,\
+                                                                    generator_obj.output_writers,\
+                                                                    [output_file["file_name"] for output_file in generator_obj.output_files],\
+                                                                    [(output_file["first_ID"], output_file["first_ID"] + output_file["number_of_vertices"])\
+                                                                        for output_file in generator_obj.output_files],\
+                                                                    1,\
+                                                                    generator_obj.reset_destination_file)
+        generator_obj.execute()
+        close_stream_writers(generator_obj.output_writers or [])
+    # End of generate_schema_vertices
+
+# Generates all Investor and TradeBook properties from the investor property schema
+def generate_investor_vertices(config_obj):
+    generate_schema_vertices(config_obj, "investor_vertices")
+
+# Generates all Company properties from the company property schema
+def generate_company_vertices(config_obj):
+    generate_schema_vertices(config_obj, "company_vertices")
+
+# Loads the generated vertices into the tables of all output files of the schema in a single pass
+def load_schema_vertices_into_sqlite(config_obj, generator_obj):
+
+    sink = SQLiteSink(config_obj.sqlite_database_file_name)
+    table_names = [SQLiteSink.get_table_name(output_file["file_name"]) for output_file in generator_obj.output_files]
+    file_indices = range(0, len(table_names))
+
+    tables_created = False
+    for batch in generator_obj.iter_batches():
+        file_batches = [generator_obj.get_file_batch(batch, file_index) for file_index in file_indices]
+        if not tables_created:
+            for table_name, file_batch in zip(table_names, file_batches):
+                sink.create_table(table_name, file_batch.dtype.names, file_batch.dtype)
+            tables_created = True
+
+        for table_name, file_batch in zip(table_names, file_batches):
+            sink.insert_record_batch(table_name, file_batch, file_batch.dtype.names)
+
+    if not tables_created:
+        for table_name, file_index in zip(table_names, file_indices):
+            sink.create_table(table_name, generator_obj.get_file_header_fields(file_index))
+
+    # The unique indexes on the IDs are created only after all the vertices have been loaded
+    for table_name, file_index in zip(table_names, file_indices):
+        sink.create_index(table_name, generator_obj.get_file_header_fields(file_index)[:1], unique=True)
+
+    sink.close()
+    print(generator_obj.get_vertex_type(),"Vertex Data Generation Complete")
+    # End of load_schema_vertices_into_sqlite
+
 # Generates Company List for Query Drivers
 def generate_company_list(config_obj):
 
+    seed_random_generators(config_obj, "company_list")
+
     # Initializing the data generator
     generator_obj = PLG.PermutedListGenerator(start_id=2 * config_obj.number_of_investors,\
                                                 item_cardinality=config_obj.number_of_companies)
 
     # Executing the data generator
-    generator_obj.generate_and_save_permuted_list(list_type="Company List",\
-                                                    destination_file=config_obj.company_list_file_name)
+    generate_permuted_list(config_obj, generator_obj,\
+                            list_type="Company List",\
+                            destination_file=config_obj.company_list_file_name)
     # End of generate_company_list
 
 # Generates Follower List for edge generation and Query Drivers
 def generate_follower_list(config_obj):
 
+    seed_random_generators(config_obj, "follower_list")
+
     # Initializing the data generator
     generator_obj = PLG.PermutedListGenerator(start_id=0,\
                                                 item_cardinality=config_obj.number_of_investors)
 
     # Executing the data generator and returning the generated follower list
-    return generator_obj.generate_and_save_permuted_list(list_type="Follower List",\
-                                                    destination_file=config_obj.follower_list_file_name)
+    return generate_permuted_list(config_obj, generator_obj,\
+                                    list_type="Follower List",\
+                                    destination_file=config_obj.follower_list_file_name)
     # End of generate_follower_list
 
 # Generates Leader List 1 for edge generation and Query Drivers
 def generate_leader_list_1(config_obj):
 
+    seed_random_generators(config_obj, "leader_list_1")
+
     # Initializing the data generator
     generator_obj = PLG.PermutedListGenerator(start_id=0,\
                                                 item_cardinality=config_obj.number_of_investors)
 
     # Executing the data generator and returning the generated leader list 1
-    return generator_obj.generate_and_save_permuted_list(list_type="Leader List 1",\
-                                                    destination_file=config_obj.leader_list_1_file_name)
+    return generate_permuted_list(config_obj, generator_obj,\
+                                    list_type="Leader List 1",\
+                                    destination_file=config_obj.leader_list_1_file_name)
     # End of generate_leader_list_1
 
 # Generates Leader List 2 for edge generation and Query Drivers
 def generate_leader_list_2(config_obj):
 
+    seed_random_generators(config_obj, "leader_list_2")
+
     # Initializing the data generator
     generator_obj = PLG.PermutedListGenerator(start_id=0,\
                                                 item_cardinality=config_obj.number_of_investors)
 
     # Executing the data generator and returning the generated leader list 2
-    return generator_obj.generate_and_save_permuted_list(list_type="Leader List 2",\
-                                                    destination_file=config_obj.leader_list_2_file_name)
+    return generate_permuted_list(config_obj, generator_obj,\
+                                    list_type="Leader List 2",\
+                                    destination_file=config_obj.leader_list_2_file_name)
     # End of generate_leader_list_2
 
+# Generates the investor list of the stage, or loads it from the list file if the stage is not selected
+# (and its list is read by a selected stage) or its list file is restored from the stage cache
+def generate_investor_list(config_obj, stage_cache, stage_name, stage_entries, generate_list, list_file_name):
+
+    if not is_stage_selected(config_obj, stage_name):
+        return load_investor_list(config_obj, list_file_name) if is_stage_output_needed(config_obj, stage_name) else None
+
+    if restore_stage(config_obj, stage_cache, stage_name, stage_entries) is not None:
+        return load_investor_list(config_obj, list_file_name)
+
+    investor_list = generate_list(config_obj)
+    store_stage(config_obj, stage_cache, stage_name, stage_entries)
+    return investor_list
+    # End of generate_investor_list
+
+# Loads an investor list from its list file
+def load_investor_list(config_obj, list_file_name):
+
+    assert not is_sqlite_sink(config_obj),\
+        "ExecuteBaseDataGenerator_ERROR: the outputs of the stages that are not selected are read from the files"
+
+    assert not is_stream_target(list_file_name),\
+        "ExecuteBaseDataGenerator_ERROR: the outputs of the stages that are not selected cannot be read from streams"
+
+    (investor_list,) = read_integer_columns(get_data_files(list_file_name, 1), 1, [0,])
+    return investor_list.astype(PLG.get_id_dtype(config_obj.number_of_investors - 1))
+
+# Loads the adjacency list of the friend edges from the friend edges file (or its part files), parsing
+# the file in chunks twice to build the CSR adjacency list without holding the parsed edges
+def load_friend_adjacency(config_obj):
+
+    assert not is_sqlite_sink(config_obj),\
+        "ExecuteBaseDataGenerator_ERROR: the outputs of the stages that are not selected are read from the files"
+
+    assert not is_stream_target(config_obj.friend_edges_file_name),\
+        "ExecuteBaseDataGenerator_ERROR: the outputs of the stages that are not selected cannot be read from streams"
+
+    number_of_partitions = config_obj.number_of_partitions if config_obj.output_layout == "partitioned" else None
+    data_files = get_data_files(config_obj.friend_edges_file_name, 2, number_of_partitions)
+
+    return FriendAdjacencyCSR.from_edge_batches(lambda: iter_integer_columns(data_files, 2, [0, 1]),\
+                                                config_obj.number_of_investors)
+
+# Returns the statistics of the friend edges loaded from the files (if the graph statistics are to be
+# saved), only the degree statistics are known without the counters of the friend edge generator
+def get_loaded_friend_statistics(config_obj, friend_edges_adjacency_csr):
+
+    if config_obj.statistics_file_name is None:
+        return None
+
+    friend_degrees = friend_edges_adjacency_csr.get_degrees()
+    return {"number_of_friend_edges": int(friend_degrees.sum()) // 2,\
+            "degrees": get_degree_statistics(friend_degrees, config_obj.statistics_number_of_hubs)}
+
+# Returns the NumPy view of an investor list published into shared memory (or the list itself)
+def get_investor_list(investor_list):
+    if isinstance(investor_list, SharedMemoryArray):
+        return investor_list.array
+    return investor_list
+
 # Generates Friend and Mirror Edges and the Remove Mirror Edges for Query Drivers
-def generate_edges(config_obj, follower_list, leader_list_1, leader_list_2):
+def generate_edges(config_obj, follower_list, leader_list_1, leader_list_2, stage_cache=None, stage_entries=None):
 
-    # Initializing the friend edge generator
-    friend_edges_generator_obj = FEG.FriendEdgeGenerator(thread_number=10,\
-                                                             lines_per_thread=1000,\
+    if not (is_stage_selected(config_obj, "friend_edges") or is_stage_selected(config_obj, "mirror_edges")):
+        return
+
+    # In the streaming mode, the edges are emitted as a stream of update operations instead
+    if config_obj.update_stream_target is not None:
+        assert is_stage_selected(config_obj, "friend_edges") and is_stage_selected(config_obj, "mirror_edges"),\
+            "ExecuteBaseDataGenerator_ERROR: the update stream needs both the friend_edges and mirror_edges stages"
+        generate_update_stream(config_obj, follower_list, leader_list_1, leader_list_2)
+        return
+
+    stage_entries = {} if stage_entries is None else stage_entries
+
+    if not is_stage_selected(config_obj, "friend_edges"):
+        # The friend edges are read from the friend edges file by the mirror edge stage
+        friend_edges_adjacency_dict = None
+        friend_statistics = None
+    elif restore_stage(config_obj, stage_cache, "friend_edges", stage_entries) is None:
+        if config_obj.pipelined_edge_stages and is_stage_selected(config_obj, "mirror_edges"):
+            # The mirror edges of every partition are generated as soon as its friend edges are finalized
+            friend_statistics = generate_pipelined_edges(config_obj=config_obj,\
+                                                            follower_list=follower_list,\
+                                                            leader_list_1=leader_list_1,\
+                                                            leader_list_2=leader_list_2)
+            store_stage(config_obj, stage_cache, "friend_edges", stage_entries, metadata={"statistics": friend_statistics})
+            store_stage(config_obj, stage_cache, "mirror_edges", stage_entries)
+            return
+
+        # Generate Friend Edges and get the adjacency list for the mirror edge generator
+        friend_edges_adjacency_dict, friend_statistics = generate_friend_edges(config_obj=config_obj,\
+                                                            follower_list=follower_list,\
+                                                            leader_list_1=leader_list_1,\
+                                                            leader_list_2=leader_list_2)
+        store_stage(config_obj, stage_cache, "friend_edges", stage_entries, metadata={"statistics": friend_statistics})
+    else:
+        # The adjacency list of the restored friend edges is only loaded if the mirror edges are generated
+        friend_edges_adjacency_dict = None
+        friend_statistics = stage_entries["friend_edges"]["metadata"]["statistics"]
+
+    if not is_stage_selected(config_obj, "mirror_edges"):
+        return
+
+    if restore_stage(config_obj, stage_cache, "mirror_edges", stage_entries) is not None:
+        return
+
+    if friend_edges_adjacency_dict is None:
+        friend_edges_adjacency_dict = load_friend_adjacency(config_obj)
+
+        if not is_stage_selected(config_obj, "friend_edges"):
+            friend_statistics = get_loaded_friend_statistics(config_obj, friend_edges_adjacency_dict)
+
+    if config_obj.use_shared_memory:
+        # Publishing the adjacency list once into shared memory; the mirror edge
+        # generator runs in a worker process that attaches to it and to the shared
+        # follower list instead of receiving pickled copies
+        if not isinstance(friend_edges_adjacency_dict, FriendAdjacencyCSR):
+            friend_edges_adjacency_dict = FriendAdjacencyCSR.from_adjacency_dict(friend_edges_adjacency_dict,\
+                                                                                 config_obj.number_of_investors)
+        shared_friend_adjacency = friend_edges_adjacency_dict.publish_to_shared_memory()
+        del friend_edges_adjacency_dict
+
+        # The alias table of the follower sampler (if any) is shared the same way
+        shared_follower_sampler = create_mirror_follower_sampler(config_obj).publish_to_shared_memory()
+
+        mirror_edges_process = mp.Process(target=generate_mirror_edges,\
+                                            args=(config_obj, follower_list, shared_friend_adjacency, shared_follower_sampler, friend_statistics))
+        mirror_edges_process.start()
+        mirror_edges_process.join()
+
+        shared_friend_adjacency.close()
+        shared_follower_sampler.close()
+        check_stage_process(config_obj, "mirror_edges", mirror_edges_process)
+    else:
+        generate_mirror_edges(config_obj=config_obj,\
+                                follower_list=follower_list,\
+                                friend_edges_adjacency_dict=friend_edges_adjacency_dict,\
+                                friend_statistics=friend_statistics)
+
+    store_stage(config_obj, stage_cache, "mirror_edges", stage_entries)
+    # End of generate_edges
+
+# Creates the sampler for the follower vertices of the mirror edges
+def create_mirror_follower_sampler(config_obj):
+    return create_vertex_sampler(config_obj.mirror_follower_sampler,\
+                                    config_obj.number_of_investors,\
+                                    config_obj.follower_list_mirror_power_dis_param)
+
+# Creates the friend edge generator
+def create_friend_edges_generator(config_obj, follower_list, leader_list_1, leader_list_2):
+
+    stage_parameters = config_obj.get_stage_parameters("friend_edges")
+
+    if config_obj.friend_edges_engine == "rmat":
+        return RMEG.RMatEdgeGenerator(thread_number=stage_parameters["thread_number"],\
+                                        lines_per_thread=stage_parameters["lines_per_thread"],\
+                                        backend=stage_parameters["backend"],\
+                                        scheduling=stage_parameters["scheduling"],\
+                                        destination_file=config_obj.friend_edges_file_name,\
+                                        number_of_friend_edges=config_obj.number_of_friend_edges,\
+                                        follower_list=get_investor_list(follower_list),\
+                                        rmat_probabilities=config_obj.rmat_probabilities,\
+                                        output_writer=create_output_writer(config_obj,\
+                                                                            config_obj.friend_edges_file_name,\
+                                                                            0,\
+                                                                            config_obj.number_of_investors),\
+                                        memory_budget=config_obj.friend_edges_memory_budget,\
+                                        temporary_directory=config_obj.temporary_directory)
+
+    if config_obj.friend_edges_engine == "chung_lu":
+        return CLEG.ChungLuEdgeGenerator(thread_number=stage_parameters["thread_number"],\
+                                           lines_per_thread=stage_parameters["lines_per_thread"],\
+                                           backend=stage_parameters["backend"],\
+                                           scheduling=stage_parameters["scheduling"],\
+                                           destination_file=config_obj.friend_edges_file_name,\
+                                           number_of_friend_edges=config_obj.number_of_friend_edges,\
+                                           follower_list=get_investor_list(follower_list),\
+                                           leader_list_1=get_investor_list(leader_list_1),\
+                                           leader_list_2=get_investor_list(leader_list_2),\
+                                           follower_list_friend_power_dis_param=config_obj.follower_list_friend_power_dis_param,\
+                                           leader_list_1_friend_power_dis_param=config_obj.leader_list_1_friend_power_dis_param,\
+                                           leader_list_2_friend_power_dis_param=config_obj.leader_list_2_friend_power_dis_param,\
+                                           choose_leader_list_1_as_friend_prob=config_obj.choose_leader_list_1_as_friend_prob,\
+                                           output_writer=create_output_writer(config_obj,\
+                                                                               config_obj.friend_edges_file_name,\
+                                                                               0,\
+                                                                               config_obj.number_of_investors),\
+                                           follower_sampler=create_vertex_sampler(config_obj.friend_follower_sampler,\
+                                                                                   config_obj.number_of_investors,\
+                                                                                   config_obj.follower_list_friend_power_dis_param),\
+                                           leader_1_sampler=create_vertex_sampler(config_obj.friend_leader_list_1_sampler,\
+                                                                                   config_obj.number_of_investors,\
+                                                                                   config_obj.leader_list_1_friend_power_dis_param),\
+                                           leader_2_sampler=create_vertex_sampler(config_obj.friend_leader_list_2_sampler,\
+                                                                                   config_obj.number_of_investors,\
+                                                                                   config_obj.leader_list_2_friend_power_dis_param))
+
+    friend_edges_generator_obj = FEG.FriendEdgeGenerator(thread_number=stage_parameters["thread_number"],\
+                                                             lines_per_thread=stage_parameters["lines_per_thread"],\
+                                                             backend=stage_parameters["backend"],\
+                                                             scheduling=stage_parameters["scheduling"],\
                                                              destination_file=config_obj.friend_edges_file_name,\
                                                              number_of_friend_edges=config_obj.number_of_friend_edges,\
-                                                             follower_list=follower_list,\
-                                                             leader_list_1=leader_list_1,\
-                                                             leader_list_2=leader_list_2,\
+                                                             follower_list=get_investor_list(follower_list),\
+                                                             leader_list_1=get_investor_list(leader_list_1),\
+                                                             leader_list_2=get_investor_list(leader_list_2),\
                                                              follower_list_friend_power_dis_param=config_obj.follower_list_friend_power_dis_param,\
                                                              leader_list_1_friend_power_dis_param=config_obj.leader_list_1_friend_power_dis_param,\
                                                              leader_list_2_friend_power_dis_param=config_obj.leader_list_2_friend_power_dis_param,\
                                                              choose_leader_list_1_as_friend_prob=config_obj.choose_leader_list_1_as_friend_prob,\
-                                                             lock_list_element_cardinality=20)
+                                                             lock_list_element_cardinality=stage_parameters["lock_list_element_cardinality"],\
+                                                             output_writer=create_output_writer(config_obj,\
+                                                                                                 config_obj.friend_edges_file_name,\
+                                                                                                 0,\
+                                                                                                 config_obj.number_of_investors),\
+                                                             follower_sampler=create_vertex_sampler(config_obj.friend_follower_sampler,\
+                                                                                                     config_obj.number_of_investors,\
+                                                                                                     config_obj.follower_list_friend_power_dis_param),\
+                                                             leader_1_sampler=create_vertex_sampler(config_obj.friend_leader_list_1_sampler,\
+                                                                                                     config_obj.number_of_investors,\
+                                                                                                     config_obj.leader_list_1_friend_power_dis_param),\
+                                                             leader_2_sampler=create_vertex_sampler(config_obj.friend_leader_list_2_sampler,\
+                                                                                                     config_obj.number_of_investors,\
+                                                                                                     config_obj.leader_list_2_friend_power_dis_param),\
+                                                             memory_budget=config_obj.friend_edges_memory_budget,\
+                                                             temporary_directory=config_obj.temporary_directory)
+    seed_generator_blocks(config_obj, friend_edges_generator_obj, "friend_edges")
+
+    return friend_edges_generator_obj
+    # End of create_friend_edges_generator
+
+# Routes the friend edges to the outputs of the nested scale factors too (if configured)
+def add_friend_edges_scale_factor_writer(config_obj, friend_edges_generator_obj):
+    (friend_edges_generator_obj.output_writer,) = create_scale_factor_writers(config_obj,\
+                                                                                [friend_edges_generator_obj.output_writer,],\
+                                                                                [config_obj.friend_edges_file_name,],\
+                                                                                [(0, config_obj.number_of_investors),],\
+                                                                                2,\
+                                                                                friend_edges_generator_obj.reset_destination_file)
+
+# Generates Friend Edges and returns their adjacency list and their statistics (if configured)
+def generate_friend_edges(config_obj, follower_list, leader_list_1, leader_list_2):
+
+    seed_random_generators(config_obj, "friend_edges")
+
+    # Initializing the friend edge generator
+    friend_edges_generator_obj = create_friend_edges_generator(config_obj, follower_list, leader_list_1, leader_list_2)
 
     # Executing the friend edge generator and getting the generated adjacency list for mirror edge generator
-    friend_edges_adjacency_dict = friend_edges_generator_obj.execute()
+    if is_sqlite_sink(config_obj):
+        load_into_sqlite(config_obj, config_obj.friend_edges_file_name,\
+                            friend_edges_generator_obj.get_header_fields(),\
+                            friend_edges_generator_obj.iter_batches(),\
+                            index_fields=friend_edges_generator_obj.get_header_fields())
+        friend_edges_adjacency_dict = friend_edges_generator_obj.get_friend_adjacency()
+        print("Friend Edge Generation Complete")
+    else:
+        add_friend_edges_scale_factor_writer(config_obj, friend_edges_generator_obj)
+        friend_edges_adjacency_dict = friend_edges_generator_obj.execute()
+        close_stream_writers([friend_edges_generator_obj.output_writer,])
+        check_nested_scale_factor_edges(config_obj, "friend edges", [friend_edges_generator_obj.output_writer,])
 
-    # Initializing the mirror edge generator
-    mirror_edges_generator_obj = MEG.MirrorEdgeGenerator(thread_number=5,\
-                                                             lines_per_thread=1000,\
+    save_friend_adjacency_csr(config_obj, friend_edges_adjacency_dict)
+
+    return friend_edges_adjacency_dict, get_friend_statistics(config_obj, friend_edges_generator_obj)
+    # End of generate_friend_edges
+
+# Saves the adjacency list of the friend edges as a binary CSR file for the query drivers (if configured)
+def save_friend_adjacency_csr(config_obj, friend_edges_adjacency_dict):
+
+    if config_obj.friend_adjacency_csr_file_name is None:
+        return
+
+    if not isinstance(friend_edges_adjacency_dict, FriendAdjacencyCSR):
+        friend_edges_adjacency_dict = FriendAdjacencyCSR.from_adjacency_dict(friend_edges_adjacency_dict, config_obj.number_of_investors)
+
+    friend_edges_adjacency_dict.save(config_obj.friend_adjacency_csr_file_name)
+    print("Friend Adjacency CSR Generation Complete")
+    # End of save_friend_adjacency_csr
+
+# Saves the directed adjacency list of the mirror edges (from the sources to the destinations, as
+# tradebook IDs) as a binary CSR file for the query drivers (if configured). The mirror edges are not
+# kept in memory, so the mirror edges file (or its part files) is parsed in chunks twice
+def save_mirror_adjacency_csr(config_obj):
+
+    if config_obj.mirror_adjacency_csr_file_name is None:
+        return
+
+    assert not is_sqlite_sink(config_obj),\
+        "ExecuteBaseDataGenerator_ERROR: the mirror adjacency CSR file is built from the mirror edges files"
+
+    number_of_partitions = config_obj.number_of_partitions if config_obj.output_layout == "partitioned" else None
+    data_files = get_data_files(config_obj.mirror_edges_file_name, 2, number_of_partitions)
+
+    mirror_edges_adjacency_csr = FriendAdjacencyCSR.from_edge_batches(lambda: iter_integer_columns(data_files, 2, [0, 1]),\
+                                                                      config_obj.number_of_investors,\
+                                                                      id_offset=config_obj.number_of_investors,\
+                                                                      directed=True)
+    mirror_edges_adjacency_csr.save(config_obj.mirror_adjacency_csr_file_name)
+    print("Mirror Adjacency CSR Generation Complete")
+    # End of save_mirror_adjacency_csr
+
+# Generates the Friend Edges and the Mirror Edges in one pipelined pass over the partitions of the
+# investors, and returns the statistics of the friend edges (if configured)
+def generate_pipelined_edges(config_obj, follower_list, leader_list_1, leader_list_2):
+
+    assert (config_obj.friend_edges_engine == "sampling") and (config_obj.friend_edges_memory_budget is None),\
+        "ExecuteBaseDataGenerator_ERROR: the pipelined edge stages need the sampling engine without a memory budget"
+
+    assert not is_sqlite_sink(config_obj),\
+        "ExecuteBaseDataGenerator_ERROR: the pipelined edge stages do not support the sqlite sink"
+
+    seed_random_generators(config_obj, "friend_edges")
+
+    friend_edges_generator_obj = create_friend_edges_generator(config_obj, follower_list, leader_list_1, leader_list_2)
+    mirror_edges_generator_obj = create_mirror_edges_generator(config_obj, follower_list,\
+                                                                friend_edges_generator_obj.get_friend_adjacency(),\
+                                                                create_mirror_follower_sampler(config_obj))
+
+    friend_stage_parameters = config_obj.get_stage_parameters("friend_edges")
+    mirror_stage_parameters = config_obj.get_stage_parameters("mirror_edges")
+
+    pipelined_edges_generator_obj = PEG.PipelinedEdgeGenerator(friend_edges_generator=friend_edges_generator_obj,\
+                                                                mirror_edges_generator=mirror_edges_generator_obj,\
+                                                                number_of_partitions=config_obj.pipelined_edge_partitions,\
+                                                                thread_number=max(friend_stage_parameters["thread_number"],\
+                                                                                  mirror_stage_parameters["thread_number"]),\
+                                                                backend=friend_stage_parameters["backend"])
+    add_friend_edges_scale_factor_writer(config_obj, friend_edges_generator_obj)
+    add_mirror_edges_scale_factor_writers(config_obj, mirror_edges_generator_obj)
+    friend_edges_adjacency_dict = pipelined_edges_generator_obj.execute()
+    close_stream_writers([friend_edges_generator_obj.output_writer,\
+                            mirror_edges_generator_obj.mirror_output_writer,\
+                            mirror_edges_generator_obj.remove_mirror_output_writer])
+    check_nested_scale_factor_edges(config_obj, "friend edges", [friend_edges_generator_obj.output_writer,])
+    check_nested_scale_factor_edges(config_obj, "mirror edges", [mirror_edges_generator_obj.mirror_output_writer,])
+
+    friend_statistics = get_friend_statistics(config_obj, friend_edges_generator_obj)
+    save_friend_adjacency_csr(config_obj, friend_edges_adjacency_dict)
+    save_mirror_adjacency_csr(config_obj)
+    save_degree_index(config_obj, friend_edges_adjacency_dict, mirror_edges_generator_obj)
+    save_graph_statistics(config_obj, friend_statistics, mirror_edges_generator_obj)
+
+    return friend_statistics
+    # End of generate_pipelined_edges
+
+# Returns the statistics of the generated friend edges, if the graph statistics are to be saved
+def get_friend_statistics(config_obj, friend_edges_generator_obj):
+
+    if config_obj.statistics_file_name is None:
+        return None
+
+    return friend_edges_generator_obj.get_statistics(config_obj.statistics_number_of_hubs)
+
+# Creates the mirror edge generator using the adjacency list of the friend edges
+def create_mirror_edges_generator(config_obj, follower_list, friend_edges_adjacency_dict, follower_sampler):
+
+    stage_parameters = config_obj.get_stage_parameters("mirror_edges")
+
+    mirror_output_writer, remove_mirror_output_writer = get_single_file_stream_writers(config_obj,\
+                                                            [create_output_writer(config_obj,\
+                                                                                    config_obj.mirror_edges_file_name,\
+                                                                                    config_obj.number_of_investors,\
+                                                                                    2 * config_obj.number_of_investors),\
+                                                                create_output_writer(config_obj,\
+                                                                                    config_obj.remove_mirror_edges_file_name,\
+                                                                                    config_obj.number_of_investors,\
+                                                                                    2 * config_obj.number_of_investors)],\
+                                                            [config_obj.mirror_edges_file_name, config_obj.remove_mirror_edges_file_name])
+
+    mirror_edges_generator_obj = MEG.MirrorEdgeGenerator(thread_number=stage_parameters["thread_number"],\
+                                                             lines_per_thread=stage_parameters["lines_per_thread"],\
+                                                             backend=stage_parameters["backend"],\
+                                                             scheduling=stage_parameters["scheduling"],\
                                                              mirror_destination_file=config_obj.mirror_edges_file_name,\
                                                              remove_mirror_destination_file=config_obj.remove_mirror_edges_file_name,\
-                                                             follower_list=follower_list,\
+                                                             follower_list=get_investor_list(follower_list),\
                                                              number_of_friend_edges=config_obj.number_of_friend_edges,\
                                                              number_of_mirror_edges=config_obj.number_of_mirror_edges,\
                                                              follower_mirrors_a_friend_probability=config_obj.follower_mirrors_a_friend_probability,\
                                                              follower_removes_a_mirror_probability=config_obj.follower_removes_a_mirror_probability,\
                                                              follower_list_mirror_power_dis_param=config_obj.follower_list_mirror_power_dis_param,\
                                                              friend_adjacency_dict=friend_edges_adjacency_dict,\
-                                                             lock_list_element_cardinality=20)
+                                                             lock_list_element_cardinality=stage_parameters["lock_list_element_cardinality"],\
+                                                             mirror_output_writer=mirror_output_writer,\
+                                                             remove_mirror_output_writer=remove_mirror_output_writer,\
+                                                             follower_sampler=follower_sampler)
+    seed_generator_blocks(config_obj, mirror_edges_generator_obj, "mirror_edges")
+
+    return mirror_edges_generator_obj
+    # End of create_mirror_edges_generator
+
+# Routes the mirror edges and the remove mirror edges to the outputs of the nested scale factors too (if configured)
+def add_mirror_edges_scale_factor_writers(config_obj, mirror_edges_generator_obj):
+    mirror_edges_generator_obj.mirror_output_writer, mirror_edges_generator_obj.remove_mirror_output_writer =\
+        create_scale_factor_writers(config_obj,\
+                                    [mirror_edges_generator_obj.mirror_output_writer, mirror_edges_generator_obj.remove_mirror_output_writer],\
+                                    [config_obj.mirror_edges_file_name, config_obj.remove_mirror_edges_file_name],\
+                                    [(config_obj.number_of_investors, 2 * config_obj.number_of_investors),] * 2,\
+                                    2,\
+                                    mirror_edges_generator_obj.reset_destination_files)
+
+# Generates Mirror Edges and Remove Mirror Edges using the adjacency list of the friend edges
+def generate_mirror_edges(config_obj, follower_list, friend_edges_adjacency_dict, follower_sampler=None, friend_statistics=None):
+
+    seed_random_generators(config_obj, "mirror_edges")
+
+    if follower_sampler is None:
+        follower_sampler = create_mirror_follower_sampler(config_obj)
+
+    # Initializing the mirror edge generator
+    mirror_edges_generator_obj = create_mirror_edges_generator(config_obj, follower_list, friend_edges_adjacency_dict, follower_sampler)
+
     # Executing the mirror edge generator
-    mirror_edges_generator_obj.execute()
-    # End of generate_edges
+    if is_sqlite_sink(config_obj):
+        load_mirror_edges_into_sqlite(config_obj, mirror_edges_generator_obj)
+        print("Mirror Edge Generation Complete")
+        print("Remove Mirror Edge Generation Complete")
+    else:
+        add_mirror_edges_scale_factor_writers(config_obj, mirror_edges_generator_obj)
+        mirror_edges_generator_obj.execute()
+        close_stream_writers([mirror_edges_generator_obj.mirror_output_writer, mirror_edges_generator_obj.remove_mirror_output_writer])
+        check_nested_scale_factor_edges(config_obj, "mirror edges", [mirror_edges_generator_obj.mirror_output_writer,])
+
+    save_mirror_adjacency_csr(config_obj)
+    save_degree_index(config_obj, friend_edges_adjacency_dict, mirror_edges_generator_obj)
+    save_graph_statistics(config_obj, friend_statistics, mirror_edges_generator_obj)
+    # End of generate_mirror_edges
+
+# Saves the statistics of the friend and mirror edges gathered during generation (if configured)
+def save_graph_statistics(config_obj, friend_statistics, mirror_edges_generator_obj):
+
+    if config_obj.statistics_file_name is None:
+        return
+
+    save_statistics({"friend_edges": friend_statistics,\
+                        "mirror_edges": mirror_edges_generator_obj.get_statistics(config_obj.statistics_number_of_hubs)},\
+                    config_obj.statistics_file_name)
+    print("Graph Statistics Generation Complete")
+    # End of save_graph_statistics
+
+# Saves the degree index of the friend and mirror edges for the query drivers (if configured)
+def save_degree_index(config_obj, friend_edges_adjacency_dict, mirror_edges_generator_obj):
+
+    if config_obj.degree_index_file_name is None:
+        return
+
+    degree_index = DegreeIndex.from_degrees(DegreeIndex.get_friend_degrees(friend_edges_adjacency_dict, config_obj.number_of_investors),\
+                                            mirror_edges_generator_obj.mirror_degrees,\
+                                            quantiles=config_obj.degree_index_quantiles)
+    degree_index.save(config_obj.degree_index_file_name)
+    print("Degree Index Generation Complete")
+    # End of save_degree_index
+
+# Generates the Friend and Mirror Edges in memory and emits them as a timestamped stream of update operations
+def generate_update_stream(config_obj, follower_list, leader_list_1, leader_list_2):
+
+    seed_random_generators(config_obj, "update_stream")
+
+    friend_edges_generator_obj = create_friend_edges_generator(config_obj, follower_list, leader_list_1, leader_list_2)
+    friend_batches = list(friend_edges_generator_obj.iter_batches())
+
+    mirror_edges_generator_obj = create_mirror_edges_generator(config_obj, follower_list,\
+                                                                friend_edges_generator_obj.get_friend_adjacency(),\
+                                                                create_mirror_follower_sampler(config_obj))
+    mirror_batches = list(mirror_edges_generator_obj.iter_batches())
+
+    save_degree_index(config_obj, friend_edges_generator_obj.get_friend_adjacency(), mirror_edges_generator_obj)
+    save_graph_statistics(config_obj, get_friend_statistics(config_obj, friend_edges_generator_obj), mirror_edges_generator_obj)
+
+    emitter = UpdateStreamEmitter(target=config_obj.update_stream_target,\
+                                    ops_per_second=config_obj.update_stream_ops_per_second,\
+                                    load_profile=config_obj.update_stream_load_profile,\
+                                    mirror_delay=config_obj.update_stream_mirror_delay,\
+                                    remove_mirror_delay=config_obj.update_stream_remove_mirror_delay)
+
+    number_of_events = emitter.run(friend_batches, mirror_batches, config_obj.number_of_investors)
+    print("Update Stream Complete:", number_of_events, "operations emitted")
+    # End of generate_update_stream
+
+# Loads the mirror edges and the remove mirror edges into the SQLite database in a single pass
+def load_mirror_edges_into_sqlite(config_obj, mirror_edges_generator_obj):
+
+    sink = SQLiteSink(config_obj.sqlite_database_file_name)
+    field_names = mirror_edges_generator_obj.get_header_fields()
+    mirror_table_name = SQLiteSink.get_table_name(config_obj.mirror_edges_file_name)
+    remove_mirror_table_name = SQLiteSink.get_table_name(config_obj.remove_mirror_edges_file_name)
+
+    tables_created = False
+    for batch in mirror_edges_generator_obj.iter_batches():
+        if not tables_created:
+            sink.create_table(mirror_table_name, field_names, batch.dtype)
+            sink.create_table(remove_mirror_table_name, field_names, batch.dtype)
+            tables_created = True
+
+        sink.insert_record_batch(mirror_table_name, batch, field_names)
+        sink.insert_record_batch(remove_mirror_table_name, batch[batch["RemoveMirror"]], field_names)
+
+    if not tables_created:
+        sink.create_table(mirror_table_name, field_names)
+        sink.create_table(remove_mirror_table_name, field_names)
+
+    # Indexes are created only after all the edges have been loaded
+    for table_name in [mirror_table_name, remove_mirror_table_name]:
+        for field_name in field_names:
+            sink.create_index(table_name, [field_name,])
+
+    sink.close()
+    # End of load_mirror_edges_into_sqlite
+
+# Generates the Friend and Mirror Edges in memory for the shard server, with the investor lists and the
+# edges seeded as by their stages
+def generate_shard_edge_batches(config_obj):
+
+    investor_lists = []
+    for stage_name in ["follower_list", "leader_list_1", "leader_list_2"]:
+        seed_random_generators(config_obj, stage_name)
+        investor_lists.append(PLG.PermutedListGenerator(start_id=0,\
+                                                        item_cardinality=config_obj.number_of_investors).generate_permutation())
+
+    seed_random_generators(config_obj, "friend_edges")
+    friend_edges_generator_obj = create_friend_edges_generator(config_obj, *investor_lists)
+    friend_batches = list(friend_edges_generator_obj.iter_batches())
+
+    seed_random_generators(config_obj, "mirror_edges")
+    mirror_edges_generator_obj = create_mirror_edges_generator(config_obj, investor_lists[0],\
+                                                                friend_edges_generator_obj.get_friend_adjacency(),\
+                                                                create_mirror_follower_sampler(config_obj))
+    mirror_batches = list(mirror_edges_generator_obj.iter_batches())
+
+    print("Shard Server Edge Generation Complete")
+    return {"friend_edges": friend_batches, "mirror_edges": mirror_batches}
+    # End of generate_shard_edge_batches
+
+# Serves the vertex and edge stages as reproducible shards on the address ('tcp:host:port' or 'unix:path')
+# instead of writing the files
+def start_shard_server(json_config_file, address):
+
+    # Getting the configuration into the configuration object
+    config_obj = Configuration(json_config_file)
+
+    assert config_obj.random_seed is not None,\
+        "ExecuteBaseDataGenerator_ERROR: the shard server needs the random_seed to generate reproducible shards"
+
+    assert not config_obj.unique_vertex_names,\
+        "ExecuteBaseDataGenerator_ERROR: the shard server generates every block separately, so the names cannot be unique"
+
+    # Generators of the vertex stages, the schema stages replace the name and amount stages of their entity
+    vertex_generator_functions = {"investor_names": create_investor_names_generator,\
+                                    "tradebook_investment_amounts": create_tradebook_investment_amount_generator,\
+                                    "company_names": create_company_names_generator}
+    for stage_name in SCHEMA_VERTEX_STAGES:
+        vertex_generator_functions[stage_name] = lambda config_obj, stage_name=stage_name: create_schema_vertices_generator(config_obj, stage_name)
+
+    vertex_generators = {stage_name: create_generator(config_obj)\
+                            for stage_name, create_generator in vertex_generator_functions.items() if is_vertex_stage_used(config_obj, stage_name)}
+
+    # The edges are served by the partitions of the partitioned layout (by their source vertex)
+    edge_partitioners = {"friend_edges": PartitionedFileWriter(destination_file=config_obj.friend_edges_file_name,\
+                                                                number_of_partitions=config_obj.number_of_partitions,\
+                                                                partition_scheme=config_obj.partition_scheme,\
+                                                                low_id=0,\
+                                                                high_id=config_obj.number_of_investors),\
+                            "mirror_edges": PartitionedFileWriter(destination_file=config_obj.mirror_edges_file_name,\
+                                                                number_of_partitions=config_obj.number_of_partitions,\
+                                                                partition_scheme=config_obj.partition_scheme,\
+                                                                low_id=config_obj.number_of_investors,\
+                                                                high_id=2 * config_obj.number_of_investors)}
+
+    shard_server = ShardServer(address=address,\
+                                vertex_generators=vertex_generators,\
+                                edge_batches_function=lambda: generate_shard_edge_batches(config_obj),\
+                                edge_partitioners=edge_partitioners,\
+                                random_seed=config_obj.random_seed,\
+                                block_size=config_obj.shard_block_size)
+    shard_server.run()
+    # End of start_shard_server
 
 # Calls the functions defined above to generate all data
-def start_base_data_generator(json_config_file):
+def start_base_data_generator(json_config_file, selected_stages=None):
 
     # Getting the configuration into the configuration object
     config_obj = Configuration(json_config_file)
 
+    # Generating only the selected stages, the outputs of the others are read from the files
+    if selected_stages is not None:
+        for stage_name in selected_stages:
+            assert stage_name in STAGE_NAMES,\
+                "ExecuteBaseDataGenerator_ERROR: unknown stage " + stage_name + ", the stages are " + ", ".join(STAGE_NAMES)
+        config_obj.selected_stages = selected_stages
+
+    # Checking the outputs written to streams (the progress messages go to the standard error if
+    # an output is written to the standard output)
+    prepare_streamed_outputs(config_obj)
+
     print("Starting Base Data Generator")
 
+    # Tuning the stages for this machine and scale (or reusing the saved tuning profile)
+    if config_obj.auto_tune:
+        config_obj.tuned_stage_parameters = load_or_create_tuning_profile(config_obj)["stages"]
+
+    # Checking the nested scale factors written in the same pass (if configured)
+    prepare_nested_scale_factors(config_obj)
+
+    # Stage outputs are restored from the cache (if configured) instead of being regenerated
+    stage_cache = create_stage_cache(config_obj)
+    stage_entries = {}
+
     # Generate Investor names using multiprocessing
-    investor_name_process = mp.Process(target=generate_investor_names,\
-                                        args=(config_obj,))
-    investor_name_process.start()
+    investor_name_process = start_stage_process(config_obj, stage_cache, "investor_names", stage_entries,\
+                                                generate_investor_names)
 
     # Generate TradeBook Investment Amount using multiprocessing
-    tradebook_investment_amount_process = mp.Process(target=generate_tradebook_investment_amount,\
-                                                        args=(config_obj,))
-    tradebook_investment_amount_process.start()
+    tradebook_investment_amount_process = start_stage_process(config_obj, stage_cache, "tradebook_investment_amounts", stage_entries,\
+                                                                generate_tradebook_investment_amount)
 
     # Generate Company names using multiprocessing
-    company_name_process = mp.Process(target=generate_company_names,\
-                                        args=(config_obj,))
-    company_name_process.start()
+    company_name_process = start_stage_process(config_obj, stage_cache, "company_names", stage_entries,\
+                                                generate_company_names)
+
+    # Generate all Investor and Company properties in a single pass per entity (with property schemas) using multiprocessing
+    investor_vertices_process = start_stage_process(config_obj, stage_cache, "investor_vertices", stage_entries,\
+                                                    generate_investor_vertices)
+    company_vertices_process = start_stage_process(config_obj, stage_cache, "company_vertices", stage_entries,\
+                                                    generate_company_vertices)
 
     # Generate Company List using multiprocessing
-    generate_company_list(config_obj)
-    company_list_process = mp.Process(target=generate_company_list,\
-                                        args=(config_obj,))
-    company_list_process.start()
+    company_list_process = start_stage_process(config_obj, stage_cache, "company_list", stage_entries,\
+                                                generate_company_list)
 
     # Generate 3 Investor Lists
-    follow_list = generate_follower_list(config_obj)
-    lead_list_1 = generate_leader_list_1(config_obj)
-    lead_list_2 = generate_leader_list_2(config_obj)
+    follow_list = generate_investor_list(config_obj, stage_cache, "follower_list", stage_entries,\
+                                            generate_follower_list, config_obj.follower_list_file_name)
+    lead_list_1 = generate_investor_list(config_obj, stage_cache, "leader_list_1", stage_entries,\
+                                            generate_leader_list_1, config_obj.leader_list_1_file_name)
+    lead_list_2 = generate_investor_list(config_obj, stage_cache, "leader_list_2", stage_entries,\
+                                            generate_leader_list_2, config_obj.leader_list_2_file_name)
+
+    # Publishing the 3 Investor Lists (the ones generated or loaded) once into shared memory for the worker processes
+    if config_obj.use_shared_memory:
+        follow_list, lead_list_1, lead_list_2 = [SharedMemoryArray.publish(investor_list) if investor_list is not None else None\
+                                                    for investor_list in [follow_list, lead_list_1, lead_list_2]]
+
     # Generate Friend Edges Using 3 generated investor lists
     # Generate Mirror Edges Using Adjacency List from Friend Generator (also generates remove list)
     generate_edges(config_obj=config_obj,\
                     follower_list=follow_list,\
                     leader_list_1=lead_list_1,\
-                    leader_list_2=lead_list_2)
+                    leader_list_2=lead_list_2,\
+                    stage_cache=stage_cache,\
+                    stage_entries=stage_entries)
+
+    # Freeing the shared memory blocks of the 3 Investor Lists
+    if config_obj.use_shared_memory:
+        for investor_list in [follow_list, lead_list_1, lead_list_2]:
+            if investor_list is not None:
+                investor_list.close()
 
-    # Waiting for all processes to finish
-    investor_name_process.join()
-    tradebook_investment_amount_process.join()
-    company_name_process.join()
-    company_list_process.join()
+    # Waiting for all processes to finish (and caching their outputs)
+    join_stage_process(config_obj, stage_cache, "investor_names", stage_entries, investor_name_process)
+    join_stage_process(config_obj, stage_cache, "tradebook_investment_amounts", stage_entries, tradebook_investment_amount_process)
+    join_stage_process(config_obj, stage_cache, "company_names", stage_entries, company_name_process)
+    join_stage_process(config_obj, stage_cache, "investor_vertices", stage_entries, investor_vertices_process)
+    join_stage_process(config_obj, stage_cache, "company_vertices", stage_entries, company_vertices_process)
+    join_stage_process(config_obj, stage_cache, "company_list", stage_entries, company_list_process)
 
     print("Data Generation Complete")
     # End of start_base_data_generator
@@ -211,11 +1496,15 @@ if __name__ == "__main__":
     arglist = sys.argv
 
     # Checking if the number of command line arguments is as expected
-    if len(arglist) != 2:
+    if (len(arglist) != 2) and ((len(arglist) != 4) or (arglist[2] not in ["--stages", "--serve"])):
         print("Incorrect number of command line arguments")
-        print("Usage: python",arglist[0],"<JSON config file>")
+        print("Usage: python",arglist[0],"<JSON config file> [--stages <comma separated stage names>]")
+        print("       python",arglist[0],"<JSON config file> --serve <tcp:host:port or unix:path>")
+    elif arglist[2:3] == ["--serve"]:
+        # serving the shards of the stages on the address instead of writing the files
+        start_shard_server(arglist[1], arglist[3])
     else:
-        # starting the base data generator with the configuration file provided
-        start_base_data_generator(arglist[1])
+        # starting the base data generator with the configuration file provided (and the selected stages)
+        start_base_data_generator(arglist[1], arglist[3].split(",") if len(arglist) == 4 else None)
 
 # End of BDG000_ExecuteBaseDataGenerator.py
@@ -15,7 +15,32 @@ Description:
 
 """
 
+import copy
 import json
+import os
+
+# Backend (threads, processes or inline) and scheduling mode (dynamic, static or work_stealing)
+# of the workers of every stage, unless they are overridden
+DEFAULT_EXECUTION_PARAMETERS = {"backend": "threads", "scheduling": "dynamic"}
+
+# Parameters of the generation stages used unless they are tuned or overridden
+DEFAULT_STAGE_PARAMETERS = {"investor_names": {"thread_number": 10, "lines_per_thread": 80},\
+                            "tradebook_investment_amounts": {"thread_number": 10, "lines_per_thread": 1000},\
+                            "company_names": {"thread_number": 10, "lines_per_thread": 20},\
+                            "investor_vertices": {"thread_number": 10, "lines_per_thread": 1000},\
+                            "company_vertices": {"thread_number": 10, "lines_per_thread": 1000},\
+                            "friend_edges": {"thread_number": 10, "lines_per_thread": 1000, "lock_list_element_cardinality": 20},\
+                            "mirror_edges": {"thread_number": 5, "lines_per_thread": 1000, "lock_list_element_cardinality": 20}}
+
+# Configuration attributes of the CSV outputs, which can be streamed and are written for every nested scale factor
+CSV_OUTPUT_KEYS = ["investor_name_file_name", "tradebook_investment_amount_file_name", "company_name_file_name",\
+                    "company_list_file_name", "follower_list_file_name", "leader_list_1_file_name",\
+                    "leader_list_2_file_name", "friend_edges_file_name", "mirror_edges_file_name",\
+                    "remove_mirror_edges_file_name"]
+
+# Configuration attributes of the binary outputs, which are only written for the generated scale factor
+BINARY_OUTPUT_KEYS = ["friend_adjacency_csr_file_name", "mirror_adjacency_csr_file_name", "degree_index_file_name",\
+                        "statistics_file_name"]
 
 class Configuration:
     def __init__(self, config_file,):
@@ -84,3 +109,224 @@ class Configuration:
         self.mirror_edges_file_name = configuration_dictionary["mirror_edges_file_name"]
 
         self.remove_mirror_edges_file_name = configuration_dictionary["remove_mirror_edges_file_name"]
+
+        # Degree index with the parameter pools for the query drivers (optional, not written if null)
+        self.degree_index_file_name = configuration_dictionary.get("degree_index_file_name", None)
+
+        # Quantiles of the degrees separating the buckets of the parameter pools
+        self.degree_index_quantiles = configuration_dictionary.get("degree_index_quantiles", [0.5, 0.9, 0.99])
+
+        # Binary CSR files of the friend adjacency list and of the directed mirror adjacency list, memory-mapped
+        # by the query drivers (optional, not written if null)
+        self.friend_adjacency_csr_file_name = configuration_dictionary.get("friend_adjacency_csr_file_name", None)
+
+        self.mirror_adjacency_csr_file_name = configuration_dictionary.get("mirror_adjacency_csr_file_name", None)
+
+        # Statistics of the generated graph gathered during generation (optional, not written if null)
+        self.statistics_file_name = configuration_dictionary.get("statistics_file_name", None)
+
+        # Number of vertices with the largest degrees listed as hubs in the statistics
+        self.statistics_number_of_hubs = configuration_dictionary.get("statistics_number_of_hubs", 10)
+
+        #Output Sink Configurations (optional, the generated data is written to the files by default)
+
+        # "files" writes the files above, "sqlite" loads the data into the SQLite database file instead
+        self.output_sink = configuration_dictionary.get("output_sink", "files")
+
+        self.sqlite_database_file_name = configuration_dictionary.get("sqlite_database_file_name", "Data/BaseData.db")
+
+        #Output Layout Configurations (optional, used when the data is written to files)
+
+        # "single" writes one file per entity, "partitioned" writes number_of_partitions part files
+        # and a header file with loader-ready column names per vertex and edge file
+        self.output_layout = configuration_dictionary.get("output_layout", "single")
+
+        self.number_of_partitions = configuration_dictionary.get("number_of_partitions", 8)
+
+        # "hash" or "range" partitioning of the source vertex
+        self.partition_scheme = configuration_dictionary.get("partition_scheme", "hash")
+
+        # Writes the vertex files of the "single" layout in vertex ID order using positional writes
+        # (the streamed vertex outputs are always written in vertex ID order)
+        self.ordered_vertex_output = configuration_dictionary.get("ordered_vertex_output", False)
+
+        #Streaming Output Configurations (optional, used when a CSV output file name is "-" for the
+        #standard output, "fd:N" for an open file descriptor or the path of an existing FIFO)
+
+        # Maximum number of bytes buffered per streamed output before the workers wait for the reader
+        self.stream_buffer_bytes = configuration_dictionary.get("stream_buffer_bytes", 4194304)
+
+        #Shared Memory Configurations (optional)
+
+        # Publishes the investor lists and the friend adjacency list into shared memory blocks
+        # and runs the mirror edge generator in a worker process attached to them
+        self.use_shared_memory = configuration_dictionary.get("use_shared_memory", False)
+
+        #Vertex Sampler Configurations (optional, the power distributions above are used by default)
+
+        # Each sampler is null or a dictionary such as {"distribution": "zipf", "exponent": 1.1},
+        # see create_vertex_sampler() in samplers/BDG015_VertexSamplers.py for the distributions
+        self.friend_follower_sampler = configuration_dictionary.get("friend_follower_sampler", None)
+
+        self.friend_leader_list_1_sampler = configuration_dictionary.get("friend_leader_list_1_sampler", None)
+
+        self.friend_leader_list_2_sampler = configuration_dictionary.get("friend_leader_list_2_sampler", None)
+
+        self.mirror_follower_sampler = configuration_dictionary.get("mirror_follower_sampler", None)
+
+        #Vertex Name Configurations (optional)
+
+        # Regenerates repeated investor and company names so that every name is unique
+        self.unique_vertex_names = configuration_dictionary.get("unique_vertex_names", False)
+
+        #Vertex Property Schema Configurations (optional, the names and amounts are generated by separate stages by default)
+
+        # Schemas of the "investor" and "company" entities, such as {"investor": {"columns": [{"name": "Name",
+        # "type": "name"}, {"name": "Region", "type": "choice", "values": ["APAC", "EMEA"]}], "files": [{"file_name":
+        # "Data/Investors.csv", "columns": ["Name", "Region"]}]}}. All columns of an entity are generated in a single
+        # pass by the investor_vertices (or company_vertices) stage, replacing the name and amount stages
+        self.vertex_property_schemas = configuration_dictionary.get("vertex_property_schemas", None)
+
+        #Friend Edge Engine Configurations (optional, the sampling engine is used by default)
+
+        # "sampling" draws the endpoints of every edge and rejects the duplicate edges, "chung_lu"
+        # keeps every pair of vertices with the product of their expected degrees (from the samplers
+        # above) in independent blocks, giving number_of_friend_edges edges in expectation, "rmat"
+        # draws the edges recursively from the quadrants of the adjacency matrix (for very large graphs)
+        self.friend_edges_engine = configuration_dictionary.get("friend_edges_engine", "sampling")
+
+        # Probabilities [a, b, c, d] of the four quadrants of the "rmat" engine
+        self.rmat_probabilities = configuration_dictionary.get("rmat_probabilities", [0.57, 0.19, 0.19, 0.05])
+
+        #Memory-Bounded Generation Configurations (optional, the edges are kept in memory by default)
+
+        # Number of bytes the friend edge generator may use for the edges. If set, the candidate edges
+        # are deduplicated through sorted runs spilled to temporary files instead of an adjacency matrix
+        self.friend_edges_memory_budget = configuration_dictionary.get("friend_edges_memory_budget", None)
+
+        # Directory of the temporary files (the system temporary directory if null)
+        self.temporary_directory = configuration_dictionary.get("temporary_directory", None)
+
+        #Pipelined Edge Stage Configurations (optional, the mirror edges follow all friend edges by default)
+
+        # Splits the investors into pipelined_edge_partitions vertex ranges and generates the mirror edges of
+        # every range once its friend edges are finalized, while the next ranges still generate friend edges
+        self.pipelined_edge_stages = configuration_dictionary.get("pipelined_edge_stages", False)
+
+        self.pipelined_edge_partitions = configuration_dictionary.get("pipelined_edge_partitions", 16)
+
+        #Update Stream Configurations (optional, the edges are written to the files by default)
+
+        # File name, "-" (standard output), "tcp:host:port" or "unix:path". If set, the friend, mirror
+        # and remove mirror edges are emitted as a stream of timestamped update operations instead
+        self.update_stream_target = configuration_dictionary.get("update_stream_target", None)
+
+        self.update_stream_ops_per_second = configuration_dictionary.get("update_stream_ops_per_second", 1000)
+
+        # List of [duration in seconds, operations per second] segments used instead of the constant rate
+        self.update_stream_load_profile = configuration_dictionary.get("update_stream_load_profile", None)
+
+        # Mean number of operations between an add_friend and its add_mirror
+        self.update_stream_mirror_delay = configuration_dictionary.get("update_stream_mirror_delay", 100)
+
+        # Mean number of operations between an add_mirror and its remove_mirror
+        self.update_stream_remove_mirror_delay = configuration_dictionary.get("update_stream_remove_mirror_delay", 1000)
+
+        #Shard Server Configurations (optional, used with --serve)
+
+        # Number of vertex IDs of the blocks seeded separately by the shard server, every requested range of
+        # vertex IDs is generated from the blocks it overlaps (the vertex stages also generate the vertex
+        # files in these blocks if random_seed is set, so the files hold the same data as the shards)
+        self.shard_block_size = configuration_dictionary.get("shard_block_size", 10000)
+
+        #Tuning Configurations (optional, DEFAULT_STAGE_PARAMETERS are used by default)
+
+        # Chooses the number of threads, the batch size and the number of lock stripes of every stage
+        # from the CPU count, the available memory and a short calibration run
+        self.auto_tune = configuration_dictionary.get("auto_tune", False)
+
+        # Tuning profile reused by later runs with the same CPU count and scale (not saved if null)
+        self.tuning_profile_file_name = configuration_dictionary.get("tuning_profile_file_name", None)
+
+        # Parameters overriding the default or tuned ones, such as {"friend_edges": {"thread_number": 4}}
+        # or {"investor_names": {"backend": "processes", "scheduling": "work_stealing"}}
+        self.stage_parameters = configuration_dictionary.get("stage_parameters", {})
+
+        # Parameters chosen by the auto-tuner (set by the executor script)
+        self.tuned_stage_parameters = {}
+
+        # Stages to generate, the outputs of the others are read from the files (set by the executor
+        # script from --stages, all stages are generated if None)
+        self.selected_stages = None
+
+        #Stage Cache Configurations (optional, every stage is regenerated by default)
+
+        # Seed of the random generators, every stage seeds them from it and its name, and the vertex stages
+        # seed every block of shard_block_size vertex IDs (or sampled friend and mirror edges, not seeded if null)
+        self.random_seed = configuration_dictionary.get("random_seed", None)
+
+        # Directory storing the outputs of the stages by configuration, restored instead of
+        # regenerating a stage whose configuration and inputs did not change (no cache if null)
+        self.cache_directory = configuration_dictionary.get("cache_directory", None)
+
+        # Largest size of the cache in bytes, the least recently used stage outputs are evicted first
+        self.cache_max_bytes = configuration_dictionary.get("cache_max_bytes", 10 * 1024 * 1024 * 1024)
+
+        #Nested Scale Factor Configurations (optional, only the configured scale factor is generated by default)
+
+        # Smaller scale factors written in the same pass, such as [{"number_of_investors": 1000,
+        # "number_of_companies": 100, "output_directory": "Data/SF1"}]. Each is a seeded random sample of the
+        # generated dataset (investors with their TradeBooks and companies, and the edges between them) and its
+        # CSV outputs are written to its output directory with the file names of the generated ones
+        self.nested_scale_factors = configuration_dictionary.get("nested_scale_factors", None)
+
+    def get_stage_parameters(self, stage_name):
+        """
+        Description:
+            Returns the parameters of the generation stage: the default ones
+            (with the default execution parameters), replaced by the tuned ones
+            and then by the configured overrides.
+        """
+
+        stage_parameters = dict(DEFAULT_EXECUTION_PARAMETERS)
+        stage_parameters.update(DEFAULT_STAGE_PARAMETERS[stage_name])
+        stage_parameters.update(self.tuned_stage_parameters.get(stage_name, {}))
+        stage_parameters.update(self.stage_parameters.get(stage_name, {}))
+
+        return stage_parameters
+
+    def get_scale_factor_file_name(self, scale_factor, file_name):
+        """
+        Description:
+            Returns the name of the output file_name of the nested scale factor,
+            in the output directory of the scale factor.
+        """
+
+        return os.path.join(scale_factor["output_directory"], os.path.basename(file_name))
+
+    def get_scale_factor_configuration(self, scale_factor):
+        """
+        Description:
+            Returns the configuration of the dataset of the nested scale factor
+            (e.g. to validate it), with its numbers of vertices and CSV outputs.
+            The binary outputs are only written for the generated scale factor.
+        """
+
+        scale_factor_config = copy.copy(self)
+        scale_factor_config.number_of_investors = scale_factor["number_of_investors"]
+        scale_factor_config.number_of_companies = scale_factor["number_of_companies"]
+        scale_factor_config.nested_scale_factors = None
+
+        for key in CSV_OUTPUT_KEYS:
+            setattr(scale_factor_config, key, self.get_scale_factor_file_name(scale_factor, getattr(self, key)))
+
+        for key in BINARY_OUTPUT_KEYS:
+            setattr(scale_factor_config, key, None)
+
+        if self.vertex_property_schemas is not None:
+            scale_factor_config.vertex_property_schemas = copy.deepcopy(self.vertex_property_schemas)
+            for schema in scale_factor_config.vertex_property_schemas.values():
+                for file_schema in schema["files"]:
+                    file_schema["file_name"] = self.get_scale_factor_file_name(scale_factor, file_schema["file_name"])
+
+        return scale_factor_config
@@ -20,6 +20,29 @@ import vertex_generators.BDG003_NumberedVertexGenerator as Test_numbered
 import edge_generators.BDG004_FriendEdgeGenerator as Test_friend_edge_gen
 import edge_generators.BDG005_MirrorEdgeGenerator as Test_mirror_edge_gen
 import list_generators.BDG006_PermutedListGenerator as Test_list_gen
+import data_sinks.BDG010_RecordBatch as Test_record_batch
+import data_sinks.BDG011_SQLiteSink as Test_sqlite_sink
+import data_sinks.BDG012_PartitionedFileWriter as Test_partitioned_writer
+import shared_data.BDG013_SharedMemoryArray as Test_shared_memory_array
+import edge_generators.BDG014_FriendAdjacencyCSR as Test_friend_adjacency_csr
+import samplers.BDG015_VertexSamplers as Test_vertex_samplers
+import vertex_generators.BDG016_FingerprintSet as Test_fingerprint_set
+import update_streams.BDG017_UpdateStreamEmitter as Test_update_stream_emitter
+import query_parameters.BDG018_DegreeIndex as Test_degree_index
+import graph_statistics.BDG019_GraphStatistics as Test_graph_statistics
+import tuning.BDG020_AutoTuner as Test_auto_tuner
+import external_memory.BDG021_ExternalSorter as Test_external_sorter
+import data_readers.BDG022_ColumnReader as Test_column_reader
+import BDG023_DatasetValidator as Test_dataset_validator
+import stage_cache.BDG024_StageCache as Test_stage_cache
+import edge_generators.BDG025_ChungLuEdgeGenerator as Test_chung_lu_edge_gen
+import edge_generators.BDG026_RMatEdgeGenerator as Test_rmat_edge_gen
+import execution.BDG027_BatchExecutor as Test_batch_executor
+import edge_generators.BDG028_PipelinedEdgeGenerator as Test_pipelined_edge_gen
+import vertex_generators.BDG029_SchemaVertexGenerator as Test_schema_vertex_gen
+import shard_service.BDG030_ShardService as Test_shard_service
+import data_sinks.BDG031_StreamWriter as Test_stream_writer
+import data_sinks.BDG032_ScaleFactorWriter as Test_scale_factor_writer
 
 
 sys.path.append("vertex_generators/")
@@ -32,6 +55,29 @@ try:
     Test_friend_edge_gen.execute_all_unit_tests()
     Test_mirror_edge_gen.execute_all_unit_tests()
     Test_list_gen.execute_all_unit_tests()
+    Test_record_batch.execute_all_unit_tests()
+    Test_sqlite_sink.execute_all_unit_tests()
+    Test_partitioned_writer.execute_all_unit_tests()
+    Test_shared_memory_array.execute_all_unit_tests()
+    Test_friend_adjacency_csr.execute_all_unit_tests()
+    Test_vertex_samplers.execute_all_unit_tests()
+    Test_fingerprint_set.execute_all_unit_tests()
+    Test_update_stream_emitter.execute_all_unit_tests()
+    Test_degree_index.execute_all_unit_tests()
+    Test_graph_statistics.execute_all_unit_tests()
+    Test_auto_tuner.execute_all_unit_tests()
+    Test_external_sorter.execute_all_unit_tests()
+    Test_column_reader.execute_all_unit_tests()
+    Test_dataset_validator.execute_all_unit_tests()
+    Test_stage_cache.execute_all_unit_tests()
+    Test_chung_lu_edge_gen.execute_all_unit_tests()
+    Test_rmat_edge_gen.execute_all_unit_tests()
+    Test_batch_executor.execute_all_unit_tests()
+    Test_pipelined_edge_gen.execute_all_unit_tests()
+    Test_schema_vertex_gen.execute_all_unit_tests()
+    Test_shard_service.execute_all_unit_tests()
+    Test_stream_writer.execute_all_unit_tests()
+    Test_scale_factor_writer.execute_all_unit_tests()
 except AssertionError as emsg:
     print("Unit Tests Failed")
     print(emsg)
@@ -0,0 +1,490 @@
+"""
+FYP : 22013
+
+Module:
+    Base Data Generator
+
+Description:
+    This python script contains the definition of the DatasetValidator class,
+    the function comparing sorted key streams and their unit tests. It also
+    validates the dataset generated with the provided configuration file when
+    executed:
+
+        python BDG023_DatasetValidator.py <JSON config file>
+
+    Every generated file is read once with the ColumnReader (memory-mapped and
+    parsed with NumPy in chunks) and checked as follows:
+        - vertex files and list files: every ID of the expected range occurs
+          exactly once (tracked in a bitmap of 1 bit per ID)
+        - friend edges: no self-loop, no ID out of range and no duplicate
+          undirected edge
+        - mirror edges: every mirror edge (A + N, B + N) has the friend edge
+          (A, B) in either direction, N being the number of investors
+        - remove mirror edges: every removed edge is a mirror edge
+    The datasets of the nested scale factors (if configured) are validated the
+    same way.
+    The edges are packed into 64 bit keys and sorted with the ExternalSorter, so
+    the memory used is bounded by the memory budget (plus the ID bitmaps) and not
+    by the number of edges. The exit code is 1 if any check fails.
+
+"""
+
+# Imports from built-in modules
+import numpy as np
+import os
+import sys
+
+# Imports from Base Data Generator Module
+from BDG007_Configuration import Configuration
+from data_readers.BDG022_ColumnReader import ColumnReader, get_data_files
+from external_memory.BDG021_ExternalSorter import ExternalSorter
+from vertex_generators.BDG029_SchemaVertexGenerator import get_schema_output_files
+
+# Number of sorters alive at the same time, sharing the memory budget
+NUMBER_OF_SORTERS = 4
+
+def count_missing_keys(sorted_keys_iter, reference_keys_iter):
+    """
+    Description:
+        Returns the number of keys of sorted_keys_iter not in reference_keys_iter.
+        Both are iterators of sorted chunks of unique keys (e.g. from
+        ExternalSorter.iter_sorted_keys), walked together one chunk at a time.
+    """
+
+    number_of_missing_keys = 0
+    reference_keys = np.zeros((0,), dtype=np.uint64)
+    is_reference_exhausted = False
+
+    for keys in sorted_keys_iter:
+        while len(keys) > 0:
+            if is_reference_exhausted:
+                number_of_missing_keys += len(keys)
+                break
+
+            # the current reference chunk is below all keys left, reading the next one
+            if (len(reference_keys) == 0) or (reference_keys[-1] < keys[0]):
+                reference_keys = next(reference_keys_iter, None)
+                is_reference_exhausted = reference_keys is None
+                continue
+
+            number_of_compared_keys = int(np.searchsorted(keys, reference_keys[-1], side='right'))
+            compared_keys = keys[:number_of_compared_keys]
+            keys = keys[number_of_compared_keys:]
+
+            reference_indices = np.searchsorted(reference_keys, compared_keys)
+            number_of_missing_keys += int(np.count_nonzero(reference_keys[reference_indices] != compared_keys))
+
+    return number_of_missing_keys
+
+def get_undirected_edge_keys(source_ids, destination_ids):
+    """
+    Description:
+        Returns the key (smaller ID << 32 | larger ID) of every edge.
+    """
+
+    source_ids = source_ids.astype(np.uint64)
+    destination_ids = destination_ids.astype(np.uint64)
+    return (np.minimum(source_ids, destination_ids) << np.uint64(32)) | np.maximum(source_ids, destination_ids)
+
+def get_directed_edge_keys(source_ids, destination_ids):
+    """
+    Description:
+        Returns the key (source ID << 32 | destination ID) of every edge.
+    """
+
+    return (source_ids.astype(np.uint64) << np.uint64(32)) | destination_ids.astype(np.uint64)
+
+class DatasetValidator:
+
+    def __init__(self, config_obj, memory_budget=256 * 1024 * 1024, chunk_size=16 * 1024 * 1024):
+
+        assert getattr(config_obj, "output_sink", "files") != "sqlite",\
+            "DatasetValidator_ERROR: only the generated files can be validated"
+
+        # Configuration of the generated dataset
+        self.config_obj = config_obj
+
+        # Number of bytes each of the NUMBER_OF_SORTERS sorters may use
+        self.sorter_memory_budget = max(1024 * 1024, memory_budget // NUMBER_OF_SORTERS)
+
+        # Number of bytes parsed at a time by the column readers
+        self.chunk_size = chunk_size
+
+        # Result of every check, by check name
+        self.report = {}
+
+        # Sorted keys kept between the checks of the edge files
+        self.friend_edge_sorter = None
+        self.mirror_edge_sorter = None
+        self.directed_mirror_edge_sorter = None
+
+    def create_sorter(self):
+        """
+        Description:
+            Returns a new ExternalSorter using the share of the memory budget.
+        """
+
+        return ExternalSorter(memory_budget=self.sorter_memory_budget,\
+                                temporary_directory=getattr(self.config_obj, "temporary_directory", None))
+
+    def iter_columns(self, check_report, destination_file, header_lines, number_of_columns, column_indices, is_partitioned=True):
+        """
+        Description:
+            Generator yielding the integer columns of column_indices of all data
+            files of destination_file (its part files for the partitioned layout,
+            unless is_partitioned is False), one chunk at a time. Counts the rows
+            and the invalid lines in check_report.
+        """
+
+        field_names = ["column_" + str(column_index) for column_index in column_indices]
+
+        is_partitioned = is_partitioned and (getattr(self.config_obj, "output_layout", "single") == "partitioned")
+        number_of_partitions = self.config_obj.number_of_partitions if is_partitioned else None
+
+        for file_name, file_header_lines in get_data_files(destination_file, header_lines, number_of_partitions):
+            if not os.path.exists(file_name):
+                check_report["missing_files"].append(file_name)
+                continue
+
+            reader = ColumnReader(file_name,\
+                                    number_of_columns=number_of_columns,\
+                                    header_lines=file_header_lines,\
+                                    chunk_size=self.chunk_size)
+
+            for batch in reader.iter_batches(column_indices, field_names):
+                check_report["rows"] += len(batch)
+                yield [batch[field_name] for field_name in field_names]
+
+            check_report["invalid_lines"] += reader.number_of_invalid_lines
+
+    def create_check_report(self, check_name, error_counter_names):
+        """
+        Description:
+            Adds and returns the report of a check, with the row count, the
+            invalid line count and the error counters (all 0).
+        """
+
+        check_report = {"valid": False, "rows": 0, "missing_files": [], "invalid_lines": 0}
+        check_report.update({counter_name: 0 for counter_name in error_counter_names})
+        self.report[check_name] = check_report
+        return check_report
+
+    def set_check_validity(self, check_report, error_counter_names):
+        """
+        Description:
+            Sets the check as valid if no error was counted.
+        """
+
+        check_report["valid"] = (len(check_report["missing_files"]) == 0) and\
+                                (check_report["invalid_lines"] == 0) and\
+                                all(check_report[counter_name] == 0 for counter_name in error_counter_names)
+
+    def check_id_set(self, check_name, destination_file, number_of_columns, low_id, number_of_ids, is_partitioned=True):
+        """
+        Description:
+            Checks that the first column of the file (1 header line) holds every
+            ID of [low_id, low_id + number_of_ids) exactly once. The list files
+            are never partitioned.
+        """
+
+        error_counter_names = ["out_of_range_ids", "duplicate_ids", "missing_ids"]
+        check_report = self.create_check_report(check_name, error_counter_names)
+
+        # bit (i & 7) of byte (i >> 3) is set once ID (low_id + i) has been read
+        id_bitmap = np.zeros(((number_of_ids + 7) // 8,), dtype=np.uint8)
+        number_of_ids_in_range = 0
+
+        for (vertex_ids,) in self.iter_columns(check_report, destination_file, 1, number_of_columns, [0,], is_partitioned):
+            offsets = vertex_ids - low_id
+            is_in_range = (offsets >= 0) & (offsets < number_of_ids)
+            offsets = offsets[is_in_range]
+
+            check_report["out_of_range_ids"] += int(len(vertex_ids) - len(offsets))
+            number_of_ids_in_range += len(offsets)
+
+            np.bitwise_or.at(id_bitmap, offsets >> 3, np.left_shift(1, offsets & 7).astype(np.uint8))
+
+        number_of_distinct_ids = int(np.unpackbits(id_bitmap).sum(dtype=np.int64))
+        del id_bitmap
+
+        check_report["duplicate_ids"] = number_of_ids_in_range - number_of_distinct_ids
+        check_report["missing_ids"] = number_of_ids - number_of_distinct_ids
+        self.set_check_validity(check_report, error_counter_names)
+
+    def check_friend_edges(self):
+        """
+        Description:
+            Checks that the friend edges are between investors, without
+            self-loops and without duplicate undirected edges. Keeps the sorted
+            undirected edge keys for check_mirror_edges.
+        """
+
+        error_counter_names = ["out_of_range_edges", "self_loops", "duplicate_edges"]
+        check_report = self.create_check_report("friend_edges", error_counter_names)
+
+        number_of_investors = self.config_obj.number_of_investors
+        self.friend_edge_sorter = self.create_sorter()
+        number_of_added_keys = 0
+
+        for source_ids, destination_ids in self.iter_columns(check_report, self.config_obj.friend_edges_file_name, 2, 2, [0, 1]):
+            is_in_range = (source_ids < number_of_investors) & (destination_ids < number_of_investors)
+            is_self_loop = source_ids == destination_ids
+
+            check_report["out_of_range_edges"] += int(np.count_nonzero(~is_in_range))
+            check_report["self_loops"] += int(np.count_nonzero(is_self_loop & is_in_range))
+
+            is_kept = is_in_range & ~is_self_loop
+            self.friend_edge_sorter.add(get_undirected_edge_keys(source_ids[is_kept], destination_ids[is_kept]))
+            number_of_added_keys += int(np.count_nonzero(is_kept))
+
+        check_report["duplicate_edges"] = number_of_added_keys - self.friend_edge_sorter.merge()
+        self.set_check_validity(check_report, error_counter_names)
+
+    def check_mirror_edges(self):
+        """
+        Description:
+            Checks that the mirror edges are between tradebooks and that every
+            mirror edge (A + N, B + N) mirrors the friend edge (A, B). Keeps the
+            sorted directed edge keys for check_remove_mirror_edges.
+        """
+
+        error_counter_names = ["out_of_range_edges", "edges_without_friend_edge"]
+        check_report = self.create_check_report("mirror_edges", error_counter_names)
+
+        number_of_investors = self.config_obj.number_of_investors
+        self.mirror_edge_sorter = self.create_sorter()
+        self.directed_mirror_edge_sorter = self.create_sorter()
+
+        for source_ids, destination_ids in self.iter_columns(check_report, self.config_obj.mirror_edges_file_name, 2, 2, [0, 1]):
+            # tradebook (A + N) mirrors investor A
+            source_ids = source_ids - number_of_investors
+            destination_ids = destination_ids - number_of_investors
+
+            is_in_range = (source_ids >= 0) & (source_ids < number_of_investors) &\
+                            (destination_ids >= 0) & (destination_ids < number_of_investors)
+            check_report["out_of_range_edges"] += int(np.count_nonzero(~is_in_range))
+
+            source_ids = source_ids[is_in_range]
+            destination_ids = destination_ids[is_in_range]
+            self.mirror_edge_sorter.add(get_undirected_edge_keys(source_ids, destination_ids))
+            self.directed_mirror_edge_sorter.add(get_directed_edge_keys(source_ids, destination_ids))
+
+        check_report["edges_without_friend_edge"] = count_missing_keys(self.mirror_edge_sorter.iter_sorted_keys(),\
+                                                                        self.friend_edge_sorter.iter_sorted_keys())
+        self.set_check_validity(check_report, error_counter_names)
+
+    def check_remove_mirror_edges(self):
+        """
+        Description:
+            Checks that every removed mirror edge is a mirror edge (same
+            direction).
+        """
+
+        error_counter_names = ["out_of_range_edges", "edges_without_mirror_edge"]
+        check_report = self.create_check_report("remove_mirror_edges", error_counter_names)
+
+        number_of_investors = self.config_obj.number_of_investors
+        remove_mirror_edge_sorter = self.create_sorter()
+
+        for source_ids, destination_ids in self.iter_columns(check_report, self.config_obj.remove_mirror_edges_file_name, 2, 2, [0, 1]):
+            source_ids = source_ids - number_of_investors
+            destination_ids = destination_ids - number_of_investors
+
+            is_in_range = (source_ids >= 0) & (source_ids < number_of_investors) &\
+                            (destination_ids >= 0) & (destination_ids < number_of_investors)
+            check_report["out_of_range_edges"] += int(np.count_nonzero(~is_in_range))
+
+            remove_mirror_edge_sorter.add(get_directed_edge_keys(source_ids[is_in_range], destination_ids[is_in_range]))
+
+        check_report["edges_without_mirror_edge"] = count_missing_keys(remove_mirror_edge_sorter.iter_sorted_keys(),\
+                                                                        self.directed_mirror_edge_sorter.iter_sorted_keys())
+        remove_mirror_edge_sorter.close()
+        self.set_check_validity(check_report, error_counter_names)
+
+    def validate(self):
+        """
+        Description:
+            Runs all checks and returns True if the whole dataset is valid.
+        """
+
+        config_obj = self.config_obj
+        number_of_investors = config_obj.number_of_investors
+        number_of_companies = config_obj.number_of_companies
+
+        # Vertex files (the files of the property schemas replace the name and amount files of their entity)
+        vertex_property_schemas = getattr(config_obj, "vertex_property_schemas", None) or {}
+
+        if "investor" not in vertex_property_schemas:
+            self.check_id_set("investor_names", config_obj.investor_name_file_name, 2, 0, number_of_investors)
+            self.check_id_set("tradebook_investment_amounts", config_obj.tradebook_investment_amount_file_name, 2, number_of_investors, number_of_investors)
+        if "company" not in vertex_property_schemas:
+            self.check_id_set("company_names", config_obj.company_name_file_name, 2, 2 * number_of_investors, number_of_companies)
+
+        for entity, schema in vertex_property_schemas.items():
+            for output_file in get_schema_output_files(entity, schema, number_of_investors, number_of_companies):
+                self.check_id_set(entity + "_vertices:" + os.path.basename(output_file["file_name"]),\
+                                    output_file["file_name"],\
+                                    1 + len(output_file["columns"]),\
+                                    output_file["first_ID"],\
+                                    output_file["number_of_vertices"])
+
+        # List files (permutations of the IDs)
+        self.check_id_set("company_list", config_obj.company_list_file_name, 1, 2 * number_of_investors, number_of_companies, is_partitioned=False)
+        self.check_id_set("follower_list", config_obj.follower_list_file_name, 1, 0, number_of_investors, is_partitioned=False)
+        self.check_id_set("leader_list_1", config_obj.leader_list_1_file_name, 1, 0, number_of_investors, is_partitioned=False)
+        self.check_id_set("leader_list_2", config_obj.leader_list_2_file_name, 1, 0, number_of_investors, is_partitioned=False)
+
+        # Edge files
+        try:
+            self.check_friend_edges()
+            self.check_mirror_edges()
+            self.check_remove_mirror_edges()
+        finally:
+            for sorter in [self.friend_edge_sorter, self.mirror_edge_sorter, self.directed_mirror_edge_sorter]:
+                if sorter is not None:
+                    sorter.close()
+
+        return all(check_report["valid"] for check_report in self.report.values())
+
+    def print_report(self):
+        """
+        Description:
+            Prints the result of every check with its non-zero counters.
+        """
+
+        for check_name, check_report in self.report.items():
+            details = ", ".join(counter_name + "=" + str(value) for counter_name, value in check_report.items()\
+                                if (counter_name != "valid") and value)
+            print(check_name + ":", "OK" if check_report["valid"] else "FAILED", "(" + details + ")")
+
+
+class ValidatorTestConfiguration:
+    def __init__(self, test_directory):
+        self.number_of_investors = 6
+        self.number_of_companies = 3
+        self.output_layout = "single"
+        self.investor_name_file_name = os.path.join(test_directory, "InvestorNames.csv")
+        self.tradebook_investment_amount_file_name = os.path.join(test_directory, "TradebookAmount.csv")
+        self.company_name_file_name = os.path.join(test_directory, "CompanyNames.csv")
+        self.company_list_file_name = os.path.join(test_directory, "CompanyList.txt")
+        self.follower_list_file_name = os.path.join(test_directory, "FollowerList.txt")
+        self.leader_list_1_file_name = os.path.join(test_directory, "LeaderList1.txt")
+        self.leader_list_2_file_name = os.path.join(test_directory, "LeaderList2.txt")
+        self.friend_edges_file_name = os.path.join(test_directory, "FriendEdges.csv")
+        self.mirror_edges_file_name = os.path.join(test_directory, "MirrorEdges.csv")
+        self.remove_mirror_edges_file_name = os.path.join(test_directory, "RemoveMirrorEdges.csv")
+
+# Writes the lines to the file of the test dataset
+def write_test_file(file_name, lines):
+    with open(file_name, mode='w') as out_file:
+        out_file.write("\n".join(lines) + "\n")
+        out_file.close()
+
+# Writes a valid test dataset with 6 investors and 3 companies
+def write_test_dataset(config_obj):
+    write_test_file(config_obj.investor_name_file_name, ["investorID|Name",] + [str(i) + "|abc" for i in [3, 0, 1, 5, 4, 2]])
+    write_test_file(config_obj.tradebook_investment_amount_file_name, ["tradeBookID|InvestmentAmount",] + [str(i) + "|15000" for i in range(6, 12)])
+    write_test_file(config_obj.company_name_file_name, ["companyID|Name", "12|ab", "13|cd", "14|ef"])
+    write_test_file(config_obj.company_list_file_name, ["Company List", "14", "12", "13"])
+    write_test_file(config_obj.follower_list_file_name, ["Follower List", "5", "4", "3", "2", "1", "0"])
+    write_test_file(config_obj.leader_list_1_file_name, ["Leader List 1", "0", "1", "2", "3", "4", "5"])
+    write_test_file(config_obj.leader_list_2_file_name, ["Leader List 2", "2", "0", "1", "5", "3", "4"])
+    write_test_file(config_obj.friend_edges_file_name, ["Friend Edges", "SourceVertexID|DestinationVertexID", "0|1", "2|1", "3|5", "4|0"])
+    write_test_file(config_obj.mirror_edges_file_name, ["Mirror Edges", "SourceTradeBookID|DestinationTradeBookID", "7|6", "7|8", "11|9"])
+    write_test_file(config_obj.remove_mirror_edges_file_name, ["Remove Mirror Edge List", "SourceTradeBookID|DestinationTradeBookID", "7|8"])
+
+# Unit tests to test if the missing keys of sorted key streams are counted
+def test_count_missing_keys():
+    keys = np.array([1, 3, 5, 7, 9, 20, 30], dtype=np.uint64)
+    reference_keys = np.array([0, 1, 2, 3, 4, 9, 10, 11, 12, 20], dtype=np.uint64)
+
+    number_of_missing_keys = count_missing_keys(iter([keys[:2], keys[2:3], keys[3:]]),\
+                                                iter([reference_keys[:3], reference_keys[3:4], reference_keys[4:8], reference_keys[8:]]))
+
+    assert number_of_missing_keys == 3,\
+        "DatasetValidator_COMPARE_ERROR number of missing keys is invalid"
+
+    assert count_missing_keys(iter([keys,]), iter([])) == len(keys),\
+        "DatasetValidator_COMPARE_ERROR keys missing from an empty reference are not counted"
+
+# Unit tests to test if a valid dataset passes all checks
+def test_valid_dataset():
+    os.makedirs("dataset_validator_test", exist_ok=True)
+    config_obj = ValidatorTestConfiguration("dataset_validator_test")
+    write_test_dataset(config_obj)
+
+    test_object = DatasetValidator(config_obj, chunk_size=8)
+
+    assert test_object.validate(),\
+        "DatasetValidator_VALIDATE_ERROR valid dataset is reported invalid"
+
+    assert test_object.report["friend_edges"]["rows"] == 4 and test_object.report["follower_list"]["rows"] == 6,\
+        "DatasetValidator_VALIDATE_ERROR number of rows is invalid"
+
+# Unit tests to test if every kind of error is detected
+def test_invalid_dataset():
+    os.makedirs("dataset_validator_test", exist_ok=True)
+    config_obj = ValidatorTestConfiguration("dataset_validator_test")
+    write_test_dataset(config_obj)
+
+    write_test_file(config_obj.investor_name_file_name, ["investorID|Name",] + [str(i) + "|abc" for i in [3, 0, 1, 3, 4, 6]])
+    write_test_file(config_obj.follower_list_file_name, ["Follower List", "5", "4", "x", "2", "1", "0"])
+    write_test_file(config_obj.friend_edges_file_name, ["Friend Edges", "SourceVertexID|DestinationVertexID", "0|1", "1|0", "3|3", "4|0", "9|1"])
+    write_test_file(config_obj.mirror_edges_file_name, ["Mirror Edges", "SourceTradeBookID|DestinationTradeBookID", "7|6", "7|8", "11|10", "2|6"])
+    write_test_file(config_obj.remove_mirror_edges_file_name, ["Remove Mirror Edge List", "SourceTradeBookID|DestinationTradeBookID", "8|7"])
+
+    test_object = DatasetValidator(config_obj)
+
+    assert not test_object.validate(),\
+        "DatasetValidator_VALIDATE_ERROR invalid dataset is reported valid"
+
+    report = test_object.report
+    assert (report["investor_names"]["duplicate_ids"], report["investor_names"]["missing_ids"], report["investor_names"]["out_of_range_ids"]) == (1, 2, 1),\
+        "DatasetValidator_ID_ERROR duplicate, missing or out of range IDs are not detected"
+
+    assert report["follower_list"]["invalid_lines"] == 1 and report["follower_list"]["missing_ids"] == 1,\
+        "DatasetValidator_ID_ERROR invalid lines are not detected"
+
+    assert (report["friend_edges"]["duplicate_edges"], report["friend_edges"]["self_loops"], report["friend_edges"]["out_of_range_edges"]) == (1, 1, 1),\
+        "DatasetValidator_FRIEND_ERROR duplicate edges, self-loops or out of range IDs are not detected"
+
+    assert report["mirror_edges"]["edges_without_friend_edge"] == 2 and report["mirror_edges"]["out_of_range_edges"] == 1,\
+        "DatasetValidator_MIRROR_ERROR mirror edges without friend edge are not detected"
+
+    assert report["remove_mirror_edges"]["edges_without_mirror_edge"] == 1,\
+        "DatasetValidator_REMOVE_ERROR removed edges that are not mirror edges are not detected"
+
+    assert report["company_names"]["valid"] and report["leader_list_2"]["valid"],\
+        "DatasetValidator_VALIDATE_ERROR valid files are reported invalid"
+
+# Function to execute all defined unit tests for DatasetValidator
+def execute_all_unit_tests():
+    test_count_missing_keys()
+    test_valid_dataset()
+    test_invalid_dataset()
+
+
+if __name__ == "__main__":
+    arglist = sys.argv
+
+    # Checking if the number of command line arguments is as expected
+    if len(arglist) != 2:
+        print("Incorrect number of command line arguments")
+        print("Usage: python",arglist[0],"<JSON config file>")
+    else:
+        # validating the dataset generated with the configuration file provided (and the datasets
+        # of its nested scale factors, if configured)
+        config_obj = Configuration(arglist[1])
+        is_valid = True
+        for scale_factor in [None,] + (config_obj.nested_scale_factors or []):
+            if scale_factor is not None:
+                print("Nested scale factor in", scale_factor["output_directory"] + ":")
+
+            validator_obj = DatasetValidator(config_obj if scale_factor is None else config_obj.get_scale_factor_configuration(scale_factor))
+            is_valid = validator_obj.validate() and is_valid
+            validator_obj.print_report()
+
+        print("Dataset Validation", "Complete" if is_valid else "Failed")
+        sys.exit(0 if is_valid else 1)
+
+# End of BDG023_DatasetValidator.py
@@ -0,0 +1,284 @@
+"""
+FYP : 22013
+
+Module:
+    Base Data Generator
+
+Description:
+    This python script contains the definition of the ColumnReader class, the
+    functions parsing and reading integer columns of generated files and their
+    unit tests.
+
+    The ColumnReader class reads the integer columns (e.g. vertex IDs) of a
+    generated file as record batches without a Python loop per line. The file is
+    memory-mapped and processed in chunks of whole lines: the positions of the
+    separators and newlines of a chunk are found with NumPy, and the digits of
+    every requested field are converted for all lines at once, one digit position
+    at a time. The pages of the chunks already parsed are released, so the
+    memory used depends on the chunk size and not on the size of the file.
+
+    Lines with a wrong number of columns or a requested field that is not a
+    non-negative integer are skipped and counted in number_of_invalid_lines.
+
+"""
+
+
+# Imports from built-in modules
+import mmap
+import numpy as np
+import os
+
+# Imports from Base Data Generator Module
+from data_sinks.BDG010_RecordBatch import COLUMN_SEPARATOR, make_record_batch
+from data_sinks.BDG012_PartitionedFileWriter import PartitionedFileWriter
+
+# Byte values of the separator, the newline and the digit 0
+SEPARATOR_BYTE = ord(COLUMN_SEPARATOR)
+NEWLINE_BYTE = ord("\n")
+ZERO_BYTE = ord("0")
+
+# Largest number of digits of a parsed integer (larger ones could overflow int64)
+MAX_INTEGER_DIGITS = 18
+
+# Powers of 10 by digit position, from the last digit of the field
+DIGIT_POWERS = 10 ** np.arange(0, MAX_INTEGER_DIGITS, dtype=np.int64)
+
+def parse_integer_columns(lines_buffer, number_of_columns, column_indices):
+    """
+    Description:
+        Parses the columns of column_indices as integers from the buffer of
+        whole lines (a uint8 array ending with a newline). Returns the list of
+        int64 columns of the valid lines and the number of invalid lines.
+    """
+
+    is_newline = lines_buffer == NEWLINE_BYTE
+    delimiter_positions = np.flatnonzero(is_newline | (lines_buffer == SEPARATOR_BYTE))
+    line_end_indices = np.flatnonzero(is_newline[delimiter_positions])
+
+    # number of delimiters (separators and the newline) of every line
+    delimiters_per_line = np.diff(np.concatenate(([-1,], line_end_indices)))
+    has_all_columns = delimiters_per_line == number_of_columns
+
+    # index in delimiter_positions of the first delimiter of every line with all columns
+    first_delimiter_indices = (line_end_indices - number_of_columns + 1)[has_all_columns]
+
+    # lines with all columns whose requested fields are all valid integers
+    is_valid_line = np.ones((len(first_delimiter_indices),), dtype=np.bool_)
+
+    columns = []
+    for column_index in column_indices:
+        field_end_positions = delimiter_positions[first_delimiter_indices + column_index]
+        field_start_positions = np.where(first_delimiter_indices + column_index > 0,\
+                                            delimiter_positions[np.maximum(first_delimiter_indices + column_index - 1, 0)] + 1, 0)
+        field_lengths = field_end_positions - field_start_positions
+
+        is_valid_field = (field_lengths > 0) & (field_lengths <= MAX_INTEGER_DIGITS)
+        values = np.zeros((len(field_end_positions),), dtype=np.int64)
+
+        for digit_position in range(0, min(int(field_lengths.max(initial=0)), MAX_INTEGER_DIGITS)):
+            # fields shorter than digit_position + 1 read the byte 0 instead of a digit
+            has_digit = digit_position < field_lengths
+            digits = np.where(has_digit, lines_buffer[np.maximum(field_end_positions - 1 - digit_position, 0)], ZERO_BYTE).astype(np.int64) - ZERO_BYTE
+            is_valid_field &= (digits >= 0) & (digits <= 9)
+            values += digits * DIGIT_POWERS[digit_position]
+
+        columns.append(values)
+        is_valid_line &= is_valid_field
+
+    # dropping the lines with an invalid field in any requested column
+    columns = [values[is_valid_line] for values in columns]
+
+    return columns, int(len(line_end_indices) - np.count_nonzero(is_valid_line))
+
+class ColumnReader:
+
+    def __init__(self, file_name, number_of_columns=2, header_lines=0, chunk_size=16 * 1024 * 1024):
+
+        # File to read
+        self.file_name = file_name
+
+        # Number of columns of every line
+        self.number_of_columns = number_of_columns
+
+        # Number of lines at the start of the file that are not data (e.g. the header)
+        self.header_lines = header_lines
+
+        # Number of bytes parsed at a time (rounded to whole lines)
+        self.chunk_size = chunk_size
+
+        # Number of lines skipped because they are invalid
+        self.number_of_invalid_lines = 0
+
+    def iter_line_buffers(self):
+        """
+        Description:
+            Generator memory-mapping the file and yielding it as uint8 buffers of
+            whole lines of about chunk_size bytes, after the header lines. A
+            missing newline at the end of the file is added. The pages of every
+            buffer are released once the next one is requested.
+        """
+
+        file_size = os.path.getsize(self.file_name)
+        if file_size == 0:
+            return
+
+        with open(self.file_name, mode='rb') as in_file:
+            file_map = mmap.mmap(in_file.fileno(), 0, access=mmap.ACCESS_READ)
+            if hasattr(file_map, "madvise") and hasattr(mmap, "MADV_SEQUENTIAL"):
+                file_map.madvise(mmap.MADV_SEQUENTIAL)
+
+            file_bytes = np.frombuffer(file_map, dtype=np.uint8)
+
+            # skipping the header lines
+            start = 0
+            for i in range(0, self.header_lines):
+                newline_position = file_map.find(b"\n", start)
+                start = file_size if newline_position < 0 else newline_position + 1
+
+            while start < file_size:
+                end = min(start + self.chunk_size, file_size)
+                if end < file_size:
+                    newline_position = file_map.rfind(b"\n", start, end)
+                    end = file_map.find(b"\n", end) + 1 if newline_position < 0 else newline_position + 1
+                    end = file_size if end == 0 else end
+
+                if file_bytes[end - 1] == NEWLINE_BYTE:
+                    yield file_bytes[start:end]
+                else:
+                    yield np.append(file_bytes[start:end], np.uint8(NEWLINE_BYTE))
+
+                # releasing the pages of the parsed lines
+                if hasattr(file_map, "madvise") and hasattr(mmap, "MADV_DONTNEED"):
+                    released_start = start - start % mmap.PAGESIZE
+                    released_end = end - end % mmap.PAGESIZE
+                    if released_end > released_start:
+                        file_map.madvise(mmap.MADV_DONTNEED, released_start, released_end - released_start)
+
+                start = end
+
+            del file_bytes
+            file_map.close()
+            in_file.close()
+
+    def iter_batches(self, column_indices, field_names):
+        """
+        Description:
+            Generator yielding the integer columns of column_indices of the valid
+            lines as record batches with the field names (int64 fields).
+        """
+
+        for lines_buffer in self.iter_line_buffers():
+            columns, number_of_invalid_lines = parse_integer_columns(lines_buffer, self.number_of_columns, column_indices)
+            del lines_buffer
+
+            self.number_of_invalid_lines += number_of_invalid_lines
+            yield make_record_batch(field_names, columns)
+
+def get_data_files(destination_file, header_lines, number_of_partitions=None):
+    """
+    Description:
+        Returns the list of (file name, number of header lines) storing the data
+        of destination_file: the file itself, or its part files (without header)
+        if it was written with the partitioned output layout (number_of_partitions
+        is given).
+    """
+
+    if number_of_partitions is None:
+        return [(destination_file, header_lines),]
+
+    writer = PartitionedFileWriter(destination_file=destination_file,\
+                                    number_of_partitions=number_of_partitions)
+    return [(writer.get_part_file_name(i), 0) for i in range(0, number_of_partitions)]
+
+def iter_integer_columns(data_files, number_of_columns, column_indices, chunk_size=16 * 1024 * 1024):
+    """
+    Description:
+        Generator yielding the integer columns of column_indices of all data
+        files (as returned by get_data_files) as lists of int64 columns, one
+        chunk at a time.
+    """
+
+    field_names = ["column_" + str(column_index) for column_index in column_indices]
+
+    for file_name, header_lines in data_files:
+        reader = ColumnReader(file_name,\
+                                number_of_columns=number_of_columns,\
+                                header_lines=header_lines,\
+                                chunk_size=chunk_size)
+
+        for batch in reader.iter_batches(column_indices, field_names):
+            yield [batch[field_name] for field_name in field_names]
+
+def read_integer_columns(data_files, number_of_columns, column_indices, chunk_size=16 * 1024 * 1024):
+    """
+    Description:
+        Reads the integer columns of column_indices of all data files (as
+        returned by get_data_files) into memory. Returns the list of int64
+        columns.
+    """
+
+    chunks = list(iter_integer_columns(data_files, number_of_columns, column_indices, chunk_size))
+    if len(chunks) == 0:
+        return [np.zeros((0,), dtype=np.int64) for column_index in column_indices]
+
+    return [np.concatenate([chunk[i] for chunk in chunks]) for i in range(0, len(column_indices))]
+
+
+# Unit tests to test if integer columns are parsed and invalid lines are skipped
+def test_parse_integer_columns():
+    lines_buffer = np.frombuffer(b"12|abc7|0\n5||3\n|1|2\n907|x|65\n1|2\n8|9|10|11\n", dtype=np.uint8)
+
+    columns, number_of_invalid_lines = parse_integer_columns(lines_buffer, 3, [0, 2])
+
+    # only the requested columns must be integers (the empty field of "5||3" is not requested)
+    assert columns[0].tolist() == [12, 5, 907] and columns[1].tolist() == [0, 3, 65],\
+        "ColumnReader_PARSE_ERROR parsed columns are invalid"
+
+    assert number_of_invalid_lines == 3,\
+        "ColumnReader_PARSE_ERROR invalid lines are not counted"
+
+# Unit tests to test if ColumnReader reads files in chunks of whole lines
+def test_column_reader():
+    with open("column_reader_test.csv", mode='w') as out_file:
+        out_file.write("Friend Edges\nSourceVertexID|DestinationVertexID\n")
+        out_file.write("".join(str(i) + "|" + str(3 * i) + "\n" for i in range(0, 1000)))
+        out_file.write("1000|x\n1001|3003")
+        out_file.close()
+
+    test_object = ColumnReader("column_reader_test.csv", number_of_columns=2, header_lines=2, chunk_size=100)
+    batches = list(test_object.iter_batches([1, 0], ["DestinationVertexID", "SourceVertexID"]))
+    all_rows = np.concatenate(batches)
+
+    assert len(batches) > 10 and all_rows["SourceVertexID"].tolist() == list(range(0, 1000)) + [1001,],\
+        "ColumnReader_READ_ERROR source column is invalid"
+
+    assert all_rows["DestinationVertexID"].tolist() == [3 * i for i in range(0, 1000)] + [3003,],\
+        "ColumnReader_READ_ERROR destination column is invalid"
+
+    assert test_object.number_of_invalid_lines == 1,\
+        "ColumnReader_READ_ERROR invalid lines are not counted"
+
+# Unit tests to test if the columns of all part files are read
+def test_read_integer_columns():
+    writer = PartitionedFileWriter(destination_file="column_reader_partitioned_test.csv", number_of_partitions=3)
+    for i in range(0, 3):
+        with open(writer.get_part_file_name(i), mode='w') as out_file:
+            out_file.write("".join(str(j) + "|" + str(i) + "\n" for j in range(i, 10, 3)))
+            out_file.close()
+
+    data_files = get_data_files("column_reader_partitioned_test.csv", 1, number_of_partitions=3)
+    assert data_files == [(writer.get_part_file_name(i), 0) for i in range(0, 3)],\
+        "ColumnReader_FILES_ERROR part files are invalid"
+
+    vertex_ids, partition_indices = read_integer_columns(data_files, 2, [0, 1])
+    assert vertex_ids.tolist() == [0, 3, 6, 9, 1, 4, 7, 2, 5, 8] and partition_indices.tolist() == [0, 0, 0, 0, 1, 1, 1, 2, 2, 2],\
+        "ColumnReader_READ_ERROR columns of the part files are invalid"
+
+    assert len(read_integer_columns([], 2, [0,])[0]) == 0,\
+        "ColumnReader_READ_ERROR columns of no files are invalid"
+
+# Function to execute all defined unit tests for ColumnReader
+def execute_all_unit_tests():
+    test_parse_integer_columns()
+    test_column_reader()
+    test_read_integer_columns()
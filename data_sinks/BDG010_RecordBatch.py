@@ -0,0 +1,101 @@
+"""
+FYP : 22013
+
+Module:
+    Base Data Generator
+
+Description:
+    This python script contains the helper functions to create and format record
+    batches and their unit tests.
+
+    A record batch is a NumPy structured array holding one batch of generated
+    rows. The field names of the record batch are the column names used in the
+    header of the destination file (for example: investorID|Name), so the same
+    batch can be written to a file or consumed in memory by other tools.
+
+"""
+
+
+# Imports from built-in modules
+import numpy as np
+
+# Separator used between the columns in the generated files
+COLUMN_SEPARATOR = "|"
+
+def make_record_batch(field_names, columns):
+    """
+    Description:
+        Creates a record batch (NumPy structured array) from the list of field
+        names and the list of columns (one NumPy array per field). All columns
+        must have the same number of elements.
+    """
+
+    assert len(field_names) == len(columns),\
+        "RecordBatch_ERROR: Number of field names and columns must be the same"
+
+    columns = [np.asarray(column) for column in columns]
+
+    batch = np.empty(len(columns[0]) if columns else 0,\
+                        dtype=[(name, column.dtype) for name, column in zip(field_names, columns)])
+
+    for name, column in zip(field_names, columns):
+        batch[name] = column
+
+    return batch
+
+def format_record_batch(batch, field_names=None):
+    """
+    Description:
+        Formats the record batch as the lines to be written to a file. Only the
+        fields in field_names are written (all fields if field_names is None),
+        separated by COLUMN_SEPARATOR.
+    """
+
+    if field_names is None:
+        field_names = batch.dtype.names
+
+    columns = [batch[name].tolist() for name in field_names]
+
+    return "".join(COLUMN_SEPARATOR.join(map(str, row)) + "\n" for row in zip(*columns))
+
+def get_header_line(field_names):
+    """
+    Description:
+        Returns the header line for the files storing record batches with the
+        given field names.
+    """
+
+    return COLUMN_SEPARATOR.join(field_names) + "\n"
+
+# Unit tests to test if record batches are created correctly
+def test_make_record_batch():
+    batch = make_record_batch(["investorID", "Name"],\
+                                [np.arange(5, 8), np.array(["abc", "de", "fgh"])])
+
+    assert batch.dtype.names == ("investorID", "Name"),\
+        "RecordBatch_MAKE_ERROR field names are invalid"
+
+    assert batch["investorID"].tolist() == [5, 6, 7],\
+        "RecordBatch_MAKE_ERROR ID column is invalid"
+
+    assert batch["Name"].tolist() == ["abc", "de", "fgh"],\
+        "RecordBatch_MAKE_ERROR Name column is invalid"
+
+# Unit tests to test if record batches are formatted correctly
+def test_format_record_batch():
+    batch = make_record_batch(["SourceVertexID", "DestinationVertexID", "Flag"],\
+                                [np.array([1, 2]), np.array([3, 4]), np.array([True, False])])
+
+    assert format_record_batch(batch) == "1|3|True\n2|4|False\n",\
+        "RecordBatch_FORMAT_ERROR all fields formatted incorrectly"
+
+    assert format_record_batch(batch, ["SourceVertexID", "DestinationVertexID"]) == "1|3\n2|4\n",\
+        "RecordBatch_FORMAT_ERROR selected fields formatted incorrectly"
+
+    assert get_header_line(["SourceVertexID", "DestinationVertexID"]) == "SourceVertexID|DestinationVertexID\n",\
+        "RecordBatch_FORMAT_ERROR header line is invalid"
+
+# Function to execute all defined unit tests for the record batch helpers
+def execute_all_unit_tests():
+    test_make_record_batch()
+    test_format_record_batch()
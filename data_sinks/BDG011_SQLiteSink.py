@@ -0,0 +1,220 @@
+"""
+FYP : 22013
+
+Module:
+    Base Data Generator
+
+Description:
+    This python script contains the definition of the SQLiteSink class and its
+    unit tests.
+
+    The SQLiteSink class bulk-loads the record batches produced by the
+    generators into a SQLite database file using the sqlite3 module of the
+    standard library. Tables are created from the field names (the file header
+    columns) and dtypes of the record batches, rows are inserted with prepared
+    executemany() batches inside large transactions and the indexes are built
+    only after all the rows have been loaded.
+
+"""
+
+
+# Imports from built-in modules
+import numpy as np
+import os
+import sqlite3
+
+# Imports from Base Data Generator Module
+from data_sinks.BDG010_RecordBatch import make_record_batch
+
+class SQLiteSink:
+
+    def __init__(self, database_file="base_data.db",\
+                 rows_per_transaction=500000,\
+                 busy_timeout=600):
+
+        # Database file to load the generated data into
+        self.database_file = database_file
+
+        # Number of rows inserted in a single transaction before committing
+        self.rows_per_transaction = rows_per_transaction
+
+        # Number of rows inserted since the last commit
+        self.uncommitted_rows = 0
+
+        # Connection to the database. The busy timeout (in seconds) lets multiple
+        # processes load different tables into the same database file
+        self.connection = sqlite3.connect(database_file, timeout=busy_timeout)
+
+        # Bulk loading does not need durability of every transaction
+        self.connection.execute("PRAGMA synchronous=OFF")
+        self.connection.execute("PRAGMA journal_mode=MEMORY")
+
+    @staticmethod
+    def get_table_name(file_name):
+        """
+        Description:
+            Returns the table name used for the data that would otherwise be
+            stored in file_name, e.g. 'Data/InvestorNames.csv' -> 'InvestorNames'.
+        """
+
+        return os.path.splitext(os.path.basename(file_name))[0]
+
+    @staticmethod
+    def get_column_type(dtype):
+        """
+        Description:
+            Returns the SQLite column type for a NumPy dtype.
+        """
+
+        if np.issubdtype(dtype, np.integer) or np.issubdtype(dtype, np.bool_):
+            return "INTEGER"
+        if np.issubdtype(dtype, np.floating):
+            return "REAL"
+        return "TEXT"
+
+    def create_table(self, table_name, field_names, dtype=None):
+        """
+        Description:
+            (Re)creates the table with one column per field name. The column types
+            are taken from the record batch dtype, if provided.
+        """
+
+        column_definitions = []
+        for field_name in field_names:
+            column_definition = '"' + field_name + '"'
+            if dtype is not None:
+                column_definition += " " + self.get_column_type(dtype[field_name])
+            column_definitions.append(column_definition)
+
+        self.connection.execute('DROP TABLE IF EXISTS "' + table_name + '"')
+        self.connection.execute('CREATE TABLE "' + table_name + '" (' + ", ".join(column_definitions) + ")")
+        self.connection.commit()
+
+    def insert_record_batch(self, table_name, batch, field_names):
+        """
+        Description:
+            Inserts the fields in field_names of the record batch into the table
+            with a prepared executemany() statement. The transaction is committed
+            once rows_per_transaction rows have been inserted.
+        """
+
+        statement = 'INSERT INTO "' + table_name + '" VALUES (' + ", ".join(["?"] * len(field_names)) + ")"
+        self.connection.executemany(statement, batch[list(field_names)].tolist())
+
+        self.uncommitted_rows += len(batch)
+        if (self.uncommitted_rows >= self.rows_per_transaction):
+            self.connection.commit()
+            self.uncommitted_rows = 0
+
+    def create_index(self, table_name, field_names, unique=False):
+        """
+        Description:
+            Commits the pending rows and creates an index on the fields of the
+            table.
+        """
+
+        self.connection.commit()
+        self.uncommitted_rows = 0
+
+        index_name = table_name + "_" + "_".join(field_names) + "_index"
+        self.connection.execute("CREATE " + ("UNIQUE " if unique else "") + 'INDEX "' + index_name + '" ON "' +\
+                                    table_name + '" (' + ", ".join('"' + name + '"' for name in field_names) + ")")
+        self.connection.commit()
+
+    def load_record_batches(self, table_name, field_names, batches, index_fields=[], unique_index_fields=[]):
+        """
+        Description:
+            Creates the table (using the dtype of the first record batch), loads
+            all record batches into it and then creates one index per field in
+            index_fields and one unique index per field in unique_index_fields.
+            Returns the number of loaded rows.
+        """
+
+        table_created = False
+        number_of_rows = 0
+
+        for batch in batches:
+            if not table_created:
+                self.create_table(table_name, field_names, batch.dtype)
+                table_created = True
+
+            self.insert_record_batch(table_name, batch, field_names)
+            number_of_rows += len(batch)
+
+        if not table_created:
+            self.create_table(table_name, field_names)
+
+        for field_name in unique_index_fields:
+            self.create_index(table_name, [field_name,], unique=True)
+
+        for field_name in index_fields:
+            self.create_index(table_name, [field_name,])
+
+        return number_of_rows
+
+    def close(self):
+        """
+        Description:
+            Commits the pending rows and closes the database connection.
+        """
+
+        self.connection.commit()
+        self.connection.close()
+
+
+# Unit tests to test if SQLiteSink loads record batches and creates indexes
+def test_load_record_batches():
+    if os.path.exists("sqlite_sink_test.db"):
+        os.remove("sqlite_sink_test.db")
+
+    test_object = SQLiteSink("sqlite_sink_test.db", rows_per_transaction=3)
+
+    batches = [make_record_batch(["investorID", "Name"], [np.arange(0, 4), np.array(["a", "b", "c", "d"])]),\
+               make_record_batch(["investorID", "Name"], [np.arange(4, 6), np.array(["e", "f"])])]
+
+    number_of_rows = test_object.load_record_batches(SQLiteSink.get_table_name("Data/InvestorNames.csv"),\
+                                                        ["investorID", "Name"],\
+                                                        batches,\
+                                                        unique_index_fields=["investorID",])
+
+    assert number_of_rows == 6,\
+        "SQLiteSink_LOAD_ERROR Wrong number of rows loaded"
+
+    rows = test_object.connection.execute('SELECT investorID, Name FROM "InvestorNames" ORDER BY rowid').fetchall()
+
+    assert rows == [(0, "a"), (1, "b"), (2, "c"), (3, "d"), (4, "e"), (5, "f")],\
+        "SQLiteSink_LOAD_ERROR Loaded rows are invalid"
+
+    column_types = [row[2] for row in test_object.connection.execute('PRAGMA table_info("InvestorNames")')]
+
+    assert column_types == ["INTEGER", "TEXT"],\
+        "SQLiteSink_LOAD_ERROR Column types are invalid"
+
+    index_names = [row[1] for row in test_object.connection.execute('PRAGMA index_list("InvestorNames")')]
+
+    assert index_names == ["InvestorNames_investorID_index"],\
+        "SQLiteSink_LOAD_ERROR Index was not created"
+
+    test_object.close()
+
+# Unit tests to test if SQLiteSink creates empty tables when there are no batches
+def test_load_empty_record_batches():
+    test_object = SQLiteSink("sqlite_sink_test.db")
+
+    number_of_rows = test_object.load_record_batches("RemoveMirrorEdges",\
+                                                        ["SourceTradeBookID", "DestinationTradeBookID"],\
+                                                        [],\
+                                                        index_fields=["SourceTradeBookID",])
+
+    assert number_of_rows == 0,\
+        "SQLiteSink_LOAD_ERROR Rows loaded without batches"
+
+    assert test_object.connection.execute('SELECT COUNT(*) FROM "RemoveMirrorEdges"').fetchone()[0] == 0,\
+        "SQLiteSink_LOAD_ERROR Empty table was not created"
+
+    test_object.close()
+
+# Function to execute all defined unit tests for SQLiteSink
+def execute_all_unit_tests():
+    test_load_record_batches()
+    test_load_empty_record_batches()
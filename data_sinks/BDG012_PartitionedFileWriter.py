@@ -0,0 +1,207 @@
+"""
+FYP : 22013
+
+Module:
+    Base Data Generator
+
+Description:
+    This python script contains the definition of the PartitionedFileWriter
+    class and its unit tests.
+
+    The PartitionedFileWriter class writes the record batches produced by the
+    generators directly into N part files instead of a single file, so that
+    bulk loaders of graph databases can import the parts in parallel without
+    resplitting the single file first. The rows are partitioned by hash or range
+    of the source vertex (the first field of the record batch) and the header is
+    written to a separate header file using loader-ready column names, e.g.
+    :START_ID|:END_ID for the edges.
+
+"""
+
+
+# Imports from built-in modules
+import numpy as np
+import os
+import threading
+
+# Imports from Base Data Generator Module
+from data_sinks.BDG010_RecordBatch import format_record_batch, get_header_line, make_record_batch
+
+# Odd 64 bit constant (2^64 / golden ratio) used by the multiplicative hash
+HASH_MULTIPLIER = np.uint64(0x9E3779B97F4A7C15)
+
+class PartitionedFileWriter:
+
+    def __init__(self, destination_file="vertex.csv",\
+                 number_of_partitions=4,\
+                 partition_scheme="hash",\
+                 low_id=0,\
+                 high_id=10):
+
+        # Destination file whose name is used for the part files and the header file
+        self.destination_file = destination_file
+
+        # Number of part files
+        self.number_of_partitions = number_of_partitions
+
+        # "hash" or "range" partitioning of the source vertex
+        self.partition_scheme = partition_scheme
+
+        # The source vertex IDs are in the range [low_id, high_id), used by range partitioning
+        self.low_id = low_id
+        self.high_id = high_id
+
+        assert partition_scheme in ["hash", "range"],\
+            "PartitionedFileWriter_ERROR: partition_scheme must be 'hash' or 'range'"
+
+        assert number_of_partitions > 0,\
+            "PartitionedFileWriter_ERROR: number_of_partitions must be positive"
+
+        assert high_id > low_id,\
+            "PartitionedFileWriter_ERROR: high_id must be larger than low_id"
+
+        # One lock per part file, so threads can write different parts at the same time
+        self.part_file_lock_list = [threading.Lock() for i in range(0, number_of_partitions)]
+
+    def get_part_file_name(self, partition_index):
+        """
+        Description:
+            Returns the name of the part file, e.g. Data/FriendEdges_part-00003.csv
+        """
+
+        base_name, extension = os.path.splitext(self.destination_file)
+        return base_name + "_part-" + str(partition_index).zfill(5) + extension
+
+    def get_header_file_name(self):
+        """
+        Description:
+            Returns the name of the header file, e.g. Data/FriendEdges_header.csv
+        """
+
+        base_name, extension = os.path.splitext(self.destination_file)
+        return base_name + "_header" + extension
+
+    def get_partition_indices(self, source_vertex_ids):
+        """
+        Description:
+            Returns the part file index for every source vertex ID.
+        """
+
+        source_vertex_ids = np.asarray(source_vertex_ids, dtype=np.int64)
+
+        if (self.partition_scheme == "range"):
+            partition_indices = ((source_vertex_ids - self.low_id) * self.number_of_partitions) // (self.high_id - self.low_id)
+            return np.clip(partition_indices, 0, self.number_of_partitions - 1)
+
+        hashed_ids = source_vertex_ids.astype(np.uint64) * HASH_MULTIPLIER
+        return ((hashed_ids >> np.uint64(32)) % np.uint64(self.number_of_partitions)).astype(np.int64)
+
+    def reset_destination_files(self, loader_header_fields):
+        """
+        Description:
+            Writes the loader-ready column names (given by the generator) to the
+            header file and creates (or resets) all the part files.
+        """
+
+        with open(self.get_header_file_name(), mode='w') as out_file:
+            out_file.write(get_header_line(loader_header_fields))
+            out_file.close()
+
+        for partition_index in range(0, self.number_of_partitions):
+            with open(self.get_part_file_name(partition_index), mode='w') as out_file:
+                out_file.write('')
+                out_file.close()
+
+    def write_record_batch(self, batch, field_names=None):
+        """
+        Description:
+            Threads call this function to append the rows of the record batch to
+            the part files of their source vertices (the first field). Only one
+            thread can be writing to a part file at a time.
+        """
+
+        if field_names is None:
+            field_names = batch.dtype.names
+
+        partition_indices = self.get_partition_indices(batch[field_names[0]])
+
+        # grouping the rows by their partition while keeping their order
+        sorted_row_indices = np.argsort(partition_indices, kind='stable')
+        partition_ends = np.cumsum(np.bincount(partition_indices, minlength=self.number_of_partitions))
+
+        partition_start = 0
+        for partition_index in range(0, self.number_of_partitions):
+            partition_end = partition_ends[partition_index]
+            if (partition_end > partition_start):
+                lines = format_record_batch(batch[sorted_row_indices[partition_start:partition_end]], field_names)
+
+                self.part_file_lock_list[partition_index].acquire()
+                with open(self.get_part_file_name(partition_index), mode='a') as out_file:
+                    out_file.write(lines)
+                    out_file.close()
+                self.part_file_lock_list[partition_index].release()
+
+            partition_start = partition_end
+
+
+# Reads the lines of all part files written by the test object
+def read_part_files(test_object):
+    part_lines = []
+    for partition_index in range(0, test_object.number_of_partitions):
+        with open(test_object.get_part_file_name(partition_index), mode='r') as in_file:
+            part_lines.append(in_file.read().splitlines())
+            in_file.close()
+    return part_lines
+
+# Unit tests to test if PartitionedFileWriter partitions by range correctly
+def test_range_partitioning():
+    test_object = PartitionedFileWriter(destination_file="partitioned_test.csv",\
+                                        number_of_partitions=4,\
+                                        partition_scheme="range",\
+                                        low_id=100,\
+                                        high_id=120)
+    test_object.reset_destination_files([":START_ID", ":END_ID"])
+
+    batch = make_record_batch(["SourceVertexID", "DestinationVertexID"],\
+                                [np.array([119, 100, 104, 105, 101]), np.array([1, 2, 3, 4, 5])])
+    test_object.write_record_batch(batch)
+
+    assert read_part_files(test_object) == [["100|2", "104|3", "101|5"], ["105|4"], [], ["119|1"]],\
+        "PartitionedFileWriter_RANGE_ERROR rows written to the wrong part files"
+
+    with open(test_object.get_header_file_name(), mode='r') as in_file:
+        assert in_file.read() == ":START_ID|:END_ID\n",\
+            "PartitionedFileWriter_RANGE_ERROR header file is invalid"
+        in_file.close()
+
+# Unit tests to test if PartitionedFileWriter partitions by hash correctly
+def test_hash_partitioning():
+    test_object = PartitionedFileWriter(destination_file="partitioned_test.csv",\
+                                        number_of_partitions=3,\
+                                        partition_scheme="hash",\
+                                        low_id=0,\
+                                        high_id=1000)
+    test_object.reset_destination_files(["investorID:ID", "Name"])
+
+    batch = make_record_batch(["investorID", "Name"], [np.arange(0, 1000), np.arange(0, 1000)])
+    test_object.write_record_batch(batch)
+    test_object.write_record_batch(batch[:10])
+
+    part_lines = read_part_files(test_object)
+    written_ids = [int(line.split("|")[0]) for lines in part_lines for line in lines]
+
+    assert sorted(written_ids) == sorted(list(range(0, 1000)) + list(range(0, 10))),\
+        "PartitionedFileWriter_HASH_ERROR rows lost or duplicated"
+
+    for partition_index in range(0, 3):
+        for line in part_lines[partition_index]:
+            assert test_object.get_partition_indices([int(line.split("|")[0])])[0] == partition_index,\
+                "PartitionedFileWriter_HASH_ERROR row written to the wrong part file"
+
+    assert min(len(lines) for lines in part_lines) > 250,\
+        "PartitionedFileWriter_HASH_ERROR rows are not spread over the part files"
+
+# Function to execute all defined unit tests for PartitionedFileWriter
+def execute_all_unit_tests():
+    test_range_partitioning()
+    test_hash_partitioning()
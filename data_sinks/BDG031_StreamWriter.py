@@ -0,0 +1,314 @@
+"""
+FYP : 22013
+
+Module:
+    Base Data Generator
+
+Description:
+    This python script contains the definition of the StreamWriter class and
+    its unit tests.
+
+    The StreamWriter class writes the record batches produced by the generators
+    to a stream instead of a regular file, so that a bulk loader (or any other
+    consumer) can read the rows while they are being generated without the
+    whole output ever being stored on disk. The stream can be the standard
+    output ("-"), an already open file descriptor ("fd:N") or a named pipe
+    (FIFO) created beforehand with mkfifo.
+
+    The rows are passed to a dedicated writer thread through a bounded buffer.
+    When the consumer reads slower than the generators produce, the buffer
+    fills up and write_record_batch blocks the calling worker until the writer
+    thread has drained it, so the backpressure of the consumer propagates to
+    the workers while the memory usage stays bounded. Opening a FIFO (which
+    blocks until the consumer opens the other end) is also done by the writer
+    thread, so several outputs can be streamed at the same time without one
+    stage waiting for the consumer of another.
+
+"""
+
+
+# Imports from built-in modules
+import collections
+import numpy as np
+import os
+import stat
+import threading
+
+# Imports from Base Data Generator Module
+from data_sinks.BDG010_RecordBatch import format_record_batch, get_header_line, make_record_batch
+
+# Output file name of the standard output stream
+STDOUT_TARGET = "-"
+
+# Prefix of the output file names of already open file descriptors, e.g. fd:3
+FILE_DESCRIPTOR_PREFIX = "fd:"
+
+def is_stream_target(file_name):
+    """
+    Description:
+        Returns True if the output file name refers to a stream (the standard
+        output, a file descriptor or an existing FIFO) rather than a regular file.
+    """
+
+    if not isinstance(file_name, str):
+        return False
+
+    if (file_name == STDOUT_TARGET) or file_name.startswith(FILE_DESCRIPTOR_PREFIX):
+        return True
+
+    return os.path.exists(file_name) and stat.S_ISFIFO(os.stat(file_name).st_mode)
+
+class StreamWriter:
+
+    def __init__(self, destination_file="-",\
+                 max_buffered_bytes=4194304):
+
+        # Standard output ("-"), file descriptor ("fd:N") or path of the FIFO (or file) to write to
+        self.destination_file = destination_file
+
+        # Maximum number of bytes waiting in the buffer before writers are blocked
+        self.max_buffered_bytes = max_buffered_bytes
+
+        assert max_buffered_bytes > 0,\
+            "StreamWriter_ERROR: max_buffered_bytes must be positive"
+
+        if destination_file.startswith(FILE_DESCRIPTOR_PREFIX):
+            assert destination_file[len(FILE_DESCRIPTOR_PREFIX):].isdigit(),\
+                "StreamWriter_ERROR: file descriptor targets must be of the form fd:N"
+
+        # Chunks of encoded lines waiting to be written by the writer thread
+        self.buffered_chunks = collections.deque()
+
+        # Total size of the chunks in the buffer
+        self.buffered_bytes = 0
+
+        # Condition used to block writers on a full buffer and the writer thread on an empty one
+        self.buffer_condition = threading.Condition()
+
+        # Set by close() once no more chunks will be added
+        self.is_closed = False
+
+        # First error raised while opening or writing the stream
+        self.stream_error = None
+
+        # Thread writing the buffered chunks to the stream, started by the first write
+        self.writer_thread = None
+
+    def open_stream(self):
+        """
+        Description:
+            Returns a new file descriptor of the stream. The standard output and
+            file descriptor targets are duplicated, so that closing the writer
+            does not close the descriptor of the caller.
+        """
+
+        if (self.destination_file == STDOUT_TARGET):
+            return os.dup(1)
+
+        if self.destination_file.startswith(FILE_DESCRIPTOR_PREFIX):
+            return os.dup(int(self.destination_file[len(FILE_DESCRIPTOR_PREFIX):]))
+
+        # blocks until the consumer opens the read end if the destination is a FIFO
+        return os.open(self.destination_file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+
+    def write_chunks(self):
+        """
+        Description:
+            Executed by the writer thread. Opens the stream and writes the
+            buffered chunks in order until the writer is closed. After an error
+            the remaining chunks are discarded, so that blocked writers are
+            released and raise the error instead of waiting forever.
+        """
+
+        file_descriptor = None
+        try:
+            file_descriptor = self.open_stream()
+        except OSError as error:
+            self.stream_error = error
+
+        while True:
+            self.buffer_condition.acquire()
+            while (len(self.buffered_chunks) == 0) and not self.is_closed:
+                self.buffer_condition.wait()
+
+            if (len(self.buffered_chunks) == 0):
+                self.buffer_condition.release()
+                break
+
+            chunk = self.buffered_chunks.popleft()
+            self.buffered_bytes -= len(chunk)
+            self.buffer_condition.notify_all()
+            self.buffer_condition.release()
+
+            if self.stream_error is None:
+                try:
+                    written_view = memoryview(chunk)
+                    while (len(written_view) > 0):
+                        written_view = written_view[os.write(file_descriptor, written_view):]
+                except OSError as error:
+                    self.buffer_condition.acquire()
+                    self.stream_error = error
+                    self.buffered_chunks.clear()
+                    self.buffered_bytes = 0
+                    self.buffer_condition.notify_all()
+                    self.buffer_condition.release()
+
+        if file_descriptor is not None:
+            os.close(file_descriptor)
+
+    def put_chunk(self, chunk):
+        """
+        Description:
+            Adds a chunk of encoded lines to the buffer. Blocks while the buffer
+            is full (a chunk larger than the buffer is accepted once the buffer
+            is empty) and raises the error of the stream if writing has failed.
+        """
+
+        self.buffer_condition.acquire()
+        if self.writer_thread is None:
+            self.writer_thread = threading.Thread(target=self.write_chunks, daemon=True)
+            self.writer_thread.start()
+
+        while (self.stream_error is None) and (len(self.buffered_chunks) > 0)\
+                and (self.buffered_bytes + len(chunk) > self.max_buffered_bytes):
+            self.buffer_condition.wait()
+
+        if self.stream_error is not None:
+            self.buffer_condition.release()
+            raise self.stream_error
+
+        assert not self.is_closed,\
+            "StreamWriter_ERROR: cannot write to a closed stream"
+
+        self.buffered_chunks.append(chunk)
+        self.buffered_bytes += len(chunk)
+        self.buffer_condition.notify_all()
+        self.buffer_condition.release()
+
+    def reset_destination_files(self, loader_header_fields):
+        """
+        Description:
+            Starts the stream by writing the loader-ready column names (given by
+            the generator) as its first line.
+        """
+
+        self.put_chunk(get_header_line(loader_header_fields).encode())
+
+    def write_record_batch(self, batch, field_names=None):
+        """
+        Description:
+            Threads call this function to append the rows of the record batch to
+            the stream. The rows of a batch are kept together, and the batches
+            are streamed in the order of the calls.
+        """
+
+        lines = format_record_batch(batch, field_names)
+        if (len(lines) > 0):
+            self.put_chunk(lines.encode())
+
+    def close(self):
+        """
+        Description:
+            Waits until all the buffered chunks are written and closes the
+            stream, so the consumer reads the end of file. Raises the error of
+            the stream if writing has failed.
+        """
+
+        self.buffer_condition.acquire()
+        self.is_closed = True
+        self.buffer_condition.notify_all()
+        self.buffer_condition.release()
+
+        if self.writer_thread is not None:
+            self.writer_thread.join()
+
+        if self.stream_error is not None:
+            raise self.stream_error
+
+
+# Reads everything from the file descriptor into the list of the reader
+def read_file_descriptor(file_descriptor, read_chunks):
+    with os.fdopen(file_descriptor, mode='rb') as in_file:
+        read_chunks.append(in_file.read())
+        in_file.close()
+
+# Unit tests to test if StreamWriter streams the rows in order through a small buffer
+def test_stream_to_file_descriptor():
+    read_file_descriptor_number, write_file_descriptor_number = os.pipe()
+    read_chunks = []
+    reader_thread = threading.Thread(target=read_file_descriptor, args=(read_file_descriptor_number, read_chunks))
+    reader_thread.start()
+
+    test_object = StreamWriter(destination_file=FILE_DESCRIPTOR_PREFIX + str(write_file_descriptor_number),\
+                               max_buffered_bytes=64)
+    test_object.reset_destination_files([":START_ID", ":END_ID"])
+
+    batch = make_record_batch(["SourceVertexID", "DestinationVertexID"], [np.arange(0, 1000), np.arange(1000, 2000)])
+    for batch_start in range(0, 1000, 100):
+        test_object.write_record_batch(batch[batch_start:batch_start + 100])
+        assert test_object.buffered_bytes <= 64 or len(test_object.buffered_chunks) == 1,\
+            "StreamWriter_STREAM_ERROR buffer grew beyond its bound"
+    test_object.write_record_batch(batch[:0])
+    test_object.close()
+
+    os.close(write_file_descriptor_number)
+    reader_thread.join()
+
+    expected_lines = [":START_ID|:END_ID"] + [str(i) + "|" + str(i + 1000) for i in range(0, 1000)]
+    assert read_chunks[0].decode().splitlines() == expected_lines,\
+        "StreamWriter_STREAM_ERROR rows lost, duplicated or reordered"
+
+# Unit tests to test if StreamWriter writes to a FIFO opened by the consumer after the writer
+def test_stream_to_fifo():
+    fifo_name = "stream_test.fifo"
+    if os.path.exists(fifo_name):
+        os.remove(fifo_name)
+    os.mkfifo(fifo_name)
+
+    assert is_stream_target(fifo_name) and is_stream_target("-") and is_stream_target("fd:3"),\
+        "StreamWriter_FIFO_ERROR stream targets not recognised"
+    assert not is_stream_target("BDG008_ConfigFile.json") and not is_stream_target(None),\
+        "StreamWriter_FIFO_ERROR regular files recognised as stream targets"
+
+    test_object = StreamWriter(destination_file=fifo_name, max_buffered_bytes=1024)
+    test_object.reset_destination_files(["investorID:ID", "Name"])
+    test_object.write_record_batch(make_record_batch(["investorID", "Name"], [np.arange(0, 3), np.array(["A", "B", "C"])]))
+
+    read_chunks = []
+    reader_thread = threading.Thread(target=read_file_descriptor, args=(os.open(fifo_name, os.O_RDONLY), read_chunks))
+    reader_thread.start()
+    test_object.close()
+    reader_thread.join()
+    os.remove(fifo_name)
+
+    assert read_chunks[0].decode() == "investorID:ID|Name\n0|A\n1|B\n2|C\n",\
+        "StreamWriter_FIFO_ERROR stream content is invalid"
+
+# Unit tests to test if StreamWriter raises instead of blocking when the consumer goes away
+def test_broken_stream():
+    read_file_descriptor_number, write_file_descriptor_number = os.pipe()
+    os.close(read_file_descriptor_number)
+
+    test_object = StreamWriter(destination_file=FILE_DESCRIPTOR_PREFIX + str(write_file_descriptor_number),\
+                               max_buffered_bytes=16)
+    raised_error = False
+    try:
+        for i in range(0, 100):
+            test_object.write_record_batch(make_record_batch(["investorID"], [np.arange(0, 10)]))
+    except OSError:
+        raised_error = True
+
+    try:
+        test_object.close()
+    except OSError:
+        raised_error = True
+    os.close(write_file_descriptor_number)
+
+    assert raised_error,\
+        "StreamWriter_BROKEN_ERROR error of the stream not raised"
+
+# Function to execute all defined unit tests for StreamWriter
+def execute_all_unit_tests():
+    test_stream_to_file_descriptor()
+    test_stream_to_fifo()
+    test_broken_stream()
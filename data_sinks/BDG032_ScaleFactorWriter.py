@@ -0,0 +1,281 @@
+"""
+FYP : 22013
+
+Module:
+    Base Data Generator
+
+Description:
+    This python script contains the definition of the ScaleFactorWriter and
+    SingleFileWriter classes, the functions mapping the vertex IDs of the
+    generated (largest) scale factor to the IDs of the nested scale factors and
+    their unit tests.
+
+    A nested scale factor with n investors and c companies is a sample of the
+    generated dataset with N investors and C companies: the investors and the
+    companies are put in a seeded random order, and its investors, their
+    TradeBooks and its companies are the first n investors and the first c
+    companies of that order, with the same names and amounts, and its edges are
+    the edges between them. The order does not depend on the IDs, which are
+    correlated with the degrees (the hubs have high IDs), so a nested scale
+    factor keeps about (n / N) ** 2 of the edges, and the smaller scale factors
+    are nested in the larger ones. The IDs are remapped densely (keeping their
+    order) to the layout of the smaller scale factor (investors 0 to n - 1,
+    TradeBooks n to 2n - 1 and companies from 2n), so every scale factor is a
+    complete dataset of its own.
+
+    The ScaleFactorWriter receives the record batches of the generators once and
+    writes every row to the output of the generated scale factor and to the
+    outputs of all the nested scale factors it belongs to, so all the scale
+    factors are generated in a single pass.
+
+"""
+
+
+# Imports from built-in modules
+import numpy as np
+import os
+import threading
+
+# Imports from Base Data Generator Module
+from data_sinks.BDG010_RecordBatch import format_record_batch, get_header_line, make_record_batch
+
+def get_scale_factor_id_maps(number_of_investors, number_of_companies, scale_factors, random_generator):
+    """
+    Description:
+        Returns the ID map of every nested scale factor, given as a list of
+        (number of investors, number of companies), which holds the ID in the
+        nested scale factor of every vertex ID of the generated one, or -1 for
+        the vertices outside of it. The rank of every investor (and its
+        TradeBook) and of every company in the random order is drawn from the
+        random generator, and the vertices of a nested scale factor are the ones
+        ranked below its numbers of vertices.
+    """
+
+    for scale_factor_investors, scale_factor_companies in scale_factors:
+        assert (0 < scale_factor_investors <= number_of_investors) and (0 < scale_factor_companies <= number_of_companies),\
+            "ScaleFactorWriter_ERROR: the nested scale factors must be smaller than the generated one"
+
+    investor_ranks = random_generator.permutation(number_of_investors)
+    company_ranks = random_generator.permutation(number_of_companies)
+
+    return [get_scale_factor_id_map(investor_ranks < scale_factor_investors, company_ranks < scale_factor_companies)\
+            for scale_factor_investors, scale_factor_companies in scale_factors]
+
+def get_scale_factor_id_map(in_investors, in_companies):
+    """
+    Description:
+        Returns the ID map of the nested scale factor holding the investors
+        (and their TradeBooks) and the companies set in the boolean arrays,
+        numbering them densely in the order of their IDs.
+    """
+
+    in_scale_factor = np.concatenate([in_investors, in_investors, in_companies])
+    return np.where(in_scale_factor, np.cumsum(in_scale_factor) - 1, -1)
+
+def map_scale_factor_ids(vertex_ids, id_map):
+    """
+    Description:
+        Returns the IDs of the vertices in the nested scale factor of the ID
+        map, or -1 for the vertices outside of it.
+    """
+
+    return id_map[np.asarray(vertex_ids, dtype=np.int64)]
+
+def map_scale_factor_id_range(low_id, high_id, id_map):
+    """
+    Description:
+        Returns the range of IDs [low_id, high_id) of a vertex type in the
+        nested scale factor of the ID map (e.g. for range partitioning). The
+        IDs keep their order, so the range holds the IDs of the vertices of
+        the scale factor in [low_id, high_id).
+    """
+
+    scale_factor_low_id = np.count_nonzero(id_map[:low_id] >= 0)
+    return (scale_factor_low_id, scale_factor_low_id + np.count_nonzero(id_map[low_id:high_id] >= 0))
+
+class SingleFileWriter:
+
+    def __init__(self, destination_file="vertex.csv",\
+                 file_header=None):
+
+        # Destination file the rows are appended to
+        self.destination_file = destination_file
+
+        # Header written at the start of the file (the loader-ready column names if None)
+        self.file_header = file_header
+
+        # Lock for restricting access to writing file
+        self.file_write_lock = threading.Lock()
+
+    def reset_destination_files(self, loader_header_fields):
+        """
+        Description:
+            Creates (or resets) the destination file with its header.
+        """
+
+        with open(self.destination_file, mode='w') as out_file:
+            out_file.write(self.file_header if self.file_header is not None else get_header_line(loader_header_fields))
+            out_file.close()
+
+    def write_record_batch(self, batch, field_names=None):
+        """
+        Description:
+            Threads call this function to append the rows of the record batch to
+            the destination file. Only one thread can be writing at a time.
+        """
+
+        lines = format_record_batch(batch, field_names)
+
+        self.file_write_lock.acquire()
+        with open(self.destination_file, mode='a') as out_file:
+            out_file.write(lines)
+            out_file.close()
+        self.file_write_lock.release()
+
+class ScaleFactorWriter:
+
+    def __init__(self, output_writers,\
+                 scale_factor_id_maps,\
+                 number_of_id_fields=1):
+
+        # Writers of the generated scale factor followed by the writers of the nested scale factors
+        self.output_writers = output_writers
+
+        # ID map of every nested scale factor (given by get_scale_factor_id_maps())
+        self.scale_factor_id_maps = scale_factor_id_maps
+
+        # Number of leading fields of the record batches holding vertex IDs (1 for the vertices and
+        # the lists, 2 for the edges), a row belongs to a nested scale factor if all its vertices do
+        self.number_of_id_fields = number_of_id_fields
+
+        # Number of rows written to the output of every scale factor
+        self.row_counts = [0 for output_writer in output_writers]
+
+        # Lock for restricting access to the row counts
+        self.row_count_lock = threading.Lock()
+
+        assert len(output_writers) == len(scale_factor_id_maps) + 1,\
+            "ScaleFactorWriter_ERROR: one output writer is needed per scale factor"
+
+    def reset_destination_files(self, loader_header_fields):
+        """
+        Description:
+            Resets the outputs of all the scale factors.
+        """
+
+        for output_writer in self.output_writers:
+            output_writer.reset_destination_files(loader_header_fields)
+
+    def get_scale_factor_batch(self, batch, field_names, id_map):
+        """
+        Description:
+            Returns the rows of the record batch whose vertices all belong to the
+            nested scale factor of the ID map, with the IDs of the nested scale
+            factor.
+        """
+
+        id_field_names = field_names[:self.number_of_id_fields]
+        scale_factor_ids = [map_scale_factor_ids(batch[field_name], id_map) for field_name in id_field_names]
+        in_scale_factor = np.logical_and.reduce([field_ids >= 0 for field_ids in scale_factor_ids])
+
+        scale_factor_batch = batch[in_scale_factor]
+        for field_name, field_ids in zip(id_field_names, scale_factor_ids):
+            scale_factor_batch[field_name] = field_ids[in_scale_factor].astype(batch.dtype[field_name])
+
+        return scale_factor_batch
+
+    def write_record_batch(self, batch, field_names=None):
+        """
+        Description:
+            Threads call this function to write the record batch to the output
+            of the generated scale factor and its rows to the outputs of the
+            nested scale factors they belong to, keeping their order.
+        """
+
+        if field_names is None:
+            field_names = batch.dtype.names
+
+        self.output_writers[0].write_record_batch(batch, field_names)
+        row_counts = [len(batch),]
+
+        for output_writer, id_map in zip(self.output_writers[1:], self.scale_factor_id_maps):
+            scale_factor_batch = self.get_scale_factor_batch(batch, field_names, id_map)
+            if (len(scale_factor_batch) > 0):
+                output_writer.write_record_batch(scale_factor_batch, field_names)
+            row_counts.append(len(scale_factor_batch))
+
+        self.row_count_lock.acquire()
+        self.row_counts = [row_count + batch_row_count for row_count, batch_row_count in zip(self.row_counts, row_counts)]
+        self.row_count_lock.release()
+
+
+# Reads the lines of the file written by the unit tests
+def read_test_lines(file_name):
+    with open(file_name, mode='r') as in_file:
+        lines = in_file.read().splitlines()
+        in_file.close()
+    return lines
+
+# Unit tests to test if the IDs are mapped to the nested scale factors
+def test_map_scale_factor_ids():
+    id_maps = get_scale_factor_id_maps(10, 4, [(3, 2), (6, 4)], np.random.default_rng(7))
+
+    for id_map, (scale_factor_investors, scale_factor_companies) in zip(id_maps, [(3, 2), (6, 4)]):
+        in_scale_factor = id_map >= 0
+        assert (np.count_nonzero(in_scale_factor[:10]) == scale_factor_investors) and\
+                (in_scale_factor[:10] == in_scale_factor[10:20]).all() and\
+                (np.count_nonzero(in_scale_factor[20:]) == scale_factor_companies),\
+            "ScaleFactorWriter_MAP_ERROR nested scale factor holds the wrong vertices"
+
+        assert id_map[in_scale_factor].tolist() == list(range(2 * scale_factor_investors + scale_factor_companies)),\
+            "ScaleFactorWriter_MAP_ERROR IDs not remapped densely in their order"
+
+    assert ((id_maps[0] < 0) | (id_maps[1] >= 0)).all(),\
+        "ScaleFactorWriter_MAP_ERROR smaller scale factor not nested in the larger one"
+
+    assert map_scale_factor_ids([1, 2, 11, 12, 21, 22], id_maps[1]).tolist() == id_maps[1][[1, 2, 11, 12, 21, 22]].tolist(),\
+        "ScaleFactorWriter_MAP_ERROR IDs mapped to the wrong nested IDs"
+
+    assert map_scale_factor_id_range(10, 20, id_maps[0]) == (3, 6) and map_scale_factor_id_range(20, 24, id_maps[0]) == (6, 8) and\
+            map_scale_factor_id_range(0, 5, id_maps[0]) == (0, np.count_nonzero(id_maps[0][:5] >= 0)),\
+        "ScaleFactorWriter_MAP_ERROR ID ranges mapped to the wrong nested ranges"
+
+    # The vertices are not taken from the start of the IDs (the hubs have high IDs)
+    (id_map,) = get_scale_factor_id_maps(1000, 10, [(100, 1)], np.random.default_rng(7))
+    assert np.count_nonzero(id_map[500:1000] >= 0) > 25,\
+        "ScaleFactorWriter_MAP_ERROR nested scale factor correlated with the IDs"
+
+# Unit tests to test if the rows are routed to every scale factor they belong to
+def test_scale_factor_writer():
+    test_files = ["scale_factor_test_0.csv", "scale_factor_test_1.csv", "scale_factor_test_2.csv"]
+    test_object = ScaleFactorWriter([SingleFileWriter(file_name, "Mirror Edges\nSourceTradeBookID|DestinationTradeBookID\n")\
+                                        for file_name in test_files],\
+                                    [get_scale_factor_id_map(np.isin(np.arange(10), [1, 2, 4, 5, 9]), np.ones(4, dtype=bool)),\
+                                        get_scale_factor_id_map(np.isin(np.arange(10), [2, 4]), np.isin(np.arange(4), [2]))],\
+                                    number_of_id_fields=2)
+    test_object.reset_destination_files([":START_ID", ":END_ID"])
+
+    batch = make_record_batch(["SourceTradeBookID", "DestinationTradeBookID", "RemoveMirror"],\
+                                [np.array([11, 14, 12, 19, 15, 14]), np.array([12, 13, 11, 15, 10, 12]), np.zeros(6, dtype=bool)])
+    test_object.write_record_batch(batch, ["SourceTradeBookID", "DestinationTradeBookID"])
+
+    header = ["Mirror Edges", "SourceTradeBookID|DestinationTradeBookID"]
+    assert read_test_lines(test_files[0]) == header + ["11|12", "14|13", "12|11", "19|15", "15|10", "14|12"],\
+        "ScaleFactorWriter_WRITE_ERROR rows of the generated scale factor are invalid"
+
+    assert read_test_lines(test_files[1]) == header + ["5|6", "6|5", "9|8", "7|6"],\
+        "ScaleFactorWriter_WRITE_ERROR rows of the first nested scale factor are invalid"
+
+    assert read_test_lines(test_files[2]) == header + ["3|2"],\
+        "ScaleFactorWriter_WRITE_ERROR rows of the second nested scale factor are invalid"
+
+    assert test_object.row_counts == [6, 4, 1],\
+        "ScaleFactorWriter_WRITE_ERROR rows of the scale factors counted wrong"
+
+    for file_name in test_files:
+        os.remove(file_name)
+
+# Function to execute all defined unit tests for ScaleFactorWriter
+def execute_all_unit_tests():
+    test_map_scale_factor_ids()
+    test_scale_factor_writer()
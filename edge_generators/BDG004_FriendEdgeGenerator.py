@@ -10,29 +10,71 @@ Description:
 
     The FriendEdgeGenerator class generates the friend edges and its execute
     method returns the friend edge adjacency list (in the form of a dictionary)
-    for the MirrorEdgeGenerator to use.
+    for the MirrorEdgeGenerator to use. The friend edges can also be consumed in
+    memory as record batches through its iter_batches method.
+
+    With a memory budget, the adjacency matrix is not used. The candidate edges
+    are then generated in chunks, packed as uint64 keys and deduplicated with an
+    ExternalSorter (sorted runs spilled to temporary files and k-way merged),
+    topping up the missing edges until number_of_friend_edges distinct edges
+    exist. The edges are then written in vertex order, and the adjacency list is
+    returned as a FriendAdjacencyCSR whose indices are stored in a memory-mapped
+    temporary file.
+
+    After use_seeded_blocks(), the edges are generated in blocks with their own
+    seeded random generators, added to the adjacency matrix in block order, so
+    the edges only depend on the random seed and not on the threads or the
+    scheduling.
 
 """
 
 
 # Imports from built-in modules
 import numpy as np
+import os
+import tempfile
 import threading
 
+# Imports from Base Data Generator Module
+from data_sinks.BDG010_RecordBatch import format_record_batch, get_header_line, make_record_batch
+from edge_generators.BDG014_FriendAdjacencyCSR import FriendAdjacencyCSR
+from execution.BDG027_BatchExecutor import SCHEDULING_MODES, BatchExecutor, get_block_random_generator, get_random_generator
+from external_memory.BDG021_ExternalSorter import ExternalSorter
+from graph_statistics.BDG019_GraphStatistics import WorkerCounters, get_degree_statistics, get_ratio
+from list_generators.BDG006_PermutedListGenerator import to_id_array
+from samplers.BDG015_VertexSamplers import PowerSampler
+
+# Names of the counters kept by every worker generating friend edges
+FRIEND_EDGE_COUNTER_NAMES = ["friend_edges", "leader_list_1_edges", "rejected_self_loops", "rejected_duplicate_edges"]
+
+# Number of bytes of the temporary arrays used for sampling a candidate edge in the memory-bounded mode
+CANDIDATE_EDGE_BYTES = 64
+
+# Mask of the larger vertex ID of a packed edge key (bits 1 to 31)
+LARGER_VERTEX_ID_MASK = np.uint64(2 ** 31 - 1)
+
 class FriendEdgeGenerator:
 
     def __init__(self, thread_number=5,\
                  lines_per_thread=1000,\
                  destination_file="edge.csv",\
                  number_of_friend_edges=2,\
-                 follower_list=[0,1,2,3],\
-                 leader_list_1=[3,2,1,0],\
-                 leader_list_2=[2,1,0,3],\
+                 follower_list=np.array([0,1,2,3], dtype=np.int32),\
+                 leader_list_1=np.array([3,2,1,0], dtype=np.int32),\
+                 leader_list_2=np.array([2,1,0,3], dtype=np.int32),\
                  follower_list_friend_power_dis_param=2,\
                  leader_list_1_friend_power_dis_param=2,\
                  leader_list_2_friend_power_dis_param=2,\
                  choose_leader_list_1_as_friend_prob=0.5,\
-                 lock_list_element_cardinality=5):
+                 lock_list_element_cardinality=5,\
+                 output_writer=None,\
+                 follower_sampler=None,\
+                 leader_1_sampler=None,\
+                 leader_2_sampler=None,\
+                 memory_budget=None,\
+                 temporary_directory=None,\
+                 backend="threads",\
+                 scheduling="dynamic"):
 
         # Number of threads to be used for generating data
         self.thread_number = thread_number
@@ -49,43 +91,60 @@ class FriendEdgeGenerator:
         # Number of friend edges to be generated
         self.number_of_friend_edges = number_of_friend_edges
 
-        # Lock for restriciting access to writing file and global adjacency list
+        # Lock for restriciting access to writing file
         self.file_write_lock = threading.Lock()
 
-        # Lock for acquiring next line batch
-        self.next_line_batch_lock = threading.Lock()
+        # Lock for restriciting access to the global adjacency list
+        self.adjacency_update_lock = threading.Lock()
+
+        # Writer (e.g. PartitionedFileWriter) used instead of the destination
+        # file when it is not None
+        self.output_writer = output_writer
 
         # ID of the last edge to generate the data for
         self.last_valid_edge_ID = number_of_friend_edges + self.current_start_ID - 1
 
-        # Protects the thread_terminated_count variable defined next
-        self.thread_terminate_execution_lock = threading.Lock()
+        # The adjacency matrix and the adjacency list are only shared by threads
+        assert backend != "processes",\
+            "FriendEdgeGenerator_ERROR: the processes backend is not supported"
+
+        # Executor running the workers (threads or inline) with the scheduling mode
+        self.batch_executor = BatchExecutor(backend=backend,\
+                                            scheduling=scheduling,\
+                                            number_of_workers=thread_number)
+
+        # Seed, name and number of edges of the seeded blocks (not seeded if random_seed is None),
+        # set by use_seeded_blocks()
+        self.random_seed = None
+        self.seed_name = None
+        self.seed_block_size = None
 
-        # Number of threads that have finished execution
-        self.thread_terminated_count = 0
+        # Index of the next seeded block to be generated, so the blocks taken by the threads
+        # reject their duplicate edges in block order
+        self.next_seeded_block_index = 0
+        self.seeded_block_condition = threading.Condition()
 
-        # Semaphore used as a condition variable to indicate all threads have
-        # finished execution, i.e, all the data has been generated
-        self.main_thread_wait_semaphore = threading.Semaphore(0)
+        # Scheduler handing out the batches of edge IDs to the workers
+        self.batch_scheduler = self.create_batch_scheduler()
 
-        # Stores the (ordered) follower list
-        self.follower_list = follower_list
+        # Stores the (ordered) follower list as a compact NumPy array
+        self.follower_list = to_id_array(follower_list)
 
-        # Stores the (ordered) leader list 1
-        self.leader_list_1 = leader_list_1
+        # Stores the (ordered) leader list 1 as a compact NumPy array
+        self.leader_list_1 = to_id_array(leader_list_1)
 
-        # Stores the (ordered) leader list 2
-        self.leader_list_2 = leader_list_2
+        # Stores the (ordered) leader list 2 as a compact NumPy array
+        self.leader_list_2 = to_id_array(leader_list_2)
 
         # Performing checks to ensure all three investor lists have the same size
-        assert len(follower_list) == len(leader_list_1),\
+        assert self.follower_list.shape == self.leader_list_1.shape,\
             "FriendEdgeGenerator_ERROR: FollowerList and LeaderList1 must have same number of elements"
 
-        assert len(leader_list_1) == len(leader_list_2),\
+        assert self.leader_list_1.shape == self.leader_list_2.shape,\
             "FriendEdgeGenerator_ERROR: LeaderList1 and LeaderList2 must have same number of elements"
 
         # Getting the number of investors
-        number_of_investors = len(follower_list)
+        number_of_investors = self.follower_list.shape[0]
 
         # Getting the maximum number of edges that can exist: C(number_of_investors, 2)
         max_edges = (number_of_investors * (number_of_investors - 1)) / 2
@@ -106,14 +165,43 @@ class FriendEdgeGenerator:
         # Storing the leader list 2 friend power distribution parameter
         self.leader_list_2_friend_power_dis_param = leader_list_2_friend_power_dis_param
 
+        # Samplers drawing the follower and leader vertex IDs of the edges. If not
+        # given, the power distributions with the parameters above are used
+        self.follower_sampler = follower_sampler if follower_sampler is not None else\
+            PowerSampler(follower_list_friend_power_dis_param, number_of_investors)
+
+        self.leader_1_sampler = leader_1_sampler if leader_1_sampler is not None else\
+            PowerSampler(leader_list_1_friend_power_dis_param, number_of_investors)
+
+        self.leader_2_sampler = leader_2_sampler if leader_2_sampler is not None else\
+            PowerSampler(leader_list_2_friend_power_dis_param, number_of_investors)
+
         # Storing the probability to choose a leader from leader list 1 as a friend
         self.choose_leader_list_1_as_friend_prob = choose_leader_list_1_as_friend_prob
 
         # The adjacency list, stored as a dictionary for the friend edges
         self.friend_adjacency_dict = {}
 
+        # Number of bytes the edges may use in the memory-bounded mode. If None, the
+        # adjacency matrix and the adjacency list are kept in memory
+        self.memory_budget = memory_budget
+
+        # Directory of the temporary files of the memory-bounded mode (the system one if None)
+        self.temporary_directory = temporary_directory
+
         # The adjacency matrix for the friend edges. 0 means no edge, 1 means an edge exists
-        self.friend_adjacency_matrix = np.zeros((number_of_investors,number_of_investors), dtype=np.int8)
+        # (not used in the memory-bounded mode)
+        self.friend_adjacency_matrix = np.zeros((number_of_investors,number_of_investors), dtype=np.int8)\
+            if memory_budget is None else None
+
+        # In the memory-bounded mode: the sorter deduplicating the packed edge keys and
+        # the adjacency list built from its sorted keys
+        self.edge_key_sorter = None
+        self.friend_adjacency_csr = None
+
+        # Packed edge keys store the vertex IDs in 31 bits
+        assert (memory_budget is None) or (number_of_investors <= 2 ** 31),\
+            "FriendEdgeGenerator_ERROR: the memory-bounded mode supports at most 2^31 investors"
 
         # stores the size of the lock list to protect the adjacency matrix
         # determines how many vertices in the adjacency matrix should 1 lock in the lock list protect
@@ -125,178 +213,574 @@ class FriendEdgeGenerator:
         # the lock list that protects the adjacency matrix
         self.vertex_lock_list = [threading.Lock() for i in range(0, self.lock_list_element_cardinality)]
 
+        # Number of friends of every investor, updated with the adjacency list
+        self.friend_degrees = np.zeros((number_of_investors,), dtype=np.int64)
 
+        # Counters of every worker iterating over the batches, merged by get_statistics()
+        self.worker_counters_list = []
 
-    def fetch_next_line_batch(self):
+        # Lock for restricting access to the list of worker counters
+        self.worker_counters_lock = threading.Lock()
+
+
+
+    def create_batch_scheduler(self):
         """
         Description:
-            Threads call this function to get the next batch of lines
+            Creates a scheduler handing out the batches of all the edges (the
+            batches of edge IDs, or of block indices with seeded blocks).
+        """
 
-        Returns:
-            - start ID for the batch and the number of items in the batch
-            - (-1, -1) if all batches have finished
+        if self.random_seed is None:
+            return self.batch_executor.create_scheduler(0, self.number_of_friend_edges, self.lines_per_thread)
+
+        number_of_blocks = (self.number_of_friend_edges + self.seed_block_size - 1) // self.seed_block_size
+        return self.batch_executor.create_scheduler(0, number_of_blocks, max(1, self.lines_per_thread // self.seed_block_size))
+
+    def use_seeded_blocks(self, random_seed, seed_name, seed_block_size):
+        """
+        Description:
+            Generates the edges in blocks of seed_block_size edges, each with its
+            own random generator seeded from the random seed, the seed name (e.g.
+            the stage name) and the block index. The batches are then made of
+            whole blocks (as many as fit in lines_per_thread, at least one), and
+            a block is only added to the adjacency matrix once the previous
+            blocks have been, so the same edges are generated whatever the number
+            of threads or the order in which they take the blocks.
         """
 
-        self.next_line_batch_lock.acquire()
+        assert seed_block_size > 0,\
+            "FriendEdgeGenerator_ERROR: seed_block_size must be positive"
 
-        if (self.current_start_ID > self.last_valid_edge_ID):
-            self.next_line_batch_lock.release()
-            return (-1, -1)
+        self.random_seed = random_seed
+        self.seed_name = seed_name
+        self.seed_block_size = seed_block_size
+        self.next_seeded_block_index = 0
 
-        batch_size = self.lines_per_thread
-        assigned_start_ID = self.current_start_ID
-        if (self.current_start_ID + batch_size > self.last_valid_edge_ID):
-            batch_size = self.last_valid_edge_ID - self.current_start_ID + 1
+        # the scheduler hands out block indices instead of edge IDs
+        self.batch_scheduler = self.create_batch_scheduler()
 
-        self.current_start_ID += batch_size
+    def create_random_generator(self, block_index):
+        """
+        Description:
+            Returns the random generator of the block: seeded for the block after
+            use_seeded_blocks(), otherwise seeded from the global random generator.
+        """
 
-        self.next_line_batch_lock.release()
+        if self.random_seed is None:
+            return get_random_generator()
 
-        return (assigned_start_ID, batch_size)
+        return get_block_random_generator(self.random_seed, self.seed_name, block_index)
 
-    def thread_end_execution(self):
+    def fetch_next_line_batch(self, worker_index=None, batch_scheduler=None):
         """
         Description:
-            Threads call this function to indicate that they have finished
-            execution by updating thread_terminated_count. This happens when
-            they get (-1, -1) when calling fetch_next_line_batch(). The last
-            thread wakes up the main thread.
+            Threads call this function to get the next batch of lines from the
+            batch scheduler (with their worker index, if they are one of the
+            workers of the executor). The scheduler of the workers is used if
+            batch_scheduler is None.
+
+        Returns:
+            - start ID for the batch and the number of items in the batch
+            - (-1, -1) if all batches have finished
         """
 
-        self.thread_terminate_execution_lock.acquire()
-        self.thread_terminated_count += 1
-        if (self.thread_terminated_count >= self.thread_number):
-            self.main_thread_wait_semaphore.release()
-        self.thread_terminate_execution_lock.release()
+        batch_scheduler = batch_scheduler if batch_scheduler is not None else self.batch_scheduler
+
+        assigned_start_ID, batch_size = batch_scheduler.next_batch(worker_index)
+        number_of_assigned_items = batch_scheduler.get_number_of_assigned_items()
 
-    def save_edges_to_file_and_update_adjacency_list(self, lines, new_adjacency_dict):
+        # with seeded blocks, the scheduler assigns block indices
+        if self.random_seed is not None:
+            number_of_assigned_items = min(self.number_of_friend_edges, number_of_assigned_items * self.seed_block_size)
+            if (assigned_start_ID >= 0):
+                assigned_start_ID, batch_size = (assigned_start_ID * self.seed_block_size,\
+                                                 min(batch_size * self.seed_block_size,\
+                                                     self.number_of_friend_edges - assigned_start_ID * self.seed_block_size))
+
+        self.current_start_ID = number_of_assigned_items
+
+        return (assigned_start_ID, batch_size)
+
+    def save_edges_to_file(self, lines):
         """
         Description:
             Threads call this function to write their generated data in the form
-            of a string to the destination file and update the adjacency list (in
-            the form of a dictionary). Only one thread can be writing
-            to the file at a time and updating the adjacency list at a time.
+            of a string to the destination file. Only one thread can be writing
+            to the file at a time.
         """
 
         self.file_write_lock.acquire()
         with open(self.destination_file, mode='a') as out_file:
             out_file.write(lines)
             out_file.close()
+        self.file_write_lock.release()
+
+    def update_adjacency_list(self, batch):
+        """
+        Description:
+            Updates the adjacency list (in the form of a dictionary) with the
+            edges in the record batch. Only one thread can be updating the
+            adjacency list at a time.
+        """
+
+        self.adjacency_update_lock.acquire()
 
-        for vertex in new_adjacency_dict:
-            if vertex in self.friend_adjacency_dict:
-                self.friend_adjacency_dict[vertex].extend(new_adjacency_dict[vertex])
+        for source_vertex_id, destination_vertex_id in zip(batch["SourceVertexID"].tolist(),\
+                                                            batch["DestinationVertexID"].tolist()):
+            if source_vertex_id in self.friend_adjacency_dict:
+                self.friend_adjacency_dict[source_vertex_id].append(destination_vertex_id)
             else:
-                self.friend_adjacency_dict[vertex] = new_adjacency_dict[vertex]
+                self.friend_adjacency_dict[source_vertex_id] = [destination_vertex_id,]
 
-        self.file_write_lock.release()
+            if destination_vertex_id in self.friend_adjacency_dict:
+                self.friend_adjacency_dict[destination_vertex_id].append(source_vertex_id)
+            else:
+                self.friend_adjacency_dict[destination_vertex_id] = [source_vertex_id,]
+
+        np.add.at(self.friend_degrees, batch["SourceVertexID"], 1)
+        np.add.at(self.friend_degrees, batch["DestinationVertexID"], 1)
 
-    def lines_generator(self):
+        self.adjacency_update_lock.release()
+
+    def generate_edge_batch(self, batch_size, worker_counters=None, edge_samplers=None, random_generator=None):
         """
         Description:
-            The thread must first acquire a batch and check if it's valid. If the
-            batch is not valid, the function must return, otherwise keep
-            acquiring batches and generating data and saving it to the
-            destination file.
+            Generates batch_size new friend edges and returns them as a record
+            batch with the fields SourceVertexID and DestinationVertexID. The
+            adjacency matrix is updated so that no edge is generated twice. The
+            rejected samples and the chosen leader lists are counted in the
+            worker counters, if given. edge_samplers replaces the samplers of
+            the generator, if given, as a tuple (follower_sampler,
+            leader_1_sampler, leader_2_sampler, choose_leader_list_1_as_friend_prob)
+            (e.g. samplers restricted to the vertex ranges of a partition). The
+            samples are drawn with the NumPy random generator (see
+            get_random_generator()).
         """
 
+        random_generator = get_random_generator(random_generator)
+
+        if worker_counters is None:
+            worker_counters = self.create_worker_counters()
+
+        if edge_samplers is None:
+            edge_samplers = (self.follower_sampler, self.leader_1_sampler, self.leader_2_sampler, self.choose_leader_list_1_as_friend_prob)
+
+        follower_sampler, leader_1_sampler, leader_2_sampler, choose_leader_list_1_as_friend_prob = edge_samplers
+
+        # stores the number of edges generated for this batch so far
+        generated_edges = 0
+
+        # the source (follower) and destination (leader) vertices of the generated edges,
+        # stored with the same dtype as the investor lists
+        source_vertex_ids = np.empty((batch_size,), dtype=self.follower_list.dtype)
+        destination_vertex_ids = np.empty((batch_size,), dtype=self.follower_list.dtype)
+
+        while generated_edges < batch_size:
+            number_of_edges_to_generate = batch_size - generated_edges
+
+            follower_samples = follower_sampler.sample(number_of_edges_to_generate, random_generator)
+
+            leader1_samples = leader_1_sampler.sample(number_of_edges_to_generate, random_generator)
+
+            leader2_samples = leader_2_sampler.sample(number_of_edges_to_generate, random_generator)
+
+            leader_choice_samples = random_generator.uniform(low=0.0, high=1.0, size=(number_of_edges_to_generate,))
+
+            # converting the samples to vertex IDs for all edges at once
+            follower_vertex_ids = follower_samples.astype(np.int64).tolist()
+            chooses_leader_list_1 = leader_choice_samples < choose_leader_list_1_as_friend_prob
+            leader_vertex_ids = np.where(chooses_leader_list_1, leader1_samples, leader2_samples).astype(np.int64).tolist()
+            chooses_leader_list_1 = chooses_leader_list_1.tolist()
+
+            for i in range(0, number_of_edges_to_generate):
+                follower_vertex_id = follower_vertex_ids[i]
+                leader_vertex_id = leader_vertex_ids[i]
+
+                # proceed only when both vertex IDs are distinct
+                if (follower_vertex_id == leader_vertex_id):
+                    worker_counters.add("rejected_self_loops")
+                    continue
+
+                # ensures that the smaller id cannot be the source
+                # this protects potential repetition of edges in multiple threads
+                smaller_vertex_id = min(follower_vertex_id, leader_vertex_id)
+                larger_vertex_id = max(follower_vertex_id, leader_vertex_id)
+
+                lock_index = min(self.lock_list_element_cardinality - 1,\
+                                    int(smaller_vertex_id / self.lock_list_element_granularity))
+
+                self.vertex_lock_list[lock_index].acquire()
+
+                if (self.friend_adjacency_matrix[smaller_vertex_id][larger_vertex_id] == 1):
+                    # edge already exists
+                    self.vertex_lock_list[lock_index].release()
+                    worker_counters.add("rejected_duplicate_edges")
+                    continue
+                else:
+                    self.friend_adjacency_matrix[smaller_vertex_id][larger_vertex_id] = 1
+                    self.vertex_lock_list[lock_index].release()
+
+                    # The follower-leader order is preserved in the batch, so
+                    # if a database supporting directed edges is to be
+                    # benchmarked, the directed edges can be stored
+                    source_vertex_ids[generated_edges] = follower_vertex_id
+                    destination_vertex_ids[generated_edges] = leader_vertex_id
+                    generated_edges += 1
+
+                    if chooses_leader_list_1[i]:
+                        worker_counters.add("leader_list_1_edges")
+
+        worker_counters.add("friend_edges", batch_size)
+
+        return make_record_batch(self.get_header_fields(),\
+                                    [source_vertex_ids, destination_vertex_ids])
+
+    def generate_seeded_edge_batch(self, start_id, batch_size, worker_counters, batch_scheduler):
+        """
+        Description:
+            Generates the friend edges start_id to (start_id + batch_size - 1) and
+            adds them to the adjacency list. After use_seeded_blocks(), every
+            block of the batch is generated with its own seeded random generator
+            once the previous blocks have been generated (by any thread), so the
+            duplicate edges are rejected in block order. Returns None if the
+            execution of the batch scheduler was cancelled while waiting.
+        """
+
+        if self.random_seed is None:
+            batch = self.generate_edge_batch(batch_size, worker_counters)
+            self.update_adjacency_list(batch)
+            return batch
+
+        block_batches = []
+        for block_start_ID in range(start_id, start_id + batch_size, self.seed_block_size):
+            block_index = block_start_ID // self.seed_block_size
+
+            self.seeded_block_condition.acquire()
+            self.seeded_block_condition.wait_for(lambda: (self.next_seeded_block_index == block_index) or batch_scheduler.is_cancelled())
+
+            if self.next_seeded_block_index != block_index:
+                self.seeded_block_condition.release()
+                return None
+
+            try:
+                block_batch = self.generate_edge_batch(min(self.seed_block_size, start_id + batch_size - block_start_ID),\
+                                                        worker_counters,\
+                                                        random_generator=self.create_random_generator(block_index))
+                self.update_adjacency_list(block_batch)
+                block_batches.append(block_batch)
+            finally:
+                self.next_seeded_block_index += 1
+                self.seeded_block_condition.notify_all()
+                self.seeded_block_condition.release()
+
+        return block_batches[0] if len(block_batches) == 1 else np.concatenate(block_batches)
+
+    def notify_seeded_block_waiters(self):
+        """
+        Description:
+            Wakes up the threads waiting for the previous seeded blocks, so they
+            stop once the execution is cancelled.
+        """
+
+        self.seeded_block_condition.acquire()
+        self.seeded_block_condition.notify_all()
+        self.seeded_block_condition.release()
+
+    def iter_batches(self, worker_index=None):
+        """
+        Description:
+            Generator that keeps acquiring batches and yields the generated friend
+            edges for each batch as a record batch. The adjacency list returned by
+            execute() is updated with every batch, so the MirrorEdgeGenerator can
+            use it once the iteration is complete. Every call without a worker
+            index generates all the friend edges again with its own scheduler
+            (see reset_generated_edges()), so the generator can be iterated
+            again. With the worker index of a worker of the executor, the batches
+            are shared with the other workers through fetch_next_line_batch()
+            instead. Every iteration keeps its own worker counters. In the
+            memory-bounded mode, the edges are yielded in vertex order by a
+            single iteration.
+        """
+
+        batch_scheduler = self.batch_scheduler
+        if worker_index is None:
+            self.reset_generated_edges()
+            batch_scheduler = self.create_batch_scheduler()
+
+        worker_counters = self.create_worker_counters()
+
+        if self.memory_budget is not None:
+            yield from self.iter_memory_bounded_batches(worker_counters)
+            return
+
         # Executes until batches no longer exist
         while True:
-            start_id, batch_size = self.fetch_next_line_batch()
+            start_id, batch_size = self.fetch_next_line_batch(worker_index, batch_scheduler)
 
             #if run out of batches, return
             if ((start_id < 0) or (batch_size <= 0)):
                 return
 
-            # stores the number of edges generated for this batch so far
-            generated_edges = 0
+            batch = self.generate_seeded_edge_batch(start_id, batch_size, worker_counters, batch_scheduler)
 
-            # local adjacency dictionary
-            current_adjacency_dict = {}
+            #if the execution was cancelled, return
+            if batch is None:
+                return
 
-            # string storing the lines to be written to the file for this batch
-            file_lines = ""
+            yield batch
 
-            while generated_edges < batch_size:
-                number_of_edges_to_generate = batch_size - generated_edges
+    def reset_generated_edges(self):
+        """
+        Description:
+            Forgets the friend edges of a previous iteration (the adjacency
+            matrix and list, the edge keys of the memory-bounded mode, the
+            degrees and the worker counters), so that the next iteration
+            generates number_of_friend_edges distinct edges again.
+        """
 
-                follower_samples = np.random.power(a=self.follower_list_friend_power_dis_param,\
-                                                    size=(number_of_edges_to_generate,)) * self.number_of_investors
+        if (self.friend_adjacency_matrix is not None) and (len(self.worker_counters_list) > 0):
+            self.friend_adjacency_matrix.fill(0)
 
-                leader1_samples = np.random.power(a=self.leader_list_1_friend_power_dis_param,\
-                                                    size=(number_of_edges_to_generate,)) * self.number_of_investors
+        if self.edge_key_sorter is not None:
+            self.edge_key_sorter.close()
+            self.edge_key_sorter = None
 
-                leader2_samples = np.random.power(a=self.leader_list_2_friend_power_dis_param,\
-                                                    size=(number_of_edges_to_generate,)) * self.number_of_investors
+        self.friend_adjacency_dict.clear()
+        self.friend_adjacency_csr = None
+        self.friend_degrees.fill(0)
+        self.next_seeded_block_index = 0
 
-                leader_choice_samples = np.random.uniform(low=0.0, high=1.0, size=(number_of_edges_to_generate,))
+        self.worker_counters_lock.acquire()
+        self.worker_counters_list = []
+        self.worker_counters_lock.release()
 
-                for i in range(0, number_of_edges_to_generate):
-                    follower_vertex_id = int(follower_samples[i])
+    def generate_candidate_edge_keys(self, number_of_candidates, worker_counters, random_generator):
+        """
+        Description:
+            Samples number_of_candidate edges at once (in the same way as
+            generate_edge_batch()) with the NumPy random generator and returns the
+            packed keys of the edges that are not self loops. A key stores the
+            smaller vertex ID in its bits 32 to 62, the larger one in its bits 1
+            to 31 and, in its bit 0, whether the follower is the larger vertex, so
+            duplicate edges have keys equal but for bit 0.
+        """
 
-                    leader_vertex_id = -1
+        follower_vertex_ids = self.follower_sampler.sample(number_of_candidates, random_generator).astype(np.uint64)
+        leader1_samples = self.leader_1_sampler.sample(number_of_candidates, random_generator)
+        leader2_samples = self.leader_2_sampler.sample(number_of_candidates, random_generator)
+        chooses_leader_list_1 = random_generator.uniform(low=0.0, high=1.0, size=(number_of_candidates,)) < self.choose_leader_list_1_as_friend_prob
+        leader_vertex_ids = np.where(chooses_leader_list_1, leader1_samples, leader2_samples).astype(np.uint64)
 
+        is_not_self_loop = follower_vertex_ids != leader_vertex_ids
+        worker_counters.add("rejected_self_loops", int(number_of_candidates - np.count_nonzero(is_not_self_loop)))
+        worker_counters.add("leader_list_1_edges", int(np.count_nonzero(chooses_leader_list_1 & is_not_self_loop)))
 
-                    if (leader_choice_samples[i] < self.choose_leader_list_1_as_friend_prob):
-                        leader_vertex_id = int(leader1_samples[i])
-                    else:
-                        leader_vertex_id = int(leader2_samples[i])
+        follower_vertex_ids = follower_vertex_ids[is_not_self_loop]
+        leader_vertex_ids = leader_vertex_ids[is_not_self_loop]
 
-                    # proceed only when both vertex IDs are distinct
-                    if (follower_vertex_id == leader_vertex_id):
-                        continue
+        return (np.minimum(follower_vertex_ids, leader_vertex_ids) << np.uint64(32)) |\
+                (np.maximum(follower_vertex_ids, leader_vertex_ids) << np.uint64(1)) |\
+                (follower_vertex_ids > leader_vertex_ids).astype(np.uint64)
 
-                    # ensures that the smaller id cannot be the source
-                    # this protects potential repetition of edges in multiple threads
-                    smaller_vertex_id = min(follower_vertex_id, leader_vertex_id)
-                    larger_vertex_id = max(follower_vertex_id, leader_vertex_id)
+    def generate_unique_edge_keys(self, worker_counters):
+        """
+        Description:
+            Generates the candidate edges in chunks into the external sorter and
+            merges them, topping up the number of duplicate edges found until
+            the sorter holds number_of_friend_edges distinct edges. As at most one
+            candidate is generated per missing edge, the sorter never holds more.
+            All the candidates are drawn by a single random generator (the one of
+            the first block after use_seeded_blocks()).
+        """
 
-                    lock_index = min(self.lock_list_element_cardinality - 1,\
-                                        int(smaller_vertex_id / self.lock_list_element_granularity))
+        random_generator = self.create_random_generator(0)
 
-                    self.vertex_lock_list[lock_index].acquire()
+        self.edge_key_sorter = ExternalSorter(memory_budget=self.memory_budget // 2,\
+                                                temporary_directory=self.temporary_directory,\
+                                                ignored_low_bits=1)
 
-                    if (self.friend_adjacency_matrix[smaller_vertex_id][larger_vertex_id] == 1):
-                        # edge already exists
-                        self.vertex_lock_list[lock_index].release()
-                        continue
-                    else:
-                        self.friend_adjacency_matrix[smaller_vertex_id][larger_vertex_id] = 1
+        candidate_chunk_size = max(1, (self.memory_budget // 4) // CANDIDATE_EDGE_BYTES)
+        number_of_candidates = 0
+        number_of_unique_edges = 0
 
-                        # The follower-leader order is preserved in the file, so
-                        # if a database supporting directed edges is to be
-                        # benchmarked, the directed edges can be stored
-                        file_lines += str(follower_vertex_id) + "|" + str(leader_vertex_id) + "\n"
+        while number_of_unique_edges < self.number_of_friend_edges:
+            missing_edges = self.number_of_friend_edges - number_of_unique_edges
 
-                        # add to local adjacency dictionary
-                        if (smaller_vertex_id in current_adjacency_dict):
-                            current_adjacency_dict[smaller_vertex_id].append(larger_vertex_id)
-                        else:
-                            current_adjacency_dict[smaller_vertex_id] = [larger_vertex_id,]
+            while missing_edges > 0:
+                candidate_keys = self.generate_candidate_edge_keys(min(candidate_chunk_size, missing_edges), worker_counters, random_generator)
+                self.edge_key_sorter.add(candidate_keys)
+                missing_edges -= len(candidate_keys)
+                number_of_candidates += len(candidate_keys)
 
-                        if (larger_vertex_id in current_adjacency_dict):
-                            current_adjacency_dict[larger_vertex_id].append(smaller_vertex_id)
-                        else:
-                            current_adjacency_dict[larger_vertex_id] = [smaller_vertex_id,]
+            number_of_unique_edges = self.edge_key_sorter.merge()
 
-                        self.vertex_lock_list[lock_index].release()
-                        generated_edges += 1
+        worker_counters.add("rejected_duplicate_edges", number_of_candidates - number_of_unique_edges)
+        worker_counters.add("friend_edges", number_of_unique_edges)
 
-            # after all the edges for the batch have been generated
-            # save the lines in the file and update the global adjacency list
-            self.save_edges_to_file_and_update_adjacency_list(file_lines, current_adjacency_dict)
+    @staticmethod
+    def get_edge_key_vertex_ids(edge_keys):
+        """
+        Description:
+            Returns the smaller vertex IDs, the larger vertex IDs and the flags
+            telling if the follower is the larger vertex of the packed edge keys.
+        """
 
+        return (edge_keys >> np.uint64(32)).astype(np.int64),\
+                ((edge_keys >> np.uint64(1)) & LARGER_VERTEX_ID_MASK).astype(np.int64),\
+                (edge_keys & np.uint64(1)).astype(np.bool_)
 
-    def thread_job(self):
+    def iter_memory_bounded_batches(self, worker_counters):
         """
         Description:
-            Defines the function of single thread. Once the lines_generator
-            function returns, it indicates that the thread has finished
-            execution by calling thread_end_execution().
+            Generator yielding the distinct edges of the memory-bounded mode as
+            record batches of at most lines_per_thread edges, in the order of
+            their packed keys (by smaller vertex ID, then larger vertex ID).
         """
 
-        self.lines_generator()
-        self.thread_end_execution()
+        if self.edge_key_sorter is None:
+            self.generate_unique_edge_keys(worker_counters)
+
+        for edge_keys in self.edge_key_sorter.iter_sorted_keys(self.lines_per_thread):
+            smaller_vertex_ids, larger_vertex_ids, follower_is_larger = self.get_edge_key_vertex_ids(edge_keys)
+
+            np.add.at(self.friend_degrees, smaller_vertex_ids, 1)
+            np.add.at(self.friend_degrees, larger_vertex_ids, 1)
+
+            yield make_record_batch(self.get_header_fields(),\
+                                    [np.where(follower_is_larger, larger_vertex_ids, smaller_vertex_ids).astype(self.follower_list.dtype),\
+                                     np.where(follower_is_larger, smaller_vertex_ids, larger_vertex_ids).astype(self.follower_list.dtype)])
+
+    def build_friend_adjacency_csr(self):
+        """
+        Description:
+            Builds the CSR adjacency list of the memory-bounded mode from the
+            sorted edge keys. Both directions of every edge are sorted by vertex
+            with a second external sorter, so the neighbours are written
+            sequentially to a temporary file, which is then memory-mapped (and
+            paged in from disk as needed instead of being held in memory).
+        """
+
+        directed_edge_sorter = ExternalSorter(memory_budget=self.memory_budget // 2,\
+                                                temporary_directory=self.temporary_directory)
+
+        for edge_keys in self.edge_key_sorter.iter_sorted_keys():
+            smaller_vertex_ids, larger_vertex_ids, follower_is_larger = self.get_edge_key_vertex_ids(edge_keys)
+            directed_edge_sorter.add((smaller_vertex_ids.astype(np.uint64) << np.uint64(32)) | larger_vertex_ids.astype(np.uint64))
+            directed_edge_sorter.add((larger_vertex_ids.astype(np.uint64) << np.uint64(32)) | smaller_vertex_ids.astype(np.uint64))
+
+        friend_degrees = np.zeros((self.number_of_investors,), dtype=np.int64)
+        indices_file = tempfile.TemporaryFile(dir=self.temporary_directory)
+
+        for directed_edge_keys in directed_edge_sorter.iter_sorted_keys():
+            np.add.at(friend_degrees, (directed_edge_keys >> np.uint64(32)).astype(np.int64), 1)
+            (directed_edge_keys & np.uint64(2 ** 32 - 1)).astype(self.follower_list.dtype).tofile(indices_file)
+
+        directed_edge_sorter.close()
+        indices_file.flush()
+
+        indptr = np.zeros((self.number_of_investors + 1,), dtype=np.int64)
+        np.cumsum(friend_degrees, out=indptr[1:])
+
+        # memory maps cannot be empty
+        indices = np.memmap(indices_file, dtype=self.follower_list.dtype, mode='r', shape=(int(indptr[-1]),))\
+            if indptr[-1] > 0 else np.zeros((0,), dtype=self.follower_list.dtype)
+        indices_file.close()
+
+        return FriendAdjacencyCSR(indptr, indices)
+
+    def get_friend_adjacency(self):
+        """
+        Description:
+            Returns the adjacency list of the generated friend edges: the
+            dictionary, or the FriendAdjacencyCSR in the memory-bounded mode
+            (built once all edges are generated, which also removes the
+            temporary files of the sorter).
+        """
+
+        if self.memory_budget is None:
+            return self.friend_adjacency_dict
+
+        if self.friend_adjacency_csr is None:
+            if self.edge_key_sorter is None:
+                self.generate_unique_edge_keys(self.create_worker_counters())
+            self.friend_adjacency_csr = self.build_friend_adjacency_csr()
+            self.edge_key_sorter.close()
+
+        return self.friend_adjacency_csr
+
+    def create_worker_counters(self):
+        """
+        Description:
+            Creates the counters of a new worker and registers them to be merged
+            by get_statistics().
+        """
+
+        worker_counters = WorkerCounters(FRIEND_EDGE_COUNTER_NAMES)
+
+        self.worker_counters_lock.acquire()
+        self.worker_counters_list.append(worker_counters)
+        self.worker_counters_lock.release()
+
+        return worker_counters
+
+    def get_statistics(self, number_of_hubs=10):
+        """
+        Description:
+            Merges the counters of all workers and returns the statistics of the
+            generated friend edges (a dictionary that can be saved as JSON).
+        """
+
+        counters = WorkerCounters.merge_all(FRIEND_EDGE_COUNTER_NAMES, self.worker_counters_list)
+
+        return {"number_of_friend_edges": counters["friend_edges"],\
+                "rejected_self_loops": counters["rejected_self_loops"],\
+                "rejected_duplicate_edges": counters["rejected_duplicate_edges"],\
+                "configured_choose_leader_list_1_as_friend_prob": self.choose_leader_list_1_as_friend_prob,\
+                "realized_choose_leader_list_1_as_friend_prob": get_ratio(counters["leader_list_1_edges"], counters["friend_edges"]),\
+                "degrees": get_degree_statistics(self.friend_degrees, number_of_hubs)}
+
+    def lines_generator(self, worker_index=None):
+        """
+        Description:
+            Defines the work of a single worker of the executor: keeps generating
+            record batches through iter_batches() and saving them to the
+            destination file (or passing them to the output writer).
+        """
+
+        for batch in self.iter_batches(worker_index):
+            self.save_batch(batch)
+
+    def save_batch(self, batch):
+        """
+        Description:
+            Saves a record batch of friend edges to the destination file (or
+            passes it to the output writer).
+        """
+
+        if self.output_writer is not None:
+            self.output_writer.write_record_batch(batch)
+        else:
+            self.save_edges_to_file(format_record_batch(batch))
+
+    def get_header_fields(self):
+        """
+        Description:
+            Returns the column names of the friend edges, which are also the
+            field names of the generated record batches.
+        """
+
+        return ["SourceVertexID", "DestinationVertexID"]
+
+    def get_loader_header_fields(self):
+        """
+        Description:
+            Returns the typed column names used in the header file of bulk
+            loaders (e.g. for the partitioned output layout).
+        """
+
+        return [":START_ID", ":END_ID"]
+
 
     def reset_destination_file(self):
         """
@@ -307,9 +791,21 @@ class FriendEdgeGenerator:
         """
         
         with open(self.destination_file, mode='w') as out_file:
-            out_file.write('Friend Edges\nSourceVertexID|DestinationVertexID\n')
+            out_file.write('Friend Edges\n' + get_header_line(self.get_header_fields()))
             out_file.close()
 
+    def reset_outputs(self):
+        """
+        Description:
+            Resets the destination file, or the files of the output writer if
+            it is not None.
+        """
+
+        if self.output_writer is not None:
+            self.output_writer.reset_destination_files(self.get_loader_header_fields())
+        else:
+            self.reset_destination_file()
+
     def execute(self):
         """
         Description:
@@ -317,20 +813,19 @@ class FriendEdgeGenerator:
             the adjacency list in the form of a python dictionary.
         """
 
-        # reset destination_file, if it exists
-        self.reset_destination_file()
-
-        # create and start threads
-        for i in range(0, self.thread_number):
-            temp_thread_object = threading.Thread(target=self.thread_job, )
-            temp_thread_object.start()
+        # reset destination_file (or the files of the output writer), if it exists
+        self.reset_outputs()
 
-        # wait for end_semaphore
-        self.main_thread_wait_semaphore.acquire()
+        if self.memory_budget is not None:
+            # the candidate edges are generated and merged by a single thread with vectorized operations
+            self.lines_generator()
+        else:
+            # run the workers until all batches are generated (the first exception of a worker is raised again)
+            self.batch_executor.run(self.lines_generator, self.batch_scheduler, cancel_function=self.notify_seeded_block_waiters)
         print("Friend Edge Generation Complete")
 
-        #returns the adjacency list in the form of a python dictionary
-        return self.friend_adjacency_dict
+        #returns the adjacency list in the form of a python dictionary (or a FriendAdjacencyCSR)
+        return self.get_friend_adjacency()
 
 # Unit tests to test if FriendEdgeGenerator is initializing correctly
 def test_friend_edge_generator_init():
@@ -412,7 +907,149 @@ def test_generate_friend_edges():
     print("The adjacency list is as follows:")
     print(adjacency_list)
 
+# Unit test to check if friend edges are yielded as expected by iter_batches()
+def test_iter_batches():
+    test_object = FriendEdgeGenerator( thread_number=5,\
+                 lines_per_thread=40,\
+                 destination_file="friend_edge_test3.csv",\
+                 number_of_friend_edges=100,\
+                 follower_list=np.random.permutation(50).tolist(),\
+                 leader_list_1=np.random.permutation(50).tolist(),\
+                 leader_list_2=np.random.permutation(50).tolist(),\
+                 follower_list_friend_power_dis_param=2,\
+                 leader_list_1_friend_power_dis_param=2,\
+                 leader_list_2_friend_power_dis_param=2,\
+                 choose_leader_list_1_as_friend_prob=0.5,\
+                 lock_list_element_cardinality=5)
+    batches = list(test_object.iter_batches())
+
+    assert [len(batch) for batch in batches] == [40, 40, 20],\
+        "FriendEdgeGenerator_ITER_BATCHES_ERROR batch sizes are wrong"
+
+    all_edges = np.concatenate(batches)
+    undirected_edges = set(zip(np.minimum(all_edges["SourceVertexID"], all_edges["DestinationVertexID"]).tolist(),\
+                               np.maximum(all_edges["SourceVertexID"], all_edges["DestinationVertexID"]).tolist()))
+
+    assert len(undirected_edges) == 100,\
+        "FriendEdgeGenerator_ITER_BATCHES_ERROR duplicate edges generated"
+
+    assert np.all(all_edges["SourceVertexID"] != all_edges["DestinationVertexID"]),\
+        "FriendEdgeGenerator_ITER_BATCHES_ERROR self loop generated"
+
+    edge_count = 0
+    for i in test_object.friend_adjacency_dict:
+        edge_count += len(test_object.friend_adjacency_dict[i])
+
+    assert edge_count == 200,\
+        "FriendEdgeGenerator_ITER_BATCHES_ERROR adjacency list not updated"
+
+    statistics = test_object.get_statistics(number_of_hubs=3)
+
+    assert statistics["number_of_friend_edges"] == 100 and sum(statistics["degrees"]["log2_degree_histogram"]) == 50,\
+        "FriendEdgeGenerator_STATISTICS_ERROR edge count or degree histogram is invalid"
+
+    assert statistics["degrees"]["max_degree"] == max(len(friends) for friends in test_object.friend_adjacency_dict.values()),\
+        "FriendEdgeGenerator_STATISTICS_ERROR max degree is invalid"
+
+    assert 0 <= statistics["realized_choose_leader_list_1_as_friend_prob"] <= 1,\
+        "FriendEdgeGenerator_STATISTICS_ERROR realized probability is invalid"
+
+    # iterating again generates all the edges again, instead of yielding nothing
+    all_edges = np.concatenate(list(test_object.iter_batches()))
+    undirected_edges = set(zip(np.minimum(all_edges["SourceVertexID"], all_edges["DestinationVertexID"]).tolist(),\
+                               np.maximum(all_edges["SourceVertexID"], all_edges["DestinationVertexID"]).tolist()))
+
+    assert len(all_edges) == 100 and len(undirected_edges) == 100,\
+        "FriendEdgeGenerator_ITER_BATCHES_ERROR second iteration is invalid"
+
+    assert sum(len(friends) for friends in test_object.friend_adjacency_dict.values()) == 200 and\
+            test_object.get_statistics()["number_of_friend_edges"] == 100 and test_object.friend_degrees.sum() == 200,\
+        "FriendEdgeGenerator_ITER_BATCHES_ERROR adjacency list or statistics of the second iteration are invalid"
+
+# Unit test to check if the memory-bounded mode generates distinct edges through spilled runs
+def test_memory_bounded_friend_edges():
+    test_object = FriendEdgeGenerator( thread_number=5,\
+                 lines_per_thread=300,\
+                 destination_file="friend_edge_test4.csv",\
+                 number_of_friend_edges=3000,\
+                 follower_list=np.random.permutation(200).tolist(),\
+                 leader_list_1=np.random.permutation(200).tolist(),\
+                 leader_list_2=np.random.permutation(200).tolist(),\
+                 follower_list_friend_power_dis_param=2,\
+                 leader_list_1_friend_power_dis_param=2,\
+                 leader_list_2_friend_power_dis_param=2,\
+                 choose_leader_list_1_as_friend_prob=0.5,\
+                 memory_budget=4096)
+
+    assert test_object.friend_adjacency_matrix is None,\
+        "FriendEdgeGenerator_MEMORY_BOUNDED_ERROR adjacency matrix allocated"
+
+    adjacency_csr = test_object.execute()
+
+    assert test_object.get_statistics()["rejected_duplicate_edges"] > 0,\
+        "FriendEdgeGenerator_MEMORY_BOUNDED_ERROR no duplicate edges were topped up"
+
+    with open("friend_edge_test4.csv", mode='r') as in_file:
+        lines = in_file.read().splitlines()[2:]
+        in_file.close()
+
+    edges = np.array([line.split("|") for line in lines], dtype=np.int64)
+    undirected_edges = set(zip(edges.min(axis=1).tolist(), edges.max(axis=1).tolist()))
+
+    assert len(edges) == 3000 and len(undirected_edges) == 3000 and np.all(edges[:, 0] != edges[:, 1]),\
+        "FriendEdgeGenerator_MEMORY_BOUNDED_ERROR edges are not distinct"
+
+    assert adjacency_csr.get_degrees().tolist() == test_object.friend_degrees.tolist() and adjacency_csr.get_degrees().sum() == 6000,\
+        "FriendEdgeGenerator_MEMORY_BOUNDED_ERROR adjacency list degrees are invalid"
+
+    for smaller_vertex_id, larger_vertex_id in list(undirected_edges)[:100]:
+        assert larger_vertex_id in adjacency_csr[smaller_vertex_id] and smaller_vertex_id in adjacency_csr[larger_vertex_id],\
+            "FriendEdgeGenerator_MEMORY_BOUNDED_ERROR adjacency list is missing an edge"
+
+    # iterating again generates the distinct edges again with new edge keys
+    assert len(np.concatenate(list(test_object.iter_batches()))) == 3000 and test_object.friend_degrees.sum() == 6000,\
+        "FriendEdgeGenerator_MEMORY_BOUNDED_ERROR second iteration is invalid"
+
+# Creates the seeded friend edge generator of the unit tests
+def create_seeded_test_object(thread_number, lines_per_thread, scheduling, destination_file):
+    test_object = FriendEdgeGenerator(thread_number=thread_number,\
+                 lines_per_thread=lines_per_thread,\
+                 destination_file=destination_file,\
+                 number_of_friend_edges=600,\
+                 follower_list=np.arange(100),\
+                 leader_list_1=np.arange(100),\
+                 leader_list_2=np.arange(100),\
+                 scheduling=scheduling)
+    test_object.use_seeded_blocks(7, "friend_edges", 40)
+    return test_object
+
+# Unit test to check if the seeded blocks give the same edges whatever the scheduling, number of threads
+# and batch size, and the same edges as a single iteration over all the blocks (like the shard server)
+def test_seeded_blocks():
+    expected_edges = np.concatenate(list(create_seeded_test_object(1, 1000, "dynamic", "friend_edge_test5.csv").iter_batches()))
+    expected_lines = sorted(format_record_batch(expected_edges).splitlines())
+
+    for scheduling in SCHEDULING_MODES:
+        for thread_number, lines_per_thread in [(1, 1000), (4, 40), (4, 120)]:
+            test_object = create_seeded_test_object(thread_number, lines_per_thread, scheduling, "friend_edge_test5.csv")
+            adjacency_list = test_object.execute()
+
+            with open("friend_edge_test5.csv", mode='r') as in_file:
+                lines = in_file.read().splitlines()[2:]
+                in_file.close()
+
+            assert sorted(lines) == expected_lines,\
+                "FriendEdgeGenerator_SEEDED_BLOCKS_ERROR " + scheduling + " edges depend on the execution"
+
+            assert sum(len(friends) for friends in adjacency_list.values()) == 1200,\
+                "FriendEdgeGenerator_SEEDED_BLOCKS_ERROR " + scheduling + " adjacency list is invalid"
+
+    os.remove("friend_edge_test5.csv")
+
 # Function to execute all defined unit tests for FriendEdgeGenerator
 def execute_all_unit_tests():
     test_friend_edge_generator_init()
     test_generate_friend_edges()
+    test_iter_batches()
+    test_memory_bounded_friend_edges()
+    test_seeded_blocks()
@@ -10,29 +10,51 @@ Description:
 
     The MirrorEdgeGenerator class generates the mirror edges and the remove
     mirror edges by using the friend edge adjacency list (defined as a python
-    dictionary).
+    dictionary). The mirror edges can also be consumed in memory as record
+    batches through its iter_batches method.
+
+    After use_seeded_blocks(), the mirror edges are generated in blocks with
+    their own seeded random generators, examining the friend pairs in block
+    order, so the mirror edges only depend on the random seed and on the friend
+    edges, and not on the threads or the scheduling.
 
 """
 
 
 # Imports from built-in modules
 import numpy as np
+import os
 import threading
 
+# Imports from Base Data Generator Module
+from data_sinks.BDG010_RecordBatch import format_record_batch, get_header_line, make_record_batch
+from execution.BDG027_BatchExecutor import SCHEDULING_MODES, BatchExecutor, get_block_random_generator, get_random_generator
+from graph_statistics.BDG019_GraphStatistics import WorkerCounters, get_degree_statistics, get_ratio
+from list_generators.BDG006_PermutedListGenerator import get_id_dtype, to_id_array
+from samplers.BDG015_VertexSamplers import PowerSampler
+
+# Names of the counters kept by every worker generating mirror edges
+MIRROR_EDGE_COUNTER_NAMES = ["mirror_edges", "remove_mirror_edges", "examined_friend_pairs", "followers_without_friends"]
+
 class MirrorEdgeGenerator:
 
     def __init__(self, thread_number=5,\
                  lines_per_thread=1000,\
                  mirror_destination_file="mirror_edge.csv",\
                  remove_mirror_destination_file="remove_mirror_edge.csv",\
-                 follower_list=[0,1,2,3],\
+                 follower_list=np.array([0,1,2,3], dtype=np.int32),\
                  number_of_friend_edges=2,\
                  number_of_mirror_edges=1,\
                  follower_mirrors_a_friend_probability=0.75,\
                  follower_removes_a_mirror_probability=0.95,\
                  follower_list_mirror_power_dis_param=2,\
                  friend_adjacency_dict={1:[2,],3:[0,],2:[1,],0:[3,]},\
-                 lock_list_element_cardinality=5):
+                 lock_list_element_cardinality=5,\
+                 mirror_output_writer=None,\
+                 remove_mirror_output_writer=None,\
+                 follower_sampler=None,\
+                 backend="threads",\
+                 scheduling="dynamic"):
 
         # Number of threads to be used for generating data
         self.thread_number = thread_number
@@ -52,34 +74,52 @@ class MirrorEdgeGenerator:
         # number of friend edges
         self.number_of_friend_edges = number_of_friend_edges
 
+        # number of mirror edges to be generated
+        self.number_of_mirror_edges = number_of_mirror_edges
+
         # Lock for restriciting access to writing file and global adjacency list
         self.file_write_lock = threading.Lock()
 
-        # Lock for acquiring next line batch
-        self.next_line_batch_lock = threading.Lock()
+        # Writers (e.g. PartitionedFileWriter) used instead of the destination
+        # files when they are not None
+        self.mirror_output_writer = mirror_output_writer
+        self.remove_mirror_output_writer = remove_mirror_output_writer
 
         # ID of the last edge to generate the data for
         self.last_valid_edge_ID = number_of_mirror_edges + self.current_start_ID - 1
 
-        # Protects the thread_terminated_count variable defined next
-        self.thread_terminate_execution_lock = threading.Lock()
+        # The mirror adjacency matrix is only shared by threads
+        assert backend != "processes",\
+            "MirrorEdgeGenerator_ERROR: the processes backend is not supported"
+
+        # Executor running the workers (threads or inline) with the scheduling mode
+        self.batch_executor = BatchExecutor(backend=backend,\
+                                            scheduling=scheduling,\
+                                            number_of_workers=thread_number)
 
-        # Number of threads that have finished execution
-        self.thread_terminated_count = 0
+        # Seed, name and number of edges of the seeded blocks (not seeded if random_seed is None),
+        # set by use_seeded_blocks()
+        self.random_seed = None
+        self.seed_name = None
+        self.seed_block_size = None
 
-        # Semaphore used as a condition variable to indicate all threads have
-        # finished execution, i.e, all the data has been generated
-        self.main_thread_wait_semaphore = threading.Semaphore(0)
+        # Index of the next seeded block to be generated, so the blocks taken by the threads
+        # examine the friend pairs in block order
+        self.next_seeded_block_index = 0
+        self.seeded_block_condition = threading.Condition()
 
-        # Stores the (ordered) follower list
-        self.follower_list = follower_list
+        # Scheduler handing out the batches of edge IDs to the workers
+        self.batch_scheduler = self.create_batch_scheduler()
+
+        # Stores the (ordered) follower list as a compact NumPy array
+        self.follower_list = to_id_array(follower_list)
 
         # Checking if number of mirror edges < probability of mirroring a friend * number of friends
         assert number_of_mirror_edges < number_of_friend_edges * follower_mirrors_a_friend_probability,\
             "MirrorEdgeGenerator_ERROR: Number of mirror edges must be smaller than (number_of_friend_edges x follower_mirrors_a_friend_probability)"
 
         # Stores the number of investors
-        self.number_of_investors = len(follower_list)
+        self.number_of_investors = self.follower_list.shape[0]
 
         # Stores the probability that a friend edge also has a mirror edge
         self.follower_mirrors_a_friend_probability = follower_mirrors_a_friend_probability
@@ -90,6 +130,11 @@ class MirrorEdgeGenerator:
         # Stores the follower list mirror power distribution parameter
         self.follower_list_mirror_power_dis_param = follower_list_mirror_power_dis_param
 
+        # Sampler drawing the follower vertex IDs. If not given, the power
+        # distribution with the parameter above is used
+        self.follower_sampler = follower_sampler if follower_sampler is not None else\
+            PowerSampler(follower_list_mirror_power_dis_param, self.number_of_investors)
+
         # Stores the adjacency list for the friend edges in the form of a python dictionary
         self.friend_adjacency_dict = friend_adjacency_dict
 
@@ -110,47 +155,83 @@ class MirrorEdgeGenerator:
         # the lock list that protects the adjacency matrix
         self.vertex_lock_list = [threading.Lock() for i in range(0, self.lock_list_element_cardinality)]
 
-    def fetch_next_line_batch(self):
+        # Number of generated mirror edges of every tradebook (indexed by the investor ID)
+        self.mirror_degrees = np.zeros((self.number_of_investors,), dtype=np.int64)
+
+        # Lock for restricting access to the mirror degrees
+        self.degree_update_lock = threading.Lock()
+
+        # Counters of every worker iterating over the batches, merged by get_statistics()
+        self.worker_counters_list = []
+
+        # Lock for restricting access to the list of worker counters
+        self.worker_counters_lock = threading.Lock()
+
+    def create_batch_scheduler(self):
         """
         Description:
-            Threads call this function to get the next batch of lines
-
-        Returns:
-            - start ID for the batch and the number of items in the batch
-            - (-1, -1) if all batches have finished
+            Creates a scheduler handing out the batches of all the mirror edges
+            (the batches of edge IDs, or of block indices with seeded blocks).
         """
 
-        self.next_line_batch_lock.acquire()
+        if self.random_seed is None:
+            return self.batch_executor.create_scheduler(0, self.number_of_mirror_edges, self.lines_per_thread)
 
-        if (self.current_start_ID > self.last_valid_edge_ID):
-            self.next_line_batch_lock.release()
-            return (-1, -1)
+        number_of_blocks = (self.number_of_mirror_edges + self.seed_block_size - 1) // self.seed_block_size
+        return self.batch_executor.create_scheduler(0, number_of_blocks, max(1, self.lines_per_thread // self.seed_block_size))
 
-        batch_size = self.lines_per_thread
-        assigned_start_ID = self.current_start_ID
-        if (self.current_start_ID + batch_size > self.last_valid_edge_ID):
-            batch_size = self.last_valid_edge_ID - self.current_start_ID + 1
+    def use_seeded_blocks(self, random_seed, seed_name, seed_block_size):
+        """
+        Description:
+            Generates the mirror edges in blocks of seed_block_size edges, each
+            with its own random generator seeded from the random seed, the seed
+            name (e.g. the stage name) and the block index. The batches are then
+            made of whole blocks (as many as fit in lines_per_thread, at least
+            one), and a block only examines the friend pairs once the previous
+            blocks have, so the same mirror edges are generated whatever the
+            number of threads or the order in which they take the blocks.
+        """
 
-        self.current_start_ID += batch_size
+        assert seed_block_size > 0,\
+            "MirrorEdgeGenerator_ERROR: seed_block_size must be positive"
 
-        self.next_line_batch_lock.release()
+        self.random_seed = random_seed
+        self.seed_name = seed_name
+        self.seed_block_size = seed_block_size
+        self.next_seeded_block_index = 0
 
-        return (assigned_start_ID, batch_size)
+        # the scheduler hands out block indices instead of edge IDs
+        self.batch_scheduler = self.create_batch_scheduler()
 
-    def thread_end_execution(self):
+    def fetch_next_line_batch(self, worker_index=None, batch_scheduler=None):
         """
         Description:
-            Threads call this function to indicate that they have finished
-            execution by updating thread_terminated_count. This happens when
-            they get (-1, -1) when calling fetch_next_line_batch(). The last
-            thread wakes up the main thread.
+            Threads call this function to get the next batch of lines from the
+            batch scheduler (with their worker index, if they are one of the
+            workers of the executor). The scheduler of the workers is used if
+            batch_scheduler is None.
+
+        Returns:
+            - start ID for the batch and the number of items in the batch
+            - (-1, -1) if all batches have finished
         """
 
-        self.thread_terminate_execution_lock.acquire()
-        self.thread_terminated_count += 1
-        if (self.thread_terminated_count >= self.thread_number):
-            self.main_thread_wait_semaphore.release()
-        self.thread_terminate_execution_lock.release()
+        batch_scheduler = batch_scheduler if batch_scheduler is not None else self.batch_scheduler
+
+        assigned_start_ID, batch_size = batch_scheduler.next_batch(worker_index)
+        number_of_assigned_items = batch_scheduler.get_number_of_assigned_items()
+
+        # with seeded blocks, the scheduler assigns block indices
+        if self.random_seed is not None:
+            number_of_assigned_items = min(self.number_of_mirror_edges, number_of_assigned_items * self.seed_block_size)
+            if (assigned_start_ID >= 0):
+                assigned_start_ID, batch_size = (assigned_start_ID * self.seed_block_size,\
+                                                 min(batch_size * self.seed_block_size,\
+                                                     self.number_of_mirror_edges - assigned_start_ID * self.seed_block_size))
+
+        self.current_start_ID = number_of_assigned_items
+
+        return (assigned_start_ID, batch_size)
 
     def save_mirror_and_remove_mirror_edges_to_file(self, mirror_lines, remove_mirror_lines):
         """
@@ -171,106 +252,320 @@ class MirrorEdgeGenerator:
 
         self.file_write_lock.release()
 
-    def lines_generator(self):
+    def generate_mirror_batch(self, batch_size, worker_counters=None, follower_sampler=None, max_follower_samples=None, random_generator=None):
+        """
+        Description:
+            Generates batch_size new mirror edges and returns them as a record
+            batch with the fields SourceTradeBookID, DestinationTradeBookID and
+            RemoveMirror. RemoveMirror is True for the mirror edges that are
+            also remove mirror edges. The examined friend edges and the sampled
+            followers without friends are counted in the worker counters, if
+            given. follower_sampler replaces the sampler of the generator, if
+            given. With max_follower_samples, at most that many followers are
+            sampled, so the batch may have fewer than batch_size edges (e.g.
+            when the friend pairs of the sampled followers run out). The samples
+            are drawn with the NumPy random generator (see get_random_generator()).
+        """
+
+        random_generator = get_random_generator(random_generator)
+
+        if worker_counters is None:
+            worker_counters = self.create_worker_counters()
+
+        if follower_sampler is None:
+            follower_sampler = self.follower_sampler
+
+        # stores the number of edges generated for this batch so far
+        generated_edges = 0
+
+        # the source and destination tradebooks of the generated mirror edges
+        tradebook_id_dtype = get_id_dtype(2 * self.number_of_investors - 1)
+        source_tradebook_ids = np.empty((batch_size,), dtype=tradebook_id_dtype)
+        destination_tradebook_ids = np.empty((batch_size,), dtype=tradebook_id_dtype)
+
+        # stores if the generated mirror edges are to be removed in the future
+        remove_mirror_flags = np.zeros((batch_size,), dtype=np.bool_)
+
+        # follower vertex IDs are sampled batch_size at a time
+        follower_vertex_ids = []
+        follower_sample_index = 0
+        number_of_follower_samples = 0
+
+        while generated_edges < batch_size:
+            if (max_follower_samples is not None) and (number_of_follower_samples >= max_follower_samples):
+                break
+            number_of_follower_samples += 1
+
+            if (follower_sample_index >= len(follower_vertex_ids)):
+                follower_vertex_ids = follower_sampler.sample(batch_size, random_generator).tolist()
+                follower_sample_index = 0
+
+            follower_vertex_id = follower_vertex_ids[follower_sample_index]
+            follower_sample_index += 1
+
+            if (follower_vertex_id not in self.friend_adjacency_dict):
+                worker_counters.add("followers_without_friends")
+                continue
+            else:
+                copied_list = self.friend_adjacency_dict[follower_vertex_id].copy()
+                copied_list.append(follower_vertex_id)
+                copied_list.sort()
+
+                mirror_samples = random_generator.uniform(low=0.0, high=1.0, size=(len(copied_list) - 1,))
+                remove_mirror_samples = random_generator.uniform(low=0.0, high=1.0, size=(len(copied_list) - 1,))
+                mirror_sample_index = 0
+
+                #acquiring locks in ascending order for all vertices to prevent deadlock
+                acquired_lock_indices = []
+                for vertex_id in copied_list:
+                    lock_index = min(self.lock_list_element_cardinality - 1,\
+                                    int(vertex_id / self.lock_list_element_granularity))
+                    if (lock_index not in acquired_lock_indices):
+                        self.vertex_lock_list[lock_index].acquire()
+                        acquired_lock_indices.append(lock_index)
+
+                for vertex_id in copied_list:
+                    if (vertex_id != follower_vertex_id):
+
+                        should_mirror = mirror_samples[mirror_sample_index]
+                        should_remove_mirror = remove_mirror_samples[mirror_sample_index]
+                        mirror_sample_index += 1
+
+                        source_tradebook_id = follower_vertex_id + self.number_of_investors
+                        destination_tradebook_id = vertex_id + self.number_of_investors
+
+                        if (self.mirror_adjacency_matrix[follower_vertex_id][vertex_id] == 1\
+                                or self.mirror_adjacency_matrix[vertex_id][follower_vertex_id] == 1):
+                            pass
+                        else:
+                            worker_counters.add("examined_friend_pairs")
+
+                            #do mirror prob, do remove mirror prob and add to batch
+                            if (should_mirror < self.follower_mirrors_a_friend_probability):
+                                source_tradebook_ids[generated_edges] = source_tradebook_id
+                                destination_tradebook_ids[generated_edges] = destination_tradebook_id
+                                remove_mirror_flags[generated_edges] = (should_remove_mirror < self.follower_removes_a_mirror_probability)
+                                generated_edges += 1
+
+                                if (generated_edges >= batch_size):
+                                    self.mirror_adjacency_matrix[follower_vertex_id][vertex_id] = 1
+                                    self.mirror_adjacency_matrix[vertex_id][follower_vertex_id] = 1
+                                    break
+
+                    self.mirror_adjacency_matrix[follower_vertex_id][vertex_id] = 1
+                    self.mirror_adjacency_matrix[vertex_id][follower_vertex_id] = 1
+
+
+                for lock_index in acquired_lock_indices:
+                    self.vertex_lock_list[lock_index].release()
+
+        worker_counters.add("mirror_edges", generated_edges)
+        worker_counters.add("remove_mirror_edges", int(np.count_nonzero(remove_mirror_flags)))
+
+        return make_record_batch(self.get_header_fields() + ["RemoveMirror",],\
+                                    [source_tradebook_ids[:generated_edges],\
+                                     destination_tradebook_ids[:generated_edges],\
+                                     remove_mirror_flags[:generated_edges]])
+
+    def generate_seeded_mirror_batch(self, start_id, batch_size, worker_counters, batch_scheduler):
+        """
+        Description:
+            Generates the mirror edges start_id to (start_id + batch_size - 1) and
+            counts them in the mirror degrees. After use_seeded_blocks(), every
+            block of the batch is generated with its own seeded random generator
+            once the previous blocks have been generated (by any thread), so the
+            friend pairs are examined in block order. Returns None if the
+            execution of the batch scheduler was cancelled while waiting.
+        """
+
+        if self.random_seed is None:
+            batch = self.generate_mirror_batch(batch_size, worker_counters)
+            self.update_mirror_degrees(batch)
+            return batch
+
+        block_batches = []
+        for block_start_ID in range(start_id, start_id + batch_size, self.seed_block_size):
+            block_index = block_start_ID // self.seed_block_size
+
+            self.seeded_block_condition.acquire()
+            self.seeded_block_condition.wait_for(lambda: (self.next_seeded_block_index == block_index) or batch_scheduler.is_cancelled())
+
+            if self.next_seeded_block_index != block_index:
+                self.seeded_block_condition.release()
+                return None
+
+            try:
+                block_batch = self.generate_mirror_batch(min(self.seed_block_size, start_id + batch_size - block_start_ID),\
+                                                            worker_counters,\
+                                                            random_generator=get_block_random_generator(self.random_seed, self.seed_name, block_index))
+                self.update_mirror_degrees(block_batch)
+                block_batches.append(block_batch)
+            finally:
+                self.next_seeded_block_index += 1
+                self.seeded_block_condition.notify_all()
+                self.seeded_block_condition.release()
+
+        return block_batches[0] if len(block_batches) == 1 else np.concatenate(block_batches)
+
+    def notify_seeded_block_waiters(self):
         """
         Description:
-            The thread must first acquire a batch and check if it's valid. If the
-            batch is not valid, the function must return, otherwise keep
-            acquiring batches and generating data and saving it to the
-            destination file.
+            Wakes up the threads waiting for the previous seeded blocks, so they
+            stop once the execution is cancelled.
         """
 
+        self.seeded_block_condition.acquire()
+        self.seeded_block_condition.notify_all()
+        self.seeded_block_condition.release()
+
+    def iter_batches(self, worker_index=None):
+        """
+        Description:
+            Generator that keeps acquiring batches and yields the generated mirror
+            edges for each batch as a record batch. The mirror degrees are updated
+            with every batch. Every call without a worker index generates all the
+            mirror edges again with its own scheduler (see
+            reset_generated_edges()), so the generator can be iterated again.
+            With the worker index of a worker of the executor, the batches are
+            shared with the other workers through fetch_next_line_batch()
+            instead. Every iteration keeps its own worker counters.
+        """
+
+        batch_scheduler = self.batch_scheduler
+        if worker_index is None:
+            self.reset_generated_edges()
+            batch_scheduler = self.create_batch_scheduler()
+
+        worker_counters = self.create_worker_counters()
+
         # Executes until batches no longer exist
         while True:
-            start_id, batch_size = self.fetch_next_line_batch()
+            start_id, batch_size = self.fetch_next_line_batch(worker_index, batch_scheduler)
 
             #if run out of batches, return
             if ((start_id < 0) or (batch_size <= 0)):
                 return
 
-            # stores the number of edges generated for this batch so far
-            generated_edges = 0
+            batch = self.generate_seeded_mirror_batch(start_id, batch_size, worker_counters, batch_scheduler)
 
-            # string storing the mirror edge lines to be written to the file for this batch
-            mirror_lines = ""
+            #if the execution was cancelled, return
+            if batch is None:
+                return
 
-            # string storing the remove mirror edge lines to be written to the file for this batch
-            remove_mirror_lines = ""
+            yield batch
 
-            while generated_edges < batch_size:
-                power_distribution_sample = np.random.power(a=self.follower_list_mirror_power_dis_param,\
-                                                    size=(1,))[0]
+    def reset_generated_edges(self):
+        """
+        Description:
+            Forgets the mirror edges of a previous iteration (the examined friend
+            pairs, the mirror degrees and the worker counters), so that the next
+            iteration generates number_of_mirror_edges mirror edges again.
+        """
 
-                follower_vertex_id = int(power_distribution_sample * self.number_of_investors)
+        if len(self.worker_counters_list) > 0:
+            self.mirror_adjacency_matrix.fill(0)
 
-                if (follower_vertex_id not in self.friend_adjacency_dict):
-                    continue
-                else:
-                    copied_list = self.friend_adjacency_dict[follower_vertex_id].copy()
-                    copied_list.append(follower_vertex_id)
-                    copied_list.sort()
+        self.mirror_degrees.fill(0)
+        self.next_seeded_block_index = 0
 
-                    mirror_samples = np.random.uniform(low=0.0, high=1.0, size=(len(copied_list) - 1,))
-                    remove_mirror_samples = np.random.uniform(low=0.0, high=1.0, size=(len(copied_list) - 1,))
-                    mirror_sample_index = 0
+        self.worker_counters_lock.acquire()
+        self.worker_counters_list = []
+        self.worker_counters_lock.release()
 
-                    #acquiring locks in ascending order for all vertices to prevent deadlock
-                    acquired_lock_indices = []
-                    for vertex_id in copied_list:
-                        lock_index = min(self.lock_list_element_cardinality - 1,\
-                                        int(vertex_id / self.lock_list_element_granularity))
-                        if (lock_index not in acquired_lock_indices):
-                            self.vertex_lock_list[lock_index].acquire()
-                            acquired_lock_indices.append(lock_index)
+    def update_mirror_degrees(self, batch):
+        """
+        Description:
+            Counts the mirror edges of the record batch in the mirror degrees of
+            both tradebooks. Only one thread can be updating the degrees at a time.
+        """
 
-                    for vertex_id in copied_list:
-                        if (vertex_id != follower_vertex_id):
+        self.degree_update_lock.acquire()
+        np.add.at(self.mirror_degrees, batch["SourceTradeBookID"].astype(np.int64) - self.number_of_investors, 1)
+        np.add.at(self.mirror_degrees, batch["DestinationTradeBookID"].astype(np.int64) - self.number_of_investors, 1)
+        self.degree_update_lock.release()
 
-                            should_mirror = mirror_samples[mirror_sample_index]
-                            should_remove_mirror = remove_mirror_samples[mirror_sample_index]
-                            mirror_sample_index += 1
+    def create_worker_counters(self):
+        """
+        Description:
+            Creates the counters of a new worker and registers them to be merged
+            by get_statistics().
+        """
 
-                            source_tradebook_id = follower_vertex_id + self.number_of_investors
-                            destination_tradebook_id = vertex_id + self.number_of_investors
+        worker_counters = WorkerCounters(MIRROR_EDGE_COUNTER_NAMES)
 
-                            if (self.mirror_adjacency_matrix[follower_vertex_id][vertex_id] == 1\
-                                    or self.mirror_adjacency_matrix[vertex_id][follower_vertex_id] == 1):
-                                pass
-                            else:
-                                #do mirror prob, do remove mirror prob and add to list
-                                if (should_mirror < self.follower_mirrors_a_friend_probability):
-                                    mirror_lines += str(source_tradebook_id) + "|" + str(destination_tradebook_id) + "\n"
-                                    generated_edges += 1
+        self.worker_counters_lock.acquire()
+        self.worker_counters_list.append(worker_counters)
+        self.worker_counters_lock.release()
 
-                                    if (should_remove_mirror < self.follower_removes_a_mirror_probability):
-                                        remove_mirror_lines += str(source_tradebook_id) + "|" + str(destination_tradebook_id) + "\n"
+        return worker_counters
 
-                                    if (generated_edges >= batch_size):
-                                        self.mirror_adjacency_matrix[follower_vertex_id][vertex_id] = 1
-                                        self.mirror_adjacency_matrix[vertex_id][follower_vertex_id] = 1
-                                        break
+    def get_statistics(self, number_of_hubs=10):
+        """
+        Description:
+            Merges the counters of all workers and returns the statistics of the
+            generated mirror edges (a dictionary that can be saved as JSON). The
+            realized probabilities are measured over the examined friend edges
+            and the generated mirror edges.
+        """
+
+        counters = WorkerCounters.merge_all(MIRROR_EDGE_COUNTER_NAMES, self.worker_counters_list)
 
-                        self.mirror_adjacency_matrix[follower_vertex_id][vertex_id] = 1
-                        self.mirror_adjacency_matrix[vertex_id][follower_vertex_id] = 1
+        return {"number_of_mirror_edges": counters["mirror_edges"],\
+                "number_of_remove_mirror_edges": counters["remove_mirror_edges"],\
+                "examined_friend_edges": counters["examined_friend_pairs"],\
+                "sampled_followers_without_friends": counters["followers_without_friends"],\
+                "configured_follower_mirrors_a_friend_probability": self.follower_mirrors_a_friend_probability,\
+                "realized_follower_mirrors_a_friend_probability": get_ratio(counters["mirror_edges"], counters["examined_friend_pairs"]),\
+                "configured_follower_removes_a_mirror_probability": self.follower_removes_a_mirror_probability,\
+                "realized_follower_removes_a_mirror_probability": get_ratio(counters["remove_mirror_edges"], counters["mirror_edges"]),\
+                "degrees": get_degree_statistics(self.mirror_degrees, number_of_hubs, id_offset=self.number_of_investors)}
+
+    def lines_generator(self, worker_index=None):
+        """
+        Description:
+            Defines the work of a single worker of the executor: keeps generating
+            record batches through iter_batches() and saving the mirror edges and
+            the remove mirror edges to the destination files.
+        """
 
+        for batch in self.iter_batches(worker_index):
+            self.save_batch(batch)
 
-                    for lock_index in acquired_lock_indices:
-                        self.vertex_lock_list[lock_index].release()
+    def save_batch(self, batch):
+        """
+        Description:
+            Saves a record batch of mirror edges to the mirror edge file and its
+            remove mirror edges to the remove mirror edge file (or passes them
+            to the output writers).
+        """
 
-            # after mirror edges for the batch have been generated, store the lines
+        if self.mirror_output_writer is not None:
+            self.mirror_output_writer.write_record_batch(batch, self.get_header_fields())
+            self.remove_mirror_output_writer.write_record_batch(batch[batch["RemoveMirror"]], self.get_header_fields())
+        else:
+            mirror_lines = format_record_batch(batch, self.get_header_fields())
+            remove_mirror_lines = format_record_batch(batch[batch["RemoveMirror"]], self.get_header_fields())
             self.save_mirror_and_remove_mirror_edges_to_file(mirror_lines, remove_mirror_lines)
 
+    def get_header_fields(self):
+        """
+        Description:
+            Returns the column names of the mirror edges and the remove mirror
+            edges. These are also the field names of the generated record batches
+            (apart from the RemoveMirror field).
+        """
+
+        return ["SourceTradeBookID", "DestinationTradeBookID"]
 
-    def thread_job(self):
+    def get_loader_header_fields(self):
         """
         Description:
-            Defines the function of single thread. Once the lines_generator
-            function returns, it indicates that the thread has finished
-            execution by calling thread_end_execution().
+            Returns the typed column names used in the header files of bulk
+            loaders (e.g. for the partitioned output layout).
         """
 
-        self.lines_generator()
-        self.thread_end_execution()
+        return [":START_ID", ":END_ID"]
+
 
     def reset_destination_files(self):
         """
@@ -281,13 +576,26 @@ class MirrorEdgeGenerator:
         """
 
         with open(self.mirror_destination_file, mode='w') as out_file:
-            out_file.write('Mirror Edges\nSourceTradeBookID|DestinationTradeBookID\n')
+            out_file.write('Mirror Edges\n' + get_header_line(self.get_header_fields()))
             out_file.close()
 
         with open(self.remove_mirror_destination_file, mode='w') as out_file:
-            out_file.write('Remove Mirror Edge List\nSourceTradeBookID|DestinationTradeBookID\n')
+            out_file.write('Remove Mirror Edge List\n' + get_header_line(self.get_header_fields()))
             out_file.close()
 
+    def reset_outputs(self):
+        """
+        Description:
+            Resets the destination files, or the files of the output writers if
+            they are not None.
+        """
+
+        if self.mirror_output_writer is not None:
+            self.mirror_output_writer.reset_destination_files(self.get_loader_header_fields())
+            self.remove_mirror_output_writer.reset_destination_files(self.get_loader_header_fields())
+        else:
+            self.reset_destination_files()
+
     def execute(self):
         """
         Description:
@@ -295,16 +603,11 @@ class MirrorEdgeGenerator:
             remove mirror edges.
         """
 
-        #reset destination_file, if it exists
-        self.reset_destination_files()
-
-        #create and start threads
-        for i in range(0, self.thread_number):
-            temp_thread_object = threading.Thread(target=self.thread_job, )
-            temp_thread_object.start()
+        #reset destination_files (or the files of the output writers), if they exist
+        self.reset_outputs()
 
-        #wait for end_semaphore
-        self.main_thread_wait_semaphore.acquire()
+        #run the workers until all batches are generated (the first exception of a worker is raised again)
+        self.batch_executor.run(self.lines_generator, self.batch_scheduler, cancel_function=self.notify_seeded_block_waiters)
         print("Mirror Edge Generation Complete")
         print("Remove Mirror Edge Generation Complete")
 
@@ -350,7 +653,95 @@ def test_generate_mirror_edges():
     print("A file named 'mirror_edge.csv' must have been created, check for issues")
     print("A file named 'remove_mirror_edge.csv' must have been created, check for issues")
 
+# Unit test to check if mirror edges are yielded as expected by iter_batches()
+def test_iter_batches():
+    friend_adjacency_dict = {0:[3,2,5,8], 1:[4,7], 2:[0,], 3:[0,], 5:[0,], 8:[0,], 4:[1,], 7:[1,]}
+    test_object = MirrorEdgeGenerator(thread_number=5,\
+                 lines_per_thread=2,\
+                 mirror_destination_file="mirror_edge.csv",\
+                 remove_mirror_destination_file="remove_mirror_edge.csv",\
+                 follower_list=[0,1,2,3,4,5,6,7,8],\
+                 number_of_friend_edges=6,\
+                 number_of_mirror_edges=3,\
+                 follower_mirrors_a_friend_probability=1.0,\
+                 follower_removes_a_mirror_probability=0.5,\
+                 follower_list_mirror_power_dis_param=2,\
+                 friend_adjacency_dict=friend_adjacency_dict,\
+                 lock_list_element_cardinality=5)
+    batches = list(test_object.iter_batches())
+
+    assert [len(batch) for batch in batches] == [2, 1],\
+        "MirrorEdgeGenerator_ITER_BATCHES_ERROR batch sizes are wrong"
+
+    all_edges = np.concatenate(batches)
+    for source_id, destination_id in zip(all_edges["SourceTradeBookID"].tolist(), all_edges["DestinationTradeBookID"].tolist()):
+        assert (destination_id - 9) in friend_adjacency_dict[source_id - 9],\
+            "MirrorEdgeGenerator_ITER_BATCHES_ERROR mirror edge without friend edge"
+
+    expected_degrees = np.bincount(np.concatenate((all_edges["SourceTradeBookID"], all_edges["DestinationTradeBookID"])) - 9, minlength=9)
+    assert test_object.mirror_degrees.tolist() == expected_degrees.tolist(),\
+        "MirrorEdgeGenerator_ITER_BATCHES_ERROR mirror degrees are wrong"
+
+    statistics = test_object.get_statistics(number_of_hubs=1)
+
+    assert statistics["number_of_mirror_edges"] == 3 and statistics["realized_follower_mirrors_a_friend_probability"] == 1.0,\
+        "MirrorEdgeGenerator_STATISTICS_ERROR edge count or realized probability is invalid"
+
+    assert statistics["degrees"]["hubs"][0]["vertex_id"] >= 9 and statistics["degrees"]["max_degree"] == int(expected_degrees.max()),\
+        "MirrorEdgeGenerator_STATISTICS_ERROR tradebook degrees are invalid"
+
+    # iterating again generates all the mirror edges again, instead of yielding nothing
+    all_edges = np.concatenate(list(test_object.iter_batches()))
+
+    assert len(all_edges) == 3 and len(set(zip(all_edges["SourceTradeBookID"].tolist(), all_edges["DestinationTradeBookID"].tolist()))) == 3,\
+        "MirrorEdgeGenerator_ITER_BATCHES_ERROR second iteration is invalid"
+
+    assert test_object.mirror_degrees.sum() == 6 and test_object.get_statistics()["number_of_mirror_edges"] == 3,\
+        "MirrorEdgeGenerator_ITER_BATCHES_ERROR mirror degrees or statistics of the second iteration are invalid"
+
+# Creates the seeded mirror edge generator of the unit tests, every investor being friends with the next 4 ones
+def create_seeded_test_object(thread_number, lines_per_thread, scheduling):
+    friend_adjacency_dict = {vertex_id: sorted([(vertex_id + offset) % 60 for offset in [-4, -3, -2, -1, 1, 2, 3, 4]])\
+                                for vertex_id in range(0, 60)}
+
+    test_object = MirrorEdgeGenerator(thread_number=thread_number,\
+                 lines_per_thread=lines_per_thread,\
+                 mirror_destination_file="mirror_edge_test2.csv",\
+                 remove_mirror_destination_file="remove_mirror_edge_test2.csv",\
+                 follower_list=np.arange(60),\
+                 number_of_friend_edges=240,\
+                 number_of_mirror_edges=100,\
+                 friend_adjacency_dict=friend_adjacency_dict,\
+                 scheduling=scheduling)
+    test_object.use_seeded_blocks(7, "mirror_edges", 15)
+    return test_object
+
+# Unit test to check if the seeded blocks give the same mirror edges whatever the scheduling, number of
+# threads and batch size, and the same edges as a single iteration over all the blocks (like the shard server)
+def test_seeded_blocks():
+    expected_edges = np.concatenate(list(create_seeded_test_object(1, 1000, "dynamic").iter_batches()))
+    expected_lines = [sorted(format_record_batch(expected_edges, ["SourceTradeBookID", "DestinationTradeBookID"]).splitlines()),\
+                      sorted(format_record_batch(expected_edges[expected_edges["RemoveMirror"]], ["SourceTradeBookID", "DestinationTradeBookID"]).splitlines())]
+
+    for scheduling in SCHEDULING_MODES:
+        for thread_number, lines_per_thread in [(1, 1000), (4, 15), (4, 45)]:
+            create_seeded_test_object(thread_number, lines_per_thread, scheduling).execute()
+
+            lines = []
+            for file_name in ["mirror_edge_test2.csv", "remove_mirror_edge_test2.csv"]:
+                with open(file_name, mode='r') as in_file:
+                    lines.append(sorted(in_file.read().splitlines()[2:]))
+                    in_file.close()
+
+            assert lines == expected_lines,\
+                "MirrorEdgeGenerator_SEEDED_BLOCKS_ERROR " + scheduling + " mirror edges depend on the execution"
+
+    os.remove("mirror_edge_test2.csv")
+    os.remove("remove_mirror_edge_test2.csv")
+
 # Function to execute all defined unit tests for MirrorEdgeGenerator
 def execute_all_unit_tests():
     test_mirror_edge_generator_init()
     test_generate_mirror_edges()
+    test_iter_batches()
+    test_seeded_blocks()
@@ -0,0 +1,420 @@
+"""
+FYP : 22013
+
+Module:
+    Base Data Generator
+
+Description:
+    This python script contains the definition of the FriendAdjacencyCSR class
+    and its unit tests.
+
+    The FriendAdjacencyCSR class stores the friend edge adjacency list in the
+    compressed sparse row (CSR) format: the neighbours of vertex v are
+    indices[indptr[v]:indptr[v + 1]]. It can be used in place of the adjacency
+    list dictionary returned by FriendEdgeGenerator.execute() (for example by the
+    MirrorEdgeGenerator) and its two arrays can be published into shared memory,
+    so that worker processes use the adjacency list without copying it.
+
+    The adjacency list (or the directed one of the mirror edges) can also be
+    saved as a binary CSR file: a 64 byte header (magic, format version, dtype
+    of the indices, number of vertices, ID offset, number of indices, directed
+    flag) followed by the int64 indptr array and the indices array. Loading the
+    file memory-maps both arrays, so the query drivers get the neighbours of a
+    vertex in O(degree) without parsing the edge files, and the pages are
+    shared by all processes reading the file on the same host. The vertex v of
+    the file and its neighbours are stored as v - id_offset (e.g. the tradebook
+    IDs of the mirror edges are stored from 0).
+
+"""
+
+
+# Imports from built-in modules
+import itertools
+import multiprocessing as mp
+import numpy as np
+
+# Imports from Base Data Generator Module
+from list_generators.BDG006_PermutedListGenerator import get_id_dtype
+from shared_data.BDG013_SharedMemoryArray import SharedMemoryArray
+
+# Magic bytes and version of the binary CSR files
+CSR_FILE_MAGIC = b"BDG_CSR_"
+CSR_FILE_VERSION = 1
+
+# Header of the binary CSR files (64 bytes, little-endian), followed by indptr and indices
+CSR_FILE_HEADER_DTYPE = np.dtype([("magic", "S8"),\
+                                  ("version", "<u4"),\
+                                  ("indices_dtype", "S4"),\
+                                  ("number_of_vertices", "<u8"),\
+                                  ("id_offset", "<u8"),\
+                                  ("number_of_indices", "<u8"),\
+                                  ("directed", "<u8"),\
+                                  ("reserved", "<u8", (2,))])
+
+class FriendAdjacencyCSR:
+
+    def __init__(self, indptr, indices, id_offset=0, directed=False):
+
+        # Storage of the two arrays, either NumPy arrays or SharedMemoryArray objects
+        self.indptr_storage = indptr
+        self.indices_storage = indices
+
+        # The vertex IDs are stored as (vertex ID - id_offset), in the rows and in the indices
+        self.id_offset = id_offset
+
+        # True if the neighbours of a vertex are only the destinations of its edges
+        self.directed = directed
+
+        self.set_array_views()
+
+    def set_array_views(self):
+        """
+        Description:
+            Sets the NumPy views of the indptr and indices arrays on their storage.
+        """
+
+        self.indptr = self.indptr_storage.array if isinstance(self.indptr_storage, SharedMemoryArray) else self.indptr_storage
+        self.indices = self.indices_storage.array if isinstance(self.indices_storage, SharedMemoryArray) else self.indices_storage
+
+        # Number of vertices (with or without friends) stored in the adjacency list
+        self.number_of_vertices = len(self.indptr) - 1
+
+    @classmethod
+    def from_adjacency_dict(cls, adjacency_dict, number_of_vertices):
+        """
+        Description:
+            Creates the CSR adjacency list from the adjacency list dictionary for
+            the vertices 0 to (number_of_vertices - 1).
+        """
+
+        degrees = np.zeros((number_of_vertices,), dtype=np.int64)
+        for vertex_id in adjacency_dict:
+            degrees[vertex_id] = len(adjacency_dict[vertex_id])
+
+        indptr = np.zeros((number_of_vertices + 1,), dtype=np.int64)
+        np.cumsum(degrees, out=indptr[1:])
+
+        vertices_with_friends = sorted(adjacency_dict)
+        indices = np.fromiter(itertools.chain.from_iterable(adjacency_dict[vertex_id] for vertex_id in vertices_with_friends),\
+                                dtype=get_id_dtype(number_of_vertices - 1),\
+                                count=int(indptr[-1]))
+
+        return cls(indptr, indices)
+
+    @classmethod
+    def from_edges(cls, source_vertex_ids, destination_vertex_ids, number_of_vertices):
+        """
+        Description:
+            Creates the CSR adjacency list of the undirected friend edges given as
+            two arrays of vertex IDs.
+        """
+
+        return cls.from_edge_batches(lambda: iter([(source_vertex_ids, destination_vertex_ids),]), number_of_vertices)
+
+    @classmethod
+    def from_edge_batches(cls, iter_edge_batches, number_of_vertices, id_offset=0, directed=False):
+        """
+        Description:
+            Creates the CSR adjacency list of the undirected friend edges given by
+            iter_edge_batches, a function returning an iterator of (source vertex
+            IDs, destination vertex IDs) array pairs (e.g. parsed from the friend
+            edges file), called twice. The first pass counts the degrees of the
+            vertices of every batch, the second sorts every batch by vertex and writes the friends of each
+            vertex after the ones of the previous batches, so only the indices
+            array and one batch are in memory. The friends of every vertex keep
+            the order of the edges (within a batch, the edges where the vertex is
+            the source come first). The vertex IDs of the batches are reduced by
+            id_offset. If directed, only the destinations are the neighbours of
+            the sources (e.g. for the mirror edges).
+        """
+
+        id_dtype = get_id_dtype(max(0, number_of_vertices - 1))
+
+        def iter_directed_edge_batches():
+            for source_vertex_ids, destination_vertex_ids in iter_edge_batches():
+                source_vertex_ids = np.asarray(source_vertex_ids, dtype=np.int64) - id_offset
+                destination_vertex_ids = np.asarray(destination_vertex_ids, dtype=np.int64) - id_offset
+
+                if directed:
+                    yield source_vertex_ids, destination_vertex_ids
+                else:
+                    yield np.concatenate((source_vertex_ids, destination_vertex_ids)), np.concatenate((destination_vertex_ids, source_vertex_ids))
+
+        degrees = np.zeros((number_of_vertices,), dtype=np.int64)
+        for vertex_ids, _ in iter_directed_edge_batches():
+            batch_vertex_ids, batch_degrees = np.unique(vertex_ids, return_counts=True)
+            degrees[batch_vertex_ids] += batch_degrees
+
+        indptr = np.zeros((number_of_vertices + 1,), dtype=np.int64)
+        np.cumsum(degrees, out=indptr[1:])
+        del degrees
+
+        indices = np.zeros((int(indptr[-1]),), dtype=id_dtype)
+
+        # position in indices of the next friend of every vertex
+        next_positions = indptr[:-1].copy()
+
+        for vertex_ids, friend_ids in iter_directed_edge_batches():
+            if len(vertex_ids) == 0:
+                continue
+
+            order = np.argsort(vertex_ids, kind='stable')
+            sorted_vertex_ids = vertex_ids[order]
+
+            # rank of every friend among the friends of its vertex in the batch
+            is_group_start = np.ones((len(sorted_vertex_ids),), dtype=np.bool_)
+            is_group_start[1:] = sorted_vertex_ids[1:] != sorted_vertex_ids[:-1]
+            group_starts = np.flatnonzero(is_group_start)
+            group_sizes = np.diff(np.append(group_starts, len(sorted_vertex_ids)))
+            ranks = np.arange(len(sorted_vertex_ids)) - np.repeat(group_starts, group_sizes)
+
+            indices[next_positions[sorted_vertex_ids] + ranks] = friend_ids[order]
+            next_positions[sorted_vertex_ids[group_starts]] += group_sizes
+
+        return cls(indptr, indices, id_offset, directed)
+
+    def save(self, csr_file):
+        """
+        Description:
+            Saves the adjacency list as a binary CSR file (the header, then the
+            indptr and indices arrays), which load() memory-maps.
+        """
+
+        header = np.zeros((1,), dtype=CSR_FILE_HEADER_DTYPE)
+        header["magic"] = CSR_FILE_MAGIC
+        header["version"] = CSR_FILE_VERSION
+        header["indices_dtype"] = self.indices.dtype.newbyteorder("<").str.encode()
+        header["number_of_vertices"] = self.number_of_vertices
+        header["id_offset"] = self.id_offset
+        header["number_of_indices"] = len(self.indices)
+        header["directed"] = 1 if self.directed else 0
+
+        with open(csr_file, mode='wb') as out_file:
+            header.tofile(out_file)
+            np.ascontiguousarray(self.indptr, dtype="<i8").tofile(out_file)
+            np.ascontiguousarray(self.indices, dtype=self.indices.dtype.newbyteorder("<")).tofile(out_file)
+            out_file.close()
+
+    @classmethod
+    def load(cls, csr_file):
+        """
+        Description:
+            Loads an adjacency list saved by save(), with both arrays
+            memory-mapped (read-only) from the file.
+        """
+
+        header = np.fromfile(csr_file, dtype=CSR_FILE_HEADER_DTYPE, count=1)
+
+        assert len(header) == 1 and header["magic"][0] == CSR_FILE_MAGIC,\
+            "FriendAdjacencyCSR_ERROR: " + str(csr_file) + " is not a binary CSR file"
+
+        assert header["version"][0] == CSR_FILE_VERSION,\
+            "FriendAdjacencyCSR_ERROR: unsupported binary CSR file version " + str(header["version"][0])
+
+        number_of_vertices = int(header["number_of_vertices"][0])
+        number_of_indices = int(header["number_of_indices"][0])
+        indices_dtype = np.dtype(header["indices_dtype"][0].decode())
+
+        indptr = np.memmap(csr_file, dtype="<i8", mode='r', offset=CSR_FILE_HEADER_DTYPE.itemsize, shape=(number_of_vertices + 1,))
+
+        # memory maps cannot be empty
+        indices = np.memmap(csr_file, dtype=indices_dtype, mode='r',\
+                            offset=CSR_FILE_HEADER_DTYPE.itemsize + 8 * (number_of_vertices + 1),\
+                            shape=(number_of_indices,))\
+            if number_of_indices > 0 else np.zeros((0,), dtype=indices_dtype)
+
+        return cls(indptr, indices, int(header["id_offset"][0]), bool(header["directed"][0]))
+
+    def publish_to_shared_memory(self):
+        """
+        Description:
+            Returns a copy of the adjacency list whose arrays are published into
+            shared memory. Passing the copy to other processes only pickles the
+            handles of the shared memory blocks.
+        """
+
+        return FriendAdjacencyCSR(SharedMemoryArray.publish(self.indptr),\
+                                    SharedMemoryArray.publish(self.indices),\
+                                    self.id_offset,\
+                                    self.directed)
+
+    def close(self):
+        """
+        Description:
+            Closes (and frees, in the publishing process) the shared memory blocks.
+        """
+
+        for storage in [self.indptr_storage, self.indices_storage]:
+            if isinstance(storage, SharedMemoryArray):
+                storage.close()
+
+    def get_degrees(self):
+        """
+        Description:
+            Returns the number of friends of every vertex.
+        """
+
+        return np.diff(self.indptr)
+
+    def get_neighbours(self, vertex_id):
+        """
+        Description:
+            Returns the friends of the vertex as a NumPy view (without copying).
+        """
+
+        return self.indices[self.indptr[vertex_id]:self.indptr[vertex_id + 1]]
+
+    def get_neighbour_ids(self, vertex_id):
+        """
+        Description:
+            Returns the neighbours of the vertex ID (e.g. a tradebook ID for the
+            mirror edges) as vertex IDs, taking the ID offset into account.
+        """
+
+        return self.get_neighbours(vertex_id - self.id_offset).astype(np.int64) + self.id_offset
+
+    def __getstate__(self):
+        # The views are recreated from the storage when unpickling
+        return {"indptr_storage": self.indptr_storage, "indices_storage": self.indices_storage,\
+                "id_offset": self.id_offset, "directed": self.directed}
+
+    def __setstate__(self, state):
+        self.indptr_storage = state["indptr_storage"]
+        self.indices_storage = state["indices_storage"]
+        self.id_offset = state.get("id_offset", 0)
+        self.directed = state.get("directed", False)
+        self.set_array_views()
+
+    # The following methods let the object be used like the adjacency list
+    # dictionary, which only has the vertices with at least one friend as keys
+
+    def __contains__(self, vertex_id):
+        return (0 <= vertex_id < self.number_of_vertices) and (self.indptr[vertex_id + 1] > self.indptr[vertex_id])
+
+    def __getitem__(self, vertex_id):
+        if vertex_id not in self:
+            raise KeyError(vertex_id)
+        return self.get_neighbours(vertex_id).tolist()
+
+    def __iter__(self):
+        return iter(np.flatnonzero(self.get_degrees()).tolist())
+
+    def __len__(self):
+        return int(np.count_nonzero(self.get_degrees()))
+
+    def keys(self):
+        return list(self)
+
+
+# Unit tests to test if the binary CSR files are saved and memory-mapped as expected
+def test_binary_csr_file():
+    adjacency_dict = {0:[3,2,5,8], 1:[4,7], 2:[0,], 3:[0,], 5:[0,], 8:[0,], 4:[1,], 7:[1,]}
+    test_object = FriendAdjacencyCSR.from_adjacency_dict(adjacency_dict, 10)
+    test_object.save("friend_adjacency_test.csr")
+
+    loaded_object = FriendAdjacencyCSR.load("friend_adjacency_test.csr")
+
+    assert isinstance(loaded_object.indptr, np.memmap) and isinstance(loaded_object.indices, np.memmap),\
+        "FriendAdjacencyCSR_FILE_ERROR arrays are not memory-mapped"
+
+    assert loaded_object.indptr.tolist() == test_object.indptr.tolist() and loaded_object.indices.dtype == test_object.indices.dtype,\
+        "FriendAdjacencyCSR_FILE_ERROR indptr or indices dtype is invalid"
+
+    for vertex_id in adjacency_dict:
+        assert loaded_object[vertex_id] == adjacency_dict[vertex_id],\
+            "FriendAdjacencyCSR_FILE_ERROR neighbours are invalid"
+
+    # directed mirror edges between the tradebooks 10 to 19
+    source_tradebook_ids, destination_tradebook_ids = np.array([10, 10, 13, 18]), np.array([13, 12, 10, 10])
+    test_object = FriendAdjacencyCSR.from_edge_batches(lambda: iter([(source_tradebook_ids, destination_tradebook_ids),]), 10,\
+                                                        id_offset=10, directed=True)
+    test_object.save("mirror_adjacency_test.csr")
+
+    loaded_object = FriendAdjacencyCSR.load("mirror_adjacency_test.csr")
+
+    assert loaded_object.id_offset == 10 and loaded_object.directed and loaded_object.get_degrees().tolist() == [2, 0, 0, 1, 0, 0, 0, 0, 1, 0],\
+        "FriendAdjacencyCSR_FILE_ERROR directed header or degrees are invalid"
+
+    assert loaded_object.get_neighbour_ids(10).tolist() == [13, 12] and loaded_object.get_neighbour_ids(18).tolist() == [10],\
+        "FriendAdjacencyCSR_FILE_ERROR neighbour IDs are invalid"
+
+    # empty adjacency list
+    FriendAdjacencyCSR.from_adjacency_dict({}, 3).save("friend_adjacency_test.csr")
+
+    assert FriendAdjacencyCSR.load("friend_adjacency_test.csr").get_degrees().tolist() == [0, 0, 0],\
+        "FriendAdjacencyCSR_FILE_ERROR empty adjacency list is invalid"
+
+    with open("friend_adjacency_test.csr", mode='wb') as out_file:
+        out_file.write(b"Friend Edges\n")
+        out_file.close()
+
+    try:
+        FriendAdjacencyCSR.load("friend_adjacency_test.csr")
+        raised_error = False
+    except AssertionError:
+        raised_error = True
+
+    assert raised_error,\
+        "FriendAdjacencyCSR_FILE_ERROR invalid file was loaded"
+
+# Function executed by the child process of test_shared_friend_adjacency_csr()
+def check_adjacency_in_child_process(adjacency_csr, result_queue):
+    result_queue.put((adjacency_csr[0], adjacency_csr[4], 2 in adjacency_csr))
+    adjacency_csr.close()
+
+# Unit tests to test if FriendAdjacencyCSR behaves like the adjacency list dictionary
+def test_friend_adjacency_csr():
+    adjacency_dict = {0:[3,2,5,8], 1:[4,7], 2:[0,], 3:[0,], 5:[0,], 8:[0,], 4:[1,], 7:[1,]}
+    test_object = FriendAdjacencyCSR.from_adjacency_dict(adjacency_dict, 10)
+
+    assert test_object.indptr.tolist() == [0, 4, 6, 7, 8, 9, 10, 10, 11, 12, 12],\
+        "FriendAdjacencyCSR_INIT_ERROR indptr is invalid"
+
+    assert sorted(test_object) == sorted(adjacency_dict) and len(test_object) == len(adjacency_dict),\
+        "FriendAdjacencyCSR_INIT_ERROR vertices with friends are invalid"
+
+    for vertex_id in range(-1, 11):
+        assert (vertex_id in test_object) == (vertex_id in adjacency_dict),\
+            "FriendAdjacencyCSR_INIT_ERROR membership is invalid"
+
+    for vertex_id in adjacency_dict:
+        assert test_object[vertex_id] == adjacency_dict[vertex_id],\
+            "FriendAdjacencyCSR_INIT_ERROR neighbours are invalid"
+
+    assert test_object.get_degrees().tolist() == [4, 2, 1, 1, 1, 1, 0, 1, 1, 0],\
+        "FriendAdjacencyCSR_INIT_ERROR degrees are invalid"
+
+    # the same adjacency list created from the edges, at once and in batches
+    source_vertex_ids, destination_vertex_ids = np.array([0, 0, 1, 5, 8, 7]), np.array([3, 2, 4, 0, 0, 1])
+    edges_object = FriendAdjacencyCSR.from_edges(source_vertex_ids, destination_vertex_ids, 10)
+    batches_object = FriendAdjacencyCSR.from_edge_batches(lambda: iter([(source_vertex_ids[i:i + 2], destination_vertex_ids[i:i + 2]) for i in range(0, 6, 2)]), 10)
+
+    for created_object in [edges_object, batches_object]:
+        assert created_object.indptr.tolist() == test_object.indptr.tolist(),\
+            "FriendAdjacencyCSR_EDGES_ERROR indptr is invalid"
+
+        for vertex_id in adjacency_dict:
+            assert created_object[vertex_id] == adjacency_dict[vertex_id],\
+                "FriendAdjacencyCSR_EDGES_ERROR neighbours are invalid"
+
+# Unit tests to test if FriendAdjacencyCSR is shared with worker processes
+def test_shared_friend_adjacency_csr():
+    adjacency_dict = {0:[3,2,5,8], 1:[4,7], 2:[0,], 3:[0,], 5:[0,], 8:[0,], 4:[1,], 7:[1,]}
+    test_object = FriendAdjacencyCSR.from_adjacency_dict(adjacency_dict, 10).publish_to_shared_memory()
+
+    result_queue = mp.Queue()
+    child_process = mp.Process(target=check_adjacency_in_child_process, args=(test_object, result_queue))
+    child_process.start()
+    result = result_queue.get()
+    child_process.join()
+
+    assert result == ([3, 2, 5, 8], [1,], True),\
+        "FriendAdjacencyCSR_SHARED_ERROR worker process read an invalid adjacency list"
+
+    test_object.close()
+
+# Function to execute all defined unit tests for FriendAdjacencyCSR
+def execute_all_unit_tests():
+    test_friend_adjacency_csr()
+    test_shared_friend_adjacency_csr()
+    test_binary_csr_file()
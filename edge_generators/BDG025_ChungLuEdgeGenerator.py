@@ -0,0 +1,585 @@
+"""
+FYP : 22013
+
+Module:
+    Base Data Generator
+
+Description:
+    This python script contains the definition of the ChungLuEdgeGenerator class
+    and its unit tests.
+
+    The ChungLuEdgeGenerator class is an alternative engine for the friend edges.
+    Instead of sampling the endpoints of every edge and rejecting the duplicates
+    with an adjacency matrix, it gives every vertex an expected degree taken from
+    the configured skew (the probabilities of the follower sampler and of the
+    mixture of the two leader samplers) and keeps every pair of vertices u, v as
+    an edge independently with the probability w(u) x w(v) / S (Chung-Lu model),
+    where S is the sum of the expected degrees.
+
+    The vertices are binned into weight classes (expected degrees within a
+    factor of 2), and every pair of classes is split into blocks of pairs. In a
+    block, the candidate pairs are drawn with the largest probability of the
+    block by skipping geometric gaps, and each candidate is accepted with its
+    own probability, so the work is proportional to the number of edges. Every
+    pair of vertices belongs to exactly one block and is visited at most once,
+    so no duplicate edges are generated and no existence structure is shared:
+    each block has its own random generator seeded from the block index, so the
+    blocks can be generated by any thread or process, in any order, with the
+    same result. number_of_friend_edges is the expected number of edges.
+
+    The friend edges are written as by the FriendEdgeGenerator, and the
+    adjacency list is returned as a FriendAdjacencyCSR built by generating the
+    blocks again, so the MirrorEdgeGenerator uses it unchanged.
+
+"""
+
+
+# Imports from built-in modules
+import math
+import numpy as np
+import threading
+
+# Imports from Base Data Generator Module
+from data_sinks.BDG010_RecordBatch import make_record_batch
+from edge_generators.BDG004_FriendEdgeGenerator import FRIEND_EDGE_COUNTER_NAMES, FriendEdgeGenerator
+from edge_generators.BDG014_FriendAdjacencyCSR import FriendAdjacencyCSR
+from execution.BDG027_BatchExecutor import BatchExecutor
+from graph_statistics.BDG019_GraphStatistics import WorkerCounters, get_degree_statistics, get_ratio
+from list_generators.BDG006_PermutedListGenerator import to_id_array
+from samplers.BDG015_VertexSamplers import PowerSampler
+
+# Names of the counters kept by every worker generating Chung-Lu friend edges
+CHUNG_LU_EDGE_COUNTER_NAMES = FRIEND_EDGE_COUNTER_NAMES + ["rejected_candidate_edges",]
+
+# Largest number of weight classes, the vertices with the smallest expected degrees share the last one
+MAX_WEIGHT_CLASSES = 64
+
+def sample_pair_positions(random_generator, start, end, probability):
+    """
+    Description:
+        Returns the sorted positions in [start, end) each kept independently
+        with the probability, drawn by skipping geometric gaps between the kept
+        positions (the work is proportional to the number of kept positions).
+    """
+
+    if (end <= start) or (probability <= 0.0):
+        return np.zeros((0,), dtype=np.int64)
+
+    if probability >= 1.0:
+        return np.arange(start, end, dtype=np.int64)
+
+    chunk_size = int((end - start) * probability * 1.1) + 16
+    chunks = []
+
+    position = start - 1
+    while position < end:
+        # gaps larger than the range end the sampling anyway, clipping them avoids overflows
+        gaps = np.minimum(random_generator.geometric(probability, size=(chunk_size,)), end - start + 1)
+        next_positions = position + np.cumsum(gaps)
+
+        chunks.append(next_positions[next_positions < end])
+        position = int(next_positions[-1])
+
+    return np.concatenate(chunks)
+
+class ChungLuEdgeGenerator(FriendEdgeGenerator):
+
+    def __init__(self, thread_number=5,\
+                 lines_per_thread=1000,\
+                 destination_file="edge.csv",\
+                 number_of_friend_edges=2,\
+                 follower_list=np.array([0,1,2,3], dtype=np.int32),\
+                 leader_list_1=np.array([3,2,1,0], dtype=np.int32),\
+                 leader_list_2=np.array([2,1,0,3], dtype=np.int32),\
+                 follower_list_friend_power_dis_param=2,\
+                 leader_list_1_friend_power_dis_param=2,\
+                 leader_list_2_friend_power_dis_param=2,\
+                 choose_leader_list_1_as_friend_prob=0.5,\
+                 output_writer=None,\
+                 follower_sampler=None,\
+                 leader_1_sampler=None,\
+                 leader_2_sampler=None,\
+                 random_seed=None,\
+                 backend="threads",\
+                 scheduling="dynamic"):
+
+        # Number of threads to be used for generating data
+        self.thread_number = thread_number
+
+        # Expected number of candidate pairs in a block, so about the largest number of edges of a batch
+        self.lines_per_thread = lines_per_thread
+
+        # Destination file to store the generated data
+        self.destination_file = destination_file
+
+        # Expected number of friend edges to be generated
+        self.number_of_friend_edges = number_of_friend_edges
+
+        # Writer (e.g. PartitionedFileWriter) used instead of the destination
+        # file when it is not None
+        self.output_writer = output_writer
+
+        # Stores the (ordered) investor lists as compact NumPy arrays, the vertex IDs
+        # of the edges are drawn from 0 to (number_of_investors - 1) as by the FriendEdgeGenerator
+        self.follower_list = to_id_array(follower_list)
+        self.leader_list_1 = to_id_array(leader_list_1)
+        self.leader_list_2 = to_id_array(leader_list_2)
+
+        assert self.follower_list.shape == self.leader_list_1.shape == self.leader_list_2.shape,\
+            "ChungLuEdgeGenerator_ERROR: FollowerList, LeaderList1 and LeaderList2 must have same number of elements"
+
+        number_of_investors = self.follower_list.shape[0]
+
+        assert number_of_friend_edges <= (number_of_investors * (number_of_investors - 1)) / 2,\
+            "ChungLuEdgeGenerator_ERROR: Number of friend edges must be smaller than C(Number_of_Investors, 2)"
+
+        self.number_of_investors = number_of_investors
+
+        # Storing the probability to choose a leader from leader list 1 as a friend
+        self.choose_leader_list_1_as_friend_prob = choose_leader_list_1_as_friend_prob
+
+        # Samplers whose probabilities give the expected degrees. If not given, the
+        # power distributions with the parameters are used
+        follower_sampler = follower_sampler if follower_sampler is not None else\
+            PowerSampler(follower_list_friend_power_dis_param, number_of_investors)
+
+        leader_1_sampler = leader_1_sampler if leader_1_sampler is not None else\
+            PowerSampler(leader_list_1_friend_power_dis_param, number_of_investors)
+
+        leader_2_sampler = leader_2_sampler if leader_2_sampler is not None else\
+            PowerSampler(leader_list_2_friend_power_dis_param, number_of_investors)
+
+        # Expected number of edges of every vertex as a follower and as a leader: the
+        # FriendEdgeGenerator draws the follower and the leader of every edge from these
+        leader_1_weights = number_of_friend_edges * choose_leader_list_1_as_friend_prob * leader_1_sampler.get_probabilities()
+        self.follower_weights = number_of_friend_edges * follower_sampler.get_probabilities()
+        self.leader_weights = leader_1_weights + number_of_friend_edges * (1 - choose_leader_list_1_as_friend_prob) * leader_2_sampler.get_probabilities()
+
+        # Probability that the leader of an edge was drawn from leader list 1, by leader vertex
+        self.leader_1_shares = np.divide(leader_1_weights, self.leader_weights,\
+                                            out=np.zeros((number_of_investors,)), where=self.leader_weights > 0)
+
+        # Expected degree of every vertex
+        self.weights = self.follower_weights + self.leader_weights
+
+        # The pairs (u, v), u != v, are edges with the probability w(u) x w(v) x edge_probability_scale.
+        # 1 / S would give S / 2 - sum(w^2) / (2 x S) edges in expectation, as the self loops are not
+        # generated, so the scale is increased to give number_of_friend_edges edges
+        weights_sum = float(self.weights.sum())
+        squared_weights_sum = float(np.dot(self.weights, self.weights))
+        self.edge_probability_scale = weights_sum / (weights_sum ** 2 - squared_weights_sum)\
+            if weights_sum ** 2 > squared_weights_sum else 0.0
+
+        self.set_weight_classes()
+
+        # Seed of the random generators of the blocks. If not given, it is drawn from the
+        # global NumPy random generator (seeded by the executor for reproducible runs)
+        self.random_seed = random_seed if random_seed is not None else int(np.random.randint(0, 2 ** 31 - 1))
+
+        # List of the blocks of pairs: (first class, second class, start, end, candidate probability)
+        self.blocks = self.get_blocks()
+
+        # The friend degrees and the worker counters are only shared by threads
+        assert backend != "processes",\
+            "ChungLuEdgeGenerator_ERROR: the processes backend is not supported"
+
+        # Executor running the workers (threads or inline) with the scheduling mode
+        self.batch_executor = BatchExecutor(backend=backend,\
+                                            scheduling=scheduling,\
+                                            number_of_workers=thread_number)
+
+        # Scheduler handing out the blocks to the workers, one block at a time
+        self.batch_scheduler = self.batch_executor.create_scheduler(0, len(self.blocks), 1)
+
+        # Lock for restriciting access to writing file
+        self.file_write_lock = threading.Lock()
+
+        # Lock for restricting access to the friend degrees
+        self.adjacency_update_lock = threading.Lock()
+
+        # The edges are never kept in memory, the execute() method of the FriendEdgeGenerator
+        # then runs the workers
+        self.memory_budget = None
+
+        # The adjacency list built from the blocks once it is requested
+        self.friend_adjacency_csr = None
+
+        # The blocks never wait for each other, the condition is only notified by the execute()
+        # method of the FriendEdgeGenerator when the execution is cancelled
+        self.seeded_block_condition = threading.Condition()
+
+        # Number of friends of every investor, updated with every batch
+        self.friend_degrees = np.zeros((number_of_investors,), dtype=np.int64)
+
+        # Counters of every worker iterating over the batches, merged by get_statistics()
+        self.worker_counters_list = []
+
+        # Lock for restricting access to the list of worker counters
+        self.worker_counters_lock = threading.Lock()
+
+    def set_weight_classes(self):
+        """
+        Description:
+            Bins the vertices with a positive expected degree into weight classes:
+            class k holds the vertices whose expected degree is within a factor
+            of 2 below max_weight / 2^k. Sets the vertex IDs sorted by class, the
+            offsets of the classes in them and the largest weight of every class.
+        """
+
+        vertex_ids = np.flatnonzero(self.weights > 0)
+        weights = self.weights[vertex_ids]
+        max_weight = weights.max(initial=0.0)
+
+        weight_classes = np.minimum(np.floor(np.log2(max_weight / weights)), MAX_WEIGHT_CLASSES - 1).astype(np.int64)
+        order = np.argsort(weight_classes, kind='stable')
+
+        self.class_vertex_ids = vertex_ids[order]
+        self.class_offsets = np.zeros((MAX_WEIGHT_CLASSES + 1,), dtype=np.int64)
+        np.cumsum(np.bincount(weight_classes, minlength=MAX_WEIGHT_CLASSES), out=self.class_offsets[1:])
+
+        self.class_max_weights = np.zeros((MAX_WEIGHT_CLASSES,))
+        for weight_class in self.get_non_empty_classes():
+            self.class_max_weights[weight_class] = self.weights[self.get_class_vertex_ids(weight_class)].max()
+
+    def get_non_empty_classes(self):
+        """
+        Description:
+            Returns the list of the weight classes holding at least one vertex.
+        """
+
+        return np.flatnonzero(np.diff(self.class_offsets)).tolist()
+
+    def get_class_vertex_ids(self, weight_class):
+        """
+        Description:
+            Returns the vertex IDs of the weight class as a NumPy view.
+        """
+
+        return self.class_vertex_ids[self.class_offsets[weight_class]:self.class_offsets[weight_class + 1]]
+
+    def get_blocks(self):
+        """
+        Description:
+            Returns the list of blocks covering every pair of vertices once. The
+            pairs of classes (i, j), i <= j, are indexed as a * size(j) + b for
+            the a-th vertex of class i and the b-th vertex of class j (only a < b
+            are used when i == j) and split into ranges of about lines_per_thread
+            expected candidates.
+        """
+
+        blocks = []
+        non_empty_classes = self.get_non_empty_classes()
+
+        for first_class in non_empty_classes:
+            for second_class in [weight_class for weight_class in non_empty_classes if weight_class >= first_class]:
+                number_of_pairs = len(self.get_class_vertex_ids(first_class)) * len(self.get_class_vertex_ids(second_class))
+                probability = min(1.0, self.class_max_weights[first_class] * self.class_max_weights[second_class] * self.edge_probability_scale)
+
+                number_of_blocks = max(1, math.ceil(number_of_pairs * probability / self.lines_per_thread))
+                boundaries = [(number_of_pairs * i) // number_of_blocks for i in range(0, number_of_blocks + 1)]
+
+                for start, end in zip(boundaries[:-1], boundaries[1:]):
+                    blocks.append((first_class, second_class, start, end, probability))
+
+        return blocks
+
+    def generate_block_edges(self, block_index, worker_counters=None):
+        """
+        Description:
+            Generates the edges of the block with its own random generator and
+            returns them as (source vertex IDs, destination vertex IDs, flags
+            telling if the leader was drawn from leader list 1). The source is the
+            follower, chosen between the two endpoints in proportion to the
+            follower and leader weights. The rejected samples are counted in the
+            worker counters, if given.
+        """
+
+        first_class, second_class, start, end, probability = self.blocks[block_index]
+        random_generator = np.random.default_rng((self.random_seed, block_index))
+
+        positions = sample_pair_positions(random_generator, start, end, probability)
+
+        second_class_size = len(self.get_class_vertex_ids(second_class))
+        first_indices, second_indices = positions // second_class_size, positions % second_class_size
+
+        if first_class == second_class:
+            # every pair of the class appears twice in the square, and once as a self loop
+            if worker_counters is not None:
+                worker_counters.add("rejected_self_loops", int(np.count_nonzero(first_indices == second_indices)))
+
+            is_upper_pair = first_indices < second_indices
+            first_indices, second_indices = first_indices[is_upper_pair], second_indices[is_upper_pair]
+
+        first_vertex_ids = self.get_class_vertex_ids(first_class)[first_indices]
+        second_vertex_ids = self.get_class_vertex_ids(second_class)[second_indices]
+
+        # accepting every candidate with its own probability
+        edge_probabilities = np.minimum(self.weights[first_vertex_ids] * self.weights[second_vertex_ids] * self.edge_probability_scale, 1.0)
+        is_accepted = random_generator.random(len(first_vertex_ids)) * probability < edge_probabilities
+
+        if worker_counters is not None:
+            worker_counters.add("rejected_candidate_edges", int(len(is_accepted) - np.count_nonzero(is_accepted)))
+
+        first_vertex_ids, second_vertex_ids = first_vertex_ids[is_accepted], second_vertex_ids[is_accepted]
+
+        # orienting every edge from its follower to its leader
+        first_is_follower_weight = self.follower_weights[first_vertex_ids] * self.leader_weights[second_vertex_ids]
+        orientation_weights = first_is_follower_weight + self.follower_weights[second_vertex_ids] * self.leader_weights[first_vertex_ids]
+        orientation_samples = random_generator.random(len(first_vertex_ids))
+        first_is_follower = np.where(orientation_weights > 0, orientation_samples * orientation_weights < first_is_follower_weight, orientation_samples < 0.5)
+
+        source_vertex_ids = np.where(first_is_follower, first_vertex_ids, second_vertex_ids).astype(self.follower_list.dtype)
+        destination_vertex_ids = np.where(first_is_follower, second_vertex_ids, first_vertex_ids).astype(self.follower_list.dtype)
+        chooses_leader_list_1 = random_generator.random(len(destination_vertex_ids)) < self.leader_1_shares[destination_vertex_ids]
+
+        return source_vertex_ids, destination_vertex_ids, chooses_leader_list_1
+
+    def fetch_next_block(self, worker_index=None, batch_scheduler=None):
+        """
+        Description:
+            Threads call this function to get the index of the next block to
+            generate from the batch scheduler (with their worker index, if they
+            are one of the workers of the executor), or -1 if all blocks have
+            been given. The scheduler of the workers is used if batch_scheduler
+            is None.
+        """
+
+        batch_scheduler = batch_scheduler if batch_scheduler is not None else self.batch_scheduler
+
+        block_index, number_of_blocks = batch_scheduler.next_batch(worker_index)
+
+        return block_index
+
+    def iter_block_indices(self, worker_index=None, number_of_workers=None, batch_scheduler=None):
+        """
+        Description:
+            Generator yielding the indices of the blocks of a worker: the blocks
+            handed out by the batch scheduler (the scheduler of the workers if
+            None) if number_of_workers is None, otherwise every
+            number_of_workers-th block from worker_index (so independent
+            processes split the blocks without communicating).
+        """
+
+        if number_of_workers is not None:
+            yield from range(worker_index, len(self.blocks), number_of_workers)
+            return
+
+        while True:
+            block_index = self.fetch_next_block(worker_index, batch_scheduler)
+            if block_index < 0:
+                return
+            yield block_index
+
+    def iter_batches(self, worker_index=None, number_of_workers=None):
+        """
+        Description:
+            Generator yielding the friend edges of the blocks of a worker (see
+            iter_block_indices()) as record batches with the fields
+            SourceVertexID and DestinationVertexID. The degrees of the vertices
+            are updated with every batch and every iteration keeps its own worker
+            counters. Every call without a worker index iterates over all the
+            blocks with its own scheduler, so the generator can be iterated again
+            (and gives the same edges).
+        """
+
+        batch_scheduler = self.batch_scheduler
+        if (worker_index is None) and (number_of_workers is None):
+            self.reset_generated_edges()
+            batch_scheduler = self.batch_executor.create_scheduler(0, len(self.blocks), 1)
+
+        worker_counters = self.create_worker_counters()
+
+        for block_index in self.iter_block_indices(worker_index, number_of_workers, batch_scheduler):
+            source_vertex_ids, destination_vertex_ids, chooses_leader_list_1 = self.generate_block_edges(block_index, worker_counters)
+            if len(source_vertex_ids) == 0:
+                continue
+
+            worker_counters.add("friend_edges", len(source_vertex_ids))
+            worker_counters.add("leader_list_1_edges", int(np.count_nonzero(chooses_leader_list_1)))
+
+            self.adjacency_update_lock.acquire()
+            np.add.at(self.friend_degrees, source_vertex_ids, 1)
+            np.add.at(self.friend_degrees, destination_vertex_ids, 1)
+            self.adjacency_update_lock.release()
+
+            yield make_record_batch(self.get_header_fields(),\
+                                    [source_vertex_ids, destination_vertex_ids])
+
+    def iter_edges(self):
+        """
+        Description:
+            Generator yielding the (source vertex IDs, destination vertex IDs) of
+            all blocks in order, without updating the degrees or the counters.
+        """
+
+        for block_index in range(0, len(self.blocks)):
+            source_vertex_ids, destination_vertex_ids, chooses_leader_list_1 = self.generate_block_edges(block_index)
+            yield source_vertex_ids, destination_vertex_ids
+
+    def reset_generated_edges(self):
+        """
+        Description:
+            Forgets the degrees and the worker counters of a previous iteration
+            (the blocks always give the same edges, so the adjacency list is kept).
+        """
+
+        self.friend_degrees.fill(0)
+
+        self.worker_counters_lock.acquire()
+        self.worker_counters_list = []
+        self.worker_counters_lock.release()
+
+    def get_friend_adjacency(self):
+        """
+        Description:
+            Returns the adjacency list of the generated friend edges as a
+            FriendAdjacencyCSR, built once by generating the blocks again (they
+            give the same edges), so the edges are never held in memory twice.
+        """
+
+        if self.friend_adjacency_csr is None:
+            self.friend_adjacency_csr = FriendAdjacencyCSR.from_edge_batches(self.iter_edges, self.number_of_investors)
+
+        return self.friend_adjacency_csr
+
+    def create_worker_counters(self):
+        """
+        Description:
+            Creates the counters of a new worker and registers them to be merged
+            by get_statistics().
+        """
+
+        worker_counters = WorkerCounters(CHUNG_LU_EDGE_COUNTER_NAMES)
+
+        self.worker_counters_lock.acquire()
+        self.worker_counters_list.append(worker_counters)
+        self.worker_counters_lock.release()
+
+        return worker_counters
+
+    def get_statistics(self, number_of_hubs=10):
+        """
+        Description:
+            Merges the counters of all workers and returns the statistics of the
+            generated friend edges, with the same fields as the FriendEdgeGenerator
+            (no duplicate edges are ever generated) and the number of rejected
+            candidate pairs.
+        """
+
+        counters = WorkerCounters.merge_all(CHUNG_LU_EDGE_COUNTER_NAMES, self.worker_counters_list)
+
+        return {"number_of_friend_edges": counters["friend_edges"],\
+                "expected_number_of_friend_edges": self.number_of_friend_edges,\
+                "rejected_self_loops": counters["rejected_self_loops"],\
+                "rejected_duplicate_edges": counters["rejected_duplicate_edges"],\
+                "rejected_candidate_edges": counters["rejected_candidate_edges"],\
+                "configured_choose_leader_list_1_as_friend_prob": self.choose_leader_list_1_as_friend_prob,\
+                "realized_choose_leader_list_1_as_friend_prob": get_ratio(counters["leader_list_1_edges"], counters["friend_edges"]),\
+                "degrees": get_degree_statistics(self.friend_degrees, number_of_hubs)}
+
+
+# Unit tests to test if the pair positions are kept with the probability
+def test_sample_pair_positions():
+    random_generator = np.random.default_rng(22013)
+
+    assert sample_pair_positions(random_generator, 5, 12, 1.0).tolist() == list(range(5, 12)),\
+        "ChungLuEdgeGenerator_SAMPLE_ERROR positions kept with probability 1 are invalid"
+
+    assert len(sample_pair_positions(random_generator, 5, 12, 0.0)) == 0 and len(sample_pair_positions(random_generator, 5, 5, 0.5)) == 0,\
+        "ChungLuEdgeGenerator_SAMPLE_ERROR positions of an empty sampling are invalid"
+
+    positions = sample_pair_positions(random_generator, 1000, 201000, 0.05)
+
+    assert np.all(np.diff(positions) > 0) and positions.min() >= 1000 and positions.max() < 201000,\
+        "ChungLuEdgeGenerator_SAMPLE_ERROR positions are not distinct or out of range"
+
+    assert abs(len(positions) - 10000) < 500,\
+        "ChungLuEdgeGenerator_SAMPLE_ERROR number of positions is invalid"
+
+# Unit tests to test if the blocks give distinct edges whose degrees follow the expected degrees
+def test_chung_lu_edge_generator():
+    test_object = ChungLuEdgeGenerator(thread_number=3,\
+                 lines_per_thread=500,\
+                 destination_file="chung_lu_edge_test.csv",\
+                 number_of_friend_edges=20000,\
+                 follower_list=np.random.permutation(2000).tolist(),\
+                 leader_list_1=np.random.permutation(2000).tolist(),\
+                 leader_list_2=np.random.permutation(2000).tolist(),\
+                 follower_list_friend_power_dis_param=2,\
+                 leader_list_1_friend_power_dis_param=3,\
+                 leader_list_2_friend_power_dis_param=5,\
+                 choose_leader_list_1_as_friend_prob=0.85,\
+                 random_seed=7)
+
+    adjacency_csr = test_object.execute()
+
+    with open("chung_lu_edge_test.csv", mode='r') as in_file:
+        lines = in_file.read().splitlines()
+        in_file.close()
+
+    assert lines[:2] == ["Friend Edges", "SourceVertexID|DestinationVertexID"],\
+        "ChungLuEdgeGenerator_EXECUTE_ERROR header is invalid"
+
+    edges = np.array([line.split("|") for line in lines[2:]], dtype=np.int64)
+    undirected_edges = set(zip(edges.min(axis=1).tolist(), edges.max(axis=1).tolist()))
+
+    assert len(undirected_edges) == len(edges) and np.all(edges[:, 0] != edges[:, 1]),\
+        "ChungLuEdgeGenerator_EXECUTE_ERROR duplicate edges or self loops generated"
+
+    assert abs(len(edges) - 20000) < 600,\
+        "ChungLuEdgeGenerator_EXECUTE_ERROR number of edges is far from the expected number"
+
+    assert adjacency_csr.get_degrees().tolist() == test_object.friend_degrees.tolist(),\
+        "ChungLuEdgeGenerator_EXECUTE_ERROR adjacency list degrees are invalid"
+
+    for source_vertex_id, destination_vertex_id in edges[:100].tolist():
+        assert destination_vertex_id in adjacency_csr[source_vertex_id],\
+            "ChungLuEdgeGenerator_EXECUTE_ERROR adjacency list is missing an edge"
+
+    # the realized degrees follow the expected degrees of the power-law mixture
+    order = np.argsort(test_object.weights)
+    for vertex_ids in np.array_split(order, 10):
+        expected_degree = test_object.weights[vertex_ids].sum()
+        assert abs(test_object.friend_degrees[vertex_ids].sum() - expected_degree) < 0.1 * expected_degree + 100,\
+            "ChungLuEdgeGenerator_DEGREE_ERROR realized degrees are far from the expected degrees"
+
+    statistics = test_object.get_statistics(number_of_hubs=3)
+
+    assert statistics["number_of_friend_edges"] == len(edges) and statistics["rejected_duplicate_edges"] == 0,\
+        "ChungLuEdgeGenerator_STATISTICS_ERROR edge counts are invalid"
+
+    assert abs(statistics["realized_choose_leader_list_1_as_friend_prob"] - 0.85) < 0.05,\
+        "ChungLuEdgeGenerator_STATISTICS_ERROR realized probability is invalid"
+
+# Unit tests to test if independent workers generate the same edges as the threads
+def test_chung_lu_workers():
+    def create_test_object():
+        return ChungLuEdgeGenerator(lines_per_thread=100,\
+                                    number_of_friend_edges=2000,\
+                                    follower_list=np.arange(300),\
+                                    leader_list_1=np.arange(300),\
+                                    leader_list_2=np.arange(300),\
+                                    random_seed=3)
+
+    def get_edge_set(batches):
+        all_edges = np.concatenate(batches)
+        return set(zip(all_edges["SourceVertexID"].tolist(), all_edges["DestinationVertexID"].tolist()))
+
+    test_object = create_test_object()
+    shared_edges = get_edge_set(list(test_object.iter_batches()))
+
+    assert get_edge_set(list(test_object.iter_batches())) == shared_edges and test_object.friend_degrees.sum() == 2 * len(shared_edges),\
+        "ChungLuEdgeGenerator_WORKERS_ERROR second iteration is invalid"
+
+    worker_batches = []
+    for worker_index in range(0, 3):
+        worker_batches += list(create_test_object().iter_batches(worker_index=worker_index, number_of_workers=3))
+
+    assert len(shared_edges) > 1500 and get_edge_set(worker_batches) == shared_edges,\
+        "ChungLuEdgeGenerator_WORKERS_ERROR workers generated different edges"
+
+# Function to execute all defined unit tests for ChungLuEdgeGenerator
+def execute_all_unit_tests():
+    test_sample_pair_positions()
+    test_chung_lu_edge_generator()
+    test_chung_lu_workers()
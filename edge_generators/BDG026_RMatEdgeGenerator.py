@@ -0,0 +1,523 @@
+"""
+FYP : 22013
+
+Module:
+    Base Data Generator
+
+Description:
+    This python script contains the definition of the RMatEdgeGenerator class
+    and its unit tests.
+
+    The RMatEdgeGenerator class is an alternative engine for the friend edges of
+    very large graphs, using the recursive matrix (R-MAT) model: the adjacency
+    matrix is split into four quadrants chosen with the configurable
+    probabilities (a, b, c, d), recursively, one bit of the source and
+    destination vertex IDs at a time. The bits of a whole block of edges are
+    drawn at once with NumPy, so no Python loop runs per edge.
+
+    Every candidate edge has an edge ID, and the candidate edges of a block of
+    edge IDs are drawn by a random generator seeded from the first edge ID of
+    the block, so every worker (thread, process or node) generates its own edge
+    ID range independently. The candidates are packed as uint64 keys (as in the
+    memory-bounded mode of the FriendEdgeGenerator) and hashed by their smaller
+    vertex ID into partitions, each deduplicated on its own by an
+    ExternalSorter. The duplicate edges, self loops and vertex IDs beyond the
+    number of investors are topped up with new edge IDs until
+    number_of_friend_edges distinct edges exist.
+
+    The vertex IDs are reversed, so that the larger vertex IDs have the larger
+    degrees as with the other engines. The friend edges are written as by the
+    FriendEdgeGenerator, and the adjacency list is returned as a
+    FriendAdjacencyCSR, so the MirrorEdgeGenerator uses it unchanged.
+
+"""
+
+
+# Imports from built-in modules
+import math
+import numpy as np
+import threading
+
+# Imports from Base Data Generator Module
+from data_sinks.BDG010_RecordBatch import make_record_batch
+from edge_generators.BDG004_FriendEdgeGenerator import FriendEdgeGenerator
+from edge_generators.BDG014_FriendAdjacencyCSR import FriendAdjacencyCSR
+from execution.BDG027_BatchExecutor import BatchExecutor
+from external_memory.BDG021_ExternalSorter import ExternalSorter
+from graph_statistics.BDG019_GraphStatistics import WorkerCounters, get_degree_statistics
+from list_generators.BDG006_PermutedListGenerator import to_id_array
+
+# Names of the counters kept by every worker generating R-MAT friend edges
+RMAT_EDGE_COUNTER_NAMES = ["candidate_edges", "rejected_self_loops", "rejected_out_of_range_edges"]
+
+# Number of bytes the partition sorters may use if no memory budget is given
+DEFAULT_DEDUPLICATION_MEMORY_BUDGET = 256 * 1024 * 1024
+
+# Multiplier of the hash of the smaller vertex ID choosing the partition of an edge (Fibonacci hashing)
+PARTITION_HASH_MULTIPLIER = np.uint64(0x9E3779B97F4A7C15)
+
+def get_rmat_vertex_ids(random_generator, number_of_edges, scale, rmat_probabilities):
+    """
+    Description:
+        Draws the source and destination vertex IDs (from 0 to 2^scale - 1) of
+        number_of_edges R-MAT edges, one bit per level for all edges at once:
+        the quadrants a, b, c and d set the (source, destination) bits to (0, 0),
+        (0, 1), (1, 0) and (1, 1).
+    """
+
+    a, b, c, d = rmat_probabilities
+    source_vertex_ids = np.zeros((number_of_edges,), dtype=np.int64)
+    destination_vertex_ids = np.zeros((number_of_edges,), dtype=np.int64)
+
+    # the arrays of a level are reused by all levels
+    quadrant_samples = np.empty((number_of_edges,), dtype=np.float32)
+    source_bits = np.empty((number_of_edges,), dtype=np.bool_)
+    destination_bits = np.empty((number_of_edges,), dtype=np.bool_)
+    is_quadrant_d = np.empty((number_of_edges,), dtype=np.bool_)
+
+    for level in range(0, scale):
+        random_generator.random(out=quadrant_samples, dtype=np.float32)
+
+        # quadrants c and d set the source bit, quadrants b and d the destination bit
+        np.greater_equal(quadrant_samples, np.float32(a + b), out=source_bits)
+        np.greater_equal(quadrant_samples, np.float32(a), out=destination_bits)
+        np.logical_xor(destination_bits, source_bits, out=destination_bits)
+        np.greater_equal(quadrant_samples, np.float32(a + b + c), out=is_quadrant_d)
+        np.logical_or(destination_bits, is_quadrant_d, out=destination_bits)
+
+        source_vertex_ids <<= 1
+        source_vertex_ids |= source_bits
+        destination_vertex_ids <<= 1
+        destination_vertex_ids |= destination_bits
+
+    return source_vertex_ids, destination_vertex_ids
+
+class RMatEdgeGenerator(FriendEdgeGenerator):
+
+    def __init__(self, thread_number=5,\
+                 lines_per_thread=1000,\
+                 destination_file="edge.csv",\
+                 number_of_friend_edges=2,\
+                 follower_list=np.array([0,1,2,3], dtype=np.int32),\
+                 rmat_probabilities=[0.57, 0.19, 0.19, 0.05],\
+                 output_writer=None,\
+                 number_of_partitions=None,\
+                 memory_budget=None,\
+                 temporary_directory=None,\
+                 random_seed=None,\
+                 backend="threads",\
+                 scheduling="dynamic"):
+
+        # Number of threads generating the candidate edges and deduplicating the partitions
+        self.thread_number = thread_number
+
+        # Number of candidate edges drawn at a time, and largest number of edges of a batch
+        self.lines_per_thread = lines_per_thread
+
+        # Destination file to store the generated data
+        self.destination_file = destination_file
+
+        # Number of friend edges to be generated
+        self.number_of_friend_edges = number_of_friend_edges
+
+        # Writer (e.g. PartitionedFileWriter) used instead of the destination
+        # file when it is not None
+        self.output_writer = output_writer
+
+        # Stores the (ordered) follower list as a compact NumPy array, the vertex IDs of the
+        # edges are drawn from 0 to (number_of_investors - 1) as by the FriendEdgeGenerator
+        self.follower_list = to_id_array(follower_list)
+
+        number_of_investors = self.follower_list.shape[0]
+
+        assert number_of_friend_edges <= (number_of_investors * (number_of_investors - 1)) / 2,\
+            "RMatEdgeGenerator_ERROR: Number of friend edges must be smaller than C(Number_of_Investors, 2)"
+
+        # Packed edge keys store the vertex IDs in 31 bits
+        assert number_of_investors <= 2 ** 31,\
+            "RMatEdgeGenerator_ERROR: the R-MAT engine supports at most 2^31 investors"
+
+        assert len(rmat_probabilities) == 4 and min(rmat_probabilities) >= 0 and abs(sum(rmat_probabilities) - 1) < 1e-6,\
+            "RMatEdgeGenerator_ERROR: the R-MAT probabilities must be 4 non-negative numbers adding up to 1"
+
+        self.number_of_investors = number_of_investors
+
+        # Probabilities (a, b, c, d) of the four quadrants of the adjacency matrix
+        self.rmat_probabilities = [float(probability) for probability in rmat_probabilities]
+
+        # Number of bits of the drawn vertex IDs, those from number_of_investors on are rejected
+        self.scale = max(1, math.ceil(math.log2(max(2, number_of_investors))))
+
+        # Seed of the random generators of the blocks of edge IDs. If not given, it is drawn from
+        # the global NumPy random generator (seeded by the executor for reproducible runs)
+        self.random_seed = random_seed if random_seed is not None else int(np.random.randint(0, 2 ** 31 - 1))
+
+        # Number of partitions deduplicated independently (one per thread by default)
+        self.number_of_partitions = number_of_partitions if number_of_partitions is not None else max(1, thread_number)
+
+        # Number of bytes the sorters of all partitions may use, and the directory of their runs
+        self.memory_budget = memory_budget if memory_budget is not None else DEFAULT_DEDUPLICATION_MEMORY_BUDGET
+        self.temporary_directory = temporary_directory
+
+        # The partition sorters are only shared by threads
+        assert backend != "processes",\
+            "RMatEdgeGenerator_ERROR: the processes backend is not supported"
+
+        # Executor running the tasks of the workers (threads or inline) with the scheduling mode
+        self.batch_executor = BatchExecutor(backend=backend,\
+                                            scheduling=scheduling,\
+                                            number_of_workers=thread_number)
+
+        # Sorter deduplicating the packed edge keys of every partition, and their locks
+        self.partition_sorters = None
+        self.partition_locks = [threading.Lock() for i in range(0, self.number_of_partitions)]
+
+        # Number of edge IDs drawn so far (the next candidate edges start from this edge ID)
+        self.number_of_candidate_edges = 0
+
+        # Lock for restriciting access to writing file
+        self.file_write_lock = threading.Lock()
+
+        # The adjacency list built from the sorted keys once it is requested
+        self.friend_adjacency_csr = None
+
+        # Number of friends of every investor, updated with every batch
+        self.friend_degrees = np.zeros((number_of_investors,), dtype=np.int64)
+
+        # Counters of every worker generating candidate edges, merged by get_statistics()
+        self.worker_counters_list = []
+
+        # Lock for restricting access to the list of worker counters
+        self.worker_counters_lock = threading.Lock()
+
+    def generate_candidate_edge_keys(self, first_edge_id, number_of_edges, worker_counters):
+        """
+        Description:
+            Draws the candidate edges of the edge IDs first_edge_id to
+            (first_edge_id + number_of_edges - 1), which must be in the same
+            block of lines_per_thread edge IDs, and returns the packed keys of
+            those that are neither self loops nor beyond the investors (see
+            FriendEdgeGenerator.generate_candidate_edge_keys()). The edges of a
+            block are drawn by a random generator seeded from its first edge ID,
+            so every edge ID always gives the same edge.
+        """
+
+        block_first_edge_id = first_edge_id - first_edge_id % self.lines_per_thread
+        random_generator = np.random.default_rng((self.random_seed, block_first_edge_id))
+        source_vertex_ids, destination_vertex_ids = get_rmat_vertex_ids(random_generator, self.lines_per_thread, self.scale, self.rmat_probabilities)
+
+        block_edge_ids = slice(first_edge_id - block_first_edge_id, first_edge_id - block_first_edge_id + number_of_edges)
+        source_vertex_ids, destination_vertex_ids = source_vertex_ids[block_edge_ids], destination_vertex_ids[block_edge_ids]
+
+        is_in_range = (source_vertex_ids < self.number_of_investors) & (destination_vertex_ids < self.number_of_investors)
+        is_not_self_loop = source_vertex_ids != destination_vertex_ids
+
+        worker_counters.add("candidate_edges", number_of_edges)
+        worker_counters.add("rejected_out_of_range_edges", int(number_of_edges - np.count_nonzero(is_in_range)))
+        worker_counters.add("rejected_self_loops", int(np.count_nonzero(is_in_range & ~is_not_self_loop)))
+
+        # reversing the vertex IDs, so that the most likely ones are the largest
+        follower_vertex_ids = (self.number_of_investors - 1 - source_vertex_ids[is_in_range & is_not_self_loop]).astype(np.uint64)
+        leader_vertex_ids = (self.number_of_investors - 1 - destination_vertex_ids[is_in_range & is_not_self_loop]).astype(np.uint64)
+
+        return (np.minimum(follower_vertex_ids, leader_vertex_ids) << np.uint64(32)) |\
+                (np.maximum(follower_vertex_ids, leader_vertex_ids) << np.uint64(1)) |\
+                (follower_vertex_ids > leader_vertex_ids).astype(np.uint64)
+
+    def get_partition_indices(self, edge_keys):
+        """
+        Description:
+            Returns the partition of every packed edge key, from the hash of its
+            smaller vertex ID (duplicate edges are always in the same partition).
+        """
+
+        return ((((edge_keys >> np.uint64(32)) * PARTITION_HASH_MULTIPLIER) >> np.uint64(32)) % np.uint64(self.number_of_partitions)).astype(np.int64)
+
+    def add_edge_id_range(self, first_edge_id, last_edge_id, worker_counters):
+        """
+        Description:
+            Generates the candidate edges of the edge IDs first_edge_id to
+            (last_edge_id - 1) block by block, and adds their keys to the sorters
+            of their partitions.
+        """
+
+        block_boundaries = [first_edge_id,] +\
+            list(range(first_edge_id - first_edge_id % self.lines_per_thread + self.lines_per_thread, last_edge_id, self.lines_per_thread)) +\
+            [last_edge_id,]
+
+        for range_first_edge_id, range_last_edge_id in zip(block_boundaries[:-1], block_boundaries[1:]):
+            if range_last_edge_id <= range_first_edge_id:
+                continue
+
+            edge_keys = self.generate_candidate_edge_keys(range_first_edge_id, range_last_edge_id - range_first_edge_id, worker_counters)
+
+            partition_indices = self.get_partition_indices(edge_keys)
+            order = np.argsort(partition_indices, kind='stable')
+            partition_boundaries = np.zeros((self.number_of_partitions + 1,), dtype=np.int64)
+            np.cumsum(np.bincount(partition_indices, minlength=self.number_of_partitions), out=partition_boundaries[1:])
+
+            sorted_edge_keys = edge_keys[order]
+            for partition_index in range(0, self.number_of_partitions):
+                partition_keys = sorted_edge_keys[partition_boundaries[partition_index]:partition_boundaries[partition_index + 1]]
+                if len(partition_keys) == 0:
+                    continue
+
+                self.partition_locks[partition_index].acquire()
+                self.partition_sorters[partition_index].add(partition_keys)
+                self.partition_locks[partition_index].release()
+
+    def run_workers(self, target, number_of_tasks):
+        """
+        Description:
+            Runs target(task_index) for the tasks 0 to (number_of_tasks - 1) with
+            the batch executor, every worker taking one task at a time from the
+            scheduler. The first exception of a task is raised again.
+        """
+
+        task_scheduler = self.batch_executor.create_scheduler(0, number_of_tasks, 1)
+
+        def worker_job(worker_index):
+            while True:
+                task_index, number_of_task_indices = task_scheduler.next_batch(worker_index)
+                if task_index < 0:
+                    return
+                target(task_index)
+
+        self.batch_executor.run(worker_job, task_scheduler)
+
+    def generate_unique_edge_keys(self):
+        """
+        Description:
+            Generates the candidate edges into the partition sorters and merges
+            the partitions, topping up the number of missing edges with new edge
+            IDs until number_of_friend_edges distinct edges exist. Every thread
+            generates its own range of the new edge IDs, then merges its own
+            partitions.
+        """
+
+        self.partition_sorters = [ExternalSorter(memory_budget=max(1, self.memory_budget // self.number_of_partitions),\
+                                                    temporary_directory=self.temporary_directory,\
+                                                    ignored_low_bits=1) for i in range(0, self.number_of_partitions)]
+
+        worker_counters_list = [self.create_worker_counters() for i in range(0, self.thread_number)]
+        partition_sizes = [0 for i in range(0, self.number_of_partitions)]
+
+        def generate_worker_edge_id_range(worker_index):
+            worker_first_edge_id = first_edge_id + (missing_edges * worker_index) // self.thread_number
+            worker_last_edge_id = first_edge_id + (missing_edges * (worker_index + 1)) // self.thread_number
+            self.add_edge_id_range(worker_first_edge_id, worker_last_edge_id, worker_counters_list[worker_index])
+
+        def merge_partition(partition_index):
+            partition_sizes[partition_index] = self.partition_sorters[partition_index].merge()
+
+        while sum(partition_sizes) < self.number_of_friend_edges:
+            first_edge_id = self.number_of_candidate_edges
+            missing_edges = self.number_of_friend_edges - sum(partition_sizes)
+
+            self.run_workers(generate_worker_edge_id_range, self.thread_number)
+            self.number_of_candidate_edges += missing_edges
+
+            self.run_workers(merge_partition, self.number_of_partitions)
+
+    def iter_edges(self):
+        """
+        Description:
+            Generator yielding the (source vertex IDs, destination vertex IDs) of
+            the distinct edges, partition by partition, in chunks of at most
+            lines_per_thread edges.
+        """
+
+        if self.partition_sorters is None:
+            self.generate_unique_edge_keys()
+
+        for partition_sorter in self.partition_sorters:
+            for edge_keys in partition_sorter.iter_sorted_keys(self.lines_per_thread):
+                smaller_vertex_ids, larger_vertex_ids, follower_is_larger = self.get_edge_key_vertex_ids(edge_keys)
+
+                yield np.where(follower_is_larger, larger_vertex_ids, smaller_vertex_ids).astype(self.follower_list.dtype),\
+                        np.where(follower_is_larger, smaller_vertex_ids, larger_vertex_ids).astype(self.follower_list.dtype)
+
+    def iter_batches(self, worker_index=None):
+        """
+        Description:
+            Generator yielding the distinct friend edges as record batches with
+            the fields SourceVertexID and DestinationVertexID (the candidate edges
+            are generated and deduplicated first, with thread_number workers).
+            The degrees of the vertices are updated with every batch (every
+            iteration yields the same edges and counts their degrees again). The
+            edges are yielded by a single iteration, so worker_index is not used.
+        """
+
+        self.friend_degrees.fill(0)
+
+        for source_vertex_ids, destination_vertex_ids in self.iter_edges():
+            np.add.at(self.friend_degrees, source_vertex_ids, 1)
+            np.add.at(self.friend_degrees, destination_vertex_ids, 1)
+
+            yield make_record_batch(self.get_header_fields(),\
+                                    [source_vertex_ids, destination_vertex_ids])
+
+    def get_friend_adjacency(self):
+        """
+        Description:
+            Returns the adjacency list of the generated friend edges as a
+            FriendAdjacencyCSR, built once from the sorted keys of the partitions
+            (which also removes the temporary files of the sorters).
+        """
+
+        if self.friend_adjacency_csr is None:
+            if self.partition_sorters is None:
+                self.generate_unique_edge_keys()
+
+            self.friend_adjacency_csr = FriendAdjacencyCSR.from_edge_batches(self.iter_edges, self.number_of_investors)
+
+            for partition_sorter in self.partition_sorters:
+                partition_sorter.close()
+
+        return self.friend_adjacency_csr
+
+    def create_worker_counters(self):
+        """
+        Description:
+            Creates the counters of a new worker and registers them to be merged
+            by get_statistics().
+        """
+
+        worker_counters = WorkerCounters(RMAT_EDGE_COUNTER_NAMES)
+
+        self.worker_counters_lock.acquire()
+        self.worker_counters_list.append(worker_counters)
+        self.worker_counters_lock.release()
+
+        return worker_counters
+
+    def get_statistics(self, number_of_hubs=10):
+        """
+        Description:
+            Merges the counters of all workers and returns the statistics of the
+            generated friend edges (a dictionary that can be saved as JSON).
+        """
+
+        counters = WorkerCounters.merge_all(RMAT_EDGE_COUNTER_NAMES, self.worker_counters_list)
+
+        number_of_friend_edges = int(self.friend_degrees.sum()) // 2
+        rejected_edges = counters["rejected_self_loops"] + counters["rejected_out_of_range_edges"]
+
+        return {"number_of_friend_edges": number_of_friend_edges,\
+                "number_of_candidate_edges": counters["candidate_edges"],\
+                "rejected_self_loops": counters["rejected_self_loops"],\
+                "rejected_out_of_range_edges": counters["rejected_out_of_range_edges"],\
+                "rejected_duplicate_edges": counters["candidate_edges"] - rejected_edges - number_of_friend_edges,\
+                "rmat_probabilities": self.rmat_probabilities,\
+                "degrees": get_degree_statistics(self.friend_degrees, number_of_hubs)}
+
+    def execute(self):
+        """
+        Description:
+            Executes the R-MAT edge generator to generate the friend edges and
+            returns the adjacency list as a FriendAdjacencyCSR.
+        """
+
+        # reset destination_file (or the files of the output writer), if it exists
+        if self.output_writer is not None:
+            self.output_writer.reset_destination_files(self.get_loader_header_fields())
+        else:
+            self.reset_destination_file()
+
+        # the candidate edges are generated and deduplicated by the threads, the
+        # distinct edges are then written in the order of the partitions
+        self.lines_generator()
+        print("Friend Edge Generation Complete")
+
+        return self.get_friend_adjacency()
+
+
+# Unit tests to test if the R-MAT quadrants are chosen with their probabilities
+def test_get_rmat_vertex_ids():
+    random_generator = np.random.default_rng(22013)
+
+    source_vertex_ids, destination_vertex_ids = get_rmat_vertex_ids(random_generator, 100000, 1, [0.5, 0.2, 0.2, 0.1])
+    quadrant_counts = np.bincount(source_vertex_ids * 2 + destination_vertex_ids, minlength=4) / 100000
+
+    assert np.all(np.abs(quadrant_counts - np.array([0.5, 0.2, 0.2, 0.1])) < 0.01),\
+        "RMatEdgeGenerator_RMAT_ERROR quadrant probabilities are invalid"
+
+    source_vertex_ids, destination_vertex_ids = get_rmat_vertex_ids(random_generator, 1000, 10, [0.57, 0.19, 0.19, 0.05])
+
+    assert source_vertex_ids.max() < 1024 and destination_vertex_ids.max() < 1024 and source_vertex_ids.min() >= 0,\
+        "RMatEdgeGenerator_RMAT_ERROR vertex IDs are out of range"
+
+    assert np.count_nonzero(source_vertex_ids < 512) > 700,\
+        "RMatEdgeGenerator_RMAT_ERROR vertex IDs are not skewed"
+
+# Unit tests to test if the partitioned deduplication gives exactly the distinct edges asked for
+def test_rmat_edge_generator():
+    test_object = RMatEdgeGenerator(thread_number=3,\
+                 lines_per_thread=700,\
+                 destination_file="rmat_edge_test.csv",\
+                 number_of_friend_edges=5000,\
+                 follower_list=np.random.permutation(1000).tolist(),\
+                 number_of_partitions=4,\
+                 memory_budget=16 * 1024,\
+                 random_seed=5)
+
+    adjacency_csr = test_object.execute()
+
+    with open("rmat_edge_test.csv", mode='r') as in_file:
+        lines = in_file.read().splitlines()
+        in_file.close()
+
+    assert lines[:2] == ["Friend Edges", "SourceVertexID|DestinationVertexID"],\
+        "RMatEdgeGenerator_EXECUTE_ERROR header is invalid"
+
+    edges = np.array([line.split("|") for line in lines[2:]], dtype=np.int64)
+    undirected_edges = set(zip(edges.min(axis=1).tolist(), edges.max(axis=1).tolist()))
+
+    assert len(edges) == 5000 and len(undirected_edges) == 5000 and np.all(edges[:, 0] != edges[:, 1]),\
+        "RMatEdgeGenerator_EXECUTE_ERROR edges are not distinct"
+
+    assert edges.min() >= 0 and edges.max() < 1000,\
+        "RMatEdgeGenerator_EXECUTE_ERROR vertex IDs are out of range"
+
+    assert adjacency_csr.get_degrees().tolist() == test_object.friend_degrees.tolist() and adjacency_csr.get_degrees().sum() == 10000,\
+        "RMatEdgeGenerator_EXECUTE_ERROR adjacency list degrees are invalid"
+
+    for source_vertex_id, destination_vertex_id in edges[:100].tolist():
+        assert destination_vertex_id in adjacency_csr[source_vertex_id],\
+            "RMatEdgeGenerator_EXECUTE_ERROR adjacency list is missing an edge"
+
+    # the larger vertex IDs have the larger degrees
+    assert test_object.friend_degrees[500:].sum() > 2 * test_object.friend_degrees[:500].sum(),\
+        "RMatEdgeGenerator_EXECUTE_ERROR degrees are not skewed towards the larger vertex IDs"
+
+    statistics = test_object.get_statistics(number_of_hubs=3)
+
+    assert statistics["number_of_friend_edges"] == 5000 and statistics["rejected_duplicate_edges"] > 0,\
+        "RMatEdgeGenerator_STATISTICS_ERROR edge counts are invalid"
+
+    assert statistics["number_of_candidate_edges"] == statistics["number_of_friend_edges"] + statistics["rejected_duplicate_edges"] +\
+                                                        statistics["rejected_self_loops"] + statistics["rejected_out_of_range_edges"],\
+        "RMatEdgeGenerator_STATISTICS_ERROR rejected edges are not counted"
+
+# Unit tests to test if the edges only depend on the seed, not on the workers or partitions
+def test_rmat_workers():
+    def get_edge_set(thread_number, number_of_partitions):
+        test_object = RMatEdgeGenerator(thread_number=thread_number,\
+                                        lines_per_thread=100,\
+                                        number_of_friend_edges=1000,\
+                                        follower_list=np.arange(300),\
+                                        number_of_partitions=number_of_partitions,\
+                                        random_seed=11)
+        all_edges = np.concatenate(list(test_object.iter_batches()))
+        return set(zip(all_edges["SourceVertexID"].tolist(), all_edges["DestinationVertexID"].tolist()))
+
+    edge_set = get_edge_set(1, 1)
+
+    assert len(edge_set) == 1000 and get_edge_set(4, 3) == edge_set,\
+        "RMatEdgeGenerator_WORKERS_ERROR workers or partitions changed the edges"
+
+# Function to execute all defined unit tests for RMatEdgeGenerator
+def execute_all_unit_tests():
+    test_get_rmat_vertex_ids()
+    test_rmat_edge_generator()
+    test_rmat_workers()
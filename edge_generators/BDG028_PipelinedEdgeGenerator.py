@@ -0,0 +1,649 @@
+"""
+FYP : 22013
+
+Module:
+    Base Data Generator
+
+Description:
+    This python script contains the definitions of the PartitionPipeline and
+    PipelinedEdgeGenerator classes and their unit tests.
+
+    The PipelinedEdgeGenerator class generates the friend edges and the mirror
+    edges in one pipelined pass instead of starting the MirrorEdgeGenerator once
+    every friend edge exists. The investors are split into partitions of
+    consecutive vertex IDs, and every friend edge is owned by the partition of
+    its smaller vertex ID. The partition p generates its quota of friend edges
+    with the samplers of the FriendEdgeGenerator restricted to the edges it
+    owns (follower in p and leader in p or above, or follower above p and
+    leader in p), so the edges touching a vertex of p are all generated once
+    the partitions 0 to p have met their quotas. The partition p is then
+    finalized, and the mirror edges of its followers are generated (with the
+    MirrorEdgeGenerator and its follower sampler restricted to p) while the
+    other partitions are still generating friend edges.
+
+    The quotas split number_of_friend_edges by the probability that a sampled
+    edge is owned by every partition (so the edges follow the distribution of
+    the FriendEdgeGenerator), and number_of_mirror_edges by the follower mass
+    of every partition weighted by the expected degrees. The PartitionPipeline
+    class hands out the friend and mirror batches of the partitions to the
+    workers, preferring the mirror batches of the finalized partitions. A
+    partition whose followers run out of friend pairs to mirror passes its
+    missing mirror edges on to the next partition, and the mirror edges missing
+    after the last partition are generated from all followers at the end.
+
+"""
+
+
+# Imports from built-in modules
+import numpy as np
+import threading
+
+# Imports from Base Data Generator Module
+from edge_generators.BDG004_FriendEdgeGenerator import FriendEdgeGenerator
+from edge_generators.BDG005_MirrorEdgeGenerator import MirrorEdgeGenerator
+from execution.BDG027_BatchExecutor import BatchExecutor
+from samplers.BDG015_VertexSamplers import RangeSampler, get_cumulative_probabilities
+
+# Kinds of the tasks handed out by the partition pipeline
+FRIEND_TASK = "friend"
+MIRROR_TASK = "mirror"
+
+# Number of followers a mirror batch may sample per requested mirror edge. A batch that is still
+# short afterwards exhausts its partition, whose missing mirror edges go to the next partition
+MIRROR_FOLLOWER_SAMPLES_PER_EDGE = 16
+
+def split_quota(total, weights):
+    """
+    Description:
+        Splits total into integer quotas proportional to the weights, giving the
+        remainder of the rounding to the largest fractional parts.
+    """
+
+    weights = np.asarray(weights, dtype=np.float64)
+    exact_quotas = total * weights / weights.sum()
+    quotas = np.floor(exact_quotas).astype(np.int64)
+
+    remainder = total - int(quotas.sum())
+    quotas[np.argsort(quotas - exact_quotas, kind="stable")[:remainder]] += 1
+
+    return quotas
+
+class PartitionPipeline:
+
+    def __init__(self, friend_quotas, mirror_quotas, friend_batch_size=1000, mirror_batch_size=1000):
+
+        # Number of partitions of the vertex IDs
+        self.number_of_partitions = len(friend_quotas)
+
+        # Number of edges a friend or mirror task generates at most
+        self.friend_batch_size = friend_batch_size
+        self.mirror_batch_size = mirror_batch_size
+
+        # Number of friend and mirror edges of every partition not handed out yet
+        self.remaining_friend_edges = np.array(friend_quotas, dtype=np.int64)
+        self.remaining_mirror_edges = np.array(mirror_quotas, dtype=np.int64)
+
+        # Number of friend and mirror tasks of every partition being generated
+        self.friend_tasks_in_progress = np.zeros((self.number_of_partitions,), dtype=np.int64)
+        self.mirror_tasks_in_progress = np.zeros((self.number_of_partitions,), dtype=np.int64)
+
+        # Partitions whose followers ran out of friend pairs to mirror
+        self.exhausted_partitions = np.zeros((self.number_of_partitions,), dtype=np.bool_)
+
+        # The partitions 0 to (number_of_finalized_partitions - 1) have all their friend edges
+        self.number_of_finalized_partitions = 0
+
+        # Missing mirror edges of the exhausted partitions that no later partition can generate
+        self.carried_mirror_edges = 0
+
+        # Number of mirror tasks handed out while friend edges were still being generated
+        self.number_of_overlapped_mirror_tasks = 0
+
+        # Set when a worker failed, so the waiting workers stop
+        self.cancelled = False
+
+        # Condition protecting the state above, notified when a task is done
+        self.task_condition = threading.Condition()
+
+        self.update_finalized_partitions()
+
+    def update_finalized_partitions(self):
+        """
+        Description:
+            Finalizes the partitions whose friend edges are all generated, in
+            order, since the edges of a partition are also owned by the
+            partitions before it. Called with the condition held.
+        """
+
+        while (self.number_of_finalized_partitions < self.number_of_partitions)\
+                and (self.remaining_friend_edges[self.number_of_finalized_partitions] == 0)\
+                and (self.friend_tasks_in_progress[self.number_of_finalized_partitions] == 0):
+            self.number_of_finalized_partitions += 1
+
+    def take_task(self):
+        """
+        Description:
+            Returns the next task (kind, partition index, number of edges), the
+            mirror tasks of the finalized partitions first, or None if no task
+            can be handed out now. Called with the condition held.
+        """
+
+        for partition_index in range(0, self.number_of_finalized_partitions):
+            if self.remaining_mirror_edges[partition_index] > 0:
+                batch_size = int(min(self.mirror_batch_size, self.remaining_mirror_edges[partition_index]))
+                self.remaining_mirror_edges[partition_index] -= batch_size
+                self.mirror_tasks_in_progress[partition_index] += 1
+
+                if self.number_of_finalized_partitions < self.number_of_partitions:
+                    self.number_of_overlapped_mirror_tasks += 1
+
+                return (MIRROR_TASK, partition_index, batch_size)
+
+        for partition_index in range(self.number_of_finalized_partitions, self.number_of_partitions):
+            if self.remaining_friend_edges[partition_index] > 0:
+                batch_size = int(min(self.friend_batch_size, self.remaining_friend_edges[partition_index]))
+                self.remaining_friend_edges[partition_index] -= batch_size
+                self.friend_tasks_in_progress[partition_index] += 1
+
+                return (FRIEND_TASK, partition_index, batch_size)
+
+        return None
+
+    def is_done(self):
+        """
+        Description:
+            Returns True if all partitions are finalized and no mirror edges
+            remain to be handed out or generated. Called with the condition held.
+        """
+
+        return (self.number_of_finalized_partitions == self.number_of_partitions)\
+                and (self.remaining_mirror_edges.sum() == 0)\
+                and (self.mirror_tasks_in_progress.sum() == 0)
+
+    def next_task(self):
+        """
+        Description:
+            Workers call this function to get their next task, waiting while
+            only the tasks in progress can make new tasks available (e.g. by
+            finalizing a partition).
+
+        Returns:
+            - the task (kind, partition index, number of edges)
+            - None if all tasks are done or the pipeline was cancelled
+        """
+
+        self.task_condition.acquire()
+
+        try:
+            while not self.cancelled:
+                task = self.take_task()
+                if task is not None:
+                    return task
+
+                if self.is_done():
+                    return None
+
+                self.task_condition.wait()
+
+            return None
+        finally:
+            self.task_condition.release()
+
+    def task_done(self, task, number_of_generated_edges):
+        """
+        Description:
+            Workers call this function once the edges of their task are saved.
+            A mirror task with fewer edges than requested exhausts its partition,
+            whose missing mirror edges are given to the next partition that is
+            not exhausted (or carried to the end, if there is none).
+        """
+
+        kind, partition_index, batch_size = task
+
+        self.task_condition.acquire()
+
+        if kind == FRIEND_TASK:
+            self.friend_tasks_in_progress[partition_index] -= 1
+            self.update_finalized_partitions()
+        else:
+            self.mirror_tasks_in_progress[partition_index] -= 1
+
+            if number_of_generated_edges < batch_size:
+                missing_mirror_edges = int(batch_size - number_of_generated_edges + self.remaining_mirror_edges[partition_index])
+                self.remaining_mirror_edges[partition_index] = 0
+                self.exhausted_partitions[partition_index] = True
+
+                next_partitions = np.flatnonzero(~self.exhausted_partitions[partition_index + 1:])
+                if len(next_partitions) > 0:
+                    self.remaining_mirror_edges[partition_index + 1 + next_partitions[0]] += missing_mirror_edges
+                else:
+                    self.carried_mirror_edges += missing_mirror_edges
+
+        self.task_condition.notify_all()
+        self.task_condition.release()
+
+    def cancel(self):
+        """
+        Description:
+            Cancels the pipeline and wakes up the waiting workers.
+        """
+
+        self.task_condition.acquire()
+        self.cancelled = True
+        self.task_condition.notify_all()
+        self.task_condition.release()
+
+class PipelinedEdgeGenerator:
+
+    def __init__(self, friend_edges_generator,\
+                 mirror_edges_generator,\
+                 number_of_partitions=8,\
+                 thread_number=5,\
+                 backend="threads"):
+
+        # The generators of the friend edges and of the mirror edges, whose
+        # samplers, adjacency structures and outputs are used by the pipeline
+        self.friend_edges_generator = friend_edges_generator
+        self.mirror_edges_generator = mirror_edges_generator
+
+        # The partitions are finalized from the adjacency list of the sampling engine
+        assert type(friend_edges_generator) is FriendEdgeGenerator and friend_edges_generator.memory_budget is None,\
+            "PipelinedEdgeGenerator_ERROR: the friend edges must be generated by the sampling engine without a memory budget"
+
+        assert isinstance(mirror_edges_generator, MirrorEdgeGenerator)\
+                and (mirror_edges_generator.friend_adjacency_dict is friend_edges_generator.friend_adjacency_dict),\
+            "PipelinedEdgeGenerator_ERROR: the mirror edge generator must use the adjacency list of the friend edge generator"
+
+        # The adjacency structures are only shared by threads
+        assert backend != "processes",\
+            "PipelinedEdgeGenerator_ERROR: the processes backend is not supported"
+
+        # Number of threads to be used for generating data
+        self.thread_number = thread_number
+
+        # Executor running the workers of the pipeline (threads or inline)
+        self.batch_executor = BatchExecutor(backend=backend, number_of_workers=thread_number)
+
+        number_of_investors = friend_edges_generator.number_of_investors
+
+        # First vertex ID of every partition, followed by the number of investors
+        self.number_of_partitions = max(1, min(number_of_partitions, number_of_investors))
+        self.partition_boundaries = (np.arange(0, self.number_of_partitions + 1, dtype=np.int64) * number_of_investors) // self.number_of_partitions
+
+        # Friend edge samplers and quotas of every partition
+        self.create_friend_edge_samplers()
+
+        # Mirror follower samplers and quotas of every partition
+        self.create_mirror_follower_samplers()
+
+        # Pipeline handing out the friend and mirror batches of the partitions
+        self.partition_pipeline = PartitionPipeline(self.friend_quotas,\
+                                                    self.mirror_quotas,\
+                                                    friend_edges_generator.lines_per_thread,\
+                                                    mirror_edges_generator.lines_per_thread)
+
+    def create_friend_edge_samplers(self):
+        """
+        Description:
+            Restricts the samplers of the friend edge generator to the two kinds
+            of edges owned by every partition: (a) follower in the partition and
+            leader in or above it, (b) follower above the partition and leader in
+            it. The probability of drawing a leader from leader list 1 is
+            conditioned on the leader range. The friend quotas split the friend
+            edges by the probability of every partition to own a sampled edge
+            (self loops, which are rejected, excluded).
+        """
+
+        friend_edges_generator = self.friend_edges_generator
+        choose_leader_list_1_prob = friend_edges_generator.choose_leader_list_1_as_friend_prob
+        number_of_investors = friend_edges_generator.number_of_investors
+
+        follower_cumulative = get_cumulative_probabilities(friend_edges_generator.follower_sampler)
+        leader_1_cumulative = get_cumulative_probabilities(friend_edges_generator.leader_1_sampler)
+        leader_2_cumulative = get_cumulative_probabilities(friend_edges_generator.leader_2_sampler)
+
+        # probability of sampling a vertex as the follower and as the leader of the same edge
+        self_loop_cumulative = np.zeros((number_of_investors + 1,), dtype=np.float64)
+        np.cumsum(np.diff(follower_cumulative)\
+                    * (choose_leader_list_1_prob * np.diff(leader_1_cumulative) + (1 - choose_leader_list_1_prob) * np.diff(leader_2_cumulative)),\
+                  out=self_loop_cumulative[1:])
+
+        def get_mass(cumulative, first_vertex_ID, end_vertex_ID):
+            return float(cumulative[end_vertex_ID] - cumulative[first_vertex_ID])
+
+        def get_edge_samplers(first_follower_ID, end_follower_ID, first_leader_ID, end_leader_ID):
+            leader_1_mass = choose_leader_list_1_prob * get_mass(leader_1_cumulative, first_leader_ID, end_leader_ID)
+            leader_2_mass = (1 - choose_leader_list_1_prob) * get_mass(leader_2_cumulative, first_leader_ID, end_leader_ID)
+
+            return (RangeSampler(follower_cumulative, first_follower_ID, end_follower_ID),\
+                    RangeSampler(leader_1_cumulative, first_leader_ID, end_leader_ID),\
+                    RangeSampler(leader_2_cumulative, first_leader_ID, end_leader_ID),\
+                    leader_1_mass / (leader_1_mass + leader_2_mass) if leader_1_mass + leader_2_mass > 0 else choose_leader_list_1_prob),\
+                    get_mass(follower_cumulative, first_follower_ID, end_follower_ID) * (leader_1_mass + leader_2_mass)
+
+        # the samplers of both kinds of edges and the probability of the first kind, for every partition
+        self.friend_edge_samplers = []
+        self.first_kind_probabilities = np.zeros((self.number_of_partitions,), dtype=np.float64)
+        friend_edge_weights = np.zeros((self.number_of_partitions,), dtype=np.float64)
+
+        for partition_index in range(0, self.number_of_partitions):
+            first_vertex_ID = int(self.partition_boundaries[partition_index])
+            end_vertex_ID = int(self.partition_boundaries[partition_index + 1])
+
+            first_kind_samplers, first_kind_weight = get_edge_samplers(first_vertex_ID, end_vertex_ID, first_vertex_ID, number_of_investors)
+            first_kind_weight = max(0.0, first_kind_weight - get_mass(self_loop_cumulative, first_vertex_ID, end_vertex_ID))
+
+            if end_vertex_ID < number_of_investors:
+                second_kind_samplers, second_kind_weight = get_edge_samplers(end_vertex_ID, number_of_investors, first_vertex_ID, end_vertex_ID)
+            else:
+                second_kind_samplers, second_kind_weight = None, 0.0
+
+            self.friend_edge_samplers.append((first_kind_samplers, second_kind_samplers))
+            friend_edge_weights[partition_index] = first_kind_weight + second_kind_weight
+            self.first_kind_probabilities[partition_index] = first_kind_weight / friend_edge_weights[partition_index]\
+                if friend_edge_weights[partition_index] > 0 else 1.0
+
+        self.friend_quotas = split_quota(friend_edges_generator.number_of_friend_edges, friend_edge_weights)
+
+        # every partition must own enough pairs of vertices for its quota
+        partition_sizes = np.diff(self.partition_boundaries)
+        owned_pairs = partition_sizes * (partition_sizes - 1) // 2 + partition_sizes * (number_of_investors - self.partition_boundaries[1:])
+
+        assert np.all(self.friend_quotas <= owned_pairs),\
+            "PipelinedEdgeGenerator_ERROR: a partition owns fewer pairs of vertices than its friend edges, use fewer partitions"
+
+    def create_mirror_follower_samplers(self):
+        """
+        Description:
+            Restricts the follower sampler of the mirror edge generator to every
+            partition. The mirror quotas split the mirror edges by the follower
+            mass of every partition, weighted by the expected friend degrees.
+        """
+
+        friend_edges_generator = self.friend_edges_generator
+        choose_leader_list_1_prob = friend_edges_generator.choose_leader_list_1_as_friend_prob
+
+        follower_cumulative = get_cumulative_probabilities(self.mirror_edges_generator.follower_sampler)
+
+        expected_friend_degrees = friend_edges_generator.follower_sampler.get_probabilities()\
+                                    + choose_leader_list_1_prob * friend_edges_generator.leader_1_sampler.get_probabilities()\
+                                    + (1 - choose_leader_list_1_prob) * friend_edges_generator.leader_2_sampler.get_probabilities()
+
+        weighted_follower_probabilities = np.diff(follower_cumulative) * expected_friend_degrees
+        mirror_edge_weights = np.add.reduceat(weighted_follower_probabilities, self.partition_boundaries[:-1])
+
+        self.mirror_follower_samplers = [RangeSampler(follower_cumulative,\
+                                                        int(self.partition_boundaries[partition_index]),\
+                                                        int(self.partition_boundaries[partition_index + 1]))\
+                                            for partition_index in range(0, self.number_of_partitions)]
+
+        self.mirror_quotas = split_quota(self.mirror_edges_generator.number_of_mirror_edges, mirror_edge_weights)
+
+    def generate_friend_task(self, partition_index, batch_size, worker_counters):
+        """
+        Description:
+            Generates batch_size friend edges owned by the partition, updates the
+            adjacency list and saves them.
+        """
+
+        first_kind_samplers, second_kind_samplers = self.friend_edge_samplers[partition_index]
+        number_of_first_kind_edges = np.random.binomial(batch_size, self.first_kind_probabilities[partition_index])
+
+        batches = []
+        for edge_samplers, number_of_edges in [(first_kind_samplers, number_of_first_kind_edges),\
+                                               (second_kind_samplers, batch_size - number_of_first_kind_edges)]:
+            if number_of_edges > 0:
+                batches.append(self.friend_edges_generator.generate_edge_batch(number_of_edges, worker_counters, edge_samplers))
+
+        batch = np.concatenate(batches)
+        self.friend_edges_generator.update_adjacency_list(batch)
+        self.friend_edges_generator.save_batch(batch)
+
+        return len(batch)
+
+    def generate_mirror_task(self, follower_sampler, batch_size, worker_counters):
+        """
+        Description:
+            Generates at most batch_size mirror edges of the followers drawn by
+            follower_sampler (sampling a bounded number of followers), updates
+            the mirror degrees and saves them. Returns the number of edges.
+        """
+
+        batch = self.mirror_edges_generator.generate_mirror_batch(batch_size, worker_counters,\
+                                                                  follower_sampler=follower_sampler,\
+                                                                  max_follower_samples=MIRROR_FOLLOWER_SAMPLES_PER_EDGE * batch_size)
+
+        if len(batch) > 0:
+            self.mirror_edges_generator.update_mirror_degrees(batch)
+            self.mirror_edges_generator.save_batch(batch)
+
+        return len(batch)
+
+    def worker_job(self, worker_index=None):
+        """
+        Description:
+            Defines the work of a single worker of the executor: keeps taking the
+            tasks of the partition pipeline and generating their edges.
+        """
+
+        friend_worker_counters = self.friend_edges_generator.create_worker_counters()
+        mirror_worker_counters = self.mirror_edges_generator.create_worker_counters()
+
+        while True:
+            task = self.partition_pipeline.next_task()
+
+            if task is None:
+                return
+
+            kind, partition_index, batch_size = task
+
+            if kind == FRIEND_TASK:
+                number_of_generated_edges = self.generate_friend_task(partition_index, batch_size, friend_worker_counters)
+            else:
+                number_of_generated_edges = self.generate_mirror_task(self.mirror_follower_samplers[partition_index],\
+                                                                      batch_size,\
+                                                                      mirror_worker_counters)
+
+            self.partition_pipeline.task_done(task, number_of_generated_edges)
+
+    def has_unexamined_friend_pairs(self):
+        """
+        Description:
+            Returns True if a follower that can be sampled has a friend pair
+            that was not examined for a mirror edge yet.
+        """
+
+        friend_adjacency_dict = self.mirror_edges_generator.friend_adjacency_dict
+        mirror_adjacency_matrix = self.mirror_edges_generator.mirror_adjacency_matrix
+        follower_probabilities = self.mirror_edges_generator.follower_sampler.get_probabilities()
+
+        for follower_vertex_id in np.flatnonzero(follower_probabilities > 0).tolist():
+            if follower_vertex_id in friend_adjacency_dict:
+                if not np.all(mirror_adjacency_matrix[follower_vertex_id, friend_adjacency_dict[follower_vertex_id]]):
+                    return True
+
+        return False
+
+    def generate_carried_mirror_edges(self):
+        """
+        Description:
+            Generates the mirror edges that the exhausted partitions could not
+            pass on, sampling the followers of all partitions (which are all
+            finalized by then).
+        """
+
+        worker_counters = self.mirror_edges_generator.create_worker_counters()
+        carried_mirror_edges = self.partition_pipeline.carried_mirror_edges
+
+        while carried_mirror_edges > 0:
+            batch_size = min(self.mirror_edges_generator.lines_per_thread, carried_mirror_edges)
+            number_of_generated_edges = self.generate_mirror_task(None, batch_size, worker_counters)
+            carried_mirror_edges -= number_of_generated_edges
+
+            assert (number_of_generated_edges == batch_size) or self.has_unexamined_friend_pairs(),\
+                "PipelinedEdgeGenerator_ERROR: the followers ran out of friend pairs to mirror"
+
+        self.partition_pipeline.carried_mirror_edges = 0
+
+    def execute(self):
+        """
+        Description:
+            Executes the pipelined generation of the friend edges, the mirror
+            edges and the remove mirror edges, and returns the adjacency list of
+            the friend edges in the form of a python dictionary.
+        """
+
+        # reset the destination files (or the files of the output writers), if they exist
+        self.friend_edges_generator.reset_outputs()
+        self.mirror_edges_generator.reset_outputs()
+
+        # run the workers until all tasks are done (the first exception of a worker is raised again)
+        self.batch_executor.run(self.worker_job, cancel_function=self.partition_pipeline.cancel)
+        self.generate_carried_mirror_edges()
+
+        print("Friend Edge Generation Complete")
+        print("Mirror Edge Generation Complete")
+        print("Remove Mirror Edge Generation Complete")
+
+        return self.friend_edges_generator.get_friend_adjacency()
+
+
+# Returns the friend and mirror edge generators of the unit tests, sharing the adjacency list
+def create_test_generators(number_of_investors, number_of_friend_edges, number_of_mirror_edges, file_prefix):
+    friend_edges_generator = FriendEdgeGenerator(thread_number=4,\
+                 lines_per_thread=50,\
+                 destination_file=file_prefix + "_friend_edge_test.csv",\
+                 number_of_friend_edges=number_of_friend_edges,\
+                 follower_list=np.random.permutation(number_of_investors).tolist(),\
+                 leader_list_1=np.random.permutation(number_of_investors).tolist(),\
+                 leader_list_2=np.random.permutation(number_of_investors).tolist(),\
+                 choose_leader_list_1_as_friend_prob=0.5,\
+                 lock_list_element_cardinality=5)
+
+    mirror_edges_generator = MirrorEdgeGenerator(thread_number=4,\
+                 lines_per_thread=20,\
+                 mirror_destination_file=file_prefix + "_mirror_edge_test.csv",\
+                 remove_mirror_destination_file=file_prefix + "_remove_mirror_edge_test.csv",\
+                 follower_list=np.random.permutation(number_of_investors).tolist(),\
+                 number_of_friend_edges=number_of_friend_edges,\
+                 number_of_mirror_edges=number_of_mirror_edges,\
+                 friend_adjacency_dict=friend_edges_generator.friend_adjacency_dict,\
+                 lock_list_element_cardinality=5)
+
+    return friend_edges_generator, mirror_edges_generator
+
+# Unit tests to test if the quotas are split as expected
+def test_split_quota():
+    quotas = split_quota(10, [1.0, 1.0, 1.0])
+
+    assert quotas.sum() == 10 and sorted(quotas.tolist()) == [3, 3, 4],\
+        "PipelinedEdgeGenerator_QUOTA_ERROR quotas do not add up"
+
+    assert split_quota(7, [0.0, 2.0, 5.0]).tolist() == [0, 2, 5],\
+        "PipelinedEdgeGenerator_QUOTA_ERROR quotas are not proportional"
+
+# Unit tests to test if the partition pipeline finalizes the partitions in order and passes on mirror edges
+def test_partition_pipeline():
+    test_object = PartitionPipeline([3, 2, 0], [2, 0, 1], friend_batch_size=2, mirror_batch_size=2)
+
+    first_task = test_object.next_task()
+    second_task = test_object.next_task()
+
+    assert first_task == (FRIEND_TASK, 0, 2) and second_task == (FRIEND_TASK, 0, 1),\
+        "PartitionPipeline_TASK_ERROR friend tasks are not handed out in partition order"
+
+    test_object.task_done(first_task, 2)
+
+    assert test_object.number_of_finalized_partitions == 0,\
+        "PartitionPipeline_FINALIZE_ERROR partition finalized with a task in progress"
+
+    test_object.task_done(second_task, 1)
+
+    assert test_object.number_of_finalized_partitions == 1,\
+        "PartitionPipeline_FINALIZE_ERROR partition not finalized"
+
+    # the mirror tasks of the finalized partition come before the friend tasks of the others
+    mirror_task = test_object.next_task()
+
+    assert mirror_task == (MIRROR_TASK, 0, 2) and test_object.number_of_overlapped_mirror_tasks == 1,\
+        "PartitionPipeline_TASK_ERROR mirror task not handed out first"
+
+    # the partition runs out of friend pairs, its missing mirror edge goes to partition 1
+    test_object.task_done(mirror_task, 1)
+
+    assert test_object.exhausted_partitions[0] and test_object.remaining_mirror_edges.tolist() == [0, 1, 1],\
+        "PartitionPipeline_EXHAUSTED_ERROR missing mirror edges not passed on"
+
+    friend_task = test_object.next_task()
+    test_object.task_done(friend_task, 2)
+
+    assert friend_task == (FRIEND_TASK, 1, 2) and test_object.number_of_finalized_partitions == 3,\
+        "PartitionPipeline_FINALIZE_ERROR partitions without friend edges not finalized"
+
+    tasks = [test_object.next_task(), test_object.next_task()]
+
+    assert tasks == [(MIRROR_TASK, 1, 1), (MIRROR_TASK, 2, 1)] and not test_object.is_done(),\
+        "PartitionPipeline_TASK_ERROR mirror tasks of the finalized partitions not handed out"
+
+    test_object.task_done(tasks[0], 1)
+    test_object.task_done(tasks[1], 0)
+
+    assert test_object.carried_mirror_edges == 1 and test_object.next_task() is None,\
+        "PartitionPipeline_EXHAUSTED_ERROR missing mirror edges of the last partition not carried"
+
+# Unit test to check if the pipelined friend and mirror edges are generated as expected
+def test_pipelined_edge_generator():
+    for backend in ["inline", "threads"]:
+        friend_edges_generator, mirror_edges_generator = create_test_generators(300, 2000, 600, "pipelined")
+
+        test_object = PipelinedEdgeGenerator(friend_edges_generator, mirror_edges_generator,\
+                                             number_of_partitions=6, thread_number=4, backend=backend)
+
+        assert test_object.friend_quotas.sum() == 2000 and test_object.mirror_quotas.sum() == 600,\
+            "PipelinedEdgeGenerator_QUOTA_ERROR quotas do not add up"
+
+        adjacency_list = test_object.execute()
+
+        with open("pipelined_friend_edge_test.csv", mode='r') as in_file:
+            friend_edges = np.array([line.split("|") for line in in_file.read().splitlines()[2:]], dtype=np.int64)
+            in_file.close()
+
+        undirected_friend_edges = set(zip(friend_edges.min(axis=1).tolist(), friend_edges.max(axis=1).tolist()))
+
+        assert len(friend_edges) == 2000 and len(undirected_friend_edges) == 2000 and np.all(friend_edges[:, 0] != friend_edges[:, 1]),\
+            "PipelinedEdgeGenerator_FRIEND_ERROR friend edges are not distinct"
+
+        assert sum(len(friends) for friends in adjacency_list.values()) == 4000,\
+            "PipelinedEdgeGenerator_FRIEND_ERROR adjacency list not updated"
+
+        # every partition generated exactly its quota of owned edges
+        owner_partitions = np.searchsorted(test_object.partition_boundaries, friend_edges.min(axis=1), side='right') - 1
+        assert np.bincount(owner_partitions, minlength=6).tolist() == test_object.friend_quotas.tolist(),\
+            "PipelinedEdgeGenerator_FRIEND_ERROR partitions generated edges they do not own"
+
+        with open("pipelined_mirror_edge_test.csv", mode='r') as in_file:
+            mirror_edges = np.array([line.split("|") for line in in_file.read().splitlines()[2:]], dtype=np.int64) - 300
+            in_file.close()
+
+        undirected_mirror_edges = set(zip(mirror_edges.min(axis=1).tolist(), mirror_edges.max(axis=1).tolist()))
+
+        assert len(mirror_edges) == 600 and len(undirected_mirror_edges) == 600,\
+            "PipelinedEdgeGenerator_MIRROR_ERROR mirror edges are not distinct"
+
+        assert undirected_mirror_edges <= undirected_friend_edges,\
+            "PipelinedEdgeGenerator_MIRROR_ERROR mirror edge without friend edge"
+
+        assert mirror_edges_generator.get_statistics()["number_of_mirror_edges"] == 600,\
+            "PipelinedEdgeGenerator_STATISTICS_ERROR mirror edge count is invalid"
+
+        if backend == "inline":
+            assert test_object.partition_pipeline.number_of_overlapped_mirror_tasks > 0,\
+                "PipelinedEdgeGenerator_PIPELINE_ERROR mirror edges were not generated before the last friend edges"
+
+    print("Files named 'pipelined_friend_edge_test.csv' and 'pipelined_mirror_edge_test.csv' must have been created, check for issues")
+
+# Function to execute all defined unit tests for PipelinedEdgeGenerator
+def execute_all_unit_tests():
+    test_split_quota()
+    test_partition_pipeline()
+    test_pipelined_edge_generator()
@@ -0,0 +1,595 @@
+"""
+FYP : 22013
+
+Module:
+    Base Data Generator
+
+Description:
+    This python script contains the definition of the BatchScheduler and
+    BatchExecutor classes and their unit tests.
+
+    The BatchScheduler class hands out the batches of a range of item IDs
+    (vertex IDs, edge IDs or block indices) to the workers of a generator with
+    one of the following scheduling modes:
+
+        - dynamic: the workers share one cursor and take lines_per_thread items
+          at a time (the original behaviour of the generators)
+        - static: every worker owns a contiguous part of the range and only
+          generates its own part
+        - work_stealing: every worker owns a contiguous part of the range and
+          takes chunks that shrink as the remaining items decrease. A worker
+          whose part is finished takes the second half of the part with the most
+          remaining items
+
+    The BatchExecutor class runs a worker function on every worker with one of
+    the following backends:
+
+        - inline: a single worker takes all batches in ID order in the calling
+          thread (with the worker index None)
+        - threads: every worker runs in its own thread
+        - processes: every worker runs in its own forked process. The state of
+          the scheduler is kept in shared memory, but any other state of the
+          generator is copied, so this backend can only be used by generators
+          whose workers write their output themselves (e.g. the vertex
+          generators)
+
+    The first exception raised by a worker cancels the scheduler, so the other
+    workers get no more batches (the worker processes are terminated), and is
+    raised again by BatchExecutor.run() once all workers have stopped.
+
+"""
+
+
+# Imports from built-in modules
+import hashlib
+import math
+import multiprocessing as mp
+import numpy as np
+import os
+import pickle
+import queue
+import random
+import threading
+import time
+import traceback
+
+# Names of the scheduling modes and of the backends
+SCHEDULING_MODES = ["dynamic", "static", "work_stealing"]
+BACKENDS = ["inline", "threads", "processes"]
+
+# Number of seconds between two checks of the worker processes that exited without reporting
+PROCESS_POLL_INTERVAL = 0.1
+
+# Positions in the scheduler state of the cancellation flag, the number of assigned items
+# and the first range (every range is stored as its next item ID and its end)
+CANCELLED_INDEX = 0
+ASSIGNED_ITEMS_INDEX = 1
+FIRST_RANGE_INDEX = 2
+
+def get_block_seed(random_seed, stage_name, block_index):
+    """
+    Description:
+        Returns the seed of the random generators for the block of the stage.
+    """
+
+    block_key = str(random_seed) + ":" + stage_name + ":" + str(block_index)
+    return int(hashlib.sha256(block_key.encode()).hexdigest()[:8], 16)
+
+def get_block_random_generator(random_seed, stage_name, block_index):
+    """
+    Description:
+        Returns a new NumPy random generator seeded for the block of the stage.
+        Every block has its own generator object, so the blocks can be generated
+        concurrently without touching (or locking) the global random state.
+    """
+
+    return np.random.default_rng(get_block_seed(random_seed, stage_name, block_index))
+
+def get_random_generator(random_generator=None):
+    """
+    Description:
+        Returns the random generator if it is given, otherwise a new NumPy random
+        generator seeded from the global NumPy random generator (seeded by stage
+        for reproducible runs).
+    """
+
+    if random_generator is not None:
+        return random_generator
+
+    return np.random.default_rng(np.random.randint(0, 2 ** 31 - 1))
+
+class WorkerTraceback(Exception):
+    """
+    Description:
+        Set as the cause of an exception raised in a worker process, so that the
+        traceback of the worker is shown with the exception raised again.
+    """
+
+class BatchScheduler:
+
+    def __init__(self, first_id=0,\
+                 number_of_items=10,\
+                 batch_size=1000,\
+                 number_of_workers=1,\
+                 scheduling="dynamic",\
+                 min_batch_size=None,\
+                 shared=False):
+
+        assert scheduling in SCHEDULING_MODES,\
+            "BatchScheduler_ERROR: scheduling must be one of " + ", ".join(SCHEDULING_MODES)
+
+        assert batch_size > 0 and number_of_workers > 0,\
+            "BatchScheduler_ERROR: batch_size and number_of_workers must be positive"
+
+        # ID of the first item and number of items to schedule
+        self.first_id = first_id
+        self.number_of_items = number_of_items
+
+        # Largest number of items of a batch
+        self.batch_size = batch_size
+
+        # Number of workers taking batches
+        self.number_of_workers = number_of_workers
+
+        # Scheduling mode (one of SCHEDULING_MODES)
+        self.scheduling = scheduling
+
+        # Smallest number of items of a batch of the work stealing mode (but the last ones)
+        self.min_batch_size = max(1, min(batch_size, min_batch_size if min_batch_size is not None else batch_size // 8))
+
+        # The dynamic mode has one range shared by all workers, the others one range per worker
+        self.number_of_ranges = 1 if scheduling == "dynamic" else number_of_workers
+
+        # State of the scheduler as an int64 array: the cancellation flag, the number of
+        # assigned items, then the next item ID and the end of every range. With shared,
+        # it is kept in shared memory so forked worker processes share it
+        state_size = FIRST_RANGE_INDEX + 2 * self.number_of_ranges
+        self.state = np.frombuffer(mp.RawArray('q', state_size), dtype=np.int64) if shared else np.zeros((state_size,), dtype=np.int64)
+        self.lock = mp.Lock() if shared else threading.Lock()
+
+        boundaries = [first_id + (number_of_items * i) // self.number_of_ranges for i in range(0, self.number_of_ranges + 1)]
+        self.state[FIRST_RANGE_INDEX::2] = boundaries[:-1]
+        self.state[FIRST_RANGE_INDEX + 1::2] = boundaries[1:]
+
+    def get_remaining_items(self):
+        """
+        Description:
+            Returns the number of items not yet assigned of every range.
+        """
+
+        return self.state[FIRST_RANGE_INDEX + 1::2] - self.state[FIRST_RANGE_INDEX::2]
+
+    def get_range_index(self, worker_index):
+        """
+        Description:
+            Returns the range the worker takes its next batch from (stealing half
+            of the largest range in the work stealing mode), or -1 if there is
+            none. A worker_index of None stands for a consumer that is not one of
+            the workers (e.g. a single iteration), served from any range.
+        """
+
+        remaining_items = self.get_remaining_items()
+
+        if self.scheduling == "dynamic":
+            return 0 if remaining_items[0] > 0 else -1
+
+        if (worker_index is None) or (worker_index >= self.number_of_ranges):
+            non_empty_ranges = np.flatnonzero(remaining_items > 0)
+            return int(non_empty_ranges[0]) if len(non_empty_ranges) > 0 else -1
+
+        if remaining_items[worker_index] > 0:
+            return worker_index
+
+        if self.scheduling == "static":
+            return -1
+
+        victim_index = int(np.argmax(remaining_items))
+        if remaining_items[victim_index] <= 0:
+            return -1
+
+        # the worker takes the second half of the victim range (all of it if it is small)
+        victim_end = int(self.state[FIRST_RANGE_INDEX + 2 * victim_index + 1])
+        stolen_items = int(remaining_items[victim_index]) // 2 if remaining_items[victim_index] > self.min_batch_size else int(remaining_items[victim_index])
+
+        self.state[FIRST_RANGE_INDEX + 2 * victim_index + 1] = victim_end - stolen_items
+        self.state[FIRST_RANGE_INDEX + 2 * worker_index] = victim_end - stolen_items
+        self.state[FIRST_RANGE_INDEX + 2 * worker_index + 1] = victim_end
+
+        return worker_index
+
+    def get_next_batch_size(self, range_index):
+        """
+        Description:
+            Returns the number of items of the next batch of the range: at most
+            batch_size, and in the work stealing mode about 1 / (2 x number of
+            workers) of the items left in all ranges, but at least min_batch_size.
+        """
+
+        remaining_items = self.get_remaining_items()
+        batch_size = self.batch_size
+
+        if self.scheduling == "work_stealing":
+            guided_batch_size = math.ceil(int(remaining_items.sum()) / (2 * self.number_of_workers))
+            batch_size = max(self.min_batch_size, min(batch_size, guided_batch_size))
+
+        return min(batch_size, int(remaining_items[range_index]))
+
+    def next_batch(self, worker_index=None):
+        """
+        Description:
+            Workers call this function to get their next batch.
+
+        Returns:
+            - start ID for the batch and the number of items in the batch
+            - (-1, -1) if all batches have finished or the scheduler is cancelled
+        """
+
+        self.lock.acquire()
+
+        range_index = self.get_range_index(worker_index) if self.state[CANCELLED_INDEX] == 0 else -1
+        if range_index < 0:
+            self.lock.release()
+            return (-1, -1)
+
+        batch_size = self.get_next_batch_size(range_index)
+        start_id = int(self.state[FIRST_RANGE_INDEX + 2 * range_index])
+
+        self.state[FIRST_RANGE_INDEX + 2 * range_index] += batch_size
+        self.state[ASSIGNED_ITEMS_INDEX] += batch_size
+
+        self.lock.release()
+
+        return (start_id, batch_size)
+
+    def get_number_of_assigned_items(self):
+        """
+        Description:
+            Returns the number of items assigned to the workers so far.
+        """
+
+        return int(self.state[ASSIGNED_ITEMS_INDEX])
+
+    def cancel(self):
+        """
+        Description:
+            Cancels the scheduler: every later call of next_batch() returns (-1, -1).
+        """
+
+        self.lock.acquire()
+        self.state[CANCELLED_INDEX] = 1
+        self.lock.release()
+
+    def is_cancelled(self):
+        """
+        Description:
+            Returns True if the scheduler was cancelled.
+        """
+
+        return bool(self.state[CANCELLED_INDEX])
+
+class BatchExecutor:
+
+    def __init__(self, backend="threads",\
+                 scheduling="dynamic",\
+                 number_of_workers=5,\
+                 min_batch_size=None):
+
+        assert backend in BACKENDS,\
+            "BatchExecutor_ERROR: backend must be one of " + ", ".join(BACKENDS)
+
+        assert scheduling in SCHEDULING_MODES,\
+            "BatchExecutor_ERROR: scheduling must be one of " + ", ".join(SCHEDULING_MODES)
+
+        # Backend running the workers (one of BACKENDS)
+        self.backend = backend
+
+        # Scheduling mode of the schedulers created by the executor (one of SCHEDULING_MODES)
+        self.scheduling = scheduling
+
+        # Number of workers
+        self.number_of_workers = max(1, number_of_workers)
+
+        # Smallest batch size of the work stealing mode (batch_size / 8 if None)
+        self.min_batch_size = min_batch_size
+
+    def create_scheduler(self, first_id, number_of_items, batch_size):
+        """
+        Description:
+            Creates the scheduler of the items first_id to
+            (first_id + number_of_items - 1) for the workers of the executor.
+        """
+
+        return BatchScheduler(first_id=first_id,\
+                                number_of_items=number_of_items,\
+                                batch_size=batch_size,\
+                                number_of_workers=self.number_of_workers,\
+                                scheduling=self.scheduling,\
+                                min_batch_size=self.min_batch_size,\
+                                shared=(self.backend == "processes"))
+
+    def create_lock(self):
+        """
+        Description:
+            Creates a lock shared by the workers of the backend.
+        """
+
+        return mp.Lock() if self.backend == "processes" else threading.Lock()
+
+    def create_condition(self):
+        """
+        Description:
+            Creates a condition variable shared by the workers of the backend.
+        """
+
+        return mp.Condition() if self.backend == "processes" else threading.Condition()
+
+    def create_state(self, size):
+        """
+        Description:
+            Creates an int64 array of zeros shared by the workers of the backend
+            (kept in shared memory for the processes backend).
+        """
+
+        if self.backend == "processes":
+            return np.frombuffer(mp.RawArray('q', size), dtype=np.int64)
+
+        return np.zeros((size,), dtype=np.int64)
+
+    def cancel(self, scheduler, cancel_function):
+        """
+        Description:
+            Cancels the scheduler and calls cancel_function (if given), which
+            wakes up the workers waiting for something else than a batch.
+        """
+
+        if scheduler is not None:
+            scheduler.cancel()
+        if cancel_function is not None:
+            cancel_function()
+
+    def run(self, worker_function, scheduler=None, cancel_function=None):
+        """
+        Description:
+            Runs worker_function(worker_index) on every worker (or
+            worker_function(None) once with the inline backend) and waits until
+            all workers have finished. The worker function takes its batches from the
+            scheduler with its worker index. The first exception raised by a
+            worker is raised again once all workers have stopped.
+        """
+
+        if self.backend == "inline":
+            self.run_inline(worker_function, scheduler, cancel_function)
+        elif self.backend == "threads":
+            self.run_threads(worker_function, scheduler, cancel_function)
+        else:
+            self.run_processes(worker_function, scheduler, cancel_function)
+
+    def run_inline(self, worker_function, scheduler, cancel_function):
+        """
+        Description:
+            Runs a single worker in the calling thread. As its worker index is
+            None, it takes the batches of all ranges in ID order.
+        """
+
+        try:
+            worker_function(None)
+        except BaseException:
+            self.cancel(scheduler, cancel_function)
+            raise
+
+    def run_threads(self, worker_function, scheduler, cancel_function):
+        """
+        Description:
+            Runs every worker in its own thread. A worker raising an exception
+            cancels the scheduler, so the other threads stop after their current
+            batch.
+        """
+
+        # Exceptions raised by the workers, in the order they were raised
+        worker_exceptions = []
+        worker_exceptions_lock = threading.Lock()
+
+        def thread_job(worker_index):
+            try:
+                worker_function(worker_index)
+            except BaseException as exception:
+                worker_exceptions_lock.acquire()
+                worker_exceptions.append(exception)
+                worker_exceptions_lock.release()
+                self.cancel(scheduler, cancel_function)
+
+        worker_threads = [threading.Thread(target=thread_job, args=(worker_index,)) for worker_index in range(0, self.number_of_workers)]
+        for worker_thread in worker_threads:
+            worker_thread.start()
+        for worker_thread in worker_threads:
+            worker_thread.join()
+
+        if len(worker_exceptions) > 0:
+            raise worker_exceptions[0]
+
+    def run_processes(self, worker_function, scheduler, cancel_function):
+        """
+        Description:
+            Runs every worker in its own forked process. Every process seeds the
+            random generators from the parent ones and its worker index, and
+            reports whether it finished or the exception it raised. The other
+            processes are terminated after the first exception.
+        """
+
+        context = mp.get_context("fork")
+        result_queue = context.Queue()
+        base_seed = int(np.random.randint(0, 2 ** 31 - 1))
+
+        def process_job(worker_index):
+            np.random.seed([base_seed, worker_index])
+            random.seed(base_seed * self.number_of_workers + worker_index)
+
+            try:
+                worker_function(worker_index)
+                result_queue.put((worker_index, None, None))
+            except BaseException as exception:
+                if scheduler is not None:
+                    scheduler.cancel()
+                try:
+                    pickled_exception = pickle.dumps(exception)
+                except Exception:
+                    pickled_exception = pickle.dumps(RuntimeError(repr(exception)))
+                result_queue.put((worker_index, pickled_exception, traceback.format_exc()))
+
+            result_queue.close()
+            result_queue.join_thread()
+
+        worker_processes = [context.Process(target=process_job, args=(worker_index,)) for worker_index in range(0, self.number_of_workers)]
+        for worker_process in worker_processes:
+            worker_process.start()
+
+        running_workers = set(range(0, self.number_of_workers))
+        worker_exception = None
+
+        while len(running_workers) > 0 and worker_exception is None:
+            try:
+                worker_index, pickled_exception, worker_traceback = result_queue.get(timeout=PROCESS_POLL_INTERVAL)
+            except queue.Empty:
+                # a process killed before reporting (e.g. out of memory) is an error as well
+                for worker_index in list(running_workers):
+                    exit_code = worker_processes[worker_index].exitcode
+                    if exit_code is not None and exit_code != 0:
+                        worker_exception = RuntimeError("BatchExecutor_ERROR: worker process " + str(worker_index) + " exited with code " + str(exit_code))
+                continue
+
+            running_workers.discard(worker_index)
+            if pickled_exception is not None:
+                worker_exception = pickle.loads(pickled_exception)
+                worker_exception.__cause__ = WorkerTraceback(worker_traceback)
+
+        if worker_exception is not None:
+            self.cancel(scheduler, cancel_function)
+            for worker_index in running_workers:
+                worker_processes[worker_index].terminate()
+
+        for worker_process in worker_processes:
+            worker_process.join()
+
+        result_queue.close()
+
+        if worker_exception is not None:
+            raise worker_exception
+
+
+# Function taking all batches of a worker, used by the unit tests
+def take_worker_batches(scheduler, worker_index, worker_batches):
+    while True:
+        start_id, batch_size = scheduler.next_batch(worker_index)
+        if start_id < 0:
+            return
+        worker_batches.append((worker_index, start_id, batch_size))
+
+# Unit tests to test if every scheduling mode hands out every item exactly once
+def test_batch_scheduler():
+    for scheduling in SCHEDULING_MODES:
+        test_object = BatchScheduler(first_id=7, number_of_items=1000, batch_size=64,\
+                                        number_of_workers=4, scheduling=scheduling, min_batch_size=4)
+        worker_batches = []
+
+        # the workers take their batches in turns, worker 3 stops early
+        for i in range(0, 10):
+            for worker_index in range(0, 3 + (i < 2)):
+                start_id, batch_size = test_object.next_batch(worker_index)
+                if start_id >= 0:
+                    worker_batches.append((worker_index, start_id, batch_size))
+        for worker_index in range(0, 4):
+            take_worker_batches(test_object, worker_index, worker_batches)
+
+        item_ids = sorted(item_id for worker_index, start_id, batch_size in worker_batches for item_id in range(start_id, start_id + batch_size))
+        assert item_ids == list(range(7, 1007)),\
+            "BatchScheduler_SCHEDULE_ERROR " + scheduling + " items are not handed out exactly once"
+
+        assert max(batch_size for worker_index, start_id, batch_size in worker_batches) <= 64,\
+            "BatchScheduler_SCHEDULE_ERROR " + scheduling + " batches are too large"
+
+        assert test_object.get_number_of_assigned_items() == 1000 and test_object.next_batch() == (-1, -1),\
+            "BatchScheduler_SCHEDULE_ERROR " + scheduling + " assigned items are invalid"
+
+        if scheduling == "static":
+            assert all(7 + 250 * worker_index <= start_id < 7 + 250 * (worker_index + 1) for worker_index, start_id, batch_size in worker_batches),\
+                "BatchScheduler_SCHEDULE_ERROR static batches are not in the worker ranges"
+
+        if scheduling == "work_stealing":
+            # the batches shrink with the remaining items, and worker 0 stole from the unfinished worker 3
+            assert min(batch_size for worker_index, start_id, batch_size in worker_batches) < 64,\
+                "BatchScheduler_SCHEDULE_ERROR work stealing batches are not adaptive"
+
+            assert any(worker_index == 0 and start_id >= 7 + 750 for worker_index, start_id, batch_size in worker_batches),\
+                "BatchScheduler_SCHEDULE_ERROR work stealing workers do not steal"
+
+    test_object = BatchScheduler(first_id=0, number_of_items=100, batch_size=10)
+    test_object.next_batch()
+    test_object.cancel()
+
+    assert test_object.is_cancelled() and test_object.next_batch() == (-1, -1),\
+        "BatchScheduler_CANCEL_ERROR cancelled scheduler still hands out batches"
+
+# Function of the workers of test_batch_executor(): the items of every batch are written
+# as lines to the file, a batch containing the item ID 500 raises an exception
+def write_batches_job(scheduler, file_name, worker_index):
+    while True:
+        start_id, batch_size = scheduler.next_batch(worker_index)
+        if start_id < 0:
+            return
+
+        if start_id <= 500 < start_id + batch_size:
+            raise ValueError("item 500")
+
+        with open(file_name, mode='a') as out_file:
+            out_file.write("".join(str(item_id) + "\n" for item_id in range(start_id, start_id + batch_size)))
+            out_file.close()
+
+        time.sleep(0.001)
+
+# Unit tests to test if every backend runs the workers and propagates their exceptions
+def test_batch_executor():
+    for backend in BACKENDS:
+        for scheduling in SCHEDULING_MODES:
+            test_object = BatchExecutor(backend=backend, scheduling=scheduling, number_of_workers=3)
+
+            # with 400 items, every item is written once
+            with open("batch_executor_test.txt", mode='w') as out_file:
+                out_file.close()
+
+            scheduler = test_object.create_scheduler(0, 400, 16)
+            test_object.run(lambda worker_index: write_batches_job(scheduler, "batch_executor_test.txt", worker_index), scheduler)
+
+            with open("batch_executor_test.txt", mode='r') as in_file:
+                item_ids = sorted(int(line) for line in in_file.read().splitlines())
+                in_file.close()
+
+            assert item_ids == list(range(0, 400)),\
+                "BatchExecutor_RUN_ERROR " + backend + " " + scheduling + " items are not generated exactly once"
+
+            # with 100000 items, the worker getting the item 500 raises and the others are cancelled
+            cancelled_workers = []
+            scheduler = test_object.create_scheduler(0, 100000, 16)
+
+            raised_exception = None
+            try:
+                test_object.run(lambda worker_index: write_batches_job(scheduler, "batch_executor_test.txt", worker_index),\
+                                scheduler,\
+                                cancel_function=lambda: cancelled_workers.append(True))
+            except ValueError as exception:
+                raised_exception = exception
+
+            assert raised_exception is not None and str(raised_exception) == "item 500",\
+                "BatchExecutor_ERROR_PROPAGATION_ERROR " + backend + " " + scheduling + " worker exception is not raised"
+
+            assert scheduler.is_cancelled() and len(cancelled_workers) > 0,\
+                "BatchExecutor_ERROR_PROPAGATION_ERROR " + backend + " " + scheduling + " workers are not cancelled"
+
+            assert scheduler.get_number_of_assigned_items() < 100000,\
+                "BatchExecutor_ERROR_PROPAGATION_ERROR " + backend + " " + scheduling + " workers kept running after the exception"
+
+    os.remove("batch_executor_test.txt")
+
+# Function to execute all defined unit tests for BatchScheduler and BatchExecutor
+def execute_all_unit_tests():
+    test_batch_scheduler()
+    test_batch_executor()
@@ -0,0 +1,287 @@
+"""
+FYP : 22013
+
+Module:
+    Base Data Generator
+
+Description:
+    This python script contains the definition of the ExternalSorter class and
+    its unit tests.
+
+    The ExternalSorter class sorts and deduplicates more 64 bit keys than fit in
+    memory. Added keys are buffered until half the memory budget is used, then
+    the buffer is sorted, deduplicated and spilled as a sorted run (a raw uint64
+    file) to a temporary directory. merge() k-way merges the runs into a single
+    sorted run without duplicates, reading every run one block at a time, so the
+    memory used never depends on the number of keys. With ignored_low_bits, keys
+    only differing in their lowest bits (e.g. a flag packed with the key) are
+    duplicates, and only one of them is kept.
+
+    The temporary files are removed by close(), or when the object is garbage
+    collected.
+
+"""
+
+
+# Imports from built-in modules
+import numpy as np
+import os
+import shutil
+import tempfile
+import weakref
+
+# Largest number of runs merged at the same time, more runs are merged in several passes
+MAX_MERGE_FAN_IN = 64
+
+# Largest key, used as the merge bound once every run has been read completely
+MAX_KEY = np.uint64(2 ** 64 - 1)
+
+class ExternalSorter:
+
+    def __init__(self, memory_budget=64 * 1024 * 1024, temporary_directory=None, ignored_low_bits=0):
+
+        # Number of bytes the buffered keys and the merge blocks may use
+        self.memory_budget = memory_budget
+
+        # Keys buffered in memory before being spilled as a sorted run
+        self.buffered_keys = []
+        self.number_of_buffered_keys = 0
+
+        # Number of keys buffered before the buffer is spilled (the sort needs a copy)
+        self.spill_threshold = max(1, memory_budget // (2 * 8))
+
+        # Keys are duplicates if they are equal after dropping their ignored_low_bits lowest bits
+        self.ignored_low_bits = np.uint64(ignored_low_bits)
+
+        # Directory storing the runs, removed by close() (or when the object is collected)
+        self.temporary_directory = tempfile.mkdtemp(prefix="bdg_external_sort_", dir=temporary_directory)
+        self.finalizer = weakref.finalize(self, shutil.rmtree, self.temporary_directory, True)
+
+        # Sorted runs spilled so far, as (file path, number of keys)
+        self.runs = []
+
+        # Number of run files created so far, used to name them
+        self.number_of_run_files = 0
+
+    def get_new_run_path(self):
+        """
+        Description:
+            Returns the path of a new run file in the temporary directory.
+        """
+
+        self.number_of_run_files += 1
+        return os.path.join(self.temporary_directory, "run_" + str(self.number_of_run_files) + ".u64")
+
+    def get_unique_keys(self, sorted_keys, last_key=None):
+        """
+        Description:
+            Returns the sorted keys without duplicates (keeping the first key of
+            every group of duplicates) and without the keys that are duplicates of
+            last_key.
+        """
+
+        compared_keys = sorted_keys >> self.ignored_low_bits
+
+        is_unique = np.ones((len(sorted_keys),), dtype=np.bool_)
+        is_unique[1:] = compared_keys[1:] != compared_keys[:-1]
+        if last_key is not None:
+            is_unique &= compared_keys > (last_key >> self.ignored_low_bits)
+
+        return sorted_keys[is_unique]
+
+    def add(self, keys):
+        """
+        Description:
+            Adds the keys (any iterable of non-negative integers below 2^64),
+            spilling a sorted run once the buffer is full.
+        """
+
+        keys = np.asarray(keys, dtype=np.uint64)
+        if len(keys) == 0:
+            return
+
+        self.buffered_keys.append(keys)
+        self.number_of_buffered_keys += len(keys)
+
+        if self.number_of_buffered_keys >= self.spill_threshold:
+            self.spill()
+
+    def spill(self):
+        """
+        Description:
+            Sorts and deduplicates the buffered keys and writes them as a new run.
+        """
+
+        if self.number_of_buffered_keys == 0:
+            return
+
+        sorted_keys = np.concatenate(self.buffered_keys)
+        self.buffered_keys = []
+        self.number_of_buffered_keys = 0
+
+        sorted_keys.sort()
+        sorted_keys = self.get_unique_keys(sorted_keys)
+
+        run_path = self.get_new_run_path()
+        with open(run_path, mode='wb') as run_file:
+            sorted_keys.tofile(run_file)
+            run_file.close()
+
+        self.runs.append((run_path, len(sorted_keys)))
+
+    def iter_merged_runs(self, runs):
+        """
+        Description:
+            Generator yielding the sorted keys of the runs without duplicates, in
+            chunks. Every run is read one block at a time: each step merges the
+            keys up to the smallest last key of the blocks of the runs not read
+            completely, which are all the keys that can be merged so far.
+        """
+
+        block_size = max(1, (self.memory_budget // 2) // (8 * len(runs)))
+        run_files = [open(run_path, mode='rb') for run_path, number_of_keys in runs]
+        keys_left = [number_of_keys for run_path, number_of_keys in runs]
+        blocks = [np.zeros((0,), dtype=np.uint64) for run in runs]
+        last_key = None
+
+        while True:
+            for i in range(0, len(runs)):
+                if (len(blocks[i]) == 0) and (keys_left[i] > 0):
+                    blocks[i] = np.fromfile(run_files[i], dtype=np.uint64, count=min(block_size, keys_left[i]))
+                    keys_left[i] -= len(blocks[i])
+
+            if all(len(block) == 0 for block in blocks):
+                break
+
+            bounds = [block[-1] for block, left in zip(blocks, keys_left) if (len(block) > 0) and (left > 0)]
+            bound = min(bounds) if bounds else MAX_KEY
+
+            merged_parts = []
+            for i in range(0, len(runs)):
+                number_of_merged_keys = int(np.searchsorted(blocks[i], bound, side='right'))
+                merged_parts.append(blocks[i][:number_of_merged_keys])
+                blocks[i] = blocks[i][number_of_merged_keys:]
+
+            merged_keys = np.concatenate(merged_parts)
+            merged_keys.sort()
+            merged_keys = self.get_unique_keys(merged_keys, last_key)
+
+            if len(merged_keys) > 0:
+                last_key = merged_keys[-1]
+                yield merged_keys
+
+        for run_file in run_files:
+            run_file.close()
+
+    def merge_runs(self, runs):
+        """
+        Description:
+            Merges the runs into a single new run and removes their files.
+        """
+
+        run_path = self.get_new_run_path()
+        number_of_keys = 0
+
+        with open(run_path, mode='wb') as run_file:
+            for merged_keys in self.iter_merged_runs(runs):
+                merged_keys.tofile(run_file)
+                number_of_keys += len(merged_keys)
+            run_file.close()
+
+        for old_run_path, old_number_of_keys in runs:
+            os.remove(old_run_path)
+
+        return (run_path, number_of_keys)
+
+    def merge(self):
+        """
+        Description:
+            Spills the buffer and merges all runs into a single sorted run without
+            duplicates (in several passes if there are more than MAX_MERGE_FAN_IN
+            runs). Returns the number of unique keys. Keys can still be added
+            afterwards and are deduplicated against the merged run by the next
+            merge().
+        """
+
+        self.spill()
+
+        while len(self.runs) > 1:
+            merged_run = self.merge_runs(self.runs[:MAX_MERGE_FAN_IN])
+            self.runs = self.runs[MAX_MERGE_FAN_IN:] + [merged_run,]
+
+        return len(self)
+
+    def iter_sorted_keys(self, chunk_size=65536):
+        """
+        Description:
+            Generator yielding all the unique keys in ascending order, in chunks
+            of at most chunk_size keys.
+        """
+
+        self.merge()
+
+        for run_path, number_of_keys in self.runs:
+            with open(run_path, mode='rb') as run_file:
+                for start in range(0, number_of_keys, chunk_size):
+                    yield np.fromfile(run_file, dtype=np.uint64, count=min(chunk_size, number_of_keys - start))
+                run_file.close()
+
+    def __len__(self):
+        # Exact once merge() has been called, an upper bound otherwise
+        return sum(number_of_keys for run_path, number_of_keys in self.runs) + self.number_of_buffered_keys
+
+    def close(self):
+        """
+        Description:
+            Removes the temporary directory with all the runs.
+        """
+
+        self.finalizer()
+        self.runs = []
+
+
+# Unit tests to test if the keys are sorted and deduplicated across spilled runs
+def test_external_sorter():
+    # a budget of 32 keys spills every 2 additions of 10 keys
+    test_object = ExternalSorter(memory_budget=32 * 8)
+
+    all_keys = np.random.randint(0, 300, size=(2000,)).astype(np.uint64)
+    for start in range(0, len(all_keys), 10):
+        test_object.add(all_keys[start:start + 10])
+
+    assert len(test_object.runs) > MAX_MERGE_FAN_IN,\
+        "ExternalSorter_SPILL_ERROR keys are not spilled"
+
+    assert test_object.merge() == len(np.unique(all_keys)) and len(test_object.runs) == 1,\
+        "ExternalSorter_MERGE_ERROR number of unique keys is invalid"
+
+    # keys added after a merge are deduplicated against the merged run
+    test_object.add(np.array([0, 1000, 299, 1000], dtype=np.uint64))
+    sorted_keys = np.concatenate(list(test_object.iter_sorted_keys(chunk_size=7)))
+
+    assert sorted_keys.tolist() == np.unique(np.concatenate((all_keys, [0, 1000, 299]))).tolist(),\
+        "ExternalSorter_MERGE_ERROR sorted keys are invalid"
+
+    temporary_directory = test_object.temporary_directory
+    test_object.close()
+    assert not os.path.exists(temporary_directory),\
+        "ExternalSorter_CLOSE_ERROR temporary files are not removed"
+
+# Unit tests to test if keys differing only in their ignored bits are duplicates
+def test_ignored_low_bits():
+    test_object = ExternalSorter(memory_budget=4 * 8, ignored_low_bits=1)
+
+    for keys in [[4, 7], [5, 9, 2], [6, 3], [8, 10]]:
+        test_object.add(np.array(keys, dtype=np.uint64))
+
+    sorted_keys = np.concatenate(list(test_object.iter_sorted_keys(chunk_size=2)))
+
+    assert (sorted_keys >> np.uint64(1)).tolist() == [1, 2, 3, 4, 5],\
+        "ExternalSorter_MERGE_ERROR keys with equal high bits are not deduplicated"
+
+    test_object.close()
+
+# Function to execute all defined unit tests for ExternalSorter
+def execute_all_unit_tests():
+    test_external_sorter()
+    test_ignored_low_bits()
@@ -0,0 +1,154 @@
+"""
+FYP : 22013
+
+Module:
+    Base Data Generator
+
+Description:
+    This python script contains the definition of the WorkerCounters class, the
+    functions summarizing the generated graph and their unit tests.
+
+    The edge generators keep one WorkerCounters object per worker (thread
+    iterating over the batches), so the workers update their counters without
+    locking. The counters of all workers are merged at the end and summarized
+    together with the degree arrays of the generators (degree histograms, max
+    degree and hub lists) into a JSON file, so the dataset is characterized
+    without reading the generated files again.
+
+"""
+
+
+# Imports from built-in modules
+import json
+import numpy as np
+
+class WorkerCounters:
+
+    def __init__(self, counter_names):
+
+        # Value of every counter, by name
+        self.counters = {counter_name: 0 for counter_name in counter_names}
+
+    def add(self, counter_name, value=1):
+        """
+        Description:
+            Adds the value to the counter.
+        """
+
+        self.counters[counter_name] += value
+
+    def merge(self, other):
+        """
+        Description:
+            Adds the counters of another worker to these counters.
+        """
+
+        for counter_name, value in other.counters.items():
+            self.counters[counter_name] = self.counters.get(counter_name, 0) + value
+
+    def __getitem__(self, counter_name):
+        return self.counters[counter_name]
+
+    @classmethod
+    def merge_all(cls, counter_names, worker_counters_list):
+        """
+        Description:
+            Returns the merged counters of all workers.
+        """
+
+        merged_counters = cls(counter_names)
+        for worker_counters in worker_counters_list:
+            merged_counters.merge(worker_counters)
+        return merged_counters
+
+def get_ratio(numerator, denominator):
+    """
+    Description:
+        Returns numerator / denominator, or None if the denominator is 0.
+    """
+
+    return (numerator / denominator) if denominator > 0 else None
+
+def get_degree_statistics(degrees, number_of_hubs=10, id_offset=0):
+    """
+    Description:
+        Summarizes the degree of every vertex: mean and max degree, the exact
+        degree histogram (degree -> number of vertices, only the degrees that
+        occur), a histogram with power of 2 bins (bin i counts the degrees in
+        [2^(i-1), 2^i), bin 0 the degree 0) and the number_of_hubs vertices with
+        the largest degrees. Vertex i has the ID (id_offset + i).
+    """
+
+    degrees = np.asarray(degrees, dtype=np.int64)
+
+    degree_counts = np.bincount(degrees) if len(degrees) > 0 else np.zeros((1,), dtype=np.int64)
+    occurring_degrees = np.flatnonzero(degree_counts)
+
+    log2_bins = np.zeros(degrees.shape, dtype=np.int64)
+    log2_bins[degrees > 0] = np.floor(np.log2(degrees[degrees > 0])).astype(np.int64) + 1
+
+    number_of_hubs = min(number_of_hubs, len(degrees))
+    hub_indices = np.argpartition(-degrees, number_of_hubs - 1)[:number_of_hubs] if number_of_hubs > 0 else np.zeros((0,), dtype=np.int64)
+    hub_indices = hub_indices[np.lexsort((hub_indices, -degrees[hub_indices]))]
+
+    return {"number_of_vertices": int(len(degrees)),\
+            "number_of_vertices_without_edges": int(degree_counts[0]) if len(degrees) > 0 else 0,\
+            "mean_degree": float(degrees.mean()) if len(degrees) > 0 else 0.0,\
+            "max_degree": int(degrees.max(initial=0)),\
+            "degree_histogram": {str(degree): int(degree_counts[degree]) for degree in occurring_degrees.tolist()},\
+            "log2_degree_histogram": np.bincount(log2_bins).tolist() if len(degrees) > 0 else [],\
+            "hubs": [{"vertex_id": int(id_offset + index), "degree": int(degrees[index])} for index in hub_indices.tolist()]}
+
+def save_statistics(statistics, statistics_file):
+    """
+    Description:
+        Writes the statistics (a dictionary) to the JSON file.
+    """
+
+    with open(statistics_file, mode='w') as out_file:
+        json.dump(statistics, out_file, indent=2)
+        out_file.close()
+
+
+# Unit tests to test if the counters of the workers are merged
+def test_worker_counters():
+    worker_counters_list = [WorkerCounters(["edges", "rejected"]) for i in range(0, 3)]
+    for i, worker_counters in enumerate(worker_counters_list):
+        worker_counters.add("edges", i + 1)
+        worker_counters.add("rejected")
+
+    merged_counters = WorkerCounters.merge_all(["edges", "rejected"], worker_counters_list)
+
+    assert merged_counters["edges"] == 6 and merged_counters["rejected"] == 3,\
+        "WorkerCounters_MERGE_ERROR merged counters are invalid"
+
+    assert get_ratio(1, 4) == 0.25 and get_ratio(1, 0) is None,\
+        "GraphStatistics_RATIO_ERROR ratio is invalid"
+
+# Unit tests to test if the degree statistics are computed correctly
+def test_get_degree_statistics():
+    statistics = get_degree_statistics(np.array([0, 3, 1, 0, 8, 3]), number_of_hubs=2, id_offset=100)
+
+    assert statistics["max_degree"] == 8 and statistics["number_of_vertices_without_edges"] == 2,\
+        "GraphStatistics_DEGREE_ERROR max degree or isolated vertices are invalid"
+
+    assert statistics["degree_histogram"] == {"0": 2, "1": 1, "3": 2, "8": 1},\
+        "GraphStatistics_DEGREE_ERROR degree histogram is invalid"
+
+    assert statistics["log2_degree_histogram"] == [2, 1, 2, 0, 1],\
+        "GraphStatistics_DEGREE_ERROR log2 degree histogram is invalid"
+
+    assert statistics["hubs"] == [{"vertex_id": 104, "degree": 8}, {"vertex_id": 101, "degree": 3}],\
+        "GraphStatistics_DEGREE_ERROR hubs are invalid"
+
+    save_statistics({"friend_edges": statistics}, "graph_statistics_test.json")
+
+    with open("graph_statistics_test.json", mode='r') as in_file:
+        assert json.load(in_file)["friend_edges"] == statistics,\
+            "GraphStatistics_SAVE_ERROR saved statistics are invalid"
+        in_file.close()
+
+# Function to execute all defined unit tests for the graph statistics
+def execute_all_unit_tests():
+    test_worker_counters()
+    test_get_degree_statistics()
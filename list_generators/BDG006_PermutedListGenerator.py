@@ -10,7 +10,10 @@ Description:
 
     The PermutedListGenerator class generates the list of permutation of sequence
     of numbers (IDs for vertices). It also exposes methods to store the lists in
-    files as well.
+    files as well and to consume the lists in memory as record batches.
+
+    The lists are NumPy arrays of the smallest integer type that can store the
+    IDs (int32 or int64), instead of python lists of integer objects.
 
 """
 
@@ -18,6 +21,33 @@ Description:
 # Imports from built-in modules
 import numpy as np
 
+# Imports from Base Data Generator Module
+from data_sinks.BDG010_RecordBatch import format_record_batch, make_record_batch
+
+def get_id_dtype(largest_id):
+    """
+    Description:
+        Returns the smallest integer dtype (int32 or int64) that can store all
+        IDs up to largest_id.
+    """
+
+    return np.dtype(np.int32) if largest_id <= np.iinfo(np.int32).max else np.dtype(np.int64)
+
+def to_id_array(id_list):
+    """
+    Description:
+        Returns the list of IDs as a NumPy array. NumPy arrays are returned as
+        they are (without copying), python lists are converted to an array of
+        the smallest integer dtype that can store their IDs.
+    """
+
+    if isinstance(id_list, np.ndarray):
+        return id_list
+
+    id_array = np.asarray(id_list, dtype=np.int64)
+    largest_id = int(id_array.max()) if len(id_array) > 0 else 0
+    return id_array.astype(get_id_dtype(largest_id))
+
 class PermutedListGenerator:
 
     def __init__(self,\
@@ -33,11 +63,55 @@ class PermutedListGenerator:
     def generate_permutation(self):
         """
         Description:
-            Generates the permutation for the sequential IDs in the form of a list.
+            Generates the permutation for the sequential IDs in the form of a
+            NumPy array of the smallest integer dtype that can store the IDs.
+            The IDs are shuffled in place, so no temporary int64 copy is made.
+        """
+
+        permuted_list = np.arange(self.start_id,\
+                                    self.start_id + self.item_cardinality,\
+                                    dtype=get_id_dtype(self.start_id + self.item_cardinality - 1))
+        np.random.shuffle(permuted_list)
+        return permuted_list
+
+    def get_header_fields(self):
+        """
+        Description:
+            Returns the field names of the generated record batches.
+        """
+
+        return ["VertexID",]
+
+    def iter_permuted_list_batches(self, permuted_list, batch_size=100000):
+        """
+        Description:
+            Generator that yields the permuted list as record batches of at most
+            batch_size IDs each.
+        """
+
+        for start_index in range(0, len(permuted_list), batch_size):
+            yield make_record_batch(self.get_header_fields(),\
+                                    [permuted_list[start_index:start_index + batch_size]])
+
+    def iter_batches(self, batch_size=100000):
+        """
+        Description:
+            Generates a new permutation for the sequential IDs and yields it as
+            record batches of at most batch_size IDs each.
+        """
+
+        return self.iter_permuted_list_batches(self.generate_permutation(), batch_size)
+
+    def reset_destination_file(self, list_type, destination_file):
+        """
+        Description:
+            Creates (or resets) the destination file with list_type as its
+            first line.
         """
 
-        permuted_list = np.random.permutation(self.item_cardinality) + self.start_id
-        return permuted_list.tolist()
+        with open(destination_file, mode='w') as out_file:
+            out_file.write(list_type + "\n")
+            out_file.close()
 
     def generate_and_save_permuted_list(self, list_type, destination_file):
         """
@@ -47,14 +121,12 @@ class PermutedListGenerator:
             the function after first printing the string in list_type.
         """
 
-        lines = list_type + "\n"
         permuted_list = self.generate_permutation()
 
-        for i in permuted_list:
-            lines += str(i) + "\n"
-
-        with open(destination_file, mode='w') as out_file:
-            out_file.write(lines)
+        self.reset_destination_file(list_type, destination_file)
+        with open(destination_file, mode='a') as out_file:
+            for batch in self.iter_permuted_list_batches(permuted_list):
+                out_file.write(format_record_batch(batch))
             out_file.close()
 
         return permuted_list
@@ -88,7 +160,40 @@ def test_list_generate_and_save():
     print("A file named 'test_list.txt' must have been created, check for issues")
     print("The file should contain permutation of 11 to 20 (inclusive)")
 
+# Unit tests to test if PermutedListGenerator uses compact integer arrays
+def test_compact_permuted_list():
+    gen_object = PermutedListGenerator(25, 100)
+    test_list = gen_object.generate_permutation()
+
+    assert test_list.dtype == np.int32 and test_list.nbytes == 400,\
+        "PermutedListGenerator_DTYPE_ERROR list is not stored as int32"
+
+    gen_object = PermutedListGenerator(np.iinfo(np.int32).max - 5, 10)
+    test_list = gen_object.generate_permutation()
+
+    assert test_list.dtype == np.int64,\
+        "PermutedListGenerator_DTYPE_ERROR large IDs are not stored as int64"
+
+    assert sorted(test_list.tolist()) == list(range(np.iinfo(np.int32).max - 5, np.iinfo(np.int32).max + 5)),\
+        "PermutedListGenerator_DTYPE_ERROR large IDs are invalid"
+
+    assert to_id_array([3, 1, 2]).dtype == np.int32 and to_id_array(test_list) is test_list,\
+        "PermutedListGenerator_DTYPE_ERROR list conversion is invalid"
+
+# Unit tests to test if PermutedListGenerator yields the list as record batches
+def test_iter_batches():
+    gen_object = PermutedListGenerator(25, 100)
+    batches = list(gen_object.iter_batches(batch_size=30))
+
+    assert [len(batch) for batch in batches] == [30, 30, 30, 10],\
+        "PermutedListGenerator_ITER_BATCHES_ERROR batch sizes are wrong"
+
+    assert sorted(np.concatenate(batches)["VertexID"].tolist()) == list(range(25, 125)),\
+        "PermutedListGenerator_ITER_BATCHES_ERROR list is not a permutation"
+
 # Function to execute all defined unit tests for PermutedListGenerator
 def execute_all_unit_tests():
     test_permutated_list_generator()
     test_list_generate_and_save()
+    test_compact_permuted_list()
+    test_iter_batches()
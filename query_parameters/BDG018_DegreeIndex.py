@@ -0,0 +1,258 @@
+"""
+FYP : 22013
+
+Module:
+    Base Data Generator
+
+Description:
+    This python script contains the definition of the DegreeIndex class and its
+    unit tests.
+
+    The DegreeIndex class stores the friend degree and the mirror degree of
+    every investor, and parameter pools for the query drivers: for each degree
+    kind, the investors are grouped into buckets cut at the degree quantiles
+    (e.g. the investors up to the median degree, up to the 90th percentile, up
+    to the 99th percentile and the hubs above it). The buckets have disjoint
+    degree ranges, so a driver can pick query parameters with a known
+    selectivity class in O(1) instead of scanning the edge files. With many
+    equal degrees, buckets can differ in size or be empty.
+
+    The index is saved as a NumPy .npz file with the following arrays, where
+    <kind> is 'friend' or 'mirror':
+
+        - <kind>_degrees: degree of every investor (mirror degrees are the
+          degrees of the tradebooks, tradebook ID = investor ID + number of
+          investors)
+        - <kind>_pool_vertex_ids: investor IDs grouped by bucket
+        - <kind>_pool_offsets: the investors of bucket b are
+          <kind>_pool_vertex_ids[<kind>_pool_offsets[b]:<kind>_pool_offsets[b + 1]]
+        - <kind>_bucket_min_degrees, <kind>_bucket_max_degrees: degree range of
+          every bucket
+        - quantiles: the quantiles separating the buckets
+
+"""
+
+
+# Imports from built-in modules
+import numpy as np
+
+# Imports from Base Data Generator Module
+from list_generators.BDG006_PermutedListGenerator import get_id_dtype
+
+# Kinds of degrees stored in the index
+DEGREE_KINDS = ["friend", "mirror"]
+
+class DegreeIndex:
+
+    def __init__(self, index_arrays):
+
+        # Arrays of the index, stored with the names used in the .npz file
+        self.index_arrays = index_arrays
+
+        # Quantiles separating the buckets of the parameter pools
+        self.quantiles = index_arrays["quantiles"]
+
+        # Number of buckets of every parameter pool
+        self.number_of_buckets = len(self.quantiles) + 1
+
+    @staticmethod
+    def get_friend_degrees(friend_adjacency, number_of_investors):
+        """
+        Description:
+            Returns the friend degree of every investor from the friend edge
+            adjacency list (a dictionary or a FriendAdjacencyCSR).
+        """
+
+        if hasattr(friend_adjacency, "get_degrees"):
+            return np.asarray(friend_adjacency.get_degrees(), dtype=np.int64)
+
+        friend_degrees = np.zeros((number_of_investors,), dtype=np.int64)
+        for vertex_id in friend_adjacency:
+            friend_degrees[vertex_id] = len(friend_adjacency[vertex_id])
+
+        return friend_degrees
+
+    @staticmethod
+    def build_parameter_pool(degrees, quantiles):
+        """
+        Description:
+            Groups the vertices into len(quantiles) + 1 buckets cut at the degree
+            quantiles and returns the pool arrays (vertex IDs, offsets and the
+            degree range of every bucket). Bucket b holds the vertices whose
+            degree is above the quantile b - 1 and at most the quantile b, so the
+            buckets have disjoint degree ranges, and a bucket is empty if its
+            quantiles have the same degree (e.g. with many vertices of degree 0).
+        """
+
+        number_of_vertices = len(degrees)
+
+        # ordering the vertices by degree
+        pool_vertex_ids = np.argsort(degrees, kind='stable').astype(get_id_dtype(max(0, number_of_vertices - 1)))
+        sorted_degrees = degrees[pool_vertex_ids]
+
+        degree_thresholds = np.quantile(sorted_degrees, quantiles) if (number_of_vertices > 0) else np.zeros((len(quantiles),))
+        pool_offsets = np.concatenate(([0,], np.searchsorted(sorted_degrees, degree_thresholds, side='right'),\
+                                        [number_of_vertices,])).astype(np.int64)
+
+        bucket_min_degrees = np.zeros((len(pool_offsets) - 1,), dtype=np.int64)
+        bucket_max_degrees = np.full((len(pool_offsets) - 1,), -1, dtype=np.int64)
+
+        non_empty_buckets = pool_offsets[1:] > pool_offsets[:-1]
+        bucket_min_degrees[non_empty_buckets] = sorted_degrees[pool_offsets[:-1][non_empty_buckets]]
+        bucket_max_degrees[non_empty_buckets] = sorted_degrees[pool_offsets[1:][non_empty_buckets] - 1]
+
+        return pool_vertex_ids, pool_offsets, bucket_min_degrees, bucket_max_degrees
+
+    @classmethod
+    def from_degrees(cls, friend_degrees, mirror_degrees, quantiles=[0.5, 0.9, 0.99]):
+        """
+        Description:
+            Builds the index from the friend degrees and the mirror degrees of the
+            investors.
+        """
+
+        assert list(quantiles) == sorted(quantiles) and all(0 < quantile < 1 for quantile in quantiles),\
+            "DegreeIndex_ERROR: quantiles must be sorted and between 0 and 1"
+
+        index_arrays = {"quantiles": np.asarray(quantiles, dtype=np.float64)}
+
+        for kind, degrees in zip(DEGREE_KINDS, [friend_degrees, mirror_degrees]):
+            degrees = np.asarray(degrees, dtype=np.int64)
+            pool_vertex_ids, pool_offsets, bucket_min_degrees, bucket_max_degrees = cls.build_parameter_pool(degrees, quantiles)
+
+            index_arrays[kind + "_degrees"] = degrees.astype(get_id_dtype(int(degrees.max(initial=0))))
+            index_arrays[kind + "_pool_vertex_ids"] = pool_vertex_ids
+            index_arrays[kind + "_pool_offsets"] = pool_offsets
+            index_arrays[kind + "_bucket_min_degrees"] = bucket_min_degrees
+            index_arrays[kind + "_bucket_max_degrees"] = bucket_max_degrees
+
+        return cls(index_arrays)
+
+    def save(self, index_file):
+        """
+        Description:
+            Saves the index arrays into the .npz file.
+        """
+
+        with open(index_file, mode='wb') as out_file:
+            np.savez(out_file, **self.index_arrays)
+            out_file.close()
+
+    @classmethod
+    def load(cls, index_file):
+        """
+        Description:
+            Loads the index from the .npz file written by save().
+        """
+
+        with np.load(index_file) as index_data:
+            return cls({name: index_data[name] for name in index_data.files})
+
+    def get_degrees(self, kind, vertex_ids):
+        """
+        Description:
+            Returns the degrees ('friend' or 'mirror') of the investors.
+        """
+
+        return self.index_arrays[kind + "_degrees"][vertex_ids]
+
+    def get_bucket_degree_range(self, kind, bucket):
+        """
+        Description:
+            Returns the smallest and the largest degree of the investors in the
+            bucket.
+        """
+
+        return (int(self.index_arrays[kind + "_bucket_min_degrees"][bucket]),\
+                int(self.index_arrays[kind + "_bucket_max_degrees"][bucket]))
+
+    def pick(self, kind, bucket, size=1):
+        """
+        Description:
+            Returns size investor IDs picked uniformly at random (in O(1) each)
+            from the bucket of the parameter pool of the degree kind. Bucket 0
+            holds the investors with the smallest degrees, and bucket -1 the hubs.
+        """
+
+        pool_offsets = self.index_arrays[kind + "_pool_offsets"]
+        bucket = bucket % self.number_of_buckets
+
+        assert pool_offsets[bucket + 1] > pool_offsets[bucket],\
+            "DegreeIndex_ERROR: the bucket is empty"
+
+        positions = np.random.randint(pool_offsets[bucket], pool_offsets[bucket + 1], size=(size,))
+        return self.index_arrays[kind + "_pool_vertex_ids"][positions]
+
+
+# Unit tests to test if the parameter pools are bucketed by degree quantile
+def test_degree_index():
+    friend_degrees = np.arange(0, 100)
+    mirror_degrees = np.zeros((100,), dtype=np.int64)
+    mirror_degrees[7] = 50
+
+    test_object = DegreeIndex.from_degrees(friend_degrees, mirror_degrees, quantiles=[0.5, 0.9, 0.99])
+
+    assert test_object.index_arrays["friend_pool_offsets"].tolist() == [0, 50, 90, 99, 100],\
+        "DegreeIndex_BUILD_ERROR bucket offsets are invalid"
+
+    assert sorted(test_object.pick("friend", 1, size=200).tolist())[0] >= 50 and\
+        max(test_object.pick("friend", 1, size=200).tolist()) < 90,\
+        "DegreeIndex_PICK_ERROR picked investors outside the bucket"
+
+    assert test_object.pick("friend", -1, size=3).tolist() == [99, 99, 99],\
+        "DegreeIndex_PICK_ERROR hub bucket is invalid"
+
+    assert test_object.get_bucket_degree_range("friend", 2) == (90, 98),\
+        "DegreeIndex_BUILD_ERROR bucket degree range is invalid"
+
+    assert test_object.pick("mirror", -1).tolist() == [7] and test_object.get_bucket_degree_range("mirror", 0) == (0, 0),\
+        "DegreeIndex_PICK_ERROR mirror buckets are invalid"
+
+    assert sorted(test_object.index_arrays["mirror_pool_vertex_ids"].tolist()) == list(range(0, 100)),\
+        "DegreeIndex_BUILD_ERROR pool does not contain every investor once"
+
+# Unit tests to test if the buckets have disjoint degree ranges when most degrees are equal
+def test_degree_index_with_ties():
+    friend_degrees = np.concatenate((np.zeros((80,), dtype=np.int64), np.ones((15,), dtype=np.int64),\
+                                     np.full((4,), 5, dtype=np.int64), [10,]))
+    mirror_degrees = np.zeros((100,), dtype=np.int64)
+
+    test_object = DegreeIndex.from_degrees(friend_degrees, mirror_degrees, quantiles=[0.5, 0.9, 0.99])
+
+    assert test_object.index_arrays["friend_pool_offsets"].tolist() == [0, 80, 95, 99, 100],\
+        "DegreeIndex_TIES_ERROR bucket offsets are invalid"
+
+    assert [test_object.get_bucket_degree_range("friend", bucket) for bucket in range(0, 4)] == [(0, 0), (1, 1), (5, 5), (10, 10)],\
+        "DegreeIndex_TIES_ERROR bucket degree ranges overlap"
+
+    assert test_object.pick("friend", -1, size=3).tolist() == [99, 99, 99] and\
+        set(test_object.get_degrees("friend", test_object.pick("friend", 1, size=50)).tolist()) == {1,},\
+        "DegreeIndex_TIES_ERROR picked investors outside the degree range of the bucket"
+
+    assert test_object.index_arrays["mirror_pool_offsets"].tolist() == [0, 100, 100, 100, 100],\
+        "DegreeIndex_TIES_ERROR buckets of equal degrees are not empty"
+
+# Unit tests to test if the index is saved and loaded, and degrees are read from adjacency lists
+def test_save_and_load_degree_index():
+    friend_adjacency_dict = {0:[3,2], 2:[0,], 3:[0,]}
+    friend_degrees = DegreeIndex.get_friend_degrees(friend_adjacency_dict, 5)
+
+    assert friend_degrees.tolist() == [2, 0, 1, 1, 0],\
+        "DegreeIndex_DEGREE_ERROR friend degrees are invalid"
+
+    test_object = DegreeIndex.from_degrees(friend_degrees, np.array([1, 1, 0, 0, 0]), quantiles=[0.6])
+    test_object.save("degree_index_test.npz")
+
+    loaded_object = DegreeIndex.load("degree_index_test.npz")
+
+    assert loaded_object.get_degrees("friend", [0, 1, 2]).tolist() == [2, 0, 1],\
+        "DegreeIndex_LOAD_ERROR degrees are invalid"
+
+    assert loaded_object.pick("friend", 1).tolist()[0] in [0, 2, 3] and loaded_object.number_of_buckets == 2,\
+        "DegreeIndex_LOAD_ERROR parameter pools are invalid"
+
+# Function to execute all defined unit tests for DegreeIndex
+def execute_all_unit_tests():
+    test_degree_index()
+    test_degree_index_with_ties()
+    test_save_and_load_degree_index()
@@ -0,0 +1,480 @@
+"""
+FYP : 22013
+
+Module:
+    Base Data Generator
+
+Description:
+    This python script contains the definitions of the vertex samplers used by
+    the edge generators to select the endpoints of the edges, and their unit
+    tests.
+
+    All samplers draw vertex IDs from 0 to (number_of_vertices - 1) with a
+    configurable skew, where larger vertex IDs are the more likely ones (as with
+    the power distribution used originally by the generators):
+
+        - PowerSampler: the original power distribution (built-in default)
+        - AliasTableSampler: any discrete distribution (Zipf, log-normal or an
+          empirical degree distribution), using a precomputed alias table so
+          that every sample costs O(1) and is drawn vectorized
+        - RangeSampler: the distribution of another sampler restricted to a
+          range of vertex IDs (e.g. the vertices owned by a partition), drawn
+          by inverting its cumulative probabilities
+
+    The alias tables are computed once per distribution and can be published
+    into shared memory, so that worker processes use them without copying.
+
+"""
+
+
+# Imports from built-in modules
+import numpy as np
+
+# Imports from Base Data Generator Module
+from execution.BDG027_BatchExecutor import get_random_generator
+from shared_data.BDG013_SharedMemoryArray import SharedMemoryArray
+
+class PowerSampler:
+
+    def __init__(self, power_dis_param=2, number_of_vertices=10):
+
+        # Parameter 'a' of the power distribution
+        self.power_dis_param = power_dis_param
+
+        # Number of vertices to sample from
+        self.number_of_vertices = number_of_vertices
+
+    def sample(self, size, random_generator=None):
+        """
+        Description:
+            Returns size vertex IDs drawn from the power distribution with the
+            NumPy random generator (see get_random_generator()).
+        """
+
+        random_generator = get_random_generator(random_generator)
+
+        return (random_generator.power(a=self.power_dis_param, size=(size,)) * self.number_of_vertices).astype(np.int64)
+
+    def get_probabilities(self):
+        """
+        Description:
+            Returns the probability of sampling every vertex ID.
+        """
+
+        boundaries = (np.arange(0, self.number_of_vertices + 1) / self.number_of_vertices) ** self.power_dis_param
+        return np.diff(boundaries)
+
+    def publish_to_shared_memory(self):
+        """
+        Description:
+            The power sampler has no table, so the sampler itself is returned.
+        """
+
+        return self
+
+    def close(self):
+        pass
+
+class AliasTableSampler:
+
+    def __init__(self, acceptance_probabilities, alias_vertex_ids):
+
+        # Storage of the alias table, either NumPy arrays or SharedMemoryArray objects
+        self.acceptance_probabilities_storage = acceptance_probabilities
+        self.alias_vertex_ids_storage = alias_vertex_ids
+
+        self.set_array_views()
+
+    def set_array_views(self):
+        """
+        Description:
+            Sets the NumPy views of the alias table on its storage.
+        """
+
+        self.acceptance_probabilities = self.acceptance_probabilities_storage.array\
+            if isinstance(self.acceptance_probabilities_storage, SharedMemoryArray) else self.acceptance_probabilities_storage
+        self.alias_vertex_ids = self.alias_vertex_ids_storage.array\
+            if isinstance(self.alias_vertex_ids_storage, SharedMemoryArray) else self.alias_vertex_ids_storage
+
+        # Number of vertices to sample from
+        self.number_of_vertices = len(self.acceptance_probabilities)
+
+    @classmethod
+    def from_weights(cls, weights):
+        """
+        Description:
+            Builds the alias table (Vose's method) for sampling vertex v with a
+            probability proportional to weights[v]. Instead of pairing one small
+            and one large column at a time, all small columns of a round are
+            assigned at once to the large columns using cumulative sums, and the
+            large columns are processed in descending order, so only a few
+            vectorized rounds are needed even for very skewed distributions.
+        """
+
+        weights = np.asarray(weights, dtype=np.float64)
+        number_of_vertices = len(weights)
+
+        assert number_of_vertices > 0 and np.all(weights >= 0) and weights.sum() > 0,\
+            "AliasTableSampler_ERROR: weights must be non-negative with a positive sum"
+
+        # scaled probabilities, the average column height is 1
+        column_heights = weights * (number_of_vertices / weights.sum())
+
+        acceptance_probabilities = np.ones((number_of_vertices,), dtype=np.float64)
+        alias_vertex_ids = np.arange(0, number_of_vertices, dtype=np.int64)
+
+        small_vertex_ids = np.flatnonzero(column_heights < 1.0)
+        large_vertex_ids = np.flatnonzero(column_heights >= 1.0)
+        large_vertex_ids = large_vertex_ids[np.argsort(-column_heights[large_vertex_ids], kind='stable')]
+
+        while len(small_vertex_ids) > 0 and len(large_vertex_ids) > 0:
+            small_deficits = 1.0 - column_heights[small_vertex_ids]
+            large_excesses = column_heights[large_vertex_ids] - 1.0
+
+            # every small column is filled by the large column whose cumulative
+            # excess covers the start of its cumulative deficit
+            deficit_starts = np.cumsum(small_deficits) - small_deficits
+            donor_indices = np.minimum(np.searchsorted(np.cumsum(large_excesses), deficit_starts, side='right'),\
+                                        len(large_vertex_ids) - 1)
+
+            acceptance_probabilities[small_vertex_ids] = column_heights[small_vertex_ids]
+            alias_vertex_ids[small_vertex_ids] = large_vertex_ids[donor_indices]
+
+            # removing the donated heights from the large columns
+            column_heights[large_vertex_ids] -= np.bincount(donor_indices, weights=small_deficits,\
+                                                            minlength=len(large_vertex_ids))
+
+            still_large = column_heights[large_vertex_ids] >= 1.0
+            small_vertex_ids = large_vertex_ids[~still_large]
+            large_vertex_ids = large_vertex_ids[still_large]
+
+        # the remaining columns are full (up to rounding errors)
+        return cls(acceptance_probabilities, alias_vertex_ids)
+
+    def sample(self, size, random_generator=None):
+        """
+        Description:
+            Returns size vertex IDs, each drawn in O(1): a uniformly chosen column
+            returns its own vertex ID with its acceptance probability and its
+            alias otherwise. The samples are drawn with the NumPy random
+            generator (see get_random_generator()).
+        """
+
+        random_generator = get_random_generator(random_generator)
+
+        column_ids = random_generator.integers(0, self.number_of_vertices, size=(size,))
+        accepted = random_generator.uniform(low=0.0, high=1.0, size=(size,)) < self.acceptance_probabilities[column_ids]
+        return np.where(accepted, column_ids, self.alias_vertex_ids[column_ids])
+
+    def get_probabilities(self):
+        """
+        Description:
+            Returns the probability of sampling every vertex ID.
+        """
+
+        probabilities = self.acceptance_probabilities.copy()
+        probabilities += np.bincount(self.alias_vertex_ids,\
+                                        weights=1.0 - self.acceptance_probabilities,\
+                                        minlength=self.number_of_vertices)
+        return probabilities / self.number_of_vertices
+
+    def publish_to_shared_memory(self):
+        """
+        Description:
+            Returns a copy of the sampler whose alias table is published into
+            shared memory. Passing the copy to other processes only pickles the
+            handles of the shared memory blocks.
+        """
+
+        return AliasTableSampler(SharedMemoryArray.publish(self.acceptance_probabilities),\
+                                    SharedMemoryArray.publish(self.alias_vertex_ids))
+
+    def close(self):
+        """
+        Description:
+            Closes (and frees, in the publishing process) the shared memory blocks.
+        """
+
+        for storage in [self.acceptance_probabilities_storage, self.alias_vertex_ids_storage]:
+            if isinstance(storage, SharedMemoryArray):
+                storage.close()
+
+    def __getstate__(self):
+        # The views are recreated from the storage when unpickling
+        return {"acceptance_probabilities_storage": self.acceptance_probabilities_storage,\
+                "alias_vertex_ids_storage": self.alias_vertex_ids_storage}
+
+    def __setstate__(self, state):
+        self.acceptance_probabilities_storage = state["acceptance_probabilities_storage"]
+        self.alias_vertex_ids_storage = state["alias_vertex_ids_storage"]
+        self.set_array_views()
+
+
+class RangeSampler:
+
+    def __init__(self, cumulative_probabilities, first_vertex_ID, end_vertex_ID):
+
+        # Cumulative probabilities of the sampled distribution, starting with 0
+        # (shared by all the range samplers of the same distribution)
+        self.cumulative_probabilities = cumulative_probabilities
+
+        # The vertex IDs from first_vertex_ID to (end_vertex_ID - 1) are sampled
+        self.first_vertex_ID = first_vertex_ID
+        self.end_vertex_ID = end_vertex_ID
+
+        assert 0 <= first_vertex_ID < end_vertex_ID < len(cumulative_probabilities),\
+            "RangeSampler_ERROR: the range of vertex IDs is invalid"
+
+        # Number of vertices to sample from
+        self.number_of_vertices = end_vertex_ID - first_vertex_ID
+
+    @classmethod
+    def from_sampler(cls, sampler, first_vertex_ID, end_vertex_ID):
+        """
+        Description:
+            Returns the range sampler of the distribution of sampler. Use
+            get_cumulative_probabilities() once and the constructor instead to
+            create many range samplers of the same distribution.
+        """
+
+        return cls(get_cumulative_probabilities(sampler), first_vertex_ID, end_vertex_ID)
+
+    def get_mass(self):
+        """
+        Description:
+            Returns the probability of the range in the original distribution.
+        """
+
+        return float(self.cumulative_probabilities[self.end_vertex_ID] - self.cumulative_probabilities[self.first_vertex_ID])
+
+    def sample(self, size, random_generator=None):
+        """
+        Description:
+            Returns size vertex IDs of the range, drawn with the original
+            probabilities (normalized by the mass of the range) with the NumPy
+            random generator (see get_random_generator()).
+        """
+
+        random_generator = get_random_generator(random_generator)
+
+        uniform_samples = random_generator.uniform(low=self.cumulative_probabilities[self.first_vertex_ID],\
+                                            high=self.cumulative_probabilities[self.end_vertex_ID],\
+                                            size=(size,))
+        vertex_ids = np.searchsorted(self.cumulative_probabilities, uniform_samples, side='right') - 1
+
+        # rounding errors at the ends of the range
+        return np.clip(vertex_ids, self.first_vertex_ID, self.end_vertex_ID - 1).astype(np.int64)
+
+    def get_probabilities(self):
+        """
+        Description:
+            Returns the probability of sampling every vertex ID of the range
+            (indexed from first_vertex_ID).
+        """
+
+        probabilities = np.diff(self.cumulative_probabilities[self.first_vertex_ID:self.end_vertex_ID + 1])
+        mass = probabilities.sum()
+        return probabilities / mass if mass > 0 else probabilities
+
+    def publish_to_shared_memory(self):
+        """
+        Description:
+            The cumulative probabilities are not published, so the sampler itself
+            is returned.
+        """
+
+        return self
+
+    def close(self):
+        pass
+
+
+def get_cumulative_probabilities(sampler):
+    """
+    Description:
+        Returns the cumulative probabilities of a sampler, starting with 0 (so
+        that the probability of the vertex IDs i to (j - 1) is the difference of
+        the values at j and i).
+    """
+
+    cumulative_probabilities = np.zeros((sampler.number_of_vertices + 1,), dtype=np.float64)
+    np.cumsum(sampler.get_probabilities(), out=cumulative_probabilities[1:])
+    return cumulative_probabilities
+
+def get_zipf_weights(number_of_vertices, exponent):
+    """
+    Description:
+        Returns the Zipf weights 1 / rank^exponent, where the vertex with the
+        largest ID has rank 1.
+    """
+
+    ranks = np.arange(number_of_vertices, 0, -1, dtype=np.float64)
+    return ranks ** (-exponent)
+
+def get_lognormal_weights(number_of_vertices, mean, sigma):
+    """
+    Description:
+        Returns log-normally distributed weights, sorted so that the vertex with
+        the largest ID has the largest weight.
+    """
+
+    return np.sort(np.random.lognormal(mean=mean, sigma=sigma, size=(number_of_vertices,)))
+
+def get_empirical_weights(number_of_vertices, degree_file):
+    """
+    Description:
+        Returns weights following an empirical degree distribution. The degree
+        file stores one degree per line (e.g. the degrees of all vertices of a
+        production graph). The sorted degrees are resampled to number_of_vertices
+        values, so the vertex with the largest ID has the largest degree.
+    """
+
+    degrees = np.sort(np.loadtxt(degree_file, dtype=np.float64, ndmin=1))
+
+    assert len(degrees) > 0,\
+        "VertexSamplers_ERROR: the empirical degree file is empty"
+
+    quantile_positions = np.linspace(0, len(degrees) - 1, number_of_vertices)
+    return np.interp(quantile_positions, np.arange(0, len(degrees)), degrees)
+
+def create_vertex_sampler(sampler_config, number_of_vertices, power_dis_param):
+    """
+    Description:
+        Creates the vertex sampler described by sampler_config (a dictionary
+        from the configuration file). If sampler_config is None, the built-in
+        power distribution sampler with power_dis_param is returned. Supported
+        distributions:
+
+            - {"distribution": "power", "power_dis_param": 2}
+            - {"distribution": "zipf", "exponent": 1.1}
+            - {"distribution": "lognormal", "mean": 0.0, "sigma": 1.0}
+            - {"distribution": "empirical", "degree_file": "degrees.txt"}
+    """
+
+    if sampler_config is None:
+        return PowerSampler(power_dis_param, number_of_vertices)
+
+    distribution = sampler_config["distribution"]
+
+    if (distribution == "power"):
+        return PowerSampler(sampler_config.get("power_dis_param", power_dis_param), number_of_vertices)
+
+    if (distribution == "zipf"):
+        weights = get_zipf_weights(number_of_vertices, sampler_config.get("exponent", 1.0))
+    elif (distribution == "lognormal"):
+        weights = get_lognormal_weights(number_of_vertices, sampler_config.get("mean", 0.0), sampler_config.get("sigma", 1.0))
+    elif (distribution == "empirical"):
+        weights = get_empirical_weights(number_of_vertices, sampler_config["degree_file"])
+    else:
+        raise ValueError("VertexSamplers_ERROR: unknown distribution " + str(distribution))
+
+    return AliasTableSampler.from_weights(weights)
+
+
+# Unit tests to test if the alias table samples the expected distribution
+def test_alias_table_sampler():
+    weights = np.array([1.0, 0.0, 2.0, 3.0, 10.0, 4.0])
+    test_object = AliasTableSampler.from_weights(weights)
+
+    assert np.allclose(test_object.get_probabilities(), weights / weights.sum()),\
+        "AliasTableSampler_TABLE_ERROR alias table has wrong probabilities"
+
+    samples = test_object.sample(200000)
+
+    assert samples.min() >= 0 and samples.max() < 6 and not np.any(samples == 1),\
+        "AliasTableSampler_SAMPLE_ERROR invalid vertex sampled"
+
+    frequencies = np.bincount(samples, minlength=6) / len(samples)
+
+    assert np.allclose(frequencies, weights / weights.sum(), atol=0.01),\
+        "AliasTableSampler_SAMPLE_ERROR sample frequencies differ from the distribution"
+
+    # very skewed distribution with a single hub
+    weights = get_zipf_weights(10000, 2.0)
+    test_object = AliasTableSampler.from_weights(weights)
+
+    assert np.allclose(test_object.get_probabilities(), weights / weights.sum()),\
+        "AliasTableSampler_TABLE_ERROR skewed alias table has wrong probabilities"
+
+# Unit tests to test if the samplers are created from the configuration
+def test_create_vertex_sampler():
+    test_object = create_vertex_sampler(None, 100, 3)
+
+    assert isinstance(test_object, PowerSampler) and test_object.power_dis_param == 3,\
+        "VertexSamplers_CREATE_ERROR default sampler is not the power sampler"
+
+    samples = test_object.sample(1000)
+
+    assert samples.min() >= 0 and samples.max() < 100,\
+        "VertexSamplers_CREATE_ERROR power sampler out of range"
+
+    assert np.isclose(test_object.get_probabilities().sum(), 1.0),\
+        "VertexSamplers_CREATE_ERROR power sampler probabilities invalid"
+
+    test_object = create_vertex_sampler({"distribution": "zipf", "exponent": 1.5}, 100, 3)
+
+    assert np.argmax(test_object.get_probabilities()) == 99,\
+        "VertexSamplers_CREATE_ERROR zipf hub is not the largest vertex ID"
+
+    test_object = create_vertex_sampler({"distribution": "lognormal", "mean": 0.0, "sigma": 2.0}, 100, 3)
+
+    assert np.all(np.diff(test_object.get_probabilities()) >= -1e-12),\
+        "VertexSamplers_CREATE_ERROR lognormal weights are not sorted"
+
+    with open("empirical_degrees_test.txt", mode='w') as out_file:
+        out_file.write("1\n1\n2\n8\n")
+        out_file.close()
+
+    test_object = create_vertex_sampler({"distribution": "empirical", "degree_file": "empirical_degrees_test.txt"}, 4, 3)
+
+    assert np.allclose(test_object.get_probabilities(), np.array([1, 1, 2, 8]) / 12),\
+        "VertexSamplers_CREATE_ERROR empirical distribution invalid"
+
+# Unit tests to test if the alias table can be shared through shared memory
+def test_shared_alias_table_sampler():
+    test_object = create_vertex_sampler({"distribution": "zipf", "exponent": 1.0}, 50, 3)
+    shared_object = test_object.publish_to_shared_memory()
+
+    assert np.array_equal(shared_object.alias_vertex_ids, test_object.alias_vertex_ids),\
+        "AliasTableSampler_SHARED_ERROR shared alias table is different"
+
+    samples = shared_object.sample(100)
+
+    assert samples.min() >= 0 and samples.max() < 50,\
+        "AliasTableSampler_SHARED_ERROR shared sampler out of range"
+
+    shared_object.close()
+
+# Unit tests to test if the range sampler samples the restricted distribution
+def test_range_sampler():
+    weights = np.array([1.0, 0.0, 2.0, 3.0, 10.0, 4.0])
+    cumulative_probabilities = get_cumulative_probabilities(AliasTableSampler.from_weights(weights))
+
+    assert np.isclose(cumulative_probabilities[0], 0.0) and np.isclose(cumulative_probabilities[-1], 1.0),\
+        "RangeSampler_CUMULATIVE_ERROR cumulative probabilities are invalid"
+
+    test_object = RangeSampler(cumulative_probabilities, 1, 4)
+
+    assert np.isclose(test_object.get_mass(), 5 / 20) and np.allclose(test_object.get_probabilities(), [0.0, 0.4, 0.6]),\
+        "RangeSampler_PROBABILITIES_ERROR range probabilities are invalid"
+
+    samples = test_object.sample(100000)
+
+    assert samples.min() >= 2 and samples.max() <= 3,\
+        "RangeSampler_SAMPLE_ERROR vertex sampled outside the range (or with probability 0)"
+
+    assert np.isclose(np.count_nonzero(samples == 2) / len(samples), 0.4, atol=0.01),\
+        "RangeSampler_SAMPLE_ERROR sample frequencies differ from the distribution"
+
+    test_object = RangeSampler.from_sampler(PowerSampler(2, 100), 90, 100)
+    samples = test_object.sample(1000)
+
+    assert samples.min() >= 90 and samples.max() < 100 and np.isclose(test_object.get_mass(), 1 - 0.81),\
+        "RangeSampler_SAMPLE_ERROR power sampler range is invalid"
+
+# Function to execute all defined unit tests for the vertex samplers
+def execute_all_unit_tests():
+    test_alias_table_sampler()
+    test_create_vertex_sampler()
+    test_shared_alias_table_sampler()
+    test_range_sampler()
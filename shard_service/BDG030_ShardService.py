@@ -0,0 +1,550 @@
+"""
+FYP : 22013
+
+Module:
+    Base Data Generator
+
+Description:
+    This python script contains the definition of the ShardServer and the
+    ShardClient classes and their unit tests.
+
+    The ShardServer class serves the generated data over a local socket
+    ('tcp:host:port' or 'unix:path'), so that bulk loaders can pull disjoint
+    shards concurrently and start ingesting immediately instead of copying the
+    generated files first. A client sends one request per line as a JSON object:
+
+        {"stage": "investor_names", "first_id": 0, "end_id": 100000, "format": "binary"}
+        {"stage": "friend_edges", "partition": 3, "format": "csv"}
+
+    i.e. a range [first_id, end_id) of the vertex IDs of a vertex stage, or a
+    partition of an edge stage, in the "csv" or "binary" format. The response is
+    a sequence of frames, each made of its length (4 bytes, little-endian) and
+    its payload:
+
+        - a JSON object with the status ("ok" or "error" with a message), the
+          field names and the dtype of the record batches
+        - the record batches, as the lines of the rows (csv) or as the bytes of
+          the NumPy structured array (binary)
+        - an empty frame ending the shard
+
+    and the connection stays open for the next request.
+
+    The vertex IDs are split into blocks of block_size IDs, and every block is
+    generated with its own random generator seeded from the random seed, the
+    stage name and the block index, so any range is reproducible whatever the
+    ranges requested before, and concurrent requests are generated in parallel.
+    The edge stages need the whole friend adjacency, so all edges are generated
+    once (from the random seed) on the first edge request, and are served by
+    the partitions of the partitioned file layout. Only the edge requests wait
+    for the edges to be generated.
+
+    The ShardClient class is the client stand-in used by the loaders (and the
+    unit tests) to request the shards.
+
+"""
+
+
+# Imports from built-in modules
+import asyncio
+import json
+import numpy as np
+import os
+import socket
+import struct
+import threading
+
+# Imports from Base Data Generator Module
+from data_sinks.BDG010_RecordBatch import format_record_batch, make_record_batch
+from data_sinks.BDG012_PartitionedFileWriter import PartitionedFileWriter
+from execution.BDG027_BatchExecutor import get_block_random_generator
+
+# Formats of the record batches in the frames
+SHARD_FORMATS = ["csv", "binary"]
+
+# Header of every frame: the length of its payload
+FRAME_HEADER = struct.Struct("<I")
+
+def get_socket_address(address):
+    """
+    Description:
+        Returns the socket family and the socket address of 'tcp:host:port' or
+        'unix:path'.
+    """
+
+    if address.startswith("tcp:"):
+        host, port = address[len("tcp:"):].rsplit(":", 1)
+        return socket.AF_INET, (host, int(port))
+
+    assert address.startswith("unix:"),\
+        "ShardService_ERROR: the address must be 'tcp:host:port' or 'unix:path'"
+
+    return socket.AF_UNIX, address[len("unix:"):]
+
+
+class ShardServer:
+
+    def __init__(self, address="unix:shards.sock",\
+                 vertex_generators={},\
+                 edge_batches_function=None,\
+                 edge_partitioners={},\
+                 random_seed=None,\
+                 block_size=10000,\
+                 rows_per_frame=10000):
+
+        # 'tcp:host:port' or 'unix:path' of the listening socket
+        self.address = address
+
+        # Vertex generators by stage name, the rows of a block are generated by
+        # their generate_record_batch() method
+        self.vertex_generators = vertex_generators
+
+        # Function generating all the edges, returns the record batches of every edge stage
+        self.edge_batches_function = edge_batches_function
+
+        # PartitionedFileWriter of every edge stage, giving the partition of every edge
+        self.edge_partitioners = edge_partitioners
+
+        # Seed of the random generators of every block
+        self.random_seed = random_seed
+
+        # Number of vertex IDs of every block
+        self.block_size = block_size
+
+        # Largest number of edges in a frame
+        self.rows_per_frame = rows_per_frame
+
+        assert block_size > 0,\
+            "ShardServer_ERROR: block_size must be positive"
+
+        # Lock for generating the edges once, only taken by the edge requests (every
+        # vertex block has its own random generator, so the vertex requests take no lock)
+        self.edge_generation_lock = threading.Lock()
+
+        # Edges of every edge stage grouped by partition, and the end of every partition
+        # (generated on the first edge request)
+        self.partitioned_edges = None
+
+        # Event loop of the server and the event stopping it (set by serve())
+        self.loop = None
+        self.stop_event = None
+
+        # Set once the server is listening
+        self.ready_event = threading.Event()
+
+    def generate_vertex_block(self, stage_name, block_index):
+        """
+        Description:
+            Generates the record batch of the block of the vertex stage with its
+            own random generator seeded for the block, so the blocks of
+            concurrent requests are generated in parallel.
+        """
+
+        generator_obj = self.vertex_generators[stage_name]
+
+        block_start_ID = generator_obj.first_vertex_ID + block_index * self.block_size
+        block_size = min(self.block_size, generator_obj.first_vertex_ID + generator_obj.item_cardinality - block_start_ID)
+
+        return generator_obj.generate_record_batch(block_start_ID, block_size,\
+                                                    get_block_random_generator(self.random_seed, stage_name, block_index))
+
+    def iter_vertex_batches(self, stage_name, first_id, end_id):
+        """
+        Description:
+            Generator yielding the record batches of the vertex IDs [first_id,
+            end_id) of the vertex stage, one block at a time.
+        """
+
+        generator_obj = self.vertex_generators[stage_name]
+        first_vertex_ID = generator_obj.first_vertex_ID
+
+        for block_index in range((first_id - first_vertex_ID) // self.block_size,\
+                                    (end_id - first_vertex_ID + self.block_size - 1) // self.block_size):
+            block_start_ID = first_vertex_ID + block_index * self.block_size
+            batch = self.generate_vertex_block(stage_name, block_index)
+            yield batch[max(first_id - block_start_ID, 0):end_id - block_start_ID]
+
+    def get_partitioned_edges(self):
+        """
+        Description:
+            Returns the edges of every edge stage grouped by partition (keeping
+            their order) with the end of every partition. The edges are generated
+            on the first call, while the vertex requests keep being served.
+        """
+
+        with self.edge_generation_lock:
+            if self.partitioned_edges is None:
+                self.partitioned_edges = {}
+
+                for stage_name, batches in self.edge_batches_function().items():
+                    edges = np.concatenate(batches)
+                    partitioner = self.edge_partitioners[stage_name]
+
+                    partition_indices = partitioner.get_partition_indices(edges[edges.dtype.names[0]])
+                    partition_ends = np.cumsum(np.bincount(partition_indices, minlength=partitioner.number_of_partitions))
+
+                    self.partitioned_edges[stage_name] = (edges[np.argsort(partition_indices, kind='stable')], partition_ends)
+
+            return self.partitioned_edges
+
+    def iter_edge_batches(self, stage_name, partition):
+        """
+        Description:
+            Generator yielding the record batches of the partition of the edge
+            stage, rows_per_frame edges at a time.
+        """
+
+        edges, partition_ends = self.get_partitioned_edges()[stage_name]
+        partition_start = int(partition_ends[partition - 1]) if partition > 0 else 0
+
+        for batch_start in range(partition_start, int(partition_ends[partition]), self.rows_per_frame):
+            yield edges[batch_start:min(batch_start + self.rows_per_frame, int(partition_ends[partition]))]
+
+    def get_shard_batches(self, request):
+        """
+        Description:
+            Checks the request and returns the generator yielding the record
+            batches of the shard.
+        """
+
+        stage_name = request.get("stage")
+
+        if stage_name in self.vertex_generators:
+            generator_obj = self.vertex_generators[stage_name]
+            first_id, end_id = int(request["first_id"]), int(request["end_id"])
+
+            assert generator_obj.first_vertex_ID <= first_id <= end_id <= generator_obj.first_vertex_ID + generator_obj.item_cardinality,\
+                "ShardServer_ERROR: the IDs of " + stage_name + " are in [" + str(generator_obj.first_vertex_ID) + ", " +\
+                str(generator_obj.first_vertex_ID + generator_obj.item_cardinality) + ")"
+
+            return self.iter_vertex_batches(stage_name, first_id, end_id)
+
+        assert stage_name in self.edge_partitioners,\
+            "ShardServer_ERROR: unknown stage " + str(stage_name) + ", the stages are " +\
+            ", ".join(list(self.vertex_generators) + list(self.edge_partitioners))
+
+        partition = int(request["partition"])
+
+        assert 0 <= partition < self.edge_partitioners[stage_name].number_of_partitions,\
+            "ShardServer_ERROR: the partitions of " + stage_name + " are 0 to " +\
+            str(self.edge_partitioners[stage_name].number_of_partitions - 1)
+
+        return self.iter_edge_batches(stage_name, partition)
+
+    async def send_shard(self, writer, request):
+        """
+        Description:
+            Sends the frames of the requested shard. The record batches are
+            generated in the default executor while the previous frames are
+            sent, and waiting for the frames to be sent before generating more
+            keeps the memory used bounded by slow clients.
+        """
+
+        def write_frame(payload):
+            writer.write(FRAME_HEADER.pack(len(payload)) + payload)
+
+        loop = asyncio.get_running_loop()
+
+        try:
+            data_format = request.get("format", "binary")
+            assert data_format in SHARD_FORMATS,\
+                "ShardServer_ERROR: the format must be one of " + ", ".join(SHARD_FORMATS)
+
+            batches = self.get_shard_batches(request)
+            batch = await loop.run_in_executor(None, next, batches, None)
+        except (AssertionError, KeyError, TypeError, ValueError) as error:
+            write_frame(json.dumps({"status": "error", "message": str(error)}).encode())
+            write_frame(b"")
+            await writer.drain()
+            return
+
+        write_frame(json.dumps({"status": "ok",\
+                                "fields": list(batch.dtype.names) if batch is not None else None,\
+                                "dtype": batch.dtype.descr if batch is not None else None}).encode())
+
+        while batch is not None:
+            if len(batch) > 0:
+                write_frame(format_record_batch(batch).encode() if data_format == "csv" else batch.tobytes())
+                await writer.drain()
+            batch = await loop.run_in_executor(None, next, batches, None)
+
+        write_frame(b"")
+        await writer.drain()
+
+    async def handle_connection(self, reader, writer):
+        """
+        Description:
+            Serves the requests of a client, one JSON object per line, until the
+            client closes the connection.
+        """
+
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+
+                try:
+                    request = json.loads(request_line)
+                except ValueError:
+                    request = {}
+
+                await self.send_shard(writer, request if isinstance(request, dict) else {})
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self):
+        """
+        Description:
+            Listens on the address and serves the clients until stop() is called.
+        """
+
+        self.loop = asyncio.get_running_loop()
+        self.stop_event = asyncio.Event()
+
+        socket_family, socket_address = get_socket_address(self.address)
+        if socket_family == socket.AF_INET:
+            server = await asyncio.start_server(self.handle_connection, socket_address[0], socket_address[1])
+        else:
+            if os.path.exists(socket_address):
+                os.remove(socket_address)
+            server = await asyncio.start_unix_server(self.handle_connection, socket_address)
+
+        async with server:
+            self.ready_event.set()
+            print("Shard Server listening on", self.address)
+            await self.stop_event.wait()
+
+    def run(self):
+        """
+        Description:
+            Runs the server until stop() is called (or the process is interrupted).
+        """
+
+        try:
+            asyncio.run(self.serve())
+        except KeyboardInterrupt:
+            pass
+
+    def stop(self):
+        """
+        Description:
+            Stops the server running in another thread.
+        """
+
+        if self.loop is not None:
+            self.loop.call_soon_threadsafe(self.stop_event.set)
+
+
+class ShardClient:
+
+    def __init__(self, address="unix:shards.sock"):
+
+        # 'tcp:host:port' or 'unix:path' of the server
+        self.address = address
+
+        socket_family, socket_address = get_socket_address(address)
+
+        # Connection to the server, kept open for all requests
+        self.connection = socket.socket(socket_family, socket.SOCK_STREAM)
+        self.connection.connect(socket_address)
+
+        # Buffered reader of the frames
+        self.connection_file = self.connection.makefile(mode='rb')
+
+        # Field names of the last requested shard
+        self.fields = None
+
+    def read_frame(self):
+        """
+        Description:
+            Returns the payload of the next frame.
+        """
+
+        frame_header = self.connection_file.read(FRAME_HEADER.size)
+        assert len(frame_header) == FRAME_HEADER.size,\
+            "ShardClient_ERROR: the server closed the connection"
+
+        (payload_length,) = FRAME_HEADER.unpack(frame_header)
+        payload = self.connection_file.read(payload_length)
+        assert len(payload) == payload_length,\
+            "ShardClient_ERROR: the server closed the connection"
+
+        return payload
+
+    def iter_shard(self, stage_name, first_id=None, end_id=None, partition=None, data_format="binary"):
+        """
+        Description:
+            Requests the shard (the range of vertex IDs or the partition of the
+            edges of the stage) and yields its record batches (binary) or its
+            lines (csv) as they are received. The shard has to be read entirely
+            before the next request.
+        """
+
+        request = {"stage": stage_name, "format": data_format}
+        if partition is not None:
+            request["partition"] = partition
+        else:
+            request["first_id"], request["end_id"] = first_id, end_id
+
+        self.connection.sendall((json.dumps(request) + "\n").encode())
+
+        metadata = json.loads(self.read_frame())
+        if metadata["status"] != "ok":
+            self.read_frame()
+        assert metadata["status"] == "ok",\
+            "ShardClient_ERROR: " + metadata.get("message", "")
+
+        self.fields = metadata["fields"]
+        batch_dtype = np.dtype([tuple(field) for field in metadata["dtype"]]) if metadata["dtype"] is not None else None
+
+        while True:
+            payload = self.read_frame()
+            if len(payload) == 0:
+                return
+
+            yield payload.decode() if data_format == "csv" else np.frombuffer(payload, dtype=batch_dtype)
+
+    def get_shard(self, stage_name, first_id=None, end_id=None, partition=None):
+        """
+        Description:
+            Returns the shard as a single record batch (None if it is empty).
+        """
+
+        batches = list(self.iter_shard(stage_name, first_id, end_id, partition))
+        return np.concatenate(batches) if batches else None
+
+    def close(self):
+        """
+        Description:
+            Closes the connection to the server.
+        """
+
+        self.connection_file.close()
+        self.connection.close()
+
+
+# Vertex generator of the unit tests: the IDs and a random number per vertex
+class TestVertexGenerator:
+    def __init__(self, first_vertex_ID, item_cardinality):
+        self.first_vertex_ID = first_vertex_ID
+        self.item_cardinality = item_cardinality
+
+    def generate_record_batch(self, start_id, batch_size, random_generator):
+        return make_record_batch(["investorID", "Value"],\
+                                    [np.arange(start_id, start_id + batch_size), random_generator.integers(0, 1000000, size=(batch_size,))])
+
+# Edges of the unit tests
+def get_test_edge_batches():
+    return {"friend_edges": [make_record_batch(["SourceVertexID", "DestinationVertexID"], [np.arange(0, 50), np.arange(1, 51)]),\
+                             make_record_batch(["SourceVertexID", "DestinationVertexID"], [np.arange(50, 99), np.arange(51, 100)])]}
+
+# Starts the server of the unit tests in a thread
+def start_test_server(address, edge_batches_function=get_test_edge_batches):
+    test_object = ShardServer(address=address,\
+                                vertex_generators={"investor_names": TestVertexGenerator(10, 95)},\
+                                edge_batches_function=edge_batches_function,\
+                                edge_partitioners={"friend_edges": PartitionedFileWriter(number_of_partitions=4, low_id=0, high_id=100)},\
+                                random_seed=7,\
+                                block_size=16,\
+                                rows_per_frame=10)
+
+    threading.Thread(target=test_object.run, daemon=True).start()
+    test_object.ready_event.wait()
+    return test_object
+
+# Unit tests to test if the vertex shards are reproducible whatever the requested ranges
+def test_vertex_shards():
+    test_object = start_test_server("unix:shard_service_test.sock")
+    client = ShardClient("unix:shard_service_test.sock")
+
+    whole_range = client.get_shard("investor_names", 10, 105)
+
+    assert whole_range["investorID"].tolist() == list(range(10, 105)),\
+        "ShardServer_VERTEX_ERROR vertex IDs are wrong"
+
+    split_ranges = np.concatenate([client.get_shard("investor_names", 10, 37), client.get_shard("investor_names", 37, 105)])
+
+    assert np.array_equal(split_ranges, whole_range),\
+        "ShardServer_VERTEX_ERROR split ranges are not reproducible"
+
+    csv_lines = "".join(client.iter_shard("investor_names", 40, 45, data_format="csv"))
+
+    assert csv_lines == format_record_batch(whole_range[30:35]) and client.fields == ["investorID", "Value"],\
+        "ShardServer_VERTEX_ERROR csv shard is invalid"
+
+    assert client.get_shard("investor_names", 20, 20) is None,\
+        "ShardServer_VERTEX_ERROR empty shard is invalid"
+
+    try:
+        client.get_shard("investor_names", 0, 20)
+        assert False, "ShardServer_VERTEX_ERROR out of range shard accepted"
+    except AssertionError as error:
+        assert "ShardClient_ERROR" in str(error),\
+            "ShardServer_VERTEX_ERROR out of range shard accepted"
+
+    # the connection is still usable after an error
+    assert np.array_equal(client.get_shard("investor_names", 10, 105), whole_range),\
+        "ShardServer_VERTEX_ERROR shards are not reproducible"
+
+    client.close()
+    test_object.stop()
+
+# Unit tests to test if the edge partitions are disjoint and hold all edges
+def test_edge_shards():
+    test_object = start_test_server("unix:shard_service_test.sock")
+    clients = [ShardClient("unix:shard_service_test.sock") for i in range(0, 2)]
+
+    partitions = [clients[partition % 2].get_shard("friend_edges", partition=partition) for partition in range(0, 4)]
+    all_edges = np.concatenate([partition for partition in partitions if partition is not None])
+
+    assert sorted(all_edges["SourceVertexID"].tolist()) == list(range(0, 99)),\
+        "ShardServer_EDGE_ERROR partitions do not hold all edges once"
+
+    partitioner = test_object.edge_partitioners["friend_edges"]
+    for partition_index, partition in enumerate(partitions):
+        if partition is not None:
+            assert (partitioner.get_partition_indices(partition["SourceVertexID"]) == partition_index).all(),\
+                "ShardServer_EDGE_ERROR edges in the wrong partition"
+
+    for client in clients:
+        client.close()
+    test_object.stop()
+    os.remove("shard_service_test.sock")
+
+# Unit tests to test if the vertex requests are served while the edges are being generated
+def test_vertex_shards_during_edge_generation():
+    edge_generation_event = threading.Event()
+
+    def get_waiting_edge_batches():
+        edge_generation_event.wait()
+        return get_test_edge_batches()
+
+    test_object = start_test_server("unix:shard_service_test.sock", get_waiting_edge_batches)
+    clients = [ShardClient("unix:shard_service_test.sock") for i in range(0, 2)]
+
+    edge_thread = threading.Thread(target=clients[0].get_shard, args=("friend_edges",), kwargs={"partition": 0}, daemon=True)
+    edge_thread.start()
+
+    vertex_shards = []
+    vertex_thread = threading.Thread(target=lambda: vertex_shards.append(clients[1].get_shard("investor_names", 10, 105)))
+    vertex_thread.start()
+    vertex_thread.join(timeout=10)
+
+    assert not vertex_thread.is_alive() and len(vertex_shards[0]) == 95,\
+        "ShardServer_LOCK_ERROR vertex request waits for the edge generation"
+
+    edge_generation_event.set()
+    edge_thread.join()
+
+    for client in clients:
+        client.close()
+    test_object.stop()
+    os.remove("shard_service_test.sock")
+
+# Function to execute all defined unit tests for the ShardServer and the ShardClient
+def execute_all_unit_tests():
+    test_vertex_shards()
+    test_edge_shards()
+    test_vertex_shards_during_edge_generation()
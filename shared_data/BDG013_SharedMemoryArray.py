@@ -0,0 +1,178 @@
+"""
+FYP : 22013
+
+Module:
+    Base Data Generator
+
+Description:
+    This python script contains the definition of the SharedMemoryArray class
+    and its unit tests.
+
+    The SharedMemoryArray class publishes a NumPy array once into a
+    multiprocessing.shared_memory block. When the object is passed to another
+    process (e.g. as an argument of multiprocessing.Process) only the name,
+    shape and dtype of the block are pickled, and the receiving process attaches
+    to the same block as a NumPy view without copying the data. Forked processes
+    inherit the mapping of the block directly.
+
+    The processes attaching to the block must be started through
+    multiprocessing by the publishing process, so that they share its resource
+    tracker and only the publishing process frees the block.
+
+"""
+
+
+# Imports from built-in modules
+import multiprocessing as mp
+from multiprocessing import shared_memory
+import numpy as np
+import os
+import pickle
+
+class SharedMemoryArray:
+
+    def __init__(self, shared_memory_block, shape, dtype, owner_pid):
+
+        # The shared memory block storing the array data
+        self.shared_memory_block = shared_memory_block
+
+        # Shape and dtype of the array stored in the block
+        self.shape = tuple(shape)
+        self.dtype = np.dtype(dtype)
+
+        # Only the process that published the array unlinks the block
+        self.owner_pid = owner_pid
+
+        # The NumPy view on the shared memory block
+        self.array = np.ndarray(self.shape, dtype=self.dtype, buffer=self.shared_memory_block.buf)
+
+    @classmethod
+    def publish(cls, array):
+        """
+        Description:
+            Copies the array into a new shared memory block and returns the
+            SharedMemoryArray owning the block.
+        """
+
+        array = np.ascontiguousarray(array)
+
+        # shared memory blocks cannot be empty
+        shared_memory_block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+
+        shared_array = cls(shared_memory_block, array.shape, array.dtype, os.getpid())
+        shared_array.array[...] = array
+
+        return shared_array
+
+    @classmethod
+    def attach(cls, handle):
+        """
+        Description:
+            Attaches to the shared memory block described by the handle returned
+            by get_handle(), without copying the array.
+        """
+
+        name, shape, dtype, owner_pid = handle
+        shared_memory_block = shared_memory.SharedMemory(name=name)
+
+        return cls(shared_memory_block, shape, dtype, owner_pid)
+
+    def get_handle(self):
+        """
+        Description:
+            Returns the (picklable) name, shape and dtype of the shared memory
+            block and the process ID of its owner.
+        """
+
+        return (self.shared_memory_block.name, self.shape, self.dtype.str, self.owner_pid)
+
+    def __reduce__(self):
+        # Only the handle is pickled, the receiving process attaches to the block
+        return (SharedMemoryArray.attach, (self.get_handle(),))
+
+    def __len__(self):
+        return len(self.array)
+
+    def close(self):
+        """
+        Description:
+            Releases the view and closes the block in this process. The owner also
+            unlinks (frees) the block, so it must be called by the owner only after
+            all other processes have finished using the array.
+        """
+
+        self.array = None
+        self.shared_memory_block.close()
+        if (os.getpid() == self.owner_pid):
+            self.shared_memory_block.unlink()
+
+
+# Function executed by the child process of test_shared_memory_array()
+def add_one_in_child_process(shared_array):
+    shared_array.array += 1
+    shared_array.close()
+
+# Unit tests to test if SharedMemoryArray shares the array without copying it
+def test_shared_memory_array():
+    test_object = SharedMemoryArray.publish(np.arange(10, dtype=np.int32))
+
+    assert test_object.array.tolist() == list(range(10)),\
+        "SharedMemoryArray_PUBLISH_ERROR array not copied into the shared memory block"
+
+    child_process = mp.Process(target=add_one_in_child_process, args=(test_object,))
+    child_process.start()
+    child_process.join()
+
+    assert child_process.exitcode == 0,\
+        "SharedMemoryArray_ATTACH_ERROR child process failed"
+
+    assert test_object.array.tolist() == list(range(1, 11)),\
+        "SharedMemoryArray_ATTACH_ERROR child process did not attach to the same block"
+
+    attached_object = SharedMemoryArray.attach(test_object.get_handle())
+
+    assert attached_object.array.dtype == np.int32 and attached_object.shape == (10,),\
+        "SharedMemoryArray_ATTACH_ERROR dtype or shape changed"
+
+    test_object.close()
+
+    # the attached view stays valid until it is closed as well
+    assert attached_object.array.tolist() == list(range(1, 11)),\
+        "SharedMemoryArray_ATTACH_ERROR attached view changed"
+
+    attached_object.array = None
+    attached_object.shared_memory_block.close()
+
+# Unit tests to test if SharedMemoryArray pickles only the handle of the block
+def test_pickle_shared_memory_array():
+    test_object = SharedMemoryArray.publish(np.arange(5, dtype=np.int64))
+
+    handle_function, handle_arguments = test_object.__reduce__()
+
+    assert handle_arguments == (test_object.get_handle(),),\
+        "SharedMemoryArray_PICKLE_ERROR more than the handle is pickled"
+
+    unpickled_object = pickle.loads(pickle.dumps(test_object))
+    unpickled_object.array[0] = 100
+
+    assert test_object.array[0] == 100,\
+        "SharedMemoryArray_PICKLE_ERROR unpickled object does not share the block"
+
+    unpickled_object.array = None
+    unpickled_object.shared_memory_block.close()
+    test_object.close()
+
+# Unit tests to test if SharedMemoryArray handles empty arrays
+def test_empty_shared_memory_array():
+    test_object = SharedMemoryArray.publish(np.zeros((0,), dtype=np.int64))
+
+    assert len(test_object) == 0,\
+        "SharedMemoryArray_PUBLISH_ERROR empty array has elements"
+
+    test_object.close()
+
+# Function to execute all defined unit tests for SharedMemoryArray
+def execute_all_unit_tests():
+    test_shared_memory_array()
+    test_pickle_shared_memory_array()
+    test_empty_shared_memory_array()
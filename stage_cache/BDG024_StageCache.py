@@ -0,0 +1,314 @@
+"""
+FYP : 22013
+
+Module:
+    Base Data Generator
+
+Description:
+    This python script contains the definition of the StageCache class, the
+    functions computing the checksums and keys of the cached stages and their
+    unit tests.
+
+    The StageCache class stores the output files of the generation stages in a
+    local cache directory, one entry per stage key. The key of a stage hashes
+    the configuration the stage depends on (including the random seed) and the
+    output hashes of its upstream stages, so a stage is only regenerated if its
+    own configuration or one of its inputs changed. A restored entry is one
+    output generated under the key, which only matches a regeneration for
+    the stages that are reproducible from the random seed (the stages drawing
+    from the shared random generators with several threads are not). An entry
+    holds the output files, their SHA-256 checksums, optional metadata and the
+    output hash (the hash of the checksums and the metadata) used by the
+    downstream stages.
+
+    Restoring an entry hardlinks its files to the destination files (or copies
+    them across file systems) after verifying their checksums; an entry whose
+    files were modified is removed and the stage is regenerated. The total size
+    of the entries is bounded: the least recently used entries are evicted once
+    the size exceeds max_cache_bytes.
+
+"""
+
+
+# Imports from built-in modules
+import hashlib
+import json
+import os
+import shutil
+import time
+
+# Number of bytes read at a time when computing a checksum
+CHECKSUM_BLOCK_SIZE = 1024 * 1024
+
+# Name of the file describing a cache entry
+MANIFEST_FILE_NAME = "manifest.json"
+
+def get_file_checksum(file_name):
+    """
+    Description:
+        Returns the SHA-256 checksum (hexadecimal) of the file content.
+    """
+
+    checksum = hashlib.sha256()
+    with open(file_name, mode='rb') as in_file:
+        for block in iter(lambda: in_file.read(CHECKSUM_BLOCK_SIZE), b""):
+            checksum.update(block)
+        in_file.close()
+
+    return checksum.hexdigest()
+
+def get_stage_key(stage_name, stage_configuration, upstream_hashes=[]):
+    """
+    Description:
+        Returns the key (hexadecimal SHA-256) of the stage from its name, its
+        configuration (a JSON serializable dictionary) and the output hashes of
+        its upstream stages.
+    """
+
+    key_content = json.dumps({"stage": stage_name,\
+                                "configuration": stage_configuration,\
+                                "upstream_hashes": list(upstream_hashes)}, sort_keys=True)
+    return hashlib.sha256(key_content.encode()).hexdigest()
+
+def link_or_copy_file(source_file, destination_file):
+    """
+    Description:
+        Replaces the destination file with a hardlink to the source file, or with
+        a copy if the files are on different file systems.
+    """
+
+    if os.path.lexists(destination_file):
+        os.remove(destination_file)
+
+    try:
+        os.link(source_file, destination_file)
+    except OSError:
+        shutil.copyfile(source_file, destination_file)
+
+class StageCache:
+
+    def __init__(self, cache_directory, max_cache_bytes=10 * 1024 * 1024 * 1024):
+
+        # Directory with one subdirectory (named after the stage key) per entry
+        self.cache_directory = cache_directory
+        os.makedirs(cache_directory, exist_ok=True)
+
+        # Largest total size of the entries before the least recently used ones are evicted
+        self.max_cache_bytes = max_cache_bytes
+
+    def get_entry_directory(self, stage_key):
+        """
+        Description:
+            Returns the directory of the entry of the stage key.
+        """
+
+        return os.path.join(self.cache_directory, stage_key)
+
+    def lookup(self, stage_key):
+        """
+        Description:
+            Returns the manifest of the entry of the stage key, or None if the
+            entry does not exist.
+        """
+
+        manifest_file = os.path.join(self.get_entry_directory(stage_key), MANIFEST_FILE_NAME)
+        if not os.path.exists(manifest_file):
+            return None
+
+        with open(manifest_file, mode='r') as in_file:
+            manifest = json.load(in_file)
+            in_file.close()
+
+        return manifest
+
+    def restore(self, stage_key, output_files):
+        """
+        Description:
+            Restores the files of the entry of the stage key to the output files
+            (in the order they were stored) and marks the entry as recently used.
+            Returns the manifest, or None if there is no valid entry.
+        """
+
+        manifest = self.lookup(stage_key)
+        if (manifest is None) or (len(manifest["files"]) != len(output_files)):
+            return None
+
+        entry_directory = self.get_entry_directory(stage_key)
+        cached_files = [os.path.join(entry_directory, file_entry["cached_name"]) for file_entry in manifest["files"]]
+
+        # an entry whose files were modified (e.g. through a hardlink) is invalid
+        for cached_file, file_entry in zip(cached_files, manifest["files"]):
+            if (not os.path.exists(cached_file)) or (get_file_checksum(cached_file) != file_entry["checksum"]):
+                self.remove_entry(stage_key)
+                return None
+
+        for cached_file, output_file in zip(cached_files, output_files):
+            if os.path.dirname(output_file):
+                os.makedirs(os.path.dirname(output_file), exist_ok=True)
+            link_or_copy_file(cached_file, output_file)
+
+        # the modification time of the manifest orders the entries for the LRU eviction
+        os.utime(os.path.join(entry_directory, MANIFEST_FILE_NAME))
+        return manifest
+
+    def store(self, stage_key, stage_name, output_files, metadata=None):
+        """
+        Description:
+            Stores the output files of the stage (with their checksums) and the
+            metadata as the entry of the stage key, then evicts the least
+            recently used entries. Returns the manifest.
+        """
+
+        entry_directory = self.get_entry_directory(stage_key)
+        temporary_directory = entry_directory + ".tmp"
+        shutil.rmtree(temporary_directory, ignore_errors=True)
+        os.makedirs(temporary_directory)
+
+        file_entries = []
+        for i, output_file in enumerate(output_files):
+            cached_name = str(i) + "_" + os.path.basename(output_file)
+            link_or_copy_file(output_file, os.path.join(temporary_directory, cached_name))
+            file_entries.append({"cached_name": cached_name,\
+                                    "checksum": get_file_checksum(output_file),\
+                                    "size": os.path.getsize(output_file)})
+
+        output_hash = hashlib.sha256(json.dumps({"checksums": [file_entry["checksum"] for file_entry in file_entries],\
+                                                    "metadata": metadata}, sort_keys=True).encode()).hexdigest()
+
+        manifest = {"stage": stage_name,\
+                    "files": file_entries,\
+                    "metadata": metadata,\
+                    "output_hash": output_hash,\
+                    "created": time.time()}
+
+        with open(os.path.join(temporary_directory, MANIFEST_FILE_NAME), mode='w') as out_file:
+            json.dump(manifest, out_file, indent=2)
+            out_file.close()
+
+        # the entry becomes visible only once it is complete
+        shutil.rmtree(entry_directory, ignore_errors=True)
+        os.rename(temporary_directory, entry_directory)
+
+        self.evict(kept_stage_key=stage_key)
+        return manifest
+
+    def remove_entry(self, stage_key):
+        """
+        Description:
+            Removes the entry of the stage key.
+        """
+
+        shutil.rmtree(self.get_entry_directory(stage_key), ignore_errors=True)
+
+    def get_entries(self):
+        """
+        Description:
+            Returns the list of (last use time, stage key, size in bytes) of all
+            entries.
+        """
+
+        entries = []
+        for stage_key in os.listdir(self.cache_directory):
+            manifest_file = os.path.join(self.get_entry_directory(stage_key), MANIFEST_FILE_NAME)
+            if not os.path.exists(manifest_file):
+                continue
+
+            manifest = self.lookup(stage_key)
+            entries.append((os.path.getmtime(manifest_file), stage_key, sum(file_entry["size"] for file_entry in manifest["files"])))
+
+        return entries
+
+    def evict(self, kept_stage_key=None):
+        """
+        Description:
+            Removes the least recently used entries (except the one of
+            kept_stage_key) until the total size is at most max_cache_bytes.
+        """
+
+        entries = sorted(self.get_entries())
+        total_size = sum(size for last_use_time, stage_key, size in entries)
+
+        for last_use_time, stage_key, size in entries:
+            if total_size <= self.max_cache_bytes:
+                break
+
+            if stage_key != kept_stage_key:
+                self.remove_entry(stage_key)
+                total_size -= size
+
+
+# Writes the text to the file of the cache tests
+def write_test_file(file_name, text):
+    with open(file_name, mode='w') as out_file:
+        out_file.write(text)
+        out_file.close()
+
+# Unit tests to test if the stage keys follow the configuration and the upstream stages
+def test_get_stage_key():
+    stage_key = get_stage_key("mirror_edges", {"number_of_mirror_edges": 300, "random_seed": 1}, ["abc",])
+
+    assert stage_key == get_stage_key("mirror_edges", {"random_seed": 1, "number_of_mirror_edges": 300}, ["abc",]),\
+        "StageCache_KEY_ERROR key depends on the order of the configuration"
+
+    assert stage_key != get_stage_key("mirror_edges", {"number_of_mirror_edges": 301, "random_seed": 1}, ["abc",]),\
+        "StageCache_KEY_ERROR key does not depend on the configuration"
+
+    assert stage_key != get_stage_key("mirror_edges", {"number_of_mirror_edges": 300, "random_seed": 1}, ["abd",]),\
+        "StageCache_KEY_ERROR key does not depend on the upstream stages"
+
+# Unit tests to test if the stored files are restored and modified entries are rejected
+def test_stage_cache():
+    shutil.rmtree("stage_cache_test", ignore_errors=True)
+    os.makedirs("stage_cache_test/data")
+    test_object = StageCache("stage_cache_test/cache")
+
+    write_test_file("stage_cache_test/data/a.csv", "a|1\n")
+    write_test_file("stage_cache_test/data/b.csv", "b|2\n")
+    manifest = test_object.store("key1", "friend_edges", ["stage_cache_test/data/a.csv", "stage_cache_test/data/b.csv"], metadata={"edges": 1})
+
+    assert test_object.restore("key2", ["stage_cache_test/data/a.csv",]) is None,\
+        "StageCache_RESTORE_ERROR missing entry is restored"
+
+    os.remove("stage_cache_test/data/a.csv")
+    os.remove("stage_cache_test/data/b.csv")
+    restored_manifest = test_object.restore("key1", ["stage_cache_test/data/c.csv", "stage_cache_test/data/new/d.csv"])
+
+    assert restored_manifest["output_hash"] == manifest["output_hash"] and restored_manifest["metadata"] == {"edges": 1},\
+        "StageCache_RESTORE_ERROR restored manifest is invalid"
+
+    with open("stage_cache_test/data/new/d.csv", mode='r') as in_file:
+        assert in_file.read() == "b|2\n",\
+            "StageCache_RESTORE_ERROR restored file is invalid"
+        in_file.close()
+
+    # writing into a restored (hardlinked) file invalidates the entry
+    with open("stage_cache_test/data/c.csv", mode='a') as out_file:
+        out_file.write("x|3\n")
+        out_file.close()
+
+    assert test_object.restore("key1", ["stage_cache_test/data/c.csv", "stage_cache_test/data/d.csv"]) is None and test_object.lookup("key1") is None,\
+        "StageCache_RESTORE_ERROR modified entry is restored"
+
+# Unit tests to test if the least recently used entries are evicted
+def test_stage_cache_eviction():
+    shutil.rmtree("stage_cache_eviction_test", ignore_errors=True)
+    os.makedirs("stage_cache_eviction_test")
+    test_object = StageCache("stage_cache_eviction_test/cache", max_cache_bytes=250)
+
+    write_test_file("stage_cache_eviction_test/data.csv", "x" * 100)
+    for i, stage_key in enumerate(["key1", "key2"]):
+        test_object.store(stage_key, "company_list", ["stage_cache_eviction_test/data.csv",])
+        os.utime(os.path.join(test_object.get_entry_directory(stage_key), MANIFEST_FILE_NAME), (1000 + i, 1000 + i))
+
+    # restoring key1 makes key2 the least recently used entry
+    test_object.restore("key1", ["stage_cache_eviction_test/restored.csv",])
+    test_object.store("key3", "company_list", ["stage_cache_eviction_test/data.csv",])
+
+    assert sorted(stage_key for last_use_time, stage_key, size in test_object.get_entries()) == ["key1", "key3"],\
+        "StageCache_EVICT_ERROR least recently used entry is not evicted"
+
+# Function to execute all defined unit tests for StageCache
+def execute_all_unit_tests():
+    test_get_stage_key()
+    test_stage_cache()
+    test_stage_cache_eviction()
@@ -0,0 +1,413 @@
+"""
+FYP : 22013
+
+Module:
+    Base Data Generator
+
+Description:
+    This python script contains the definition of the AutoTuner class, the
+    functions loading and saving tuning profiles and their unit tests.
+
+    The AutoTuner class chooses the parameters of every generation stage (the
+    number of worker threads, the number of lines given to a thread at a time and,
+    for the edge stages, the number of locks striping the adjacency matrix) from
+    the number of CPUs, the available memory and a short calibration run of the
+    stage:
+
+        - the batch size is chosen so that a batch takes about
+          target_batch_seconds to generate (long enough to amortize the locking
+          per batch), bounded so that the batches of all workers fit in a
+          fraction of the available memory and every worker gets a few batches
+        - the number of workers is bounded by the CPUs available to the stage
+          (the 3 vertex stages run in their own processes at the same time) and
+          by the number of batches
+        - the number of lock stripes grows with the number of workers, so two
+          workers rarely wait for the same lock
+
+    The tuned parameters are saved into a JSON tuning profile together with the
+    CPU count and the scale they were tuned for, and reused by later runs with
+    the same CPU count and scale instead of calibrating again.
+
+"""
+
+
+# Imports from built-in modules
+import json
+import math
+import os
+import time
+import numpy as np
+
+# Imports from Base Data Generator Module
+from data_sinks.BDG010_RecordBatch import format_record_batch
+import edge_generators.BDG004_FriendEdgeGenerator as FEG
+import edge_generators.BDG005_MirrorEdgeGenerator as MEG
+import vertex_generators.BDG002_NamedVertexGenerator as NamedVG
+import vertex_generators.BDG003_NumberedVertexGenerator as NumberedVG
+
+# Version of the tuning profile format, profiles of other versions are tuned again
+TUNING_PROFILE_VERSION = 1
+
+# Generation stages with tunable parameters
+STAGE_NAMES = ["investor_names", "tradebook_investment_amounts", "company_names", "friend_edges", "mirror_edges"]
+
+# Stages generating their edges under the striped locks of the adjacency matrix
+STRIPED_STAGE_NAMES = ["friend_edges", "mirror_edges"]
+
+# Stages running at the same time in their own processes (next to the main process)
+CONCURRENT_STAGE_NAMES = ["investor_names", "tradebook_investment_amounts", "company_names"]
+
+# Smallest number of lines given to a thread at a time
+MIN_BATCH_SIZE = 16
+
+# Number of batches every worker should get at least, so the workers finish at about the same time
+MIN_BATCHES_PER_WORKER = 4
+
+# Number of lock stripes per worker of the striped stages
+LOCK_STRIPES_PER_WORKER = 16
+
+# Largest number of items generated by the calibration run of a stage
+MAX_CALIBRATION_ITEMS = 4096
+
+# Number of investors of the small graphs used to calibrate the edge stages
+CALIBRATION_NUMBER_OF_INVESTORS = 1000
+
+def get_cpu_count():
+    """
+    Description:
+        Returns the number of CPUs this process may run on.
+    """
+
+    if hasattr(os, "sched_getaffinity"):
+        return max(1, len(os.sched_getaffinity(0)))
+    return max(1, os.cpu_count() or 1)
+
+def get_available_memory():
+    """
+    Description:
+        Returns the number of bytes of memory available without swapping (None
+        if it cannot be found on this platform).
+    """
+
+    try:
+        with open("/proc/meminfo", mode='r') as meminfo_file:
+            for line in meminfo_file:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+
+    try:
+        return os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_AVPHYS_PAGES")
+    except (AttributeError, ValueError, OSError):
+        return None
+
+def get_stage_item_counts(config_obj):
+    """
+    Description:
+        Returns the number of items (vertices or edges) every stage generates
+        with the configuration.
+    """
+
+    return {"investor_names": config_obj.number_of_investors,\
+            "tradebook_investment_amounts": config_obj.number_of_investors,\
+            "company_names": config_obj.number_of_companies,\
+            "friend_edges": config_obj.number_of_friend_edges,\
+            "mirror_edges": config_obj.number_of_mirror_edges}
+
+def create_calibration_function(stage_name):
+    """
+    Description:
+        Returns the calibration function of the stage. It generates and formats
+        a record batch of the given size with the generator of the stage and
+        returns the number of bytes it held in memory. The edge stages are
+        calibrated on a small graph of CALIBRATION_NUMBER_OF_INVESTORS investors.
+    """
+
+    if stage_name in CONCURRENT_STAGE_NAMES:
+        if stage_name == "tradebook_investment_amounts":
+            generator_obj = NumberedVG.NumberedVertexGenerator(item_cardinality=MAX_CALIBRATION_ITEMS)
+        else:
+            generator_obj = NamedVG.NamedVertexGenerator(item_cardinality=MAX_CALIBRATION_ITEMS,\
+                                                            is_numeric=(stage_name == "investor_names"))
+
+        def generate_vertex_batch(batch_size):
+            batch = generator_obj.generate_record_batch(0, batch_size, np.random.default_rng())
+            return batch.nbytes + len(format_record_batch(batch))
+
+        return generate_vertex_batch
+
+    friend_edges_generator_obj = FEG.FriendEdgeGenerator(thread_number=1,\
+                                                            number_of_friend_edges=10 * CALIBRATION_NUMBER_OF_INVESTORS,\
+                                                            follower_list=np.random.permutation(CALIBRATION_NUMBER_OF_INVESTORS),\
+                                                            leader_list_1=np.random.permutation(CALIBRATION_NUMBER_OF_INVESTORS),\
+                                                            leader_list_2=np.random.permutation(CALIBRATION_NUMBER_OF_INVESTORS))
+
+    if stage_name == "friend_edges":
+        def generate_friend_batch(batch_size):
+            batch = friend_edges_generator_obj.generate_edge_batch(batch_size)
+            friend_edges_generator_obj.update_adjacency_list(batch)
+            return batch.nbytes + len(format_record_batch(batch))
+
+        return generate_friend_batch
+
+    # the mirror edges are calibrated on the friend edges of the small graph
+    for batch in friend_edges_generator_obj.iter_batches():
+        pass
+
+    mirror_edges_generator_obj = MEG.MirrorEdgeGenerator(thread_number=1,\
+                                                            follower_list=friend_edges_generator_obj.follower_list,\
+                                                            number_of_friend_edges=friend_edges_generator_obj.number_of_friend_edges,\
+                                                            friend_adjacency_dict=friend_edges_generator_obj.friend_adjacency_dict)
+
+    def generate_mirror_batch(batch_size):
+        batch = mirror_edges_generator_obj.generate_mirror_batch(batch_size)
+        return batch.nbytes + len(format_record_batch(batch, mirror_edges_generator_obj.get_header_fields()))
+
+    return generate_mirror_batch
+
+class AutoTuner:
+
+    def __init__(self, cpu_count=None,\
+                 available_memory=None,\
+                 calibration_seconds=0.05,\
+                 target_batch_seconds=0.02,\
+                 memory_fraction=0.25,\
+                 calibration_functions=None):
+
+        # Number of CPUs the stages may use
+        self.cpu_count = cpu_count if cpu_count is not None else get_cpu_count()
+
+        # Number of bytes of available memory (None if unknown)
+        self.available_memory = available_memory if available_memory is not None else get_available_memory()
+
+        # Time spent calibrating every stage
+        self.calibration_seconds = calibration_seconds
+
+        # Time a worker should spend generating a single batch
+        self.target_batch_seconds = target_batch_seconds
+
+        # Fraction of the available memory the batches of a stage may hold at the same time
+        self.memory_fraction = memory_fraction
+
+        # Calibration function of every stage (created by create_calibration_function() if not given)
+        self.calibration_functions = calibration_functions if calibration_functions is not None else {}
+
+    def get_profile_key(self, config_obj):
+        """
+        Description:
+            Returns the key identifying the machine and the scale the stages are
+            tuned for. A saved tuning profile is only reused if its key is equal.
+        """
+
+        return {"version": TUNING_PROFILE_VERSION,\
+                "cpu_count": self.cpu_count,\
+                "number_of_items": get_stage_item_counts(config_obj)}
+
+    def calibrate(self, stage_name):
+        """
+        Description:
+            Runs the calibration function of the stage with doubling batch sizes
+            until calibration_seconds have passed (or MAX_CALIBRATION_ITEMS items
+            are generated) and returns the measured seconds and bytes per item.
+        """
+
+        if stage_name not in self.calibration_functions:
+            self.calibration_functions[stage_name] = create_calibration_function(stage_name)
+        calibration_function = self.calibration_functions[stage_name]
+
+        calibrated_items = 0
+        calibrated_bytes = 0
+        calibrated_seconds = 0.0
+        batch_size = MIN_BATCH_SIZE
+
+        while (calibrated_items + batch_size <= MAX_CALIBRATION_ITEMS) and\
+                ((calibrated_items == 0) or (calibrated_seconds < self.calibration_seconds)):
+            start_time = time.perf_counter()
+            calibrated_bytes += calibration_function(batch_size)
+            calibrated_seconds += time.perf_counter() - start_time
+            calibrated_items += batch_size
+            batch_size *= 2
+
+        return (calibrated_seconds / calibrated_items, calibrated_bytes / calibrated_items)
+
+    def tune_stage(self, stage_name, number_of_items, seconds_per_item, bytes_per_item, number_of_vertices=None):
+        """
+        Description:
+            Returns the parameters of the stage (thread_number, lines_per_thread
+            and, for the striped stages, lock_list_element_cardinality) for
+            generating number_of_items items with the measured cost per item.
+        """
+
+        number_of_items = max(1, number_of_items)
+
+        # the concurrent vertex stages share the CPUs with each other and the main process
+        available_cpus = self.cpu_count
+        if stage_name in CONCURRENT_STAGE_NAMES:
+            available_cpus = max(1, self.cpu_count // (len(CONCURRENT_STAGE_NAMES) + 1))
+
+        thread_number = max(1, min(available_cpus, math.ceil(number_of_items / MIN_BATCH_SIZE)))
+
+        # batches taking about target_batch_seconds, bounded by the memory and by the number of items
+        lines_per_thread = round(self.target_batch_seconds / max(seconds_per_item, 1e-9))
+        if self.available_memory is not None:
+            lines_per_thread = min(lines_per_thread,\
+                                    int(self.memory_fraction * self.available_memory / (thread_number * max(bytes_per_item, 1))))
+        lines_per_thread = min(lines_per_thread, math.ceil(number_of_items / (thread_number * MIN_BATCHES_PER_WORKER)))
+        lines_per_thread = max(MIN_BATCH_SIZE, lines_per_thread)
+
+        thread_number = max(1, min(thread_number, math.ceil(number_of_items / lines_per_thread)))
+
+        stage_parameters = {"thread_number": thread_number, "lines_per_thread": lines_per_thread}
+
+        if stage_name in STRIPED_STAGE_NAMES:
+            lock_list_element_cardinality = LOCK_STRIPES_PER_WORKER * thread_number
+            if number_of_vertices is not None:
+                lock_list_element_cardinality = max(1, min(lock_list_element_cardinality, number_of_vertices))
+            stage_parameters["lock_list_element_cardinality"] = lock_list_element_cardinality
+
+        return stage_parameters
+
+    def tune(self, config_obj):
+        """
+        Description:
+            Calibrates and tunes every stage for the configuration and returns the
+            tuning profile (a dictionary that can be saved as JSON).
+        """
+
+        stage_item_counts = get_stage_item_counts(config_obj)
+        calibration = {}
+        stages = {}
+
+        for stage_name in STAGE_NAMES:
+            seconds_per_item, bytes_per_item = self.calibrate(stage_name)
+            calibration[stage_name] = {"seconds_per_item": seconds_per_item, "bytes_per_item": bytes_per_item}
+            stages[stage_name] = self.tune_stage(stage_name, stage_item_counts[stage_name],\
+                                                    seconds_per_item, bytes_per_item,\
+                                                    number_of_vertices=config_obj.number_of_investors)
+
+        return {"key": self.get_profile_key(config_obj),\
+                "available_memory": self.available_memory,\
+                "calibration": calibration,\
+                "stages": stages}
+
+def load_tuning_profile(tuning_profile_file):
+    """
+    Description:
+        Returns the tuning profile saved in the JSON file (None if the file does
+        not exist or cannot be read).
+    """
+
+    try:
+        with open(tuning_profile_file, mode='r') as in_file:
+            return json.load(in_file)
+    except (OSError, ValueError):
+        return None
+
+def save_tuning_profile(tuning_profile, tuning_profile_file):
+    """
+    Description:
+        Writes the tuning profile to the JSON file.
+    """
+
+    with open(tuning_profile_file, mode='w') as out_file:
+        json.dump(tuning_profile, out_file, indent=2)
+        out_file.close()
+
+def load_or_create_tuning_profile(config_obj, tuner=None):
+    """
+    Description:
+        Returns the tuning profile saved in config_obj.tuning_profile_file_name
+        if it was tuned for this machine and scale. Otherwise, the stages are
+        tuned and the new profile is saved (if a file name is configured).
+    """
+
+    if tuner is None:
+        tuner = AutoTuner()
+
+    if config_obj.tuning_profile_file_name is not None:
+        tuning_profile = load_tuning_profile(config_obj.tuning_profile_file_name)
+        if (tuning_profile is not None) and (tuning_profile.get("key") == tuner.get_profile_key(config_obj)):
+            print("Reusing Tuning Profile", config_obj.tuning_profile_file_name)
+            return tuning_profile
+
+    tuning_profile = tuner.tune(config_obj)
+
+    if config_obj.tuning_profile_file_name is not None:
+        save_tuning_profile(tuning_profile, config_obj.tuning_profile_file_name)
+    print("Auto Tuning Complete")
+
+    return tuning_profile
+
+
+# Configuration used by the unit tests below
+class TuningTestConfiguration:
+    def __init__(self, tuning_profile_file_name):
+        self.number_of_investors = 100000
+        self.number_of_companies = 2000
+        self.number_of_friend_edges = 500000
+        self.number_of_mirror_edges = 300000
+        self.tuning_profile_file_name = tuning_profile_file_name
+
+# Unit tests to test if the stage parameters follow the CPUs, the memory and the cost per item
+def test_tune_stage():
+    test_object = AutoTuner(cpu_count=16, available_memory=2 ** 30, calibration_functions={})
+
+    stage_parameters = test_object.tune_stage("friend_edges", 1000000, 1e-5, 100, number_of_vertices=100000)
+    assert stage_parameters == {"thread_number": 16, "lines_per_thread": 2000, "lock_list_element_cardinality": 256},\
+        "AutoTuner_TUNE_ERROR edge stage parameters are invalid"
+
+    stage_parameters = test_object.tune_stage("company_names", 1000000, 1e-5, 100)
+    assert stage_parameters == {"thread_number": 4, "lines_per_thread": 2000},\
+        "AutoTuner_TUNE_ERROR concurrent stages must share the CPUs"
+
+    # few items: the workers get the smallest batches and the stripes are bounded by the vertices
+    stage_parameters = test_object.tune_stage("mirror_edges", 160, 1e-7, 100, number_of_vertices=50)
+    assert stage_parameters == {"thread_number": 10, "lines_per_thread": 16, "lock_list_element_cardinality": 50},\
+        "AutoTuner_TUNE_ERROR small stage parameters are invalid"
+
+    # little memory: the batches of all workers must fit in the memory fraction
+    test_object = AutoTuner(cpu_count=2, available_memory=8 * 10 ** 6, calibration_functions={})
+    assert test_object.tune_stage("friend_edges", 10 ** 8, 1e-7, 1000)["lines_per_thread"] == 1000,\
+        "AutoTuner_TUNE_ERROR batch size does not fit in memory"
+
+# Unit tests to test if the calibration measures the generators of the stages
+def test_calibrate():
+    test_object = AutoTuner(cpu_count=4, available_memory=2 ** 30, calibration_seconds=0.001)
+
+    for stage_name in ["tradebook_investment_amounts", "friend_edges"]:
+        seconds_per_item, bytes_per_item = test_object.calibrate(stage_name)
+        assert seconds_per_item > 0 and bytes_per_item > 8,\
+            "AutoTuner_CALIBRATE_ERROR measured cost per item is invalid"
+
+# Unit tests to test if a saved tuning profile is reused only for the same machine and scale
+def test_load_or_create_tuning_profile():
+    calibration_calls = []
+    def calibration_function(batch_size):
+        calibration_calls.append(batch_size)
+        return 50 * batch_size
+
+    test_config = TuningTestConfiguration("tuning_profile_test.json")
+    if os.path.exists(test_config.tuning_profile_file_name):
+        os.remove(test_config.tuning_profile_file_name)
+
+    test_object = AutoTuner(cpu_count=8, available_memory=2 ** 30, calibration_seconds=0.0,\
+                            calibration_functions={stage_name: calibration_function for stage_name in STAGE_NAMES})
+    tuning_profile = load_or_create_tuning_profile(test_config, test_object)
+
+    assert len(calibration_calls) == len(STAGE_NAMES) and set(tuning_profile["stages"]) == set(STAGE_NAMES),\
+        "AutoTuner_PROFILE_ERROR stages are not tuned"
+
+    assert load_or_create_tuning_profile(test_config, test_object) == tuning_profile and len(calibration_calls) == len(STAGE_NAMES),\
+        "AutoTuner_PROFILE_ERROR saved profile is not reused"
+
+    test_config.number_of_friend_edges = 600000
+    load_or_create_tuning_profile(test_config, test_object)
+    assert len(calibration_calls) == 2 * len(STAGE_NAMES),\
+        "AutoTuner_PROFILE_ERROR profile of another scale is reused"
+
+# Function to execute all defined unit tests for AutoTuner
+def execute_all_unit_tests():
+    test_tune_stage()
+    test_calibrate()
+    test_load_or_create_tuning_profile()
@@ -0,0 +1,392 @@
+"""
+FYP : 22013
+
+Module:
+    Base Data Generator
+
+Description:
+    This python script contains the definition of the UpdateStreamEmitter class
+    and its unit tests.
+
+    The UpdateStreamEmitter class turns the generated friend edges and mirror
+    edges into a single stream of timestamped update operations:
+
+        - add_friend: a friend edge between two investors
+        - add_mirror: a mirror edge between the tradebooks of two friends
+        - remove_mirror: the removal of a mirror edge
+
+    Every add_mirror follows the add_friend of its investors after a random
+    delay, and every remove_mirror follows its add_mirror after a random delay.
+    The operations are emitted at a configurable rate (operations per second) or
+    following a load profile, using asyncio so that the pacing follows the
+    schedule instead of accumulating delays. The stream is written to a file, a
+    pipe ('-' for the standard output, 'fd:N' for an open file descriptor, or a
+    named pipe), or a local socket ('tcp:host:port' or 'unix:path'), one
+    operation per line:
+
+        Timestamp|Operation|SourceID|DestinationID
+
+    where Timestamp is the scheduled emission time in milliseconds since the
+    epoch, and SourceID and DestinationID are investor IDs for add_friend and
+    tradebook IDs for add_mirror and remove_mirror.
+
+"""
+
+
+# Imports from built-in modules
+import asyncio
+import json
+import numpy as np
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+# Imports from Base Data Generator Module
+from data_sinks.BDG010_RecordBatch import format_record_batch, make_record_batch
+from data_sinks.BDG031_StreamWriter import FILE_DESCRIPTOR_PREFIX, STDOUT_TARGET
+
+# Names of the operations, indexed by the operation codes of the events
+OPERATION_NAMES = np.array(["add_friend", "add_mirror", "remove_mirror"])
+ADD_FRIEND = 0
+ADD_MIRROR = 1
+REMOVE_MIRROR = 2
+
+class UpdateStreamEmitter:
+
+    def __init__(self, target="-",\
+                 ops_per_second=1000,\
+                 load_profile=None,\
+                 mirror_delay=100,\
+                 remove_mirror_delay=1000,\
+                 events_per_write=1000):
+
+        # File name, '-' (standard output), 'fd:N', 'tcp:host:port' or 'unix:path' to write the stream to
+        self.target = target
+
+        # Number of operations emitted per second
+        self.ops_per_second = ops_per_second
+
+        # Optional list of [duration in seconds, operations per second] segments
+        # followed one after the other. The rate of the last segment is kept after
+        # the end of the profile
+        self.load_profile = load_profile
+
+        # Mean number of operations between an add_friend and its add_mirror
+        self.mirror_delay = mirror_delay
+
+        # Mean number of operations between an add_mirror and its remove_mirror
+        self.remove_mirror_delay = remove_mirror_delay
+
+        # Maximum number of operations formatted and written at once
+        self.events_per_write = events_per_write
+
+        assert (load_profile is not None) or (ops_per_second > 0),\
+            "UpdateStreamEmitter_ERROR: ops_per_second must be positive"
+
+        assert (load_profile is None) or (len(load_profile) > 0 and all(rate > 0 for duration, rate in load_profile)),\
+            "UpdateStreamEmitter_ERROR: load_profile must have segments with positive rates"
+
+    def build_events(self, friend_batches, mirror_batches, number_of_investors):
+        """
+        Description:
+            Interleaves the friend edges and the mirror edges (record batches of
+            FriendEdgeGenerator and MirrorEdgeGenerator) into a record batch of
+            events with the fields Operation, SourceID and DestinationID, in the
+            order they are to be emitted.
+
+            The add_friend operations keep the order of the friend edges. Every
+            mirror edge is placed after the add_friend of its investors (found by
+            searching the packed investor pair in the sorted friend edges) with an
+            exponentially distributed delay, and every removed mirror edge after
+            its add_mirror in the same way.
+        """
+
+        friend_edges = np.concatenate(friend_batches) if len(friend_batches) > 0 else\
+            make_record_batch(["SourceVertexID", "DestinationVertexID"], [np.zeros((0,), dtype=np.int64)] * 2)
+        mirror_edges = np.concatenate(mirror_batches) if len(mirror_batches) > 0 else\
+            make_record_batch(["SourceTradeBookID", "DestinationTradeBookID", "RemoveMirror"],\
+                                [np.zeros((0,), dtype=np.int64)] * 2 + [np.zeros((0,), dtype=np.bool_)])
+
+        friend_sources = friend_edges["SourceVertexID"].astype(np.int64)
+        friend_destinations = friend_edges["DestinationVertexID"].astype(np.int64)
+        friend_positions = np.arange(0, len(friend_edges), dtype=np.float64)
+
+        # packing the (smaller, larger) investor pairs of the friend edges into single keys
+        friend_keys = np.minimum(friend_sources, friend_destinations) * number_of_investors +\
+            np.maximum(friend_sources, friend_destinations)
+        friend_key_order = np.argsort(friend_keys, kind='stable')
+        sorted_friend_keys = friend_keys[friend_key_order]
+
+        mirror_sources = mirror_edges["SourceTradeBookID"].astype(np.int64)
+        mirror_destinations = mirror_edges["DestinationTradeBookID"].astype(np.int64)
+        mirror_keys = np.minimum(mirror_sources, mirror_destinations) * number_of_investors +\
+            np.maximum(mirror_sources, mirror_destinations) - (number_of_investors + 1) * number_of_investors
+
+        friend_key_indices = np.minimum(np.searchsorted(sorted_friend_keys, mirror_keys), max(0, len(friend_keys) - 1))
+
+        assert len(mirror_keys) == 0 or np.all(sorted_friend_keys[friend_key_indices] == mirror_keys),\
+            "UpdateStreamEmitter_ERROR: mirror edge without a friend edge"
+
+        mirror_positions = friend_positions[friend_key_order[friend_key_indices]] +\
+            np.random.exponential(scale=self.mirror_delay, size=(len(mirror_edges),))
+
+        remove_mirror_flags = mirror_edges["RemoveMirror"]
+        remove_mirror_positions = mirror_positions[remove_mirror_flags] +\
+            np.random.exponential(scale=self.remove_mirror_delay, size=(int(np.count_nonzero(remove_mirror_flags)),))
+
+        # ordering all operations by position, ties keep add_friend < add_mirror < remove_mirror
+        positions = np.concatenate((friend_positions, mirror_positions, remove_mirror_positions))
+        event_order = np.argsort(positions, kind='stable')
+
+        operations = np.concatenate((np.full((len(friend_positions),), ADD_FRIEND, dtype=np.uint8),\
+                                     np.full((len(mirror_positions),), ADD_MIRROR, dtype=np.uint8),\
+                                     np.full((len(remove_mirror_positions),), REMOVE_MIRROR, dtype=np.uint8)))
+        source_ids = np.concatenate((friend_sources, mirror_sources, mirror_sources[remove_mirror_flags]))
+        destination_ids = np.concatenate((friend_destinations, mirror_destinations, mirror_destinations[remove_mirror_flags]))
+
+        return make_record_batch(["Operation", "SourceID", "DestinationID"],\
+                                    [operations[event_order], source_ids[event_order], destination_ids[event_order]])
+
+    def get_emission_times(self, number_of_events):
+        """
+        Description:
+            Returns the scheduled emission time (in seconds from the start of the
+            stream) of every event, following ops_per_second or the load profile.
+        """
+
+        event_indices = np.arange(0, number_of_events, dtype=np.float64)
+
+        if self.load_profile is None:
+            return event_indices / self.ops_per_second
+
+        durations = np.array([float(duration) for duration, rate in self.load_profile])
+        rates = np.array([float(rate) for duration, rate in self.load_profile])
+
+        # the last segment lasts until all events have been emitted
+        durations[-1] = np.inf
+
+        segment_start_times = np.concatenate(([0.0,], np.cumsum(durations)[:-1]))
+        segment_first_events = np.concatenate(([0.0,], np.cumsum(durations * rates)[:-1]))
+
+        segment_indices = np.searchsorted(segment_first_events, event_indices, side='right') - 1
+        return segment_start_times[segment_indices] +\
+            (event_indices - segment_first_events[segment_indices]) / rates[segment_indices]
+
+    def format_events(self, events, timestamps):
+        """
+        Description:
+            Formats the events with their timestamps (in milliseconds) as the lines
+            of the stream.
+        """
+
+        return format_record_batch(make_record_batch(["Timestamp", "Operation", "SourceID", "DestinationID"],\
+                                                        [timestamps,\
+                                                         OPERATION_NAMES[events["Operation"]],\
+                                                         events["SourceID"],\
+                                                         events["DestinationID"]]))
+
+    async def open_target(self):
+        """
+        Description:
+            Opens the target of the stream and returns the functions writing data
+            to it, waiting until the data is sent, and closing it.
+        """
+
+        if self.target.startswith("tcp:") or self.target.startswith("unix:"):
+            if self.target.startswith("tcp:"):
+                host, port = self.target[len("tcp:"):].rsplit(":", 1)
+                reader, writer = await asyncio.open_connection(host, int(port))
+            else:
+                reader, writer = await asyncio.open_unix_connection(self.target[len("unix:"):])
+
+            async def close_socket():
+                writer.close()
+                await writer.wait_closed()
+
+            return writer.write, writer.drain, close_socket
+
+        # the file descriptor targets are duplicated, so closing the stream does not close the one of the caller
+        if (self.target == STDOUT_TARGET):
+            out_file = sys.stdout.buffer
+        elif self.target.startswith(FILE_DESCRIPTOR_PREFIX):
+            out_file = os.fdopen(os.dup(int(self.target[len(FILE_DESCRIPTOR_PREFIX):])), mode='wb')
+        else:
+            out_file = open(self.target, mode='wb')
+
+        async def flush_file():
+            out_file.flush()
+
+        async def close_file():
+            out_file.flush()
+            if out_file is not sys.stdout.buffer:
+                out_file.close()
+
+        return out_file.write, flush_file, close_file
+
+    async def emit(self, events):
+        """
+        Description:
+            Emits the events to the target following their schedule. The events
+            whose scheduled time has passed are written at once (at most
+            events_per_write at a time) and the emitter sleeps until the next
+            scheduled time otherwise, so delays do not accumulate. Returns the
+            number of emitted events.
+        """
+
+        write, drain, close = await self.open_target()
+
+        emission_times = self.get_emission_times(len(events))
+
+        loop = asyncio.get_running_loop()
+        start_time = loop.time()
+        start_timestamp = int(time.time() * 1000)
+
+        emitted_events = 0
+        while emitted_events < len(events):
+            elapsed_time = loop.time() - start_time
+            ready_events = min(int(np.searchsorted(emission_times, elapsed_time, side='right')),\
+                                emitted_events + self.events_per_write)
+
+            if (ready_events > emitted_events):
+                timestamps = start_timestamp + np.round(emission_times[emitted_events:ready_events] * 1000).astype(np.int64)
+                write(self.format_events(events[emitted_events:ready_events], timestamps).encode())
+                await drain()
+                emitted_events = ready_events
+            else:
+                await asyncio.sleep(emission_times[emitted_events] - elapsed_time)
+
+        await close()
+        return emitted_events
+
+    def run(self, friend_batches, mirror_batches, number_of_investors):
+        """
+        Description:
+            Builds the events from the friend edges and the mirror edges and
+            emits them. Returns the number of emitted events.
+        """
+
+        events = self.build_events(friend_batches, mirror_batches, number_of_investors)
+        return asyncio.run(self.emit(events))
+
+
+# Creates the friend and mirror edge batches used by the unit tests
+def get_test_batches():
+    friend_batches = [make_record_batch(["SourceVertexID", "DestinationVertexID"], [np.array([0, 3, 2]), np.array([1, 1, 4])]),\
+                      make_record_batch(["SourceVertexID", "DestinationVertexID"], [np.array([4]), np.array([0])])]
+    mirror_batches = [make_record_batch(["SourceTradeBookID", "DestinationTradeBookID", "RemoveMirror"],\
+                                        [np.array([6, 9, 5]), np.array([8, 5, 6]), np.array([True, False, True])])]
+    return friend_batches, mirror_batches
+
+# Unit tests to test if the events follow the order of the operations
+def test_build_events():
+    test_object = UpdateStreamEmitter(mirror_delay=2, remove_mirror_delay=2)
+    friend_batches, mirror_batches = get_test_batches()
+
+    events = test_object.build_events(friend_batches, mirror_batches, 5)
+
+    assert len(events) == 4 + 3 + 2,\
+        "UpdateStreamEmitter_BUILD_ERROR wrong number of events"
+
+    operations = events["Operation"].tolist()
+    pairs = [tuple(sorted(pair)) for pair in zip(events["SourceID"].tolist(), events["DestinationID"].tolist())]
+
+    assert [pairs[i] for i in range(0, len(events)) if operations[i] == ADD_FRIEND] == [(0, 1), (1, 3), (2, 4), (0, 4)],\
+        "UpdateStreamEmitter_BUILD_ERROR add_friend order changed"
+
+    for i in range(0, len(events)):
+        if (operations[i] == ADD_MIRROR):
+            investor_pair = (pairs[i][0] - 5, pairs[i][1] - 5)
+            assert (ADD_FRIEND, investor_pair) in list(zip(operations[:i], pairs[:i])),\
+                "UpdateStreamEmitter_BUILD_ERROR add_mirror before its add_friend"
+        if (operations[i] == REMOVE_MIRROR):
+            assert (ADD_MIRROR, pairs[i]) in list(zip(operations[:i], pairs[:i])),\
+                "UpdateStreamEmitter_BUILD_ERROR remove_mirror before its add_mirror"
+
+# Unit tests to test if the emission times follow the rate and the load profile
+def test_get_emission_times():
+    test_object = UpdateStreamEmitter(ops_per_second=4)
+
+    assert test_object.get_emission_times(3).tolist() == [0.0, 0.25, 0.5],\
+        "UpdateStreamEmitter_SCHEDULE_ERROR constant rate schedule is invalid"
+
+    test_object = UpdateStreamEmitter(load_profile=[[1, 2], [2, 1], [1, 4]])
+
+    assert test_object.get_emission_times(7).tolist() == [0.0, 0.5, 1.0, 2.0, 3.0, 3.25, 3.5],\
+        "UpdateStreamEmitter_SCHEDULE_ERROR load profile schedule is invalid"
+
+# Unit tests to test if the stream is emitted to a file at the configured rate
+def test_emit_stream():
+    test_object = UpdateStreamEmitter(target="update_stream_test.csv", ops_per_second=200, events_per_write=4)
+    friend_batches, mirror_batches = get_test_batches()
+
+    start_time = time.time()
+    number_of_events = test_object.run(friend_batches, mirror_batches, 5)
+    elapsed_time = time.time() - start_time
+
+    assert number_of_events == 9 and elapsed_time >= 8 / 200,\
+        "UpdateStreamEmitter_EMIT_ERROR stream not paced"
+
+    with open("update_stream_test.csv", mode='r') as in_file:
+        lines = in_file.read().splitlines()
+        in_file.close()
+
+    timestamps = [int(line.split("|")[0]) for line in lines]
+
+    assert len(lines) == 9 and timestamps == sorted(timestamps) and timestamps[-1] - timestamps[0] == 40,\
+        "UpdateStreamEmitter_EMIT_ERROR timestamps are invalid"
+
+    assert lines[0].split("|")[1:] == ["add_friend", "0", "1"],\
+        "UpdateStreamEmitter_EMIT_ERROR first operation is invalid"
+
+# Unit tests to test if the standard output of the generator only holds the operations of the
+# update stream (the progress messages go to the standard error)
+def test_emit_to_stdout():
+    test_directory = tempfile.mkdtemp()
+    module_directory = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+    # the shipped configuration at a small scale, writing the other outputs to the test directory
+    with open(os.path.join(module_directory, "BDG008_ConfigFile.json"), mode='r') as in_file:
+        config = json.load(in_file)
+        in_file.close()
+    config.update({"number_of_investors": 200, "number_of_companies": 50,\
+                   "number_of_friend_edges": 100, "number_of_mirror_edges": 60,\
+                   "update_stream_target": "-", "update_stream_ops_per_second": 100000})
+    for key, file_name in list(config.items()):
+        if key.endswith("_file_name") and (file_name is not None):
+            config[key] = os.path.join(test_directory, os.path.basename(file_name))
+
+    config_file_name = os.path.join(test_directory, "config.json")
+    with open(config_file_name, mode='w') as out_file:
+        json.dump(config, out_file)
+        out_file.close()
+
+    generator_script = os.path.join(module_directory, "BDG000_ExecuteBaseDataGenerator.py")
+    completed_process = subprocess.run([sys.executable, generator_script, config_file_name],\
+                                        stdout=subprocess.PIPE, stderr=subprocess.PIPE, cwd=test_directory)
+    shutil.rmtree(test_directory)
+
+    assert completed_process.returncode == 0,\
+        "UpdateStreamEmitter_STDOUT_ERROR generator failed: " + completed_process.stderr.decode()
+
+    lines = completed_process.stdout.decode().splitlines()
+    assert len(lines) > 100,\
+        "UpdateStreamEmitter_STDOUT_ERROR operations missing from the standard output"
+
+    for line in lines:
+        fields = line.split("|")
+        assert (len(fields) == 4) and fields[0].isdigit() and (fields[1] in OPERATION_NAMES)\
+                and fields[2].isdigit() and fields[3].isdigit(),\
+            "UpdateStreamEmitter_STDOUT_ERROR line is not an operation: " + line
+
+    assert "Data Generation Complete" in completed_process.stderr.decode(),\
+        "UpdateStreamEmitter_STDOUT_ERROR progress messages not written to the standard error"
+
+# Function to execute all defined unit tests for UpdateStreamEmitter
+def execute_all_unit_tests():
+    test_build_events()
+    test_get_emission_times()
+    test_emit_stream()
+    test_emit_to_stdout()
@@ -15,7 +15,13 @@ Description:
 """
 
 # Imports from built-in modules
-import threading
+import numpy as np
+import os
+
+# Imports from Base Data Generator Module
+from data_sinks.BDG010_RecordBatch import format_record_batch, make_record_batch
+from data_sinks.BDG031_StreamWriter import StreamWriter
+from execution.BDG027_BatchExecutor import BACKENDS, SCHEDULING_MODES, BatchExecutor, get_block_random_generator
 
 class VertexGenerator:
     """
@@ -23,16 +29,38 @@ class VertexGenerator:
         Contains functionality to generate vertex data in multithreaded fashion.
         Subclasses need only to define the following methods:
 
-            - lines_generator(): defining the function of a single thread
+            - generate_record_batch(): generates the data for a batch of vertices
+            - get_header_fields(): returns the column names of the data
             - get_vertex_type(): returns the type of the vertex
             - reset_destination_file(): resets the destination file
+
+        The data can either be written to the destination file by execute() or
+        consumed in memory, one record batch at a time, through iter_batches().
+        With ordered_output, the threads write their batches in parallel at
+        byte offsets reserved in vertex ID order, so the destination file is
+        sorted by vertex ID. With an output writer, ordered_output passes the
+        batches to the writer in vertex ID order instead (e.g. for streams).
+
+        The workers are run by a BatchExecutor with the given backend (threads,
+        processes or inline) and scheduling mode (dynamic, static or
+        work_stealing). With the processes backend, every worker process
+        appends its batches to the destination file (or writes them at their
+        reserved byte offsets) itself.
+
+        After use_seeded_blocks(), the vertices are generated in blocks with
+        their own seeded random generators, so the data only depends on the
+        random seed and not on the threads, the batch size or the scheduling.
     """
 
     def __init__(self, thread_number=5,\
                  lines_per_thread=1000,\
                  destination_file="vertex.csv",\
                  current_start_ID=0,\
-                 item_cardinality=10):
+                 item_cardinality=10,\
+                 output_writer=None,\
+                 ordered_output=False,\
+                 backend="threads",\
+                 scheduling="dynamic"):
 
         # Number of threads to be used for generating data
         self.thread_number = thread_number
@@ -44,74 +72,121 @@ class VertexGenerator:
         self.destination_file = destination_file
 
         # Vertex ID of the first vertex for which the data is being generated
+        self.first_vertex_ID = current_start_ID
+
+        # Vertex ID following the vertices given to the threads so far
         self.current_start_ID = current_start_ID
 
         # Number of vertices for which the data is to be generated
         self.item_cardinality = item_cardinality
 
+        # Executor running the workers (threads, processes or inline) with the scheduling mode
+        self.batch_executor = BatchExecutor(backend=backend,\
+                                            scheduling=scheduling,\
+                                            number_of_workers=thread_number)
+
+        # Writer (e.g. PartitionedFileWriter) used instead of the destination
+        # file when it is not None
+        self.output_writer = output_writer
+
+        # The output writers are only shared by threads
+        assert (backend != "processes") or (output_writer is None),\
+            "VertexGenerator_ERROR: the processes backend does not support output writers"
+
         # Lock for restriciting access to writing file
-        self.file_write_lock = threading.Lock()
+        self.file_write_lock = self.batch_executor.create_lock()
 
-        # Lock for acquiring next line batch
-        self.next_line_batch_lock = threading.Lock()
+        # ordered_output indicates if the batches are written to the destination
+        # file in vertex ID order with positional writes instead of appending
+        # them in the order the threads finish
+        self.ordered_output = ordered_output
 
-        # ID of the last vertex to generate the data for
-        self.last_valid_vertex_ID = item_cardinality + current_start_ID - 1
+        # Condition used to reserve the byte ranges of the batches in vertex ID order
+        self.output_offset_condition = self.batch_executor.create_condition()
+
+        # Vertex ID of the first vertex of the next batch to reserve a byte range for,
+        # and byte offset in the destination file where the next reserved range starts
+        self.output_reservation_state = self.batch_executor.create_state(2)
+        self.output_reservation_state[0] = current_start_ID
 
-        # Protects the thread_terminated_count variable defined next
-        self.thread_terminate_execution_lock = threading.Lock()
+        # File descriptor of the destination file shared by all threads for positional writes
+        self.destination_file_descriptor = None
 
-        # Number of threads that have finished execution
-        self.thread_terminated_count = 0
+        # ID of the last vertex to generate the data for
+        self.last_valid_vertex_ID = item_cardinality + current_start_ID - 1
 
-        # Semaphore used as a condition variable to indicate all threads have
-        # finished execution, i.e, all the data has been generated
-        self.main_thread_wait_semaphore = threading.Semaphore(0)
+        # Seed, name and number of vertex IDs of the seeded blocks (not seeded if random_seed is None),
+        # set by use_seeded_blocks()
+        self.random_seed = None
+        self.seed_name = None
+        self.seed_block_size = None
 
+        # Scheduler handing out the batches of vertex IDs to the workers of the executor
+        self.batch_scheduler = self.create_batch_scheduler()
 
-    def fetch_next_line_batch(self):
+    def create_batch_scheduler(self):
         """
         Description:
-            Threads call this function to get the next batch of lines
-
-        Returns:
-            - start ID for the batch and the number of items in the batch
-            - (-1, -1) if all batches have finished
+            Creates a scheduler handing out the batches of all the vertices (the
+            batches of vertex IDs, or of block indices with seeded blocks).
         """
 
-        self.next_line_batch_lock.acquire()
+        if self.random_seed is None:
+            return self.batch_executor.create_scheduler(self.first_vertex_ID, self.item_cardinality, self.lines_per_thread)
 
-        if (self.current_start_ID > self.last_valid_vertex_ID):
-            self.next_line_batch_lock.release()
-            return (-1, -1)
+        number_of_blocks = (self.item_cardinality + self.seed_block_size - 1) // self.seed_block_size
+        return self.batch_executor.create_scheduler(0, number_of_blocks, max(1, self.lines_per_thread // self.seed_block_size))
 
-        batch_size = self.lines_per_thread
-        assigned_start_ID = self.current_start_ID
-        if (self.current_start_ID + batch_size > self.last_valid_vertex_ID):
-            batch_size = self.last_valid_vertex_ID - self.current_start_ID + 1
-
-        self.current_start_ID += batch_size
+    def use_seeded_blocks(self, random_seed, seed_name, seed_block_size):
+        """
+        Description:
+            Generates the vertices in blocks of seed_block_size vertex IDs, each
+            with its own random generator seeded from the random seed, the seed
+            name (e.g. the stage name) and the block index, like the blocks of
+            the shard server. The batches are then made of whole blocks (as many
+            as fit in lines_per_thread, at least one), so the data does not
+            depend on the order in which the threads take them.
+        """
 
-        self.next_line_batch_lock.release()
+        assert seed_block_size > 0,\
+            "VertexGenerator_ERROR: seed_block_size must be positive"
 
-        return (assigned_start_ID, batch_size)
+        self.random_seed = random_seed
+        self.seed_name = seed_name
+        self.seed_block_size = seed_block_size
 
+        # the scheduler hands out block indices instead of vertex IDs
+        self.batch_scheduler = self.create_batch_scheduler()
 
-    def thread_end_execution(self):
+    def fetch_next_line_batch(self, worker_index=None, batch_scheduler=None):
         """
         Description:
-            Threads call this function to indicate that they have finished
-            execution by updating thread_terminated_count. This happens when
-            they get (-1, -1) when calling fetch_next_line_batch(). The last
-            thread wakes up the main thread.
+            Threads call this function to get the next batch of lines from the
+            batch scheduler (with their worker index, if they are one of the
+            workers of the executor). The scheduler of the workers is used if
+            batch_scheduler is None.
+
+        Returns:
+            - start ID for the batch and the number of items in the batch
+            - (-1, -1) if all batches have finished
         """
 
-        self.thread_terminate_execution_lock.acquire()
-        self.thread_terminated_count += 1
-        if (self.thread_terminated_count >= self.thread_number):
-            self.main_thread_wait_semaphore.release()
-        self.thread_terminate_execution_lock.release()
+        batch_scheduler = batch_scheduler if batch_scheduler is not None else self.batch_scheduler
+
+        assigned_start_ID, batch_size = batch_scheduler.next_batch(worker_index)
+        number_of_assigned_items = batch_scheduler.get_number_of_assigned_items()
+
+        # with seeded blocks, the scheduler assigns block indices
+        if self.random_seed is not None:
+            number_of_assigned_items = min(self.item_cardinality, number_of_assigned_items * self.seed_block_size)
+            if (assigned_start_ID >= 0):
+                assigned_start_ID, batch_size = (self.first_vertex_ID + assigned_start_ID * self.seed_block_size,\
+                                                 min(batch_size * self.seed_block_size,\
+                                                     self.item_cardinality - assigned_start_ID * self.seed_block_size))
 
+        self.current_start_ID = self.first_vertex_ID + number_of_assigned_items
+
+        return (assigned_start_ID, batch_size)
 
     def save_vertices_to_file(self, lines):
         """
@@ -127,25 +202,171 @@ class VertexGenerator:
             out_file.close()
         self.file_write_lock.release()
 
-    def lines_generator(self):
+    def reserve_output_range(self, start_id, batch_size, number_of_bytes):
         """
         Description:
-            This function is to be overriden by the subclasses. The thread must
-            first acquire a batch and check if it's valid. If the batch is not
-            valid, the function must return, otherwise keep acquiring batches
-            and generating data and saving it to the destination file.
+            Threads call this function to reserve number_of_bytes bytes in the
+            destination file for the batch of vertices start_id to
+            (start_id + batch_size - 1). The thread waits until the byte ranges
+            of all previous batches have been reserved, so the ranges follow the
+            vertex ID order. Returns the byte offset of the reserved range, or -1
+            if the execution was cancelled while waiting.
         """
-        pass
 
-    def thread_job(self):
+        self.output_offset_condition.acquire()
+        self.output_offset_condition.wait_for(lambda: (self.output_reservation_state[0] == start_id) or self.batch_scheduler.is_cancelled())
+
+        if self.output_reservation_state[0] != start_id:
+            self.output_offset_condition.release()
+            return -1
+
+        reserved_offset = int(self.output_reservation_state[1])
+        self.output_reservation_state[1] += number_of_bytes
+        self.output_reservation_state[0] += batch_size
+
+        self.output_offset_condition.notify_all()
+        self.output_offset_condition.release()
+
+        return reserved_offset
+
+    def write_batch_in_order(self, start_id, batch_size, write_function):
+        """
+        Description:
+            Threads call this function to call write_function for the batch of
+            vertices start_id to (start_id + batch_size - 1) once all previous
+            batches have been written, so an output writer (e.g. a StreamWriter)
+            receives the batches in vertex ID order. A writer blocking on a full
+            buffer also blocks the threads waiting for their turn, so the
+            backpressure of the output propagates to all the workers.
+        """
+
+        self.output_offset_condition.acquire()
+        self.output_offset_condition.wait_for(lambda: (self.output_reservation_state[0] == start_id) or self.batch_scheduler.is_cancelled())
+
+        if self.output_reservation_state[0] != start_id:
+            self.output_offset_condition.release()
+            return
+
+        try:
+            write_function()
+        finally:
+            self.output_reservation_state[0] += batch_size
+            self.output_offset_condition.notify_all()
+            self.output_offset_condition.release()
+
+    def notify_output_waiters(self):
+        """
+        Description:
+            Wakes up the threads waiting to reserve their byte range, so they
+            stop once the execution is cancelled.
+        """
+
+        self.output_offset_condition.acquire()
+        self.output_offset_condition.notify_all()
+        self.output_offset_condition.release()
+
+    def save_vertices_at_offset(self, start_id, batch_size, lines):
+        """
+        Description:
+            Threads call this function to write their generated data at the byte
+            range reserved for their batch using positional writes (os.pwrite)
+            on the shared file descriptor, so multiple threads can be writing to
+            the file at the same time.
+        """
+
+        data = memoryview(lines.encode())
+        offset = self.reserve_output_range(start_id, batch_size, len(data))
+        if offset < 0:
+            return
+
+        while len(data) > 0:
+            written_bytes = os.pwrite(self.destination_file_descriptor, data, offset)
+            data = data[written_bytes:]
+            offset += written_bytes
+
+    def generate_record_batch(self, start_id, batch_size, random_generator):
         """
         Description:
-            Defines the function of single thread. Once the lines_generator
-            function returns, it indicates that the thread has finished
-            execution by calling thread_end_execution().
+            This function is to be overriden by the subclasses. Generates the
+            data for the vertices start_id to (start_id + batch_size - 1) and
+            returns it as a record batch (NumPy structured array) whose fields
+            are given by get_header_fields(). All the random values are drawn
+            from random_generator (a NumPy random generator owned by the caller).
         """
-        self.lines_generator()
-        self.thread_end_execution()
+        return make_record_batch(self.get_header_fields(),\
+                                    [np.arange(start_id, start_id + batch_size)])
+
+    def generate_seeded_record_batch(self, start_id, batch_size):
+        """
+        Description:
+            Returns the record batch of the vertices start_id to
+            (start_id + batch_size - 1), generated one seeded block at a time
+            after use_seeded_blocks() (the batch is then made of whole blocks).
+            Without seeded blocks, the batch gets a new unseeded random generator.
+        """
+
+        if self.random_seed is None:
+            return self.generate_record_batch(start_id, batch_size, np.random.default_rng())
+
+        block_batches = []
+        for block_start_ID in range(start_id, start_id + batch_size, self.seed_block_size):
+            block_index = (block_start_ID - self.first_vertex_ID) // self.seed_block_size
+            block_batches.append(self.generate_record_batch(block_start_ID,\
+                                                            min(self.seed_block_size, start_id + batch_size - block_start_ID),\
+                                                            get_block_random_generator(self.random_seed, self.seed_name, block_index)))
+
+        return block_batches[0] if len(block_batches) == 1 else np.concatenate(block_batches)
+
+    def iter_batches(self, worker_index=None):
+        """
+        Description:
+            Generator yielding the generated data of all the vertices, one
+            record batch at a time. At most lines_per_thread vertices are held
+            in memory per batch (or the seeded blocks of a batch). Every call
+            without a worker index iterates over all the vertices with its own
+            scheduler, so the generator can be iterated again. With the worker
+            index of a worker of the executor, the batches are shared with the
+            other workers instead (see iter_scheduled_batches()).
+        """
+
+        batch_scheduler = self.create_batch_scheduler() if worker_index is None else self.batch_scheduler
+        return self.iter_scheduled_batches(worker_index, batch_scheduler)
+
+    def iter_scheduled_batches(self, worker_index=None, batch_scheduler=None):
+        """
+        Description:
+            Generator that keeps acquiring batches from the batch scheduler (the
+            scheduler of the workers if None) and yields the generated data for
+            each batch as a record batch. Multiple threads can iterate at the
+            same time as the batches are shared through fetch_next_line_batch().
+        """
+
+        # Executes until batches no longer exist
+        while True:
+            start_id, batch_size = self.fetch_next_line_batch(worker_index, batch_scheduler)
+
+            #if run out of batches, return
+            if ((start_id < 0) or (batch_size <= 0)):
+                return
+
+            yield self.generate_seeded_record_batch(start_id, batch_size)
+
+    def lines_generator(self, worker_index=None):
+        """
+        Description:
+            Defines the work of a single worker of the executor: keeps generating
+            record batches through iter_scheduled_batches() and saving them to
+            the destination file (or passing them to the output writer).
+        """
+        for batch in self.iter_scheduled_batches(worker_index):
+            if (self.output_writer is not None) and self.ordered_output:
+                self.write_batch_in_order(int(batch[0][0]), len(batch), lambda: self.output_writer.write_record_batch(batch))
+            elif self.output_writer is not None:
+                self.output_writer.write_record_batch(batch)
+            elif self.ordered_output:
+                self.save_vertices_at_offset(int(batch[0][0]), len(batch), format_record_batch(batch))
+            else:
+                self.save_vertices_to_file(format_record_batch(batch))
 
     def get_vertex_type(self):
         """
@@ -154,6 +375,24 @@ class VertexGenerator:
         """
         return "Base"
 
+    def get_header_fields(self):
+        """
+        Description:
+            This function is to be overriden by the subclass for their function.
+            Returns the column names of the generated data, which are also the
+            field names of the generated record batches.
+        """
+        return [self.get_vertex_type() + "ID",]
+
+    def get_loader_header_fields(self):
+        """
+        Description:
+            This function is to be overriden by the subclass for their function.
+            Returns the typed column names used in the header file of bulk
+            loaders (e.g. for the partitioned output layout).
+        """
+        return [self.get_vertex_type() + "ID:ID",]
+
     def reset_destination_file(self):
         """
         Description:
@@ -172,16 +411,28 @@ class VertexGenerator:
             Executes the Vertex Data generator for VertexGenerator and its
             subclasses.
         """
-        #reset destination_file, if it exists
-        self.reset_destination_file()
-
-        #create and start threads
-        for i in range(0, self.thread_number):
-            temp_thread_object = threading.Thread(target=self.thread_job, )
-            temp_thread_object.start()
+        #reset destination_file (or the files of the output writer), if it exists
+        if self.output_writer is not None:
+            self.output_writer.reset_destination_files(self.get_loader_header_fields())
+        else:
+            self.reset_destination_file()
+
+        #open the file descriptor shared by the workers, the batches are written after the header
+        use_ordered_output = self.ordered_output and (self.output_writer is None)
+        if self.ordered_output:
+            self.output_reservation_state[0] = self.first_vertex_ID
+        if use_ordered_output:
+            self.output_reservation_state[1] = os.path.getsize(self.destination_file)
+            self.destination_file_descriptor = os.open(self.destination_file, os.O_WRONLY)
+
+        #run the workers until all batches are generated (the first exception of a worker is raised again)
+        try:
+            self.batch_executor.run(self.lines_generator, self.batch_scheduler, cancel_function=self.notify_output_waiters)
+        finally:
+            if use_ordered_output:
+                os.close(self.destination_file_descriptor)
+                self.destination_file_descriptor = None
 
-        #wait for end_semaphore
-        self.main_thread_wait_semaphore.acquire()
         print(self.get_vertex_type(),"Vertex Data Generation Complete")
 
 
@@ -264,7 +515,169 @@ def test_fetch_next_line_batch():
         "VertexGenerator_LINE_BATCH_ERROR end start_ID is incorrect"
 
 
+# Unit tests to test if iter_batches() yields all vertices as record batches
+def test_iter_batches():
+    test_object = VertexGenerator(thread_number=5,\
+                                lines_per_thread=10,\
+                                destination_file="v.csv",\
+                                current_start_ID=3,\
+                                item_cardinality=25)
+
+    batches = list(test_object.iter_batches())
+
+    assert [len(batch) for batch in batches] == [10, 10, 5],\
+        "VertexGenerator_ITER_BATCHES_ERROR batch sizes are wrong"
+
+    assert np.concatenate(batches)["BaseID"].tolist() == list(range(3, 28)),\
+        "VertexGenerator_ITER_BATCHES_ERROR vertex IDs are wrong"
+
+    # every call iterates over all the vertices again
+    assert np.concatenate(list(test_object.iter_batches()))["BaseID"].tolist() == list(range(3, 28)),\
+        "VertexGenerator_ITER_BATCHES_ERROR second iteration does not yield every vertex"
+
+    test_object = RandomVertexGenerator(lines_per_thread=10, current_start_ID=3, item_cardinality=25)
+    test_object.use_seeded_blocks(7, "random_vertices", 4)
+
+    assert np.array_equal(np.concatenate(list(test_object.iter_batches())), np.concatenate(list(test_object.iter_batches()))),\
+        "VertexGenerator_ITER_BATCHES_ERROR seeded iterations yield different data"
+
+
+# Unit tests to test if the ordered output is sorted by vertex ID
+def test_ordered_output():
+    test_object = VertexGenerator(thread_number=5,\
+                                lines_per_thread=7,\
+                                destination_file="ordered_test.csv",\
+                                current_start_ID=10,\
+                                item_cardinality=500,\
+                                ordered_output=True)
+    test_object.execute()
+
+    with open("ordered_test.csv", mode='r') as in_file:
+        lines = in_file.read().splitlines()
+        in_file.close()
+
+    assert lines == [str(vertex_id) for vertex_id in range(10, 510)],\
+        "VertexGenerator_ORDERED_OUTPUT_ERROR file is not sorted by vertex ID"
+
+    # the batches are passed to the output writer in vertex ID order through a small buffer
+    output_writer = StreamWriter(destination_file="ordered_stream_test.csv", max_buffered_bytes=64)
+    test_object = VertexGenerator(thread_number=5,\
+                                lines_per_thread=7,\
+                                destination_file="ordered_stream_test.csv",\
+                                current_start_ID=10,\
+                                item_cardinality=500,\
+                                output_writer=output_writer,\
+                                ordered_output=True)
+    test_object.execute()
+    output_writer.close()
+
+    with open("ordered_stream_test.csv", mode='r') as in_file:
+        lines = in_file.read().splitlines()
+        in_file.close()
+
+    assert lines == ["BaseID:ID"] + [str(vertex_id) for vertex_id in range(10, 510)],\
+        "VertexGenerator_ORDERED_OUTPUT_ERROR stream is not sorted by vertex ID"
+
+
+# VertexGenerator raising an exception for the batch of the vertex ID 100, used by the unit tests
+class FailingVertexGenerator(VertexGenerator):
+    def generate_record_batch(self, start_id, batch_size, random_generator):
+        if start_id <= 100 < start_id + batch_size:
+            raise ValueError("vertex 100")
+        return super().generate_record_batch(start_id, batch_size, random_generator)
+
+# Unit tests to test if every backend and scheduling mode writes every vertex and
+# if the exception of a worker is raised by execute() instead of hanging
+def test_execution_backends():
+    for backend in BACKENDS:
+        for scheduling in SCHEDULING_MODES:
+            test_object = VertexGenerator(thread_number=3,\
+                                        lines_per_thread=7,\
+                                        destination_file="backend_test.csv",\
+                                        current_start_ID=10,\
+                                        item_cardinality=300,\
+                                        ordered_output=True,\
+                                        backend=backend,\
+                                        scheduling=scheduling)
+            test_object.execute()
+
+            with open("backend_test.csv", mode='r') as in_file:
+                lines = in_file.read().splitlines()
+                in_file.close()
+
+            assert lines == [str(vertex_id) for vertex_id in range(10, 310)],\
+                "VertexGenerator_BACKEND_ERROR " + backend + " " + scheduling + " file is not sorted by vertex ID"
+
+            # the threads waiting to write after the failed batch are woken up and stop
+            test_object = FailingVertexGenerator(thread_number=3,\
+                                        lines_per_thread=7,\
+                                        destination_file="backend_test.csv",\
+                                        current_start_ID=0,\
+                                        item_cardinality=10000,\
+                                        ordered_output=True,\
+                                        backend=backend,\
+                                        scheduling=scheduling)
+
+            raised_exception = None
+            try:
+                test_object.execute()
+            except ValueError as exception:
+                raised_exception = exception
+
+            assert raised_exception is not None and str(raised_exception) == "vertex 100",\
+                "VertexGenerator_BACKEND_ERROR " + backend + " " + scheduling + " worker exception is not raised"
+
+            assert test_object.destination_file_descriptor is None,\
+                "VertexGenerator_BACKEND_ERROR " + backend + " " + scheduling + " destination file is not closed"
+
+    os.remove("backend_test.csv")
+
+
+# VertexGenerator drawing a random number per vertex, used by the unit tests
+class RandomVertexGenerator(VertexGenerator):
+    def generate_record_batch(self, start_id, batch_size, random_generator):
+        return make_record_batch(["BaseID", "Number"],\
+                                    [np.arange(start_id, start_id + batch_size),\
+                                     random_generator.integers(0, 1000000, size=(batch_size,))])
+
+# Unit tests to test if the seeded blocks give the same data whatever the backend, scheduling, number of
+# threads and batch size, and the same data as generating every seeded block on its own (like the shard server)
+def test_seeded_blocks():
+    expected_lines = []
+    for block_index in range(0, 9):
+        block_batch = RandomVertexGenerator().generate_record_batch(10 + block_index * 40, min(40, 350 - block_index * 40),\
+                                                                    get_block_random_generator(7, "random_vertices", block_index))
+        expected_lines += format_record_batch(block_batch).splitlines()
+
+    for backend in BACKENDS:
+        for scheduling in SCHEDULING_MODES:
+            for thread_number, lines_per_thread in [(1, 1000), (4, 7), (4, 120)]:
+                test_object = RandomVertexGenerator(thread_number=thread_number,\
+                                            lines_per_thread=lines_per_thread,\
+                                            destination_file="seeded_test.csv",\
+                                            current_start_ID=10,\
+                                            item_cardinality=350,\
+                                            ordered_output=True,\
+                                            backend=backend,\
+                                            scheduling=scheduling)
+                test_object.use_seeded_blocks(7, "random_vertices", 40)
+                test_object.execute()
+
+                with open("seeded_test.csv", mode='r') as in_file:
+                    lines = in_file.read().splitlines()
+                    in_file.close()
+
+                assert lines == expected_lines,\
+                    "VertexGenerator_SEEDED_BLOCKS_ERROR " + backend + " " + scheduling + " data depends on the execution"
+
+    os.remove("seeded_test.csv")
+
+
 # Function to execute all defined unit tests for VertexGenerator
 def execute_all_unit_tests():
     test_vertex_generator_init()
     test_fetch_next_line_batch()
+    test_iter_batches()
+    test_ordered_output()
+    test_execution_backends()
+    test_seeded_blocks()
@@ -9,17 +9,57 @@ Description:
     and its unit tests.
 
     The NamedVertexGenerator class extends the VertexGenerator class to generate
-    'name' data for different vertices like: Investors and Companies.
+    'name' data for different vertices like: Investors and Companies. Optionally,
+    all generated names are unique.
 
 """
 
 
 # Imports from built-in modules
 import numpy as np
-import random
 
 # Importing VertexGenerator from BDG001_VertexGenerator.py
 from .BDG001_VertexGenerator import VertexGenerator as BaseVertexGenerator
+from .BDG016_FingerprintSet import FingerprintSet, get_fingerprints
+
+# Imports from Base Data Generator Module
+from data_sinks.BDG010_RecordBatch import get_header_line, make_record_batch
+
+# Characters of the names with digits (is_numeric) and without them
+NUMERIC_NAME_CHARACTERS = 'abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789'
+ALPHABETIC_NAME_CHARACTERS = 'abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ'
+
+def generate_names(batch_size, allowed_character_array, random_generator, name_fingerprint_set=None):
+    """
+    Description:
+        Generates batch_size random names (of 16 to 25 characters, the same
+        length within the batch) from the allowed characters, drawn from the
+        NumPy random generator, and returns them with the maximum name length,
+        so that all batches have the same dtype.
+        If the fingerprint set (shared by all threads) is given, the names are
+        regenerated until none of them was generated before.
+    """
+
+    # the length of each name in this batch
+    batch_name_length = int(random_generator.integers(16,26))
+
+    # randomly generating a matrix of characters (as indices into the allowed characters)
+    batch_character_codes = random_generator.integers(0, len(allowed_character_array), size=(batch_size, batch_name_length))
+
+    if name_fingerprint_set is not None:
+        # regenerating the rows whose names were already generated (by any thread)
+        # until all names of the batch are new
+        rows_to_check = np.arange(0, batch_size)
+        while len(rows_to_check) > 0:
+            fingerprints = get_fingerprints(batch_character_codes[rows_to_check])
+            rows_to_check = rows_to_check[~name_fingerprint_set.add_new_fingerprints(fingerprints)]
+            batch_character_codes[rows_to_check] = random_generator.integers(0, len(allowed_character_array),\
+                                                                             size=(len(rows_to_check), batch_name_length))
+
+    batch_characters = allowed_character_array[batch_character_codes]
+
+    # joining the characters of each row into a single name
+    return np.ascontiguousarray(batch_characters).view('<U' + str(batch_name_length))[:, 0].astype('<U25')
 
 
 class NamedVertexGenerator(BaseVertexGenerator):
@@ -30,13 +70,22 @@ class NamedVertexGenerator(BaseVertexGenerator):
                  current_start_ID=0,\
                  item_cardinality=10,
                  vertex_type="investor",
-                 is_numeric=True):
+                 is_numeric=True,\
+                 output_writer=None,\
+                 ordered_output=False,\
+                 unique_names=False,\
+                 backend="threads",\
+                 scheduling="dynamic"):
 
         super().__init__(thread_number,\
                     lines_per_thread,\
                     destination_file,\
                     current_start_ID,\
-                    item_cardinality)
+                    item_cardinality,\
+                    output_writer,\
+                    ordered_output,\
+                    backend,\
+                    scheduling)
 
         # Vertex Type for which the names are to be generated
         self.vertex_type = vertex_type
@@ -45,47 +94,49 @@ class NamedVertexGenerator(BaseVertexGenerator):
         # the characters from which to randomly generate the data are selected
         # accordingly
         if is_numeric:
-            self.allowed_character_list = list('abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789')
+            self.allowed_character_list = list(NUMERIC_NAME_CHARACTERS)
         else:
-            self.allowed_character_list = list('abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ')
+            self.allowed_character_list = list(ALPHABETIC_NAME_CHARACTERS)
+
+        # The allowed characters, indexed by the randomly generated character codes
+        self.allowed_character_array = np.array(self.allowed_character_list)
+
+        # unique_names indicates if every generated name must be different from
+        # all the others. The fingerprints of the generated names are then stored
+        # in a set shared by all threads
+        self.unique_names = unique_names
+        self.name_fingerprint_set = FingerprintSet(expected_number_of_fingerprints=item_cardinality) if unique_names else None
+
+        # The fingerprint set is only shared by threads
+        assert (backend != "processes") or (not unique_names),\
+            "NamedVertexGenerator_ERROR: the processes backend does not support unique names"
 
     # Overriding the get_vertex_type() method
     def get_vertex_type(self):
         return self.vertex_type
 
+    # Overriding the get_header_fields() method
+    def get_header_fields(self):
+        return [self.get_vertex_type()+"ID", "Name"]
+
+    # Overriding the get_loader_header_fields() method
+    def get_loader_header_fields(self):
+        return [self.get_vertex_type()+"ID:ID", "Name"]
+
     # Overriding the reset_destination_file() method
     def reset_destination_file(self):
         with open(self.destination_file, mode='w') as out_file:
-            out_file.write(self.get_vertex_type()+"ID|Name\n")
+            out_file.write(get_header_line(self.get_header_fields()))
             out_file.close()
 
-    # Overriding the lines_generator() method
-    def lines_generator(self):
-
-        # Executes until batches no longer exist
-        while True:
-            start_id, batch_size = self.fetch_next_line_batch()
-
-            #if run out of batches, return
-            if ((start_id < 0) or (batch_size <= 0)):
-                return
-
-            # the length of each name in this batch
-            batch_name_length = random.randrange(16,26)
-
-            # randomly generating a matrix of characters
-            batch_names = np.random.choice(self.allowed_character_list, size=(batch_size, batch_name_length))
-
-            # string storing the lines to be written to the file for this batch
-            file_lines=""
+    # Overriding the generate_record_batch() method
+    def generate_record_batch(self, start_id, batch_size, random_generator):
 
-            # storing file lines in the string
-            for investor_id in range(start_id, start_id + batch_size):
-                line = str(investor_id)+'|'+''.join(batch_names[investor_id - start_id])
-                file_lines += line + "\n"
+        # the names for this batch
+        batch_names = generate_names(batch_size, self.allowed_character_array, random_generator, self.name_fingerprint_set)
 
-            # writing the data for this batch to the destination file
-            self.save_vertices_to_file(file_lines)
+        return make_record_batch(self.get_header_fields(),\
+                                    [np.arange(start_id, start_id + batch_size), batch_names])
 
 
 # Unit tests to test if NamedVertexGenerator is initializing correctly
@@ -124,7 +175,56 @@ def test_generate_vertices():
     test_object.execute()
     print("A file named 'named_test.csv' must have been created, check for issues")
 
+# Unit test to check if the vertex data is yielded as expected by iter_batches()
+def test_iter_batches():
+    test_object = NamedVertexGenerator(thread_number=5,\
+                                lines_per_thread=8,\
+                                destination_file="named_test.csv",\
+                                current_start_ID=67,\
+                                item_cardinality=20,\
+                                vertex_type="company",\
+                                is_numeric=False)
+    batches = list(test_object.iter_batches())
+
+    assert [len(batch) for batch in batches] == [8, 8, 4],\
+        "NamedVertexGenerator_ITER_BATCHES_ERROR batch sizes are wrong"
+
+    assert batches[0].dtype.names == ("companyID", "Name"),\
+        "NamedVertexGenerator_ITER_BATCHES_ERROR field names are wrong"
+
+    all_rows = np.concatenate(batches)
+    assert all_rows["companyID"].tolist() == list(range(67, 87)),\
+        "NamedVertexGenerator_ITER_BATCHES_ERROR vertex IDs are wrong"
+
+    for name in all_rows["Name"].tolist():
+        assert (16 <= len(name) <= 25) and name.isalpha(),\
+            "NamedVertexGenerator_ITER_BATCHES_ERROR invalid name generated"
+
+# Unit test to check if the names are unique in the uniqueness mode
+def test_unique_names():
+    test_object = NamedVertexGenerator(thread_number=5,\
+                                lines_per_thread=500,\
+                                destination_file="named_test.csv",\
+                                current_start_ID=0,\
+                                item_cardinality=3000,\
+                                is_numeric=False,\
+                                unique_names=True)
+
+    # a tiny alphabet makes repeated names likely, so they have to be regenerated
+    test_object.allowed_character_list = list('ab')
+    test_object.allowed_character_array = np.array(test_object.allowed_character_list)
+
+    all_rows = np.concatenate(list(test_object.iter_batches()))
+
+    assert len(all_rows) == 3000 and len(np.unique(all_rows["Name"])) == 3000,\
+        "NamedVertexGenerator_UNIQUE_ERROR repeated names generated"
+
+    assert len(test_object.name_fingerprint_set) == 3000,\
+        "NamedVertexGenerator_UNIQUE_ERROR fingerprint set has wrong size"
+
 # Function to execute all defined unit tests for NamedVertexGenerator
 def execute_all_unit_tests():
     test_vertex_generator_init()
     test_generate_vertices()
+    test_iter_batches()
+    test_unique_names()
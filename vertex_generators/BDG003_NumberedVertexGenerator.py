@@ -21,6 +21,9 @@ import random
 # Importing VertexGenerator from BDG001_VertexGenerator.py
 from .BDG001_VertexGenerator import VertexGenerator as BaseVertexGenerator
 
+# Imports from Base Data Generator Module
+from data_sinks.BDG010_RecordBatch import get_header_line, make_record_batch
+
 
 class NumberedVertexGenerator(BaseVertexGenerator):
 
@@ -31,13 +34,21 @@ class NumberedVertexGenerator(BaseVertexGenerator):
                  item_cardinality=10,\
                  vertex_type="tradeBook",\
                  lower_limit=15000,\
-                 upper_limit=1600000):
+                 upper_limit=1600000,\
+                 output_writer=None,\
+                 ordered_output=False,\
+                 backend="threads",\
+                 scheduling="dynamic"):
 
         super().__init__(thread_number,\
                     lines_per_thread,\
                     destination_file,\
                     current_start_ID,\
-                    item_cardinality)
+                    item_cardinality,\
+                    output_writer,\
+                    ordered_output,\
+                    backend,\
+                    scheduling)
         # Vertex Type for which the numbers are to be generated
         self.vertex_type = vertex_type
 
@@ -51,38 +62,30 @@ class NumberedVertexGenerator(BaseVertexGenerator):
     def get_vertex_type(self):
         return self.vertex_type
 
+    # Overriding the get_header_fields() method
+    def get_header_fields(self):
+        return [self.get_vertex_type()+"ID", "InvestmentAmount"]
+
+    # Overriding the get_loader_header_fields() method
+    def get_loader_header_fields(self):
+        return [self.get_vertex_type()+"ID:ID", "InvestmentAmount:long"]
+
     # Overriding the reset_destination_file() method
     def reset_destination_file(self):
         with open(self.destination_file, mode='w') as out_file:
-            out_file.write(self.get_vertex_type()+"ID|InvestmentAmount\n")
+            out_file.write(get_header_line(self.get_header_fields()))
             out_file.close()
 
-    # Overriding the lines_generator() method
-    def lines_generator(self):
-
-        # Executes until batches no longer exist
-        while True:
-            start_id, batch_size = self.fetch_next_line_batch()
-
-            #if run out of batches, return
-            if ((start_id < 0) or (batch_size <= 0)):
-                return
+    # Overriding the generate_record_batch() method
+    def generate_record_batch(self, start_id, batch_size, random_generator):
 
-            # the numbers for this batch
-            batch_numbers = np.random.randint(self.lower_limit,\
-                                        self.upper_limit,\
-                                        size=(batch_size,))
+        # the numbers for this batch
+        batch_numbers = random_generator.integers(self.lower_limit,\
+                                    self.upper_limit,\
+                                    size=(batch_size,))
 
-            # string storing the lines to be written to the file for this batch
-            file_lines=""
-
-            # storing file lines in the string
-            for investor_id in range(start_id, start_id + batch_size):
-                line = str(investor_id)+'|'+str(batch_numbers[investor_id - start_id])
-                file_lines += line + "\n"
-
-            # writing the data for this batch to the destination file
-            self.save_vertices_to_file(file_lines)
+        return make_record_batch(self.get_header_fields(),\
+                                    [np.arange(start_id, start_id + batch_size), batch_numbers])
 
 
 # Unit tests to test if NumberedVertexGenerator is initializing correctly
@@ -123,7 +126,28 @@ def test_generate_vertices():
     test_object.execute()
     print("A file named 'numbered_test.csv' must have been created, check for issues")
 
+# Unit test to check if the vertex data is yielded as expected by iter_batches()
+def test_iter_batches():
+    test_object = NumberedVertexGenerator(thread_number=5,\
+                                lines_per_thread=8,\
+                                destination_file="numbered_test.csv",\
+                                current_start_ID=50,\
+                                item_cardinality=60,
+                                lower_limit=1,
+                                upper_limit=10)
+    all_rows = np.concatenate(list(test_object.iter_batches()))
+
+    assert all_rows.dtype.names == ("tradeBookID", "InvestmentAmount"),\
+        "NumberedVertexGenerator_ITER_BATCHES_ERROR field names are wrong"
+
+    assert all_rows["tradeBookID"].tolist() == list(range(50, 110)),\
+        "NumberedVertexGenerator_ITER_BATCHES_ERROR vertex IDs are wrong"
+
+    assert all_rows["InvestmentAmount"].min() >= 1 and all_rows["InvestmentAmount"].max() < 10,\
+        "NumberedVertexGenerator_ITER_BATCHES_ERROR numbers out of range"
+
 # Function to execute all defined unit tests for NumberedVertexGenerator
 def execute_all_unit_tests():
     test_vertex_generator_init()
     test_generate_vertices()
+    test_iter_batches()
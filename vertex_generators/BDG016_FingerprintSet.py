@@ -0,0 +1,199 @@
+"""
+FYP : 22013
+
+Module:
+    Base Data Generator
+
+Description:
+    This python script contains the definition of the FingerprintSet class, the
+    function computing the fingerprints of generated names and their unit tests.
+
+    The FingerprintSet class stores the 64 bit fingerprints of all the names
+    generated so far (8 bytes per name) in a few sorted NumPy runs, which
+    are merged as they grow, and is shared by all the threads of a generator.
+    A Bloom filter (one bit array, about 1 byte per name) is checked first, so
+    only its positives are searched for exactly in the sorted runs.
+
+    Equal names always have equal fingerprints, so a name whose fingerprint is
+    not in the set is guaranteed to be new. A rare fingerprint collision between
+    two different names only makes the generator regenerate a name that was
+    actually unique.
+
+"""
+
+
+# Imports from built-in modules
+import numpy as np
+import threading
+
+# Maximum length of the fingerprinted names
+MAX_FINGERPRINT_LENGTH = 64
+
+# Fixed random odd 64 bit weights of the multilinear hash, one per character position
+FINGERPRINT_WEIGHTS = (np.random.default_rng(22013).integers(0, 2 ** 62, size=(MAX_FINGERPRINT_LENGTH,)) * 2 + 1).astype(np.int64)
+
+# Sum of the weights of the first L positions, added so that names of different lengths differ
+FINGERPRINT_LENGTH_OFFSETS = np.concatenate(([0,], np.cumsum(FINGERPRINT_WEIGHTS))).astype(np.int64)
+
+def get_fingerprints(character_codes):
+    """
+    Description:
+        Returns the 64 bit fingerprint of every row of the matrix of character
+        codes (one name per row, as indices into the allowed characters). The
+        fingerprint is the multilinear hash sum((code + 1) * weight) modulo 2^64,
+        computed for all rows at once with a single integer matrix product.
+    """
+
+    character_codes = np.asarray(character_codes, dtype=np.int64)
+    name_length = character_codes.shape[1]
+
+    assert name_length <= MAX_FINGERPRINT_LENGTH,\
+        "FingerprintSet_ERROR: names are too long to be fingerprinted"
+
+    # the integer products and sums wrap around modulo 2^64
+    fingerprints = character_codes @ FINGERPRINT_WEIGHTS[:name_length] + FINGERPRINT_LENGTH_OFFSETS[name_length]
+    return fingerprints.view(np.uint64)
+
+class FingerprintSet:
+
+    def __init__(self, expected_number_of_fingerprints=1000000, bloom_filter_bits_per_fingerprint=8):
+
+        # Number of bits of the Bloom filter (a power of 2), it is indexed by the
+        # highest bloom_filter_index_bits bits of the fingerprints
+        self.bloom_filter_index_bits = max(3, int(np.ceil(np.log2(max(1, expected_number_of_fingerprints * bloom_filter_bits_per_fingerprint)))))
+        self.bloom_filter = np.zeros((2 ** (self.bloom_filter_index_bits - 3),), dtype=np.uint8)
+
+        # Sorted runs of fingerprints, the largest run first
+        self.sorted_runs = []
+
+        # Lock for restricting the check and the insertion of fingerprints to one thread at a time
+        self.fingerprint_lock = threading.Lock()
+
+        # Number of fingerprints stored in the set
+        self.number_of_fingerprints = 0
+
+    def get_bloom_filter_positions(self, fingerprints):
+        """
+        Description:
+            Returns the byte indices and the bit masks of the fingerprints in the
+            Bloom filter.
+        """
+
+        bit_indices = fingerprints >> np.uint64(64 - self.bloom_filter_index_bits)
+        return (bit_indices >> np.uint64(3)).astype(np.int64), np.left_shift(1, (bit_indices & np.uint64(7)).astype(np.uint8)).astype(np.uint8)
+
+    def contains(self, fingerprints):
+        """
+        Description:
+            Returns for every fingerprint if it is already stored in the set. Only
+            the fingerprints found in the Bloom filter are searched for in the
+            sorted runs.
+        """
+
+        fingerprints = np.asarray(fingerprints, dtype=np.uint64)
+        byte_indices, bit_masks = self.get_bloom_filter_positions(fingerprints)
+        found = (self.bloom_filter[byte_indices] & bit_masks) != 0
+
+        candidate_indices = np.flatnonzero(found)
+        candidates = fingerprints[candidate_indices]
+        found_exactly = np.zeros((len(candidates),), dtype=np.bool_)
+        for sorted_run in self.sorted_runs:
+            positions = np.minimum(np.searchsorted(sorted_run, candidates), len(sorted_run) - 1)
+            found_exactly |= (sorted_run[positions] == candidates)
+
+        found[candidate_indices] = found_exactly
+        return found
+
+    def add_new_fingerprints(self, fingerprints):
+        """
+        Description:
+            Threads call this function to add the fingerprints of their generated
+            names. Returns for every fingerprint if it was added, i.e. it was
+            neither in the set nor repeated earlier in the same call. Checking and
+            adding is done by one thread at a time.
+        """
+
+        fingerprints = np.asarray(fingerprints, dtype=np.uint64)
+        sorted_fingerprints = np.sort(fingerprints)
+
+        # only the first occurrence of a fingerprint repeated in the call can be
+        # new (repetitions are rare, so they are searched for only if they exist)
+        if np.any(sorted_fingerprints[1:] == sorted_fingerprints[:-1]):
+            is_first_occurrence = np.zeros((len(fingerprints),), dtype=np.bool_)
+            is_first_occurrence[np.unique(fingerprints, return_index=True)[1]] = True
+        else:
+            is_first_occurrence = np.ones((len(fingerprints),), dtype=np.bool_)
+
+        self.fingerprint_lock.acquire()
+
+        is_new = is_first_occurrence & ~self.contains(fingerprints)
+        self.add_sorted_run(sorted_fingerprints if is_new.all() else np.sort(fingerprints[is_new]))
+
+        self.fingerprint_lock.release()
+
+        return is_new
+
+    def add_sorted_run(self, sorted_fingerprints):
+        """
+        Description:
+            Adds a sorted run of new fingerprints. Runs are merged while the last
+            run is at least half the size of the one before it, so there are only
+            O(log n) runs to search.
+        """
+
+        if len(sorted_fingerprints) == 0:
+            return
+
+        self.sorted_runs.append(sorted_fingerprints)
+        self.number_of_fingerprints += len(sorted_fingerprints)
+
+        byte_indices, bit_masks = self.get_bloom_filter_positions(sorted_fingerprints)
+        np.bitwise_or.at(self.bloom_filter, byte_indices, bit_masks)
+
+        while (len(self.sorted_runs) > 1) and (2 * len(self.sorted_runs[-1]) >= len(self.sorted_runs[-2])):
+            last_run = self.sorted_runs.pop()
+            previous_run = self.sorted_runs.pop()
+            merged_run = np.concatenate((previous_run, last_run))
+            merged_run.sort(kind='stable')
+            self.sorted_runs.append(merged_run)
+
+    def __len__(self):
+        return self.number_of_fingerprints
+
+
+# Unit tests to test if equal names have equal fingerprints
+def test_get_fingerprints():
+    character_codes = np.array([[0, 1, 2], [2, 1, 0], [0, 1, 2]])
+    fingerprints = get_fingerprints(character_codes)
+
+    assert fingerprints.dtype == np.uint64 and fingerprints[0] == fingerprints[2] and fingerprints[0] != fingerprints[1],\
+        "FingerprintSet_FINGERPRINT_ERROR fingerprints of names are invalid"
+
+    # names only differing by trailing characters with code 0
+    assert get_fingerprints(np.array([[0, 1]]))[0] != get_fingerprints(np.array([[0, 1, 0]]))[0],\
+        "FingerprintSet_FINGERPRINT_ERROR names of different lengths have equal fingerprints"
+
+# Unit tests to test if FingerprintSet only accepts new fingerprints
+def test_fingerprint_set():
+    test_object = FingerprintSet(expected_number_of_fingerprints=1000)
+
+    assert test_object.add_new_fingerprints([5, 3, 5, 9]).tolist() == [True, True, False, True],\
+        "FingerprintSet_ADD_ERROR repeated fingerprint in a call accepted"
+
+    assert test_object.add_new_fingerprints([3, 4, 10]).tolist() == [False, True, True],\
+        "FingerprintSet_ADD_ERROR stored fingerprint accepted"
+
+    for start in range(100, 1100, 100):
+        test_object.add_new_fingerprints(np.arange(start, start + 100))
+
+    assert len(test_object) == 1005 and len(test_object.sorted_runs) <= 4,\
+        "FingerprintSet_ADD_ERROR runs are not merged"
+
+    assert test_object.contains(np.array([3, 4, 7, 150, 1099, 1100], dtype=np.uint64)).tolist() ==\
+        [True, True, False, True, True, False],\
+        "FingerprintSet_CONTAINS_ERROR membership is invalid"
+
+# Function to execute all defined unit tests for FingerprintSet
+def execute_all_unit_tests():
+    test_get_fingerprints()
+    test_fingerprint_set()
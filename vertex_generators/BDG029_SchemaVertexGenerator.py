@@ -0,0 +1,520 @@
+"""
+FYP : 22013
+
+Module:
+    Base Data Generator
+
+Description:
+    This python script contains the definition of the SchemaVertexGenerator class,
+    the functions reading the vertex property schemas and their unit tests.
+
+    The SchemaVertexGenerator class extends the VertexGenerator class to generate
+    all the properties of an entity (e.g. the investors' names, their TradeBook's
+    investment amounts and any added property such as a region or a creation
+    time) in a single pass over the vertex IDs. The properties are described by
+    a schema of typed columns:
+
+        - name: random names, with digits if is_numeric is true
+        - integer: integers in [low, high)
+        - float: real numbers in [low, high) rounded to the given decimals
+        - choice: one of the values, with the optional weights
+        - timestamp: times in [low, high) (ISO dates), as YYYY-MM-DDTHH:MM:SS
+
+    Every batch of vertices is generated once, with all its columns, and written
+    to all the output files of the schema: each file holds the IDs of its vertex
+    type and a subset of the columns, so the entity can be written either as a
+    single multi-column file or as one file per vertex type.
+
+"""
+
+
+# Imports from built-in modules
+import numpy as np
+import os
+
+# Importing VertexGenerator from BDG001_VertexGenerator.py
+from .BDG001_VertexGenerator import VertexGenerator as BaseVertexGenerator
+from .BDG002_NamedVertexGenerator import ALPHABETIC_NAME_CHARACTERS, NUMERIC_NAME_CHARACTERS, generate_names
+from .BDG016_FingerprintSet import FingerprintSet
+
+# Imports from Base Data Generator Module
+from data_sinks.BDG010_RecordBatch import COLUMN_SEPARATOR, format_record_batch, get_header_line, make_record_batch
+
+# Type suffix of the columns of every column type in the header files of bulk loaders
+LOADER_COLUMN_TYPES = {"name": "",\
+                        "integer": ":long",\
+                        "float": ":double",\
+                        "choice": "",\
+                        "timestamp": ":datetime"}
+
+# Vertex types whose files can be written from the schema of every entity
+ENTITY_VERTEX_TYPES = {"investor": ["investor", "tradeBook"],\
+                        "company": ["company"]}
+
+def get_vertex_type_first_ID(vertex_type, number_of_investors):
+    """
+    Description:
+        Returns the ID of the first vertex of the vertex type: the investors
+        are followed by their TradeBooks and then by the companies.
+    """
+
+    return {"investor": 0,\
+            "tradeBook": number_of_investors,\
+            "company": 2 * number_of_investors}[vertex_type]
+
+def get_entity_cardinality(entity, number_of_investors, number_of_companies):
+    """
+    Description:
+        Returns the number of vertices of the entity.
+    """
+
+    return number_of_companies if entity == "company" else number_of_investors
+
+def get_schema_output_files(entity, schema, number_of_investors, number_of_companies):
+    """
+    Description:
+        Returns the output files of the entity's schema with the ID range of
+        each file, as dictionaries with the file_name, the vertex_type, the
+        columns, the first_ID and the number_of_vertices. The vertex type of a
+        file is the entity, unless it is set.
+    """
+
+    assert entity in ENTITY_VERTEX_TYPES,\
+        "SchemaVertexGenerator_ERROR: unknown entity " + str(entity) + ", the entities are " + ", ".join(ENTITY_VERTEX_TYPES)
+
+    output_files = []
+    for file_schema in schema["files"]:
+        vertex_type = file_schema.get("vertex_type", entity)
+
+        assert vertex_type in ENTITY_VERTEX_TYPES[entity],\
+            "SchemaVertexGenerator_ERROR: the " + entity + " schema cannot write " + str(vertex_type) + " files"
+
+        output_files.append({"file_name": file_schema["file_name"],\
+                                "vertex_type": vertex_type,\
+                                "columns": list(file_schema["columns"]),\
+                                "first_ID": get_vertex_type_first_ID(vertex_type, number_of_investors),\
+                                "number_of_vertices": get_entity_cardinality(entity, number_of_investors, number_of_companies)})
+
+    return output_files
+
+def get_timestamp_seconds(timestamp):
+    """
+    Description:
+        Returns the number of seconds since the epoch of the ISO date (or time).
+    """
+
+    return int(np.datetime64(timestamp, 's').astype(np.int64))
+
+
+class SchemaVertexGenerator(BaseVertexGenerator):
+
+    def __init__(self, thread_number=5,\
+                 lines_per_thread=1000,\
+                 current_start_ID=0,\
+                 item_cardinality=10,\
+                 vertex_type="investor",\
+                 columns=[{"name": "Name", "type": "name", "is_numeric": True}],\
+                 output_files=[{"file_name": "vertex.csv", "vertex_type": "investor", "columns": ["Name"], "id_offset": 0}],\
+                 output_writers=None,\
+                 ordered_output=False,\
+                 unique_names=False,\
+                 backend="threads",\
+                 scheduling="dynamic"):
+
+        super().__init__(thread_number,\
+                    lines_per_thread,\
+                    output_files[0]["file_name"],\
+                    current_start_ID,\
+                    item_cardinality,\
+                    None,\
+                    ordered_output,\
+                    backend,\
+                    scheduling)
+
+        # Vertex Type (entity) for which all the properties are generated
+        self.vertex_type = vertex_type
+
+        # Typed columns generated for every vertex, in the order they are generated
+        self.columns = [dict(column) for column in columns]
+
+        # Files written from every batch, each with the IDs of its vertex type (the
+        # generated ID plus id_offset) and a subset of the columns
+        self.output_files = [dict(output_file) for output_file in output_files]
+
+        # Writers (e.g. PartitionedFileWriter), one per output file, used instead of
+        # the output files when they are not None
+        self.output_writers = output_writers
+
+        column_names = [column["name"] for column in self.columns]
+
+        assert len(set(column_names)) == len(column_names),\
+            "SchemaVertexGenerator_ERROR: the column names must be unique"
+
+        assert (output_writers is None) or (len(output_writers) == len(output_files)),\
+            "SchemaVertexGenerator_ERROR: one output writer is needed per output file"
+
+        # The output writers are only shared by threads
+        assert (backend != "processes") or (output_writers is None),\
+            "SchemaVertexGenerator_ERROR: the processes backend does not support output writers"
+
+        for output_file in self.output_files:
+            for column_name in output_file["columns"]:
+                assert column_name in column_names,\
+                    "SchemaVertexGenerator_ERROR: unknown column " + str(column_name) + " in " + output_file["file_name"]
+
+        # unique_names indicates if every generated name must be different from all
+        # the others of its column. The fingerprints of the generated names are then
+        # stored in one set per name column shared by all threads
+        self.unique_names = unique_names
+
+        # The fingerprint sets are only shared by threads
+        assert (backend != "processes") or (not unique_names),\
+            "SchemaVertexGenerator_ERROR: the processes backend does not support unique names"
+
+        for column in self.columns:
+            assert column["type"] in LOADER_COLUMN_TYPES,\
+                "SchemaVertexGenerator_ERROR: unknown type " + str(column["type"]) + " of column " + column["name"]
+
+            if column["type"] == "name":
+                # The allowed characters, indexed by the randomly generated character codes
+                column["allowed_character_array"] = np.array(list(NUMERIC_NAME_CHARACTERS if column.get("is_numeric", True)\
+                                                                    else ALPHABETIC_NAME_CHARACTERS))
+                column["name_fingerprint_set"] = FingerprintSet(expected_number_of_fingerprints=item_cardinality) if unique_names else None
+
+            elif column["type"] == "choice":
+                # The values are written as they are, so they cannot hold the column separator
+                column["value_array"] = np.array([str(value) for value in column["values"]])
+                assert not any(COLUMN_SEPARATOR in value for value in column["value_array"]),\
+                    "SchemaVertexGenerator_ERROR: the values of column " + column["name"] + " contain the column separator"
+
+                weights = np.asarray(column.get("weights", np.ones(len(column["values"]))), dtype=np.float64)
+                column["probabilities"] = weights / weights.sum()
+
+            elif column["type"] == "timestamp":
+                # The bounds as seconds since the epoch
+                column["low_seconds"] = get_timestamp_seconds(column["low"])
+                column["high_seconds"] = get_timestamp_seconds(column["high"])
+
+            if column["type"] in ["integer", "float", "timestamp"]:
+                assert column.get("low_seconds", column["low"]) < column.get("high_seconds", column["high"]),\
+                    "SchemaVertexGenerator_ERROR: the low bound of column " + column["name"] + " must be below its high bound"
+
+        # Vertex ID of the first vertex of the next batch to reserve the byte ranges for,
+        # and byte offset in every output file where its next reserved range starts
+        self.output_reservation_state = self.batch_executor.create_state(1 + len(self.output_files))
+        self.output_reservation_state[0] = current_start_ID
+
+        # File descriptors of the output files shared by all threads for positional writes
+        self.destination_file_descriptors = None
+
+    # Overriding the get_vertex_type() method
+    def get_vertex_type(self):
+        return self.vertex_type
+
+    # Overriding the get_header_fields() method
+    def get_header_fields(self):
+        return [self.get_vertex_type()+"ID"] + [column["name"] for column in self.columns]
+
+    # Overriding the get_loader_header_fields() method
+    def get_loader_header_fields(self):
+        return [self.get_vertex_type()+"ID:ID"] + [column["name"] + LOADER_COLUMN_TYPES[column["type"]] for column in self.columns]
+
+    def get_file_header_fields(self, file_index):
+        """
+        Description:
+            Returns the column names of the output file file_index.
+        """
+
+        output_file = self.output_files[file_index]
+        return [output_file["vertex_type"]+"ID"] + output_file["columns"]
+
+    def get_file_loader_header_fields(self, file_index):
+        """
+        Description:
+            Returns the typed column names of the output file file_index used in
+            the header file of bulk loaders.
+        """
+
+        column_types = {column["name"]: column["type"] for column in self.columns}
+        output_file = self.output_files[file_index]
+        return [output_file["vertex_type"]+"ID:ID"] +\
+                [column_name + LOADER_COLUMN_TYPES[column_types[column_name]] for column_name in output_file["columns"]]
+
+    def get_file_batch(self, batch, file_index):
+        """
+        Description:
+            Returns the record batch of the output file file_index from the
+            generated record batch: the IDs of its vertex type and its columns.
+        """
+
+        output_file = self.output_files[file_index]
+        return make_record_batch(self.get_file_header_fields(file_index),\
+                                    [batch[self.get_vertex_type()+"ID"] + output_file["id_offset"]] +\
+                                    [batch[column_name] for column_name in output_file["columns"]])
+
+    def generate_column(self, column, batch_size, random_generator):
+        """
+        Description:
+            Generates the values of the column for a batch of batch_size vertices,
+            drawn from the NumPy random generator.
+        """
+
+        if column["type"] == "name":
+            return generate_names(batch_size, column["allowed_character_array"], random_generator, column["name_fingerprint_set"])
+
+        if column["type"] == "integer":
+            return random_generator.integers(column["low"], column["high"], size=(batch_size,))
+
+        if column["type"] == "float":
+            return np.round(random_generator.uniform(column["low"], column["high"], size=(batch_size,)), column.get("decimals", 2))
+
+        if column["type"] == "choice":
+            return column["value_array"][random_generator.choice(len(column["value_array"]), size=(batch_size,), p=column["probabilities"])]
+
+        timestamps = random_generator.integers(column["low_seconds"], column["high_seconds"], size=(batch_size,))
+        return np.datetime_as_string(timestamps.astype('datetime64[s]')).astype('<U19')
+
+    # Overriding the generate_record_batch() method
+    def generate_record_batch(self, start_id, batch_size, random_generator):
+
+        # all the columns for this batch, generated in a single pass
+        batch_columns = [self.generate_column(column, batch_size, random_generator) for column in self.columns]
+
+        return make_record_batch(self.get_header_fields(),\
+                                    [np.arange(start_id, start_id + batch_size)] + batch_columns)
+
+    # Overriding the reset_destination_file() method
+    def reset_destination_file(self):
+        for file_index, output_file in enumerate(self.output_files):
+            with open(output_file["file_name"], mode='w') as out_file:
+                out_file.write(get_header_line(self.get_file_header_fields(file_index)))
+                out_file.close()
+
+    def save_vertices_to_files(self, file_lines):
+        """
+        Description:
+            Threads call this function to append the lines of their batch to
+            every output file (file_lines holds the lines of every file). Only
+            one thread can be writing to the files at a time, so the rows of all
+            files are in the same order.
+        """
+
+        self.file_write_lock.acquire()
+        for output_file, lines in zip(self.output_files, file_lines):
+            with open(output_file["file_name"], mode='a') as out_file:
+                out_file.write(lines)
+                out_file.close()
+        self.file_write_lock.release()
+
+    def reserve_output_ranges(self, start_id, batch_size, numbers_of_bytes):
+        """
+        Description:
+            Same as reserve_output_range(), but reserves a byte range in every
+            output file (numbers_of_bytes holds the size of every range). Returns
+            the byte offsets of the reserved ranges, or None if the execution was
+            cancelled while waiting.
+        """
+
+        self.output_offset_condition.acquire()
+        self.output_offset_condition.wait_for(lambda: (self.output_reservation_state[0] == start_id) or self.batch_scheduler.is_cancelled())
+
+        if self.output_reservation_state[0] != start_id:
+            self.output_offset_condition.release()
+            return None
+
+        reserved_offsets = []
+        for file_index, number_of_bytes in enumerate(numbers_of_bytes):
+            reserved_offsets.append(int(self.output_reservation_state[1 + file_index]))
+            self.output_reservation_state[1 + file_index] += number_of_bytes
+        self.output_reservation_state[0] += batch_size
+
+        self.output_offset_condition.notify_all()
+        self.output_offset_condition.release()
+
+        return reserved_offsets
+
+    def save_vertices_at_offsets(self, start_id, batch_size, file_lines):
+        """
+        Description:
+            Threads call this function to write the lines of their batch at the
+            byte ranges reserved for it in every output file using positional
+            writes (os.pwrite) on the shared file descriptors.
+        """
+
+        file_data = [memoryview(lines.encode()) for lines in file_lines]
+        offsets = self.reserve_output_ranges(start_id, batch_size, [len(data) for data in file_data])
+        if offsets is None:
+            return
+
+        for file_descriptor, data, offset in zip(self.destination_file_descriptors, file_data, offsets):
+            while len(data) > 0:
+                written_bytes = os.pwrite(file_descriptor, data, offset)
+                data = data[written_bytes:]
+                offset += written_bytes
+
+    def write_file_batches(self, file_batches):
+        """
+        Description:
+            Passes the record batch of every output file to its output writer.
+        """
+
+        for output_writer, file_batch in zip(self.output_writers, file_batches):
+            output_writer.write_record_batch(file_batch)
+
+    # Overriding the lines_generator() method
+    def lines_generator(self, worker_index=None):
+        for batch in self.iter_scheduled_batches(worker_index):
+            file_batches = [self.get_file_batch(batch, file_index) for file_index in range(0, len(self.output_files))]
+
+            if (self.output_writers is not None) and self.ordered_output:
+                self.write_batch_in_order(int(batch[0][0]), len(batch), lambda: self.write_file_batches(file_batches))
+            elif self.output_writers is not None:
+                self.write_file_batches(file_batches)
+            elif self.ordered_output:
+                self.save_vertices_at_offsets(int(batch[0][0]), len(batch), [format_record_batch(file_batch) for file_batch in file_batches])
+            else:
+                self.save_vertices_to_files([format_record_batch(file_batch) for file_batch in file_batches])
+
+    # Overriding the execute() method
+    def execute(self):
+        #reset the output files (or the files of the output writers), if they exist
+        if self.output_writers is not None:
+            for file_index, output_writer in enumerate(self.output_writers):
+                output_writer.reset_destination_files(self.get_file_loader_header_fields(file_index))
+        else:
+            self.reset_destination_file()
+
+        #open the file descriptors shared by the workers, the batches are written after the headers
+        use_ordered_output = self.ordered_output and (self.output_writers is None)
+        if self.ordered_output:
+            self.output_reservation_state[0] = self.first_vertex_ID
+        if use_ordered_output:
+            for file_index, output_file in enumerate(self.output_files):
+                self.output_reservation_state[1 + file_index] = os.path.getsize(output_file["file_name"])
+            self.destination_file_descriptors = [os.open(output_file["file_name"], os.O_WRONLY) for output_file in self.output_files]
+
+        #run the workers until all batches are generated (the first exception of a worker is raised again)
+        try:
+            self.batch_executor.run(self.lines_generator, self.batch_scheduler, cancel_function=self.notify_output_waiters)
+        finally:
+            if use_ordered_output:
+                for file_descriptor in self.destination_file_descriptors:
+                    os.close(file_descriptor)
+                self.destination_file_descriptors = None
+
+        print(self.get_vertex_type(),"Vertex Data Generation Complete")
+
+
+# Schema of the test investors: names and amounts in separate files, and a multi-column file
+TEST_COLUMNS = [{"name": "Name", "type": "name", "is_numeric": True},\
+                {"name": "InvestmentAmount", "type": "integer", "low": 15000, "high": 1600000},\
+                {"name": "Region", "type": "choice", "values": ["APAC", "EMEA", "AMER"], "weights": [2, 1, 1]},\
+                {"name": "Score", "type": "float", "low": 0, "high": 1, "decimals": 3},\
+                {"name": "CreatedAt", "type": "timestamp", "low": "2015-01-01", "high": "2023-01-01"}]
+
+# Reads the rows (split into columns) of the file after its header line
+def read_test_rows(file_name):
+    with open(file_name, mode='r') as in_file:
+        lines = in_file.read().splitlines()
+        in_file.close()
+    return lines[0], [line.split(COLUMN_SEPARATOR) for line in lines[1:]]
+
+# Returns the test object writing the test schema to the test files
+def create_test_object(ordered_output=False, backend="threads", unique_names=False):
+    output_files = [{"file_name": "schema_names_test.csv", "vertex_type": "investor", "columns": ["Name"], "id_offset": 0},\
+                    {"file_name": "schema_amounts_test.csv", "vertex_type": "tradeBook", "columns": ["InvestmentAmount"], "id_offset": 100},\
+                    {"file_name": "schema_all_test.csv", "vertex_type": "investor", "columns": ["Name", "Region", "Score", "CreatedAt"], "id_offset": 0}]
+
+    return SchemaVertexGenerator(thread_number=5,\
+                                    lines_per_thread=7,\
+                                    current_start_ID=0,\
+                                    item_cardinality=100,\
+                                    vertex_type="investor",\
+                                    columns=TEST_COLUMNS,\
+                                    output_files=output_files,\
+                                    ordered_output=ordered_output,\
+                                    unique_names=unique_names,\
+                                    backend=backend)
+
+# Unit test to check if the columns are generated as expected in a single pass
+def test_iter_batches():
+    test_object = create_test_object(unique_names=True)
+    all_rows = np.concatenate(list(test_object.iter_batches()))
+
+    assert all_rows.dtype.names == ("investorID", "Name", "InvestmentAmount", "Region", "Score", "CreatedAt"),\
+        "SchemaVertexGenerator_ITER_BATCHES_ERROR field names are wrong"
+
+    assert all_rows["investorID"].tolist() == list(range(0, 100)),\
+        "SchemaVertexGenerator_ITER_BATCHES_ERROR vertex IDs are wrong"
+
+    assert len(np.unique(all_rows["Name"])) == 100 and all(16 <= len(name) <= 25 for name in all_rows["Name"]),\
+        "SchemaVertexGenerator_ITER_BATCHES_ERROR invalid names generated"
+
+    assert (all_rows["InvestmentAmount"].min() >= 15000) and (all_rows["InvestmentAmount"].max() < 1600000),\
+        "SchemaVertexGenerator_ITER_BATCHES_ERROR integers out of range"
+
+    assert set(all_rows["Region"].tolist()) <= {"APAC", "EMEA", "AMER"},\
+        "SchemaVertexGenerator_ITER_BATCHES_ERROR invalid choices generated"
+
+    assert (all_rows["Score"].min() >= 0) and (all_rows["Score"].max() <= 1),\
+        "SchemaVertexGenerator_ITER_BATCHES_ERROR floats out of range"
+
+    assert all("2015-01-01T00:00:00" <= created_at < "2023-01-01T00:00:00" for created_at in all_rows["CreatedAt"]),\
+        "SchemaVertexGenerator_ITER_BATCHES_ERROR timestamps out of range"
+
+    assert test_object.get_loader_header_fields() == ["investorID:ID", "Name", "InvestmentAmount:long", "Region", "Score:double", "CreatedAt:datetime"],\
+        "SchemaVertexGenerator_ITER_BATCHES_ERROR loader header fields are wrong"
+
+# Unit test to check if every batch is written to all output files (appended, ordered or by processes)
+def test_generate_vertices():
+    for ordered_output, backend in [(False, "threads"), (True, "threads"), (True, "processes")]:
+        test_object = create_test_object(ordered_output=ordered_output, backend=backend)
+        test_object.execute()
+
+        names_header, names_rows = read_test_rows("schema_names_test.csv")
+        amounts_header, amounts_rows = read_test_rows("schema_amounts_test.csv")
+        all_header, all_rows = read_test_rows("schema_all_test.csv")
+
+        assert (names_header, amounts_header, all_header) == ("investorID|Name", "tradeBookID|InvestmentAmount",\
+                                                                "investorID|Name|Region|Score|CreatedAt"),\
+            "SchemaVertexGenerator_GENERATE_ERROR headers are wrong"
+
+        assert sorted(int(row[0]) for row in amounts_rows) == list(range(100, 200)),\
+            "SchemaVertexGenerator_GENERATE_ERROR TradeBook IDs are wrong"
+
+        # the files are written from the same batches, so their rows match
+        assert [row[:2] for row in all_rows] == names_rows,\
+            "SchemaVertexGenerator_GENERATE_ERROR files written from different batches"
+
+        assert [int(row[0]) for row in amounts_rows] == [int(row[0]) + 100 for row in names_rows],\
+            "SchemaVertexGenerator_GENERATE_ERROR files written in different orders"
+
+        if ordered_output:
+            assert [int(row[0]) for row in names_rows] == list(range(0, 100)),\
+                "SchemaVertexGenerator_GENERATE_ERROR ordered output is not sorted by vertex ID"
+
+    for file_name in ["schema_names_test.csv", "schema_amounts_test.csv", "schema_all_test.csv"]:
+        os.remove(file_name)
+
+# Unit test to check if the output files of the schemas get their ID ranges
+def test_get_schema_output_files():
+    schema = {"columns": TEST_COLUMNS,\
+                "files": [{"file_name": "a.csv", "columns": ["Name"]},\
+                          {"file_name": "b.csv", "vertex_type": "tradeBook", "columns": ["InvestmentAmount"]}]}
+
+    output_files = get_schema_output_files("investor", schema, 10, 3)
+
+    assert [(output_file["vertex_type"], output_file["first_ID"], output_file["number_of_vertices"]) for output_file in output_files] ==\
+            [("investor", 0, 10), ("tradeBook", 10, 10)],\
+        "SchemaVertexGenerator_SCHEMA_ERROR investor ID ranges are wrong"
+
+    output_files = get_schema_output_files("company", {"columns": [], "files": [{"file_name": "c.csv", "columns": []}]}, 10, 3)
+
+    assert (output_files[0]["first_ID"], output_files[0]["number_of_vertices"]) == (20, 3),\
+        "SchemaVertexGenerator_SCHEMA_ERROR company ID range is wrong"
+
+# Function to execute all defined unit tests for SchemaVertexGenerator
+def execute_all_unit_tests():
+    test_iter_batches()
+    test_generate_vertices()
+    test_get_schema_output_files()